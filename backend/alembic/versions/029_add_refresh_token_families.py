@@ -0,0 +1,36 @@
+"""add refresh token families table
+
+Revision ID: 029
+Revises: 028
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '029'
+down_revision = '028'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'refresh_token_families',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True,
+                  server_default=sa.text('gen_random_uuid()')),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('revoked_at', sa.DateTime(), nullable=True),
+        sa.Column('revoke_reason', sa.String(50), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index('ix_refresh_token_families_user_id', 'refresh_token_families', ['user_id'])
+    op.create_index('ix_refresh_token_families_revoked_at', 'refresh_token_families', ['revoked_at'])
+
+
+def downgrade():
+    op.drop_index('ix_refresh_token_families_revoked_at', table_name='refresh_token_families')
+    op.drop_index('ix_refresh_token_families_user_id', table_name='refresh_token_families')
+    op.drop_table('refresh_token_families')
@@ -0,0 +1,39 @@
+"""add email dead letters table
+
+Revision ID: 030
+Revises: 029
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '030'
+down_revision = '029'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'email_dead_letters',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True,
+                  server_default=sa.text('gen_random_uuid()')),
+        sa.Column('to_email', sa.String(255), nullable=False),
+        sa.Column('subject', sa.String(500), nullable=False),
+        sa.Column('html_content', sa.Text(), nullable=False),
+        sa.Column('text_content', sa.Text(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('queued_at', sa.DateTime(), nullable=False),
+        sa.Column('failed_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index('ix_email_dead_letters_to_email', 'email_dead_letters', ['to_email'])
+    op.create_index('ix_email_dead_letters_failed_at', 'email_dead_letters', ['failed_at'])
+
+
+def downgrade():
+    op.drop_index('ix_email_dead_letters_failed_at', table_name='email_dead_letters')
+    op.drop_index('ix_email_dead_letters_to_email', table_name='email_dead_letters')
+    op.drop_table('email_dead_letters')
@@ -0,0 +1,27 @@
+"""add audit log activity index
+
+Revision ID: 031
+Revises: 030
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+revision = '031'
+down_revision = '030'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Serves the per-user grouped count and ROW_NUMBER() ranking in the
+    # user activity report
+    op.create_index(
+        'idx_audit_logs_org_user_created',
+        'audit_logs',
+        ['organization_id', 'user_id', 'created_at']
+    )
+
+
+def downgrade():
+    op.drop_index('idx_audit_logs_org_user_created', table_name='audit_logs')
@@ -0,0 +1,76 @@
+"""add trigger-maintained financial rollup tables
+
+Revision ID: 032
+Revises: 031
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.models.financial_rollup import ROLLUP_TABLES, rollup_trigger_sql, rebuild_rollups
+
+revision = '032'
+down_revision = '031'
+branch_labels = None
+depends_on = None
+
+
+def _organization_id():
+    return sa.Column(
+        'organization_id', postgresql.UUID(as_uuid=True),
+        sa.ForeignKey('organizations.id', ondelete='CASCADE'), primary_key=True
+    )
+
+
+def upgrade():
+    op.create_table(
+        'expense_daily_rollups',
+        _organization_id(),
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('category', sa.String(50), primary_key=True),
+        sa.Column('status', sa.String(20), primary_key=True),
+        sa.Column('vehicle_id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('total_amount', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('row_count', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.create_table(
+        'payment_daily_rollups',
+        _organization_id(),
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('payment_type', sa.String(20), primary_key=True),
+        sa.Column('payment_method', sa.String(50), primary_key=True),
+        sa.Column('total_amount', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('row_count', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.create_table(
+        'invoice_daily_rollups',
+        _organization_id(),
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('due_date', sa.Date(), primary_key=True),
+        sa.Column('status', sa.String(20), primary_key=True),
+        sa.Column('total_amount', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('amount_paid', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('row_count', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+    # invoices and payments may not exist yet on databases built only from
+    # migrations; create_all installs their triggers when it creates them
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    for source_table in ROLLUP_TABLES:
+        if not inspector.has_table(source_table):
+            continue
+        for statement in rollup_trigger_sql(source_table):
+            op.execute(statement)
+        rebuild_rollups(bind, source_table)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    for source_table, rollup_table in ROLLUP_TABLES.items():
+        if inspector.has_table(source_table):
+            op.execute(f"DROP TRIGGER IF EXISTS trg_{source_table}_rollup ON {source_table}")
+        op.execute(f"DROP FUNCTION IF EXISTS rollup_{source_table}()")
+        op.drop_table(rollup_table)
@@ -0,0 +1,112 @@
+"""partition audit_logs by month and add the audit outbox
+
+Revision ID: 033
+Revises: 032
+Create Date: 2026-10-19
+"""
+
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.models.audit_log import AUDIT_DEFAULT_PARTITION_SQL, AUDIT_LOG_COLUMNS, audit_partition_statements
+
+revision = '033'
+down_revision = '032'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 2
+
+
+def upgrade():
+    op.create_table(
+        'audit_log_outbox',
+        sa.Column('seq', sa.BigInteger(), sa.Identity(), primary_key=True),
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('organization_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('action', sa.String(100), nullable=False),
+        sa.Column('entity_type', sa.String(50), nullable=True),
+        sa.Column('entity_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('details', postgresql.JSONB(), nullable=True),
+        sa.Column('ip_address', sa.String(50), nullable=True),
+        sa.Column('user_agent', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+
+    # Rebuild audit_logs as a table partitioned by month on created_at
+    op.rename_table('audit_logs', 'audit_logs_legacy')
+    op.execute("ALTER INDEX IF EXISTS audit_logs_pkey RENAME TO audit_logs_legacy_pkey")
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id UUID NOT NULL DEFAULT gen_random_uuid(),
+            user_id UUID,
+            organization_id UUID,
+            action VARCHAR(100) NOT NULL,
+            entity_type VARCHAR(50),
+            entity_id UUID,
+            details JSONB,
+            ip_address VARCHAR(50),
+            user_agent TEXT,
+            created_at TIMESTAMP NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute(AUDIT_DEFAULT_PARTITION_SQL)
+
+    bind = op.get_bind()
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM audit_logs_legacy")).scalar()
+    today = date.today()
+    last_month = date(today.year + (today.month + MONTHS_AHEAD - 1) // 12,
+                      (today.month + MONTHS_AHEAD - 1) % 12 + 1, 1)
+    for statement in audit_partition_statements(oldest.date() if oldest else today, last_month):
+        op.execute(statement)
+
+    op.execute(f"""
+        INSERT INTO audit_logs ({AUDIT_LOG_COLUMNS})
+        SELECT {AUDIT_LOG_COLUMNS} FROM audit_logs_legacy
+    """)
+    op.drop_table('audit_logs_legacy')
+
+    op.create_index('idx_audit_logs_org_user_created', 'audit_logs',
+                    ['organization_id', 'user_id', 'created_at'])
+    op.create_index('idx_audit_logs_org_action', 'audit_logs', ['organization_id', 'action'])
+    op.execute("CREATE INDEX idx_audit_logs_created_brin ON audit_logs USING brin (created_at)")
+
+
+def downgrade():
+    op.rename_table('audit_logs', 'audit_logs_partitioned')
+    op.execute("ALTER INDEX IF EXISTS audit_logs_pkey RENAME TO audit_logs_partitioned_pkey")
+    op.create_table(
+        'audit_logs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), server_default=sa.text('gen_random_uuid()'), primary_key=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('organization_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('action', sa.String(length=100), nullable=False),
+        sa.Column('entity_type', sa.String(length=50), nullable=True),
+        sa.Column('entity_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('details', postgresql.JSONB(), nullable=True),
+        sa.Column('ip_address', sa.String(length=50), nullable=True),
+        sa.Column('user_agent', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+    )
+
+    # Entries still waiting in the outbox are kept
+    op.execute(f"""
+        INSERT INTO audit_logs ({AUDIT_LOG_COLUMNS})
+        SELECT {AUDIT_LOG_COLUMNS} FROM audit_logs_partitioned
+        UNION ALL
+        SELECT {AUDIT_LOG_COLUMNS} FROM audit_log_outbox
+    """)
+    op.execute("DROP TABLE audit_logs_partitioned CASCADE")
+    op.drop_table('audit_log_outbox')
+
+    op.create_index('idx_audit_user', 'audit_logs', ['user_id'])
+    op.create_index('idx_audit_org', 'audit_logs', ['organization_id'])
+    op.create_index('idx_audit_created', 'audit_logs', ['created_at'])
+    op.create_index('idx_audit_action', 'audit_logs', ['action'])
+    op.create_index('idx_audit_logs_org_user_created', 'audit_logs',
+                    ['organization_id', 'user_id', 'created_at'])
@@ -0,0 +1,31 @@
+"""add full-text search vector to audit_logs
+
+Revision ID: 034
+Revises: 033
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+from app.models.audit_log import AUDIT_SEARCH_VECTOR_SQL
+
+revision = '034'
+down_revision = '033'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Added on the partitioned parent, so every existing and future partition
+    # gets the column and its own GIN index
+    op.execute(f"""
+        ALTER TABLE audit_logs
+        ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS ({AUDIT_SEARCH_VECTOR_SQL}) STORED
+    """)
+    op.execute("CREATE INDEX idx_audit_logs_search ON audit_logs USING gin (search_vector)")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS idx_audit_logs_search")
+    op.drop_column('audit_logs', 'search_vector')
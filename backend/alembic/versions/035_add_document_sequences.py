@@ -0,0 +1,75 @@
+"""add document number counters
+
+Revision ID: 035
+Revises: 034
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '035'
+down_revision = '034'
+branch_labels = None
+depends_on = None
+
+# table -> (number column, prefix) of per-organization monthly numbers
+MONTHLY_NUMBERS = {
+    'expenses': ('expense_number', 'EXP'),
+    'invoices': ('invoice_number', 'INV'),
+    'payments': ('payment_number', 'PAY'),
+}
+
+
+def upgrade():
+    op.create_table(
+        'document_sequences',
+        sa.Column('organization_id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('prefix', sa.String(10), primary_key=True),
+        sa.Column('period', sa.String(6), primary_key=True),
+        sa.Column('last_value', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+
+    # invoices and payments may not exist yet on databases built only from migrations
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table, (column, prefix) in MONTHLY_NUMBERS.items():
+        if not inspector.has_table(table):
+            continue
+
+        # Start each counter after the highest number already used that month
+        op.execute(f"""
+            INSERT INTO document_sequences (organization_id, prefix, period, last_value)
+            SELECT organization_id, '{prefix}', substring({column} from 5 for 6),
+                   max(substring({column} from 12)::bigint)
+              FROM {table}
+             WHERE {column} ~ '^{prefix}-[0-9]{{6}}-[0-9]+$'
+             GROUP BY organization_id, substring({column} from 5 for 6)
+        """)
+
+        # Numbers restart per organization, so only (organization_id, number) stays unique
+        for constraint in inspector.get_unique_constraints(table):
+            if constraint['column_names'] == [column]:
+                op.drop_constraint(constraint['name'], table, type_='unique')
+        for index in inspector.get_indexes(table):
+            if index['unique'] and index['column_names'] == [column] and 'duplicates_constraint' not in index:
+                op.drop_index(index['name'], table_name=table)
+                op.create_index(index['name'], table, [column])
+
+    if inspector.has_table('trips'):
+        op.execute("""
+            INSERT INTO document_sequences (organization_id, prefix, period, last_value)
+            SELECT '00000000-0000-0000-0000-000000000000', 'RR', '', max(substring(trip_number from 4)::bigint)
+              FROM trips
+             WHERE trip_number ~ '^RR-[0-9]+$'
+            HAVING count(*) > 0
+        """)
+
+
+def downgrade():
+    # Per-organization numbers may repeat across organizations by now, so the
+    # global unique constraints are not restored
+    op.drop_table('document_sequences')
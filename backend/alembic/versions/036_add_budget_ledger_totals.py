@@ -0,0 +1,53 @@
+"""add budget expense counts and rebuild budget spend totals
+
+Revision ID: 036
+Revises: 035
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '036'
+down_revision = '035'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # budgets may not exist yet on databases built only from migrations
+    if not sa.inspect(op.get_bind()).has_table('budgets'):
+        return
+
+    op.add_column('budgets', sa.Column('expense_count', sa.Integer(), nullable=False, server_default='0'))
+
+    # Spend can exceed the allocation; remaining then goes negative
+    op.execute("ALTER TABLE budgets DROP CONSTRAINT IF EXISTS check_budget_remaining_positive")
+
+    # Every overlapping budget now counts its approved and paid expenses
+    op.execute("""
+        UPDATE budgets b
+           SET spent_amount = s.spent,
+               expense_count = s.expense_count,
+               remaining_amount = b.allocated_amount - s.spent
+          FROM (
+              SELECT bu.id,
+                     COALESCE(SUM(e.total_amount), 0) AS spent,
+                     COUNT(e.id) AS expense_count
+                FROM budgets bu
+                LEFT JOIN expenses e
+                  ON e.organization_id = bu.organization_id
+                 AND e.category = bu.category
+                 AND e.expense_date BETWEEN bu.start_date AND bu.end_date
+                 AND e.status IN ('approved', 'paid')
+               GROUP BY bu.id
+          ) s
+         WHERE s.id = b.id
+    """)
+
+
+def downgrade():
+    if not sa.inspect(op.get_bind()).has_table('budgets'):
+        return
+
+    op.drop_column('budgets', 'expense_count')
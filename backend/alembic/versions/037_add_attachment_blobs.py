@@ -0,0 +1,48 @@
+"""add content-addressed attachment blobs
+
+Revision ID: 037
+Revises: 036
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '037'
+down_revision = '036'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'attachment_blobs',
+        sa.Column('sha256', sa.String(64), primary_key=True),
+        sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+        sa.Column('content_type', sa.String(100), nullable=True),
+        sa.Column('ref_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('thumbnail_status', sa.String(20), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.CheckConstraint(
+            "thumbnail_status IS NULL OR thumbnail_status IN ('pending', 'ready', 'failed')",
+            name='check_attachment_blob_thumbnail_status'
+        ),
+    )
+
+    # expense_attachments may not exist yet on databases built only from migrations
+    if not sa.inspect(op.get_bind()).has_table('expense_attachments'):
+        return
+
+    op.add_column(
+        'expense_attachments',
+        sa.Column('content_hash', sa.String(64), sa.ForeignKey('attachment_blobs.sha256'), nullable=True)
+    )
+    op.create_index('ix_expense_attachments_content_hash', 'expense_attachments', ['content_hash'])
+
+
+def downgrade():
+    if sa.inspect(op.get_bind()).has_table('expense_attachments'):
+        op.drop_index('ix_expense_attachments_content_hash', table_name='expense_attachments')
+        op.drop_column('expense_attachments', 'content_hash')
+
+    op.drop_table('attachment_blobs')
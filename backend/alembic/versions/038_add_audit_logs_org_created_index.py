@@ -0,0 +1,24 @@
+"""add audit_logs (organization_id, created_at) index
+
+Report cache fingerprints read the latest audit entry of an organization.
+
+Revision ID: 038
+Revises: 037
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+revision = '038'
+down_revision = '037'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Created on the partitioned parent, so every partition gets it
+    op.create_index('idx_audit_logs_org_created', 'audit_logs', ['organization_id', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('idx_audit_logs_org_created', table_name='audit_logs')
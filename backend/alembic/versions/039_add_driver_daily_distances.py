@@ -0,0 +1,50 @@
+"""add trigger-marked driver_daily_distances for incremental KPI distance
+
+Revision ID: 039
+Revises: 038
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.models.tracking import DISTANCE_BACKFILL_SQL, DISTANCE_TRIGGER_SQL
+
+revision = '039'
+down_revision = '038'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'driver_daily_distances',
+        sa.Column('driver_id', postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey('drivers.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('organization_id', postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey('organizations.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('distance_km', sa.Numeric(12, 3), nullable=False, server_default='0'),
+        sa.Column('point_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('stale', sa.Boolean(), nullable=False, server_default=sa.true()),
+    )
+    op.create_index('idx_driver_daily_distances_org_day', 'driver_daily_distances', ['organization_id', 'day'])
+    op.create_index(
+        'idx_driver_daily_distances_stale', 'driver_daily_distances', ['day'],
+        postgresql_where=sa.text('stale')
+    )
+
+    if sa.inspect(op.get_bind()).has_table('driver_locations'):
+        for statement in DISTANCE_TRIGGER_SQL:
+            op.execute(statement)
+        # Computed by the KPI refresher in batches, not here
+        op.execute(DISTANCE_BACKFILL_SQL)
+
+
+def downgrade():
+    if sa.inspect(op.get_bind()).has_table('driver_locations'):
+        op.execute("DROP TRIGGER IF EXISTS trg_driver_locations_distance ON driver_locations")
+    op.execute("DROP FUNCTION IF EXISTS mark_driver_distance_stale()")
+    op.execute("DROP FUNCTION IF EXISTS mark_driver_day_stale(uuid, uuid, timestamptz)")
+    op.drop_table('driver_daily_distances')
@@ -0,0 +1,43 @@
+"""move trip numbers from the global RR counter row to a sequence
+
+Revision ID: 040
+Revises: 039
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '040'
+down_revision = '039'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE SEQUENCE IF NOT EXISTS trip_number_seq")
+
+    # Continue after the highest number handed out by the counter or used by a trip
+    highest = ["SELECT last_value FROM document_sequences "
+               "WHERE organization_id = '00000000-0000-0000-0000-000000000000' AND prefix = 'RR' AND period = ''"]
+    if sa.inspect(op.get_bind()).has_table('trips'):
+        highest.append("SELECT max(substring(trip_number from 4)::bigint) FROM trips WHERE trip_number ~ '^RR-[0-9]+$'")
+    op.execute(f"""
+        SELECT setval('trip_number_seq', highest)
+          FROM (SELECT max(value) AS highest FROM ({' UNION ALL '.join(highest)}) AS used(value)) AS s
+         WHERE highest > 0
+    """)
+    op.execute(
+        "DELETE FROM document_sequences "
+        "WHERE organization_id = '00000000-0000-0000-0000-000000000000' AND prefix = 'RR' AND period = ''"
+    )
+
+
+def downgrade():
+    op.execute("""
+        INSERT INTO document_sequences (organization_id, prefix, period, last_value)
+        SELECT '00000000-0000-0000-0000-000000000000', 'RR', '', last_value
+          FROM trip_number_seq
+         WHERE is_called
+    """)
+    op.execute("DROP SEQUENCE IF EXISTS trip_number_seq")
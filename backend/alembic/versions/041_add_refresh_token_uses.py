@@ -0,0 +1,29 @@
+"""add refresh token uses table for the database token store
+
+Revision ID: 041
+Revises: 040
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '041'
+down_revision = '040'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'refresh_token_uses',
+        sa.Column('token_id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_refresh_token_uses_expires_at', 'refresh_token_uses', ['expires_at'])
+
+
+def downgrade():
+    op.drop_index('ix_refresh_token_uses_expires_at', table_name='refresh_token_uses')
+    op.drop_table('refresh_token_uses')
@@ -13,7 +13,8 @@ from app.schemas.auth import (
     EmailVerificationRequest, EmailVerificationCodeRequest, EmailVerificationResponse,
     ForgotPasswordRequest, PasswordResetResponse,
     UsernameRecoveryRequest, UsernameRecoveryResponse,
-    ResendVerificationRequest
+    ResendVerificationRequest,
+    RefreshTokenRequest, RefreshTokenResponse
 )
 from app.schemas.security_question import SecurityQuestionsListResponse, SecurityQuestionResponse
 from app.services.auth_service import AuthService
@@ -322,17 +323,35 @@ def get_current_user():
     )
 
 
+@router.post("/refresh", response_model=RefreshTokenResponse)
+def refresh(
+    refresh_data: RefreshTokenRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Exchange a refresh token for a new access token.
+
+    **Rotation:**
+    - Every refresh token can be used once; a new one is returned each time
+    - Re-using an old refresh token revokes the whole session
+    - Revocation is checked against the token store, not the database
+    """
+    auth_service = AuthService(db)
+    result = auth_service.refresh_session(refresh_data.refresh_token)
+    return RefreshTokenResponse(**result)
+
+
 @router.post("/logout")
-def logout():
+def logout(
+    logout_data: RefreshTokenRequest,
+    db: Session = Depends(get_db)
+):
     """
     User logout.
 
     **Process:**
-    - Invalidate JWT token (client-side)
-    - Log audit event
+    - Revoke the session's refresh token family
+    - Access tokens expire on their own (30 minutes)
     """
-    # TODO: Implement logout logic
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Logout not yet implemented"
-    )
+    auth_service = AuthService(db)
+    return auth_service.logout(logout_data.refresh_token)
@@ -13,6 +13,7 @@ from app.database import get_db
 from app.dependencies import get_current_user, get_current_organization
 from app.models.user import User
 from app.services.budget_service import BudgetService
+from app.services.budget_forecast_service import BudgetForecastService
 from app.schemas.budget import (
     BudgetCreateRequest,
     BudgetUpdateRequest,
@@ -20,7 +21,8 @@ from app.schemas.budget import (
     BudgetListResponse,
     BudgetUtilizationResponse,
     BudgetComparisonResponse,
-    BudgetSummaryResponse
+    BudgetSummaryResponse,
+    BudgetForecastResponse
 )
 from app.core.permissions import require_capability, AccessLevel
 
@@ -173,6 +175,35 @@ def get_active_budgets(
     return budgets
 
 
+@router.get(
+    "/forecast",
+    response_model=BudgetForecastResponse,
+    summary="Forecast budget spend",
+    description="Project end-of-period spend, overrun probability and exhaustion date for all budgets. Requires budget.view capability."
+)
+def forecast_budgets(
+    method: str = Query("linear", pattern="^(linear|moving_average|seasonal)$", description="linear, moving_average or seasonal"),
+    window: int = Query(14, ge=1, le=90, description="Days averaged by moving_average"),
+    active_only: bool = Query(True, description="Forecast only active budgets"),
+    current_user: User = Depends(get_current_user),
+    org_id: str = Depends(get_current_organization),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_capability("budget.view", AccessLevel.VIEW))
+):
+    """
+    Forecast spend for every budget of the organization in one call.
+
+    Required capability: budget.view (VIEW or higher access)
+    """
+    service = BudgetForecastService(db)
+    return service.forecast_budgets(
+        org_id=org_id,
+        method=method,
+        window=window,
+        active_only=active_only
+    )
+
+
 @router.get(
     "/compare",
     response_model=BudgetComparisonResponse,
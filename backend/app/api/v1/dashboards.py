@@ -0,0 +1,66 @@
+"""
+Dashboard API Endpoints
+List dashboards and resolve all widget data of a dashboard in one request.
+"""
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.dependencies import get_current_user, get_current_organization
+from app.models.user import User
+from app.services.dashboard_service import DashboardService
+from app.schemas.dashboard import DashboardListResponse, DashboardDataResponse
+from app.core.permissions import require_capability, AccessLevel
+
+
+router = APIRouter()
+
+
+@router.get(
+    "",
+    response_model=DashboardListResponse,
+    summary="Get dashboards",
+    description="Get the user's own, shared and default dashboards. Requires analytics.dashboard.view capability."
+)
+def get_dashboards(
+    current_user: User = Depends(get_current_user),
+    org_id: str = Depends(get_current_organization),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_capability("analytics.dashboard.view", AccessLevel.VIEW))
+):
+    """
+    Get dashboards visible to the user.
+
+    Required capability: analytics.dashboard.view (VIEW or higher access)
+    """
+    dashboards = DashboardService(db).get_dashboards(org_id, str(current_user.id))
+    return DashboardListResponse(dashboards=dashboards, total=len(dashboards))
+
+
+@router.get(
+    "/{dashboard_id}/data",
+    response_model=DashboardDataResponse,
+    summary="Get dashboard data",
+    description="Resolve every widget of a dashboard. Results are cached per widget for its "
+                "refresh interval and shared by all viewers. Requires analytics.dashboard.view capability."
+)
+def get_dashboard_data(
+    dashboard_id: str,
+    refresh: bool = Query(False, description="Recompute all widgets instead of using cached data"),
+    current_user: User = Depends(get_current_user),
+    org_id: str = Depends(get_current_organization),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_capability("analytics.dashboard.view", AccessLevel.VIEW))
+):
+    """
+    Get all widget data of a dashboard.
+
+    Required capability: analytics.dashboard.view (VIEW or higher access)
+    """
+    return DashboardService(db).get_dashboard_data(
+        org_id=org_id,
+        user_id=str(current_user.id),
+        dashboard_id=dashboard_id,
+        refresh=refresh
+    )
@@ -18,6 +18,7 @@ from app.schemas.driver import (
     DriverListResponse
 )
 from app.services.driver_service import DriverService
+from app.services.email_service import EmailService
 
 
 router = APIRouter()
@@ -184,6 +185,32 @@ def get_drivers(
     )
 
 
+@router.post("/license-expiry-reminders", response_model=dict)
+def send_license_expiry_reminders(
+    days_ahead: int = Query(30, ge=1, le=365, description="Reminder horizon in days"),
+    org_id: str = Depends(get_current_organization),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Email a renewal reminder to every active driver whose license expires soon.
+
+    **Requires:**
+    - Authentication (Bearer token)
+    - Active organization membership
+
+    **Returns:**
+    - Number of reminders queued for delivery
+    """
+    queued = EmailService.send_license_expiry_reminders(db, org_id, days_ahead)
+
+    return {
+        "success": True,
+        "days_ahead": days_ahead,
+        "reminders_queued": queued
+    }
+
+
 @router.get("/{driver_id}")
 def get_driver_details(
     driver_id: str,
@@ -13,13 +13,19 @@ from app.database import get_db
 from app.dependencies import get_current_user, get_current_organization
 from app.models.user import User
 from app.services.expense_service import ExpenseService
+from app.services.expense_import_service import ExpenseImportService
+from app.services.kpi_service import record_kpi_change
+from app.services.attachment_service import AttachmentService, file_response
 from app.schemas.expense import (
     ExpenseCreateRequest,
     ExpenseUpdateRequest,
     ExpenseApproveRequest,
     ExpenseResponse,
     ExpenseListResponse,
-    ExpenseSummaryResponse
+    ExpenseSummaryResponse,
+    ExpenseImportResponse,
+    ExpenseAttachmentResponse,
+    ExpenseAttachmentListResponse
 )
 from app.core.permissions import require_capability, AccessLevel
 
@@ -55,6 +61,40 @@ def create_expense(
     return expense
 
 
+@router.post(
+    "/import",
+    response_model=ExpenseImportResponse,
+    summary="Import expenses from a file",
+    description="Bulk import expenses as drafts from a CSV or XLSX file. Requires expense.create capability."
+)
+def import_expenses(
+    file: UploadFile = File(...),
+    dry_run: bool = Query(False, description="Validate the file without importing"),
+    current_user: User = Depends(get_current_user),
+    org_id: str = Depends(get_current_organization),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_capability("expense.create", AccessLevel.FULL))
+):
+    """
+    Import expenses in bulk (e.g. fuel card or toll statements).
+
+    Columns: category, description, amount, expense_date, and optionally
+    tax_amount, notes, vehicle_id/vehicle_number, driver_id/employee_id,
+    vendor_id/vendor_name. Valid rows are imported, invalid rows are
+    reported with their line number.
+
+    Required capability: expense.create (FULL access)
+    """
+    service = ExpenseImportService(db)
+    return service.import_expenses(
+        user_id=str(current_user.id),
+        org_id=org_id,
+        file=file.file,
+        filename=file.filename,
+        dry_run=dry_run
+    )
+
+
 @router.get(
     "",
     response_model=ExpenseListResponse,
@@ -189,8 +229,17 @@ def delete_expense(
             detail="Expense not found"
         )
 
+    content_hashes = [a.content_hash for a in expense.attachments if a.content_hash]
     db.delete(expense)
+
+    # Attachments are deleted with the expense; drop their stored files' references
+    attachment_service = AttachmentService(db)
+    for content_hash in content_hashes:
+        attachment_service.release(content_hash)
+
     db.commit()
+    record_kpi_change(org_id, "expenses")
+    record_kpi_change(org_id, "budgets")
 
 
 @router.post(
@@ -278,6 +327,7 @@ def mark_expense_paid(
 
 @router.post(
     "/{expense_id}/attachments",
+    response_model=ExpenseAttachmentResponse,
     status_code=status.HTTP_201_CREATED,
     summary="Upload expense attachment",
     description="Upload attachment for expense. Requires expense.edit capability."
@@ -293,18 +343,25 @@ def upload_attachment(
     """
     Upload attachment for expense.
 
+    The file is copied to storage in chunks; identical files are stored once.
+
     Required capability: expense.edit (FULL access)
     """
-    # TODO: Implement file upload logic with storage service
-    # For now, return placeholder
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="File upload functionality not yet implemented"
+    service = ExpenseService(db)
+    attachment = service.upload_expense_attachment(
+        user_id=str(current_user.id),
+        expense_id=expense_id,
+        org_id=org_id,
+        file_name=file.filename,
+        file=file.file,
+        file_type=file.content_type
     )
+    return attachment
 
 
 @router.get(
     "/{expense_id}/attachments",
+    response_model=ExpenseAttachmentListResponse,
     summary="List expense attachments",
     description="List all attachments for expense. Requires expense.view capability."
 )
@@ -332,6 +389,66 @@ def list_attachments(
     return {"attachments": expense.attachments}
 
 
+@router.get(
+    "/{expense_id}/attachments/{attachment_id}/file",
+    summary="Download expense attachment",
+    description="Download attachment file (supports Range requests). Requires expense.view capability."
+)
+def download_attachment(
+    expense_id: str,
+    attachment_id: str,
+    current_user: User = Depends(get_current_user),
+    org_id: str = Depends(get_current_organization),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_capability("expense.view", AccessLevel.VIEW))
+):
+    """
+    Download attachment file.
+
+    Required capability: expense.view (VIEW or higher access)
+    """
+    service = ExpenseService(db)
+    attachment = service.get_expense_attachment(expense_id, attachment_id, org_id)
+
+    if not attachment.content_hash:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Attachment file not found"
+        )
+
+    return file_response(attachment.content_hash, attachment.file_name, attachment.file_type)
+
+
+@router.get(
+    "/{expense_id}/attachments/{attachment_id}/thumbnail",
+    summary="Get expense attachment thumbnail",
+    description="Get JPEG thumbnail of an image attachment. Requires expense.view capability."
+)
+def get_attachment_thumbnail(
+    expense_id: str,
+    attachment_id: str,
+    current_user: User = Depends(get_current_user),
+    org_id: str = Depends(get_current_organization),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_capability("expense.view", AccessLevel.VIEW))
+):
+    """
+    Get attachment thumbnail. Returns 409 while it is still being generated.
+
+    Required capability: expense.view (VIEW or higher access)
+    """
+    service = ExpenseService(db)
+    attachment = service.get_expense_attachment(expense_id, attachment_id, org_id)
+
+    if not attachment.content_hash:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Attachment has no thumbnail"
+        )
+
+    return AttachmentService(db).thumbnail_response(attachment.content_hash)
+
+
 @router.delete(
     "/{expense_id}/attachments/{attachment_id}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -351,10 +468,12 @@ def delete_attachment(
 
     Required capability: expense.edit (FULL access)
     """
-    # TODO: Implement attachment deletion with storage service
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="File deletion functionality not yet implemented"
+    service = ExpenseService(db)
+    service.delete_expense_attachment(
+        user_id=str(current_user.id),
+        expense_id=expense_id,
+        attachment_id=attachment_id,
+        org_id=org_id
     )
 
 
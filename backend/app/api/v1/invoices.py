@@ -4,19 +4,23 @@ Handles all invoice-related operations including CRUD, line items, and actions.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from datetime import date
+import os
 import uuid
 
 from app.database import get_db
 from app.dependencies import get_current_user, get_current_organization
 from app.models.user import User
 from app.services.invoice_service import InvoiceService
+from app.services.invoice_pdf_service import InvoicePdfService, iter_pdf_chunks, stream_invoice_archive
 from app.schemas.invoice import (
     InvoiceCreateRequest,
     InvoiceUpdateRequest,
     InvoiceLineItemRequest,
+    InvoiceLineItemBulkRequest,
     InvoiceSendRequest,
     InvoiceRecordPaymentRequest,
     InvoiceResponse,
@@ -57,18 +61,6 @@ def create_invoice(
         invoice_data=invoice_data
     )
 
-    # Add line items
-    for item_data in invoice_data.line_items:
-        service.add_line_item(
-            user_id=str(current_user.id),
-            invoice_id=str(invoice.id),
-            org_id=org_id,
-            line_item_data=item_data
-        )
-
-    # Refresh to get line items
-    db.refresh(invoice)
-
     return invoice
 
 
@@ -168,6 +160,41 @@ def get_invoice_summary(
     return summary
 
 
+@router.get(
+    "/pdf-archive",
+    summary="Download a period's invoices as PDFs",
+    description="Stream a ZIP of the PDFs of all invoices dated in a period. Requires invoice.view capability."
+)
+def download_invoice_archive(
+    from_date: date = Query(..., description="First invoice date"),
+    to_date: date = Query(..., description="Last invoice date"),
+    status_filter: Optional[str] = Query(None, alias="status", description="Only invoices with this status"),
+    current_user: User = Depends(get_current_user),
+    org_id: str = Depends(get_current_organization),
+    _: None = Depends(require_capability("invoice.view", AccessLevel.VIEW))
+):
+    """
+    Download every invoice of a period as one ZIP of PDFs.
+
+    Only invoices that changed since their last rendering are rendered; the
+    archive is streamed while the rest are rendered.
+
+    Required capability: invoice.view (VIEW or higher access)
+    """
+    if to_date < from_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="to_date must be on or after from_date"
+        )
+
+    file_name = f"invoices_{from_date.isoformat()}_{to_date.isoformat()}.zip"
+    return StreamingResponse(
+        stream_invoice_archive(org_id, from_date, to_date, status_filter),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{file_name}"'}
+    )
+
+
 @router.get(
     "/{invoice_id}",
     response_model=InvoiceResponse,
@@ -198,6 +225,34 @@ def get_invoice(
     return invoice
 
 
+@router.get(
+    "/{invoice_id}/pdf",
+    summary="Download invoice PDF",
+    description="Download the invoice as a branded PDF. Requires invoice.view capability."
+)
+def download_invoice_pdf(
+    invoice_id: str,
+    current_user: User = Depends(get_current_user),
+    org_id: str = Depends(get_current_organization),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_capability("invoice.view", AccessLevel.VIEW))
+):
+    """
+    Download invoice PDF (rendered again only when the invoice has changed).
+
+    Required capability: invoice.view (VIEW or higher access)
+    """
+    pdf, file_name = InvoicePdfService(db).get_invoice_pdf(org_id, invoice_id)
+    return StreamingResponse(
+        iter_pdf_chunks(pdf),
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f'attachment; filename="{file_name}"',
+            "Content-Length": str(os.fstat(pdf.fileno()).st_size),
+        }
+    )
+
+
 @router.put(
     "/{invoice_id}",
     response_model=InvoiceResponse,
@@ -253,6 +308,35 @@ def delete_invoice(
     )
 
 
+@router.patch(
+    "/{invoice_id}/line-items",
+    response_model=InvoiceResponse,
+    summary="Bulk edit line items",
+    description="Add, update and delete line items of a draft invoice in one transaction. Requires invoice.edit capability."
+)
+def bulk_update_line_items(
+    invoice_id: str,
+    changes: InvoiceLineItemBulkRequest,
+    current_user: User = Depends(get_current_user),
+    org_id: str = Depends(get_current_organization),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_capability("invoice.edit", AccessLevel.FULL))
+):
+    """
+    Apply line item additions, updates and deletions together and return the updated invoice.
+
+    Required capability: invoice.edit (FULL access)
+    """
+    service = InvoiceService(db)
+    invoice = service.bulk_update_line_items(
+        user_id=str(current_user.id),
+        invoice_id=invoice_id,
+        org_id=org_id,
+        changes=changes
+    )
+    return invoice
+
+
 @router.post(
     "/{invoice_id}/line-items",
     status_code=status.HTTP_201_CREATED,
@@ -0,0 +1,113 @@
+"""
+KPI API Endpoints
+Read precomputed KPI values and history; define and refresh KPIs.
+"""
+
+from fastapi import APIRouter, Depends, status, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.database import get_db
+from app.dependencies import get_current_user, get_current_organization
+from app.models.user import User
+from app.services.kpi_service import KPIService
+from app.schemas.kpi import (
+    KPICreateRequest,
+    KPIResponse,
+    KPIListResponse,
+    KPIHistoryResponse,
+    KPIRefreshResponse
+)
+from app.core.permissions import require_capability, AccessLevel
+
+
+router = APIRouter()
+
+
+@router.get(
+    "",
+    response_model=KPIListResponse,
+    summary="Get KPIs",
+    description="Get active KPIs with their precomputed values. Requires analytics.kpi.view capability."
+)
+def get_kpis(
+    category: Optional[str] = Query(None, description="Filter by category"),
+    current_user: User = Depends(get_current_user),
+    org_id: str = Depends(get_current_organization),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_capability("analytics.kpi.view", AccessLevel.VIEW))
+):
+    """
+    Get KPIs. Values are read as last calculated; nothing is aggregated here.
+
+    Required capability: analytics.kpi.view (VIEW or higher access)
+    """
+    kpis = KPIService(db).get_kpis(org_id, category)
+    return KPIListResponse(kpis=kpis, total=len(kpis))
+
+
+@router.post(
+    "",
+    response_model=KPIResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Create a KPI",
+    description="Define a KPI and calculate its first value. Requires analytics.kpi.view FULL access."
+)
+def create_kpi(
+    kpi_data: KPICreateRequest,
+    current_user: User = Depends(get_current_user),
+    org_id: str = Depends(get_current_organization),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_capability("analytics.kpi.view", AccessLevel.FULL))
+):
+    """
+    Create a KPI.
+
+    Required capability: analytics.kpi.view (FULL access)
+    """
+    return KPIService(db).create_kpi(str(current_user.id), org_id, kpi_data.model_dump())
+
+
+@router.post(
+    "/refresh",
+    response_model=KPIRefreshResponse,
+    summary="Recalculate KPIs",
+    description="Recalculate every KPI of the organization now. Requires analytics.kpi.view FULL access."
+)
+def refresh_kpis(
+    current_user: User = Depends(get_current_user),
+    org_id: str = Depends(get_current_organization),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_capability("analytics.kpi.view", AccessLevel.FULL))
+):
+    """
+    Recalculate the organization's KPIs.
+
+    Required capability: analytics.kpi.view (FULL access)
+    """
+    return KPIRefreshResponse(refreshed=KPIService(db).refresh({org_id}))
+
+
+@router.get(
+    "/{kpi_id}/history",
+    response_model=KPIHistoryResponse,
+    summary="Get KPI history",
+    description="Get KPI snapshots for trend charts. Requires analytics.kpi.view capability."
+)
+def get_kpi_history(
+    kpi_id: str,
+    days: int = Query(30, ge=1, le=366, description="Number of days of history"),
+    current_user: User = Depends(get_current_user),
+    org_id: str = Depends(get_current_organization),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_capability("analytics.kpi.view", AccessLevel.VIEW))
+):
+    """
+    Get KPI history.
+
+    Required capability: analytics.kpi.view (VIEW or higher access)
+    """
+    service = KPIService(db)
+    kpi = service.get_kpi(org_id, kpi_id)
+    history = service.get_history(org_id, kpi_id, days)
+    return KPIHistoryResponse(kpi_id=kpi.id, kpi_code=kpi.kpi_code, history=history)
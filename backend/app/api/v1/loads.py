@@ -3,8 +3,6 @@ Load Requirements API
 Endpoints for load_owner companies to submit and manage load requirements.
 """
 
-import random
-import string
 import uuid
 from datetime import date
 from typing import Optional, List
@@ -20,6 +18,8 @@ from app.models.user_organization import UserOrganization
 from app.models.company import Organization
 from app.models.load_requirement import LoadRequirement
 from app.models.trip import Trip
+from app.services.kpi_service import record_kpi_change
+from app.services.numbering_service import NumberingService
 
 router = APIRouter()
 
@@ -93,12 +93,8 @@ def _get_fleet_management_company(current_user: User, db: Session) -> Organizati
 
 
 def _generate_trip_number(db: Session) -> str:
-    for _ in range(10):
-        suffix = ''.join(random.choices(string.digits, k=5))
-        trip_number = f"RR-{suffix}"
-        if not db.query(Trip).filter(Trip.trip_number == trip_number).first():
-            return trip_number
-    raise HTTPException(status_code=500, detail="Could not generate unique trip number")
+    """Generate a unique RR-XXXXX trip number."""
+    return NumberingService(db).trip_number()
 
 
 def _get_load_owner_company(current_user: User, db: Session) -> Organization:
@@ -412,6 +408,7 @@ def fulfill_load_requirement(
     load.fulfilling_org_id = fleet_company.id
 
     db.commit()
+    record_kpi_change(trip.organization_id, "trips")
     db.refresh(trip)
     db.refresh(load)
 
@@ -3,9 +3,9 @@ Payment Management API Endpoints
 Handles all payment-related operations including CRUD and reports.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import List, Optional
 from datetime import date
 import uuid
 
@@ -13,6 +13,8 @@ from app.database import get_db
 from app.dependencies import get_current_user, get_current_organization
 from app.models.user import User
 from app.services.payment_service import PaymentService
+from app.services.cash_flow_service import CashFlowService
+from app.services.reconciliation_service import ReconciliationService, DATE_WINDOW_DAYS
 from app.schemas.payment import (
     PaymentCreateRequest,
     PaymentUpdateRequest,
@@ -20,7 +22,11 @@ from app.schemas.payment import (
     PaymentListResponse,
     PaymentMethodSummaryResponse,
     PaymentPeriodSummaryResponse,
-    PaymentSummaryResponse
+    PaymentSummaryResponse,
+    CashFlowResponse,
+    ReconciliationResponse,
+    ReconciliationApplyRequest,
+    ReconciliationApplyResponse
 )
 from app.core.permissions import require_capability, AccessLevel
 
@@ -56,6 +62,65 @@ def create_payment(
     return payment
 
 
+@router.post(
+    "/reconcile",
+    response_model=ReconciliationResponse,
+    summary="Match a bank statement",
+    description="Propose invoices and expenses for the lines of a CSV or XLSX bank statement. Requires payment.record capability."
+)
+def reconcile_statement(
+    file: UploadFile = File(...),
+    date_window_days: int = Query(DATE_WINDOW_DAYS, ge=0, le=365, description="Days after the due/expense date a payment may arrive"),
+    current_user: User = Depends(get_current_user),
+    org_id: str = Depends(get_current_organization),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_capability("payment.record", AccessLevel.FULL))
+):
+    """
+    Match bank statement lines to open invoices (credits) and approved expenses (debits).
+
+    Columns: date, and amount (signed) or credit/debit, optionally
+    reference and description. Lines are matched by invoice/expense number
+    first, then by amount within the date window. Nothing is recorded;
+    confirm the matches with POST /reconcile/apply.
+
+    Required capability: payment.record (FULL access)
+    """
+    service = ReconciliationService(db)
+    return service.match_statement(
+        org_id=org_id,
+        file=file.file,
+        filename=file.filename,
+        date_window_days=date_window_days
+    )
+
+
+@router.post(
+    "/reconcile/apply",
+    response_model=ReconciliationApplyResponse,
+    summary="Record confirmed statement matches",
+    description="Record payments for confirmed bank statement matches in one transaction. Requires payment.record capability."
+)
+def apply_reconciliation(
+    request: ReconciliationApplyRequest,
+    current_user: User = Depends(get_current_user),
+    org_id: str = Depends(get_current_organization),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_capability("payment.record", AccessLevel.FULL))
+):
+    """
+    Record confirmed matches as payments and update the invoices and expenses.
+
+    Required capability: payment.record (FULL access)
+    """
+    service = ReconciliationService(db)
+    return service.apply_matches(
+        user_id=str(current_user.id),
+        org_id=org_id,
+        request=request
+    )
+
+
 @router.get(
     "",
     response_model=PaymentListResponse,
@@ -186,6 +251,35 @@ def get_payments_by_period(
     return summary
 
 
+@router.get(
+    "/cash-flow",
+    response_model=CashFlowResponse,
+    summary="Get cash-flow series",
+    description="Get received, paid and net series per day, week and month. Requires payment.view capability."
+)
+def get_cash_flow(
+    from_date: Optional[date] = Query(None, description="Default: 90 days before to_date"),
+    to_date: Optional[date] = Query(None, description="Default: today"),
+    granularity: List[str] = Query(["day", "week", "month"], description="day, week and/or month"),
+    current_user: User = Depends(get_current_user),
+    org_id: str = Depends(get_current_organization),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_capability("payment.view", AccessLevel.VIEW))
+):
+    """
+    Get gap-free cash-flow series for a date range, one per granularity.
+
+    Required capability: payment.view (VIEW or higher access)
+    """
+    service = CashFlowService(db)
+    return service.get_cash_flow(
+        org_id=org_id,
+        from_date=from_date,
+        to_date=to_date,
+        granularities=granularity
+    )
+
+
 @router.get(
     "/{payment_id}",
     response_model=PaymentResponse,
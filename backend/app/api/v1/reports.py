@@ -4,21 +4,30 @@ Generate and retrieve various reports
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import List, Optional
 from datetime import date
 
 from app.database import get_db
 from app.dependencies import get_current_user, get_current_organization
+from app.core.permissions import require_capability, AccessLevel
 from app.models.user import User
 from app.schemas.report import (
+    ReportType,
+    ReportFormat,
     DriverListReportResponse,
     LicenseExpiryReportResponse,
     OrganizationSummaryReportResponse,
     AuditLogReportResponse,
-    UserActivityReportResponse
+    AuditLogSearchResponse,
+    UserActivityReportResponse,
+    ReportExecutionRequest,
+    ReportExecutionResponse
 )
 from app.services.report_service import ReportService
+from app.services.report_execution_service import ReportExecutionService
+from app.services.report_export_service import EXPORT_FORMATS, stream_export
 
 router = APIRouter()
 
@@ -169,6 +178,45 @@ def get_audit_log_report(
     return AuditLogReportResponse(**result)
 
 
+@router.get("/audit-log/search", response_model=AuditLogSearchResponse)
+def search_audit_log(
+    q: str = Query(..., min_length=1, max_length=200, description="Search terms (supports \"phrases\", OR and -exclusions)"),
+    start_date: Optional[date] = Query(None, description="Start date (default: 90 days ago)"),
+    end_date: Optional[date] = Query(None, description="End date (default: today)"),
+    action_filter: Optional[str] = Query(None, description="Filter by action type"),
+    entity_type: Optional[str] = Query(None, description="Filter by entity type"),
+    sort: str = Query("relevance", pattern="^(relevance|recent)$", description="relevance or recent"),
+    page: int = Query(1, ge=1, le=1000, description="Page number"),
+    page_size: int = Query(50, ge=1, le=200, description="Entries per page"),
+    current_user: User = Depends(get_current_user),
+    org_id: str = Depends(get_current_organization),
+    db: Session = Depends(get_db)
+):
+    """
+    Search the audit log.
+
+    **Requires:**
+    - Authentication
+    - Active organization membership
+
+    **Query Parameters:**
+    - q: Words matched against action, entity type and detail values
+    - start_date / end_date: Date range (default: last 90 days)
+    - action_filter / entity_type: Exact filters
+    - sort: relevance (default) or recent
+    - page / page_size: Pagination (max 200 per page)
+
+    **Returns:**
+    - Ranked page of matching entries
+    - has_more when another page exists
+    """
+    report_service = ReportService(db)
+    result = report_service.search_audit_log(
+        org_id, q, start_date, end_date, action_filter, entity_type, sort, page, page_size
+    )
+    return AuditLogSearchResponse(**result)
+
+
 @router.get("/user-activity", response_model=UserActivityReportResponse)
 def get_user_activity_report(
     start_date: Optional[date] = Query(None, description="Start date (default: 30 days ago)"),
@@ -209,3 +257,166 @@ def get_user_activity_report(
         org_id, start_date, end_date
     )
     return UserActivityReportResponse(**result)
+
+
+def _execution_response(execution, include_result: bool = True) -> ReportExecutionResponse:
+    """Build the API response for a ReportExecution"""
+    parameters = (execution.execution_parameters or {}).get("params") or {}
+
+    return ReportExecutionResponse(
+        execution_id=str(execution.id),
+        report_id=str(execution.report_id),
+        report_type=execution.report.report_type,
+        status=execution.execution_status,
+        started_at=execution.started_at,
+        completed_at=execution.completed_at,
+        row_count=int(execution.row_count) if execution.row_count else None,
+        error_message=execution.error_message,
+        parameters=parameters,
+        result=execution.result_data if include_result and execution.is_completed else None
+    )
+
+
+@router.post(
+    "/executions",
+    response_model=ReportExecutionResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
+def submit_report_execution(
+    request: ReportExecutionRequest,
+    current_user: User = Depends(get_current_user),
+    org_id: str = Depends(get_current_organization),
+    db: Session = Depends(get_db)
+):
+    """
+    Run a report in the background.
+
+    **Requires:**
+    - Authentication
+    - Active organization membership
+
+    **Body:**
+    - report_type: Standard report to run, or
+    - report_id: Saved report to run (its filters are the default parameters)
+    - parameters: Report parameters, same names as the GET report endpoints
+    - force: Ignore cached results and run again
+
+    **Returns:**
+    - The execution to poll via GET /executions/{execution_id}
+    - If an up-to-date result already exists for the same parameters, the
+      completed execution with its result is returned immediately
+    """
+    execution_service = ReportExecutionService(db)
+    execution = execution_service.submit(
+        org_id=org_id,
+        user_id=str(current_user.id),
+        report_type=request.report_type.value if request.report_type else None,
+        parameters=request.parameters,
+        report_id=request.report_id,
+        force=request.force
+    )
+    return _execution_response(execution)
+
+
+@router.get("/executions", response_model=List[ReportExecutionResponse])
+def list_report_executions(
+    report_id: Optional[str] = Query(None, description="Only executions of this report"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum executions to return"),
+    current_user: User = Depends(get_current_user),
+    org_id: str = Depends(get_current_organization),
+    db: Session = Depends(get_db)
+):
+    """
+    List recent report executions (status only, without results).
+    """
+    execution_service = ReportExecutionService(db)
+    executions = execution_service.list_executions(org_id, report_id, limit)
+    return [_execution_response(execution, include_result=False) for execution in executions]
+
+
+@router.get("/executions/{execution_id}", response_model=ReportExecutionResponse)
+def get_report_execution(
+    execution_id: str,
+    current_user: User = Depends(get_current_user),
+    org_id: str = Depends(get_current_organization),
+    db: Session = Depends(get_db)
+):
+    """
+    Poll a report execution.
+
+    **Returns:**
+    - status: pending, running, completed or failed
+    - result: The report data once completed
+    """
+    execution_service = ReportExecutionService(db)
+    execution = execution_service.get_execution(org_id, execution_id)
+    return _execution_response(execution)
+
+
+@router.get("/saved/{report_id}/latest", response_model=ReportExecutionResponse)
+def get_latest_report_result(
+    report_id: str,
+    current_user: User = Depends(get_current_user),
+    org_id: str = Depends(get_current_organization),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the latest completed result of a saved report.
+
+    Scheduled reports are precomputed before their scheduled time, so this
+    returns the morning's result without running the report.
+    """
+    execution_service = ReportExecutionService(db)
+    execution = execution_service.get_latest_completed(org_id, report_id)
+    return _execution_response(execution)
+
+
+@router.get("/export/{report_type}")
+def export_report(
+    report_type: ReportType,
+    format: ReportFormat = Query(ReportFormat.CSV, description="csv, excel or pdf"),
+    status_filter: Optional[str] = Query(None, description="Driver list: filter by status"),
+    days_ahead: int = Query(90, ge=1, le=365, description="License expiry: look ahead this many days"),
+    start_date: Optional[date] = Query(None, description="Audit log / user activity: start date"),
+    end_date: Optional[date] = Query(None, description="Audit log / user activity: end date"),
+    action_filter: Optional[str] = Query(None, description="Audit log: filter by action type"),
+    current_user: User = Depends(require_capability("reports.export", AccessLevel.FULL)),
+    org_id: str = Depends(get_current_organization),
+    db: Session = Depends(get_db)
+):
+    """
+    Download a report as CSV, Excel or PDF.
+
+    **Requires:**
+    - Authentication
+    - reports.export capability
+
+    **Notes:**
+    - The file is streamed while rows are read, so large reports (e.g. a
+      multi-year audit log) are never held in memory
+    - Audit log exports are not limited to 1000 entries
+    - PDF exports are capped at REPORT_EXPORT_PDF_MAX_ROWS rows
+    """
+    if format == ReportFormat.JSON or report_type == ReportType.DRIVER_PERFORMANCE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Export of {report_type.value} as {format.value} is not supported"
+        )
+
+    org = ReportService(db)._get_organization(org_id)
+    media_type, extension = EXPORT_FORMATS[format.value]
+    file_name = f"{report_type.value}_{date.today().isoformat()}.{extension}"
+
+    params = {
+        "status_filter": status_filter,
+        "days_ahead": days_ahead,
+        "start_date": start_date,
+        "end_date": end_date,
+        "action_filter": action_filter,
+    }
+
+    return StreamingResponse(
+        stream_export(report_type.value, format.value, org_id, org.company_name, params),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{file_name}"'}
+    )
@@ -3,8 +3,6 @@ Trips API
 Endpoints for managing trips — accessible by both fleet_manager and load_owner roles.
 """
 
-import random
-import string
 from typing import Optional, List
 from datetime import date
 
@@ -17,6 +15,8 @@ from app.dependencies import get_current_user
 from app.models import User, UserOrganization
 from app.models.trip import Trip
 from app.models.role import Role
+from app.services.kpi_service import record_kpi_change
+from app.services.numbering_service import NumberingService
 
 router = APIRouter()
 
@@ -43,12 +43,7 @@ def _get_role_key(user_org: UserOrganization, db: Session) -> str:
 
 def _generate_trip_number(db: Session) -> str:
     """Generate a unique RR-XXXXX trip number."""
-    for _ in range(10):
-        suffix = ''.join(random.choices(string.digits, k=5))
-        trip_number = f"RR-{suffix}"
-        if not db.query(Trip).filter(Trip.trip_number == trip_number).first():
-            return trip_number
-    raise HTTPException(status_code=500, detail="Could not generate unique trip number")
+    return NumberingService(db).trip_number()
 
 
 # ─── Schemas ─────────────────────────────────────────────────────────────────
@@ -194,6 +189,7 @@ def create_trip(
     db.add(trip)
     db.commit()
     db.refresh(trip)
+    record_kpi_change(trip.organization_id, "trips")
     return _enrich(trip, db)
 
 
@@ -223,6 +219,7 @@ def update_trip(
 
     db.commit()
     db.refresh(trip)
+    record_kpi_change(trip.organization_id, "trips")
     return _enrich(trip, db)
 
 
@@ -452,6 +449,7 @@ def submit_stage3(
     trip.status                 = 'ongoing'  # now active in factory
 
     db.commit()
+    record_kpi_change(trip.organization_id, "trips")
     db.refresh(trip)
     return {"success": True, "message": "Truck intake complete. Trip is now active.", "trip": _enrich(trip, db)}
 
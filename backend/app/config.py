@@ -29,6 +29,12 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    # Redis (shared caches, token revocation, rate limiting)
+    # Leave REDIS_HOST empty to use per-process in-memory backends
+    REDIS_HOST: str = ""
+    REDIS_PORT: int = 6379
+    REDIS_DB: int = 0
+
     # Encryption (for security questions)
     ENCRYPTION_MASTER_KEY: str
 
@@ -43,9 +49,14 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str = ""
     SMTP_FROM_EMAIL: str = "noreply@fleetapp.com"
     SMTP_FROM_NAME: str = "Fleet Management System"
+    EMAIL_BACKEND: str = "smtp"  # 'smtp' or 'memory' (local stand-in, nothing is sent)
+    EMAIL_QUEUE_BATCH_SIZE: int = 20
+    EMAIL_MAX_RETRIES: int = 5
+    EMAIL_RETRY_BASE_SECONDS: int = 30  # Doubles after each failed attempt
 
     # Frontend URLs
     FRONTEND_URL: str = "http://localhost:3000"
+    PUBLIC_BASE_URL: str = "http://localhost:8000"  # Public API URL, used for links to uploads in emails
     EMAIL_VERIFICATION_URL: str = "http://localhost:3000/verify-email"
     PASSWORD_RESET_URL: str = "http://localhost:3000/reset-password"
 
@@ -61,7 +72,59 @@ class Settings(BaseSettings):
     RECOVERY_LOCKOUT_MINUTES: int = 30
 
     # Rate Limiting
-    RATE_LIMIT_PER_MINUTE: int = 60
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_PER_MINUTE: int = 60  # Per user (or IP if anonymous), general API
+    RATE_LIMIT_IP_PER_MINUTE: int = 600  # Per client IP, all routes combined
+    RATE_LIMIT_AUTH_PER_MINUTE: int = 20  # Per IP, /api/auth/*
+    RATE_LIMIT_INGEST_PER_MINUTE: int = 600  # Per user, GPS location ingest
+    RATE_LIMIT_REPORTS_PER_MINUTE: int = 30  # Per user, /api/reports/*
+
+    # Report Execution
+    REPORT_WORKERS: int = 2  # Background threads running report jobs
+    REPORT_CACHE_MAX_AGE_SECONDS: int = 900  # Reuse a finished execution at most this long
+    REPORT_SCHEDULER_ENABLED: bool = True
+    REPORT_SCHEDULER_INTERVAL_SECONDS: int = 60
+    REPORT_SCHEDULE_WINDOW_MINUTES: int = 60  # Scheduled runs start up to this long before their time
+    REPORT_EXPORT_PDF_MAX_ROWS: int = 10000  # CSV/Excel exports are not capped
+
+    # KPIs
+    KPI_REFRESHER_ENABLED: bool = True
+    KPI_REFRESH_INTERVAL_SECONDS: int = 60  # Recalculate KPIs whose data changed
+    KPI_FULL_REFRESH_MINUTES: int = 60  # Recalculate every KPI at least this often
+    KPI_SNAPSHOT_MINUTES: int = 60  # History snapshot interval for unchanged values
+
+    # Dashboards
+    DASHBOARD_WIDGET_WORKERS: int = 4  # Threads resolving widget data concurrently
+    DASHBOARD_WIDGET_TIMEOUT_SECONDS: int = 10  # Slower widgets are returned as still loading
+
+    # Audit Pipeline
+    AUDIT_OUTBOX_ENABLED: bool = True  # Write audit entries through the outbox
+    AUDIT_RELAY_INTERVAL_SECONDS: int = 2
+    AUDIT_RELAY_BATCH_SIZE: int = 500
+    AUDIT_PARTITION_MONTHS_AHEAD: int = 2
+
+    # Document Numbering
+    DOCUMENT_NUMBER_BLOCK_SIZE: int = 1  # >1: each worker reserves blocks of numbers (faster, not gapless)
+
+    # Invoice Sweeper
+    INVOICE_SWEEPER_ENABLED: bool = True
+    INVOICE_SWEEP_INTERVAL_SECONDS: int = 900  # Mark invoices past their due date as overdue
+    INVOICE_SWEEP_BATCH_SIZE: int = 500
+
+    # Invoice PDFs
+    INVOICE_PDF_DIR: str = "./storage/invoices"  # Not under UPLOAD_DIR, which is served publicly
+    INVOICE_PDF_WORKERS: int = 2  # Rendering processes
+
+    # Cash Flow
+    CASH_FLOW_CACHE_TTL_SECONDS: int = 3600  # Upper bound; payment writes invalidate sooner
+
+    # Expense Attachments
+    ATTACHMENT_STORAGE_BACKEND: str = "local"
+    ATTACHMENT_STORAGE_DIR: str = "./storage/attachments"  # Not under UPLOAD_DIR, which is served publicly
+    ATTACHMENT_THUMBNAIL_WORKERS: int = 2
+    ATTACHMENT_THUMBNAIL_SIZE: int = 320  # Longest side in pixels
+    ATTACHMENT_SENDFILE_HEADER: str = ""  # X-Accel-Redirect (nginx) or X-Sendfile (Apache) to offload downloads
+    ATTACHMENT_SENDFILE_PREFIX: str = ""  # Internal location for X-Accel-Redirect; empty sends the absolute path
 
     # Pagination
     DEFAULT_PAGE_SIZE: int = 20
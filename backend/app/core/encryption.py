@@ -4,9 +4,11 @@ AES-256 encryption using Fernet with PBKDF2 key derivation
 """
 
 import os
+import time
 import base64
 import hashlib
-from typing import Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Tuple
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
@@ -14,6 +16,11 @@ from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from app.config import settings
 
 
+# Worker pool for PBKDF2 derivations, so independent keys (different salts, or
+# old/new password during re-encryption) are derived concurrently.
+_kdf_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="pbkdf2")
+
+
 def generate_salt() -> str:
     """
     Generate a unique 32-byte salt for encryption.
@@ -67,6 +74,40 @@ def derive_key(password: str, salt: str, iterations: int = 100000) -> bytes:
     return base64.urlsafe_b64encode(key)
 
 
+def derive_keys(password: str, salts: Iterable[str]) -> Dict[str, bytes]:
+    """
+    Derive one encryption key per distinct salt for a single operation.
+
+    Each (password, salt) pair is derived exactly once; when several distinct
+    salts are involved the derivations run concurrently on the PBKDF2 pool.
+    Keys are never kept beyond the returned mapping.
+
+    Args:
+        password: User's password (plain text)
+        salts: Base64-encoded salt strings (duplicates are ignored)
+
+    Returns:
+        Dictionary mapping each salt to its derived Fernet key
+    """
+    unique_salts = list(dict.fromkeys(salts))
+    if len(unique_salts) <= 1:
+        return {salt: derive_key(password, salt) for salt in unique_salts}
+
+    keys = _kdf_executor.map(lambda salt: derive_key(password, salt), unique_salts)
+    return dict(zip(unique_salts, keys))
+
+
+def _compare_with_key(cipher: Fernet, encrypted_answer: str, user_input: str) -> bool:
+    """Decrypt a stored answer with an existing cipher and compare with user input"""
+    try:
+        normalized_input = user_input.lower().strip()
+        decrypted_bytes = cipher.decrypt(encrypted_answer.encode('utf-8'))
+        return decrypted_bytes.decode('utf-8') == normalized_input
+    except Exception:
+        # Decryption failed (invalid key, corrupted data, etc.)
+        return False
+
+
 def encrypt_answer(answer: str, password: str, salt: str) -> str:
     """
     Encrypt a security question answer using AES-256 via Fernet.
@@ -103,6 +144,25 @@ def encrypt_answer(answer: str, password: str, salt: str) -> str:
     return encrypted_bytes.decode('utf-8')
 
 
+def encrypt_answers(answers: List[str], password: str, salt: str) -> List[str]:
+    """
+    Encrypt several security question answers with a single key derivation.
+
+    Args:
+        answers: Security question answers (plain text)
+        password: User's password for key derivation
+        salt: Unique salt for this user (base64-encoded)
+
+    Returns:
+        List of encrypted answers, in the same order as the input
+    """
+    cipher = Fernet(derive_key(password, salt))
+    return [
+        cipher.encrypt(answer.lower().strip().encode('utf-8')).decode('utf-8')
+        for answer in answers
+    ]
+
+
 def decrypt_and_compare(
     encrypted_answer: str,
     user_input: str,
@@ -133,26 +193,13 @@ def decrypt_and_compare(
         )
     """
     try:
-        # Normalize user input
-        normalized_input = user_input.lower().strip()
-
         # Derive decryption key
         key = derive_key(password, salt)
-
-        # Create Fernet cipher
-        cipher = Fernet(key)
-
-        # Decrypt stored answer
-        decrypted_bytes = cipher.decrypt(encrypted_answer.encode('utf-8'))
-        decrypted_answer = decrypted_bytes.decode('utf-8')
-
-        # Compare (case-insensitive, whitespace-trimmed)
-        return decrypted_answer == normalized_input
-
     except Exception:
-        # Decryption failed (invalid key, corrupted data, etc.)
         return False
 
+    return _compare_with_key(Fernet(key), encrypted_answer, user_input)
+
 
 def verify_multiple_answers(
     encrypted_answers: list[Tuple[str, str]],  # [(encrypted, user_input), ...]
@@ -181,10 +228,39 @@ def verify_multiple_answers(
         ]
         all_correct = verify_multiple_answers(answers_to_verify, pwd, salt)
     """
-    for encrypted_answer, user_input in encrypted_answers:
-        if not decrypt_and_compare(encrypted_answer, user_input, password, salt):
-            return False
-    return True
+    return verify_salted_answers(
+        [(encrypted, user_input, salt) for encrypted, user_input in encrypted_answers],
+        password
+    )
+
+
+def verify_salted_answers(
+    answers: list[Tuple[str, str, str]],  # [(encrypted, user_input, salt), ...]
+    password: str
+) -> bool:
+    """
+    Verify security answers that each carry their own stored salt.
+
+    Keys are derived once per distinct salt (in parallel when there is more
+    than one), then every answer is checked against its cached cipher.
+
+    Args:
+        answers: List of tuples (encrypted_answer, user_input, salt)
+        password: User's password for key derivation
+
+    Returns:
+        True if ALL answers are correct, False if any answer is wrong
+    """
+    try:
+        keys = derive_keys(password, (salt for _, _, salt in answers))
+    except Exception:
+        return False
+
+    ciphers = {salt: Fernet(key) for salt, key in keys.items()}
+    return all(
+        _compare_with_key(ciphers[salt], encrypted_answer, user_input)
+        for encrypted_answer, user_input, salt in answers
+    )
 
 
 def re_encrypt_answers(
@@ -218,18 +294,22 @@ def re_encrypt_answers(
     """
     re_encrypted = []
 
+    try:
+        # Derive both keys once, concurrently, for the whole batch
+        old_key_future = _kdf_executor.submit(derive_key, old_password, salt)
+        new_key = derive_key(new_password, salt)
+        cipher_old = Fernet(old_key_future.result())
+        cipher_new = Fernet(new_key)
+    except Exception:
+        return []
+
     for encrypted_answer in encrypted_answers:
         try:
             # Decrypt with old password
-            old_key = derive_key(old_password, salt)
-            cipher_old = Fernet(old_key)
             decrypted_bytes = cipher_old.decrypt(encrypted_answer.encode('utf-8'))
-            plain_answer = decrypted_bytes.decode('utf-8')
 
             # Encrypt with new password
-            new_key = derive_key(new_password, salt)
-            cipher_new = Fernet(new_key)
-            new_encrypted_bytes = cipher_new.encrypt(plain_answer.encode('utf-8'))
+            new_encrypted_bytes = cipher_new.encrypt(decrypted_bytes)
 
             re_encrypted.append(new_encrypted_bytes.decode('utf-8'))
 
@@ -269,6 +349,58 @@ def test_encryption():
     print(f"Wrong password verification: {wrong_pwd}")  # Should be False
 
 
+# Benchmark function for development/debugging
+def benchmark_encryption(questions: int = 3, rounds: int = 3):
+    """
+    Measure the cost of each security-answer operation.
+
+    Prints the average wall time and the number of PBKDF2 derivations per
+    operation. With key caching every operation should need at most one
+    derivation per distinct (password, salt) pair, i.e. 1 for encryption and
+    verification and 2 for re-encryption, regardless of question count.
+    """
+    global derive_key
+
+    password = "BenchPassword123!"
+    salt = generate_salt()
+    answers = [f"answer {i}" for i in range(questions)]
+
+    calls = {"count": 0}
+    original_derive_key = derive_key
+
+    def counting_derive_key(*args, **kwargs):
+        calls["count"] += 1
+        return original_derive_key(*args, **kwargs)
+
+    def measure(label, operation):
+        calls["count"] = 0
+        start = time.perf_counter()
+        for _ in range(rounds):
+            result = operation()
+        elapsed_ms = (time.perf_counter() - start) * 1000 / rounds
+        derivations = calls["count"] / rounds
+        print(f"{label:<28} {elapsed_ms:8.1f} ms/op  {derivations:4.1f} derivations/op")
+        return result
+
+    derive_key = counting_derive_key
+    try:
+        encrypted = measure(
+            "encrypt_answers",
+            lambda: encrypt_answers(answers, password, salt)
+        )
+        measure(
+            "verify_multiple_answers",
+            lambda: verify_multiple_answers(list(zip(encrypted, answers)), password, salt)
+        )
+        measure(
+            "re_encrypt_answers",
+            lambda: re_encrypt_answers(encrypted, password, password + "!", salt)
+        )
+    finally:
+        derive_key = original_derive_key
+
+
 if __name__ == "__main__":
-    # Run test if executed directly
+    # Run test and benchmark if executed directly
     test_encryption()
+    benchmark_encryption()
@@ -0,0 +1,105 @@
+"""
+Leader Lock
+Elect one worker process to run a periodic background job
+
+Uses a Redis key with a TTL when REDIS_HOST is set, and a PostgreSQL
+session-level advisory lock otherwise. Callers call acquire() on every tick;
+it renews the lock if this process already holds it.
+"""
+
+import uuid
+
+from sqlalchemy import text
+
+from app.core.redis_client import get_redis
+
+# Extend the lock only if we still own it
+RENEW_LOCK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class RedisLeaderLock:
+    """Leader lock held as a Redis key with a TTL, renewed every tick"""
+
+    def __init__(self, client, key: str, ttl_seconds: int):
+        self.client = client
+        self.key = key
+        self.ttl = ttl_seconds
+        self.token = str(uuid.uuid4())
+        self._renew = client.register_script(RENEW_LOCK_LUA)
+
+    def acquire(self) -> bool:
+        if self._renew(keys=[self.key], args=[self.token, self.ttl]):
+            return True
+        return bool(self.client.set(self.key, self.token, nx=True, ex=self.ttl))
+
+    def release(self) -> None:
+        if self.client.get(self.key) == self.token:
+            self.client.delete(self.key)
+
+
+class PostgresLeaderLock:
+    """
+    Leader lock held as a session-level PostgreSQL advisory lock.
+
+    The lock lives as long as the dedicated connection, so a crashed
+    leader releases it automatically.
+    """
+
+    def __init__(self, lock_id: int):
+        self.lock_id = lock_id
+        self._connection = None
+
+    def acquire(self) -> bool:
+        from app.database import engine
+
+        if self._connection is not None:
+            try:
+                self._connection.execute(text("SELECT 1"))
+                self._connection.commit()
+                return True
+            except Exception:
+                self.release()
+
+        connection = engine.connect()
+        acquired = connection.execute(
+            text("SELECT pg_try_advisory_lock(:lock_id)"),
+            {"lock_id": self.lock_id}
+        ).scalar()
+        connection.commit()
+
+        if acquired:
+            self._connection = connection
+        else:
+            connection.close()
+        return bool(acquired)
+
+    def release(self) -> None:
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+
+def create_leader_lock(key: str, lock_id: int, ttl_seconds: int):
+    """
+    Create a leader lock for the configured backend.
+
+    Args:
+        key: Redis key (used when REDIS_HOST is set)
+        lock_id: PostgreSQL advisory lock id (used otherwise)
+        ttl_seconds: How long a Redis lock survives without renewal
+
+    Returns:
+        RedisLeaderLock or PostgresLeaderLock
+    """
+    client = get_redis()
+    if client is not None:
+        return RedisLeaderLock(client, key, ttl_seconds)
+    return PostgresLeaderLock(lock_id)
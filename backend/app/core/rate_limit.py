@@ -0,0 +1,411 @@
+"""
+Rate Limiting
+Token-bucket rate limits and login lockout enforced as ASGI middleware
+
+Requests are classified into route classes (auth, ingest, reports, api) and
+checked against two buckets before any endpoint code runs:
+- a per-client-IP bucket covering all routes
+- a per-identity bucket for the route class (user ID from the bearer token,
+  or client IP for anonymous requests)
+
+Login attempts are additionally counted per username; once
+MAX_FAILED_LOGIN_ATTEMPTS failures accumulate, further attempts are rejected
+without touching the database or hashing a password.
+
+Backends:
+- Redis (when REDIS_HOST is set): all buckets are evaluated in a single atomic
+  Lua script, so limits hold across workers
+- In-memory: per-process, for development and single-worker deployments
+"""
+
+import json
+import logging
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.core.redis_client import get_async_redis
+from app.core.security import decode_access_token
+
+logger = logging.getLogger(__name__)
+
+# (key, capacity, window_seconds)
+Bucket = Tuple[str, int, int]
+
+LOGIN_PATH = "/api/auth/login"
+MAX_LOGIN_BODY_BYTES = 65536
+
+EXEMPT_PATHS = ("/", "/health", "/docs", "/redoc", "/openapi.json")
+EXEMPT_PREFIXES = ("/uploads/", "/docs/")
+
+ROUTE_CLASS_AUTH = "auth"
+ROUTE_CLASS_INGEST = "ingest"
+ROUTE_CLASS_REPORTS = "reports"
+ROUTE_CLASS_API = "api"
+
+
+def classify_route(path: str) -> Optional[str]:
+    """
+    Map a request path to its rate-limit route class.
+
+    Returns:
+        Route class name, or None if the path is not rate limited
+    """
+    if path in EXEMPT_PATHS or path.startswith(EXEMPT_PREFIXES):
+        return None
+    if path.startswith("/api/auth/"):
+        return ROUTE_CLASS_AUTH
+    if path.startswith("/api/v1/tracking/locations"):
+        return ROUTE_CLASS_INGEST
+    if path.startswith("/api/reports"):
+        return ROUTE_CLASS_REPORTS
+    return ROUTE_CLASS_API
+
+
+def route_class_limit(route_class: str) -> int:
+    """Requests per minute allowed for a route class"""
+    return {
+        ROUTE_CLASS_AUTH: settings.RATE_LIMIT_AUTH_PER_MINUTE,
+        ROUTE_CLASS_INGEST: settings.RATE_LIMIT_INGEST_PER_MINUTE,
+        ROUTE_CLASS_REPORTS: settings.RATE_LIMIT_REPORTS_PER_MINUTE,
+    }.get(route_class, settings.RATE_LIMIT_PER_MINUTE)
+
+
+# ============================================================================
+# Backends
+# ============================================================================
+
+class RateLimitBackend:
+    """Interface for rate-limit state"""
+
+    async def hit(self, buckets: List[Bucket]) -> Tuple[bool, int]:
+        """
+        Take one token from every bucket, only if all of them have one.
+
+        Returns:
+            Tuple of (allowed, retry_after_seconds)
+        """
+        raise NotImplementedError
+
+    async def failures(self, key: str) -> Tuple[int, int]:
+        """
+        Get a failure counter.
+
+        Returns:
+            Tuple of (count, seconds_until_reset)
+        """
+        raise NotImplementedError
+
+    async def record_failure(self, key: str, window_seconds: int) -> int:
+        """Increment a failure counter that expires window_seconds after the first failure"""
+        raise NotImplementedError
+
+    async def clear(self, key: str) -> None:
+        """Reset a failure counter"""
+        raise NotImplementedError
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Per-process token buckets and counters"""
+
+    def __init__(self, max_keys: int = 100000):
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # key -> (tokens, updated_at)
+        self._counters: Dict[str, Tuple[int, float]] = {}  # key -> (count, expires_at)
+        self._max_keys = max_keys
+        self._lock = threading.Lock()
+
+    async def hit(self, buckets: List[Bucket]) -> Tuple[bool, int]:
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            retry_after = 0.0
+            for key, capacity, window in buckets:
+                rate = capacity / window
+                tokens, updated_at = self._buckets.get(key, (capacity, now))
+                tokens = min(capacity, tokens + (now - updated_at) * rate)
+                if tokens < 1:
+                    retry_after = max(retry_after, (1 - tokens) / rate)
+                levels.append(tokens)
+
+            allowed = retry_after == 0
+            for (key, _, _), tokens in zip(buckets, levels):
+                self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+
+            if len(self._buckets) > self._max_keys:
+                self._prune(now)
+
+        return allowed, math.ceil(retry_after)
+
+    def _prune(self, now: float) -> None:
+        """Drop buckets idle for over a minute (they would be full again)"""
+        self._buckets = {
+            key: state for key, state in self._buckets.items() if now - state[1] < 60
+        }
+
+    async def failures(self, key: str) -> Tuple[int, int]:
+        count, expires_at = self._counters.get(key, (0, 0.0))
+        remaining = expires_at - time.monotonic()
+        if remaining <= 0:
+            return 0, 0
+        return count, math.ceil(remaining)
+
+    async def record_failure(self, key: str, window_seconds: int) -> int:
+        now = time.monotonic()
+        with self._lock:
+            count, expires_at = self._counters.get(key, (0, 0.0))
+            if expires_at <= now:
+                count, expires_at = 0, now + window_seconds
+            self._counters[key] = (count + 1, expires_at)
+            return count + 1
+
+    async def clear(self, key: str) -> None:
+        with self._lock:
+            self._counters.pop(key, None)
+
+
+# KEYS: bucket keys; ARGV: capacity_1, window_ms_1, capacity_2, window_ms_2, ...
+TOKEN_BUCKET_LUA = """
+local now = redis.call('TIME')
+local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local retry_ms = 0
+local levels = {}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local window_ms = tonumber(ARGV[2 * i])
+    local rate = capacity / window_ms
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now_ms
+    tokens = math.min(capacity, tokens + (now_ms - ts) * rate)
+    if tokens < 1 then
+        retry_ms = math.max(retry_ms, math.ceil((1 - tokens) / rate))
+    end
+    levels[i] = tokens
+end
+local allowed = retry_ms == 0
+for i, key in ipairs(KEYS) do
+    local tokens = levels[i]
+    if allowed then
+        tokens = tokens - 1
+    end
+    redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', now_ms)
+    redis.call('PEXPIRE', key, tonumber(ARGV[2 * i]))
+end
+if allowed then
+    return {1, 0}
+end
+return {0, retry_ms}
+"""
+
+FAILURE_COUNTER_LUA = """
+local count = redis.call('INCR', KEYS[1])
+if count == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return count
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Rate-limit state shared by all workers through Redis"""
+
+    def __init__(self, client):
+        self.redis = client
+        self._token_bucket = client.register_script(TOKEN_BUCKET_LUA)
+        self._failure_counter = client.register_script(FAILURE_COUNTER_LUA)
+
+    async def hit(self, buckets: List[Bucket]) -> Tuple[bool, int]:
+        keys = [key for key, _, _ in buckets]
+        args = []
+        for _, capacity, window in buckets:
+            args.extend([capacity, window * 1000])
+
+        allowed, retry_ms = await self._token_bucket(keys=keys, args=args)
+        return bool(allowed), math.ceil(int(retry_ms) / 1000)
+
+    async def failures(self, key: str) -> Tuple[int, int]:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.ttl(key)
+            count, ttl = await pipe.execute()
+        return int(count or 0), max(int(ttl), 0)
+
+    async def record_failure(self, key: str, window_seconds: int) -> int:
+        return int(await self._failure_counter(keys=[key], args=[window_seconds]))
+
+    async def clear(self, key: str) -> None:
+        await self.redis.delete(key)
+
+
+_backend: Optional[RateLimitBackend] = None
+
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    """Get the process-wide rate-limit backend (Redis if configured)"""
+    global _backend
+
+    if _backend is None:
+        client = get_async_redis()
+        _backend = RedisRateLimitBackend(client) if client else InMemoryRateLimitBackend()
+
+    return _backend
+
+
+# ============================================================================
+# Middleware
+# ============================================================================
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware enforcing RATE_LIMIT_* settings and login lockout.
+
+    Client IPs come from the ASGI scope; run uvicorn with --proxy-headers
+    behind a reverse proxy so they reflect the real client.
+
+    Backend errors are logged and the request is allowed through, so an
+    unavailable Redis degrades to no rate limiting rather than an outage.
+    """
+
+    def __init__(self, app, backend: Optional[RateLimitBackend] = None):
+        self.app = app
+        self._backend = backend
+
+    @property
+    def backend(self) -> RateLimitBackend:
+        if self._backend is None:
+            self._backend = get_rate_limit_backend()
+        return self._backend
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not settings.RATE_LIMIT_ENABLED
+            or scope["method"] == "OPTIONS"
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        route_class = classify_route(path)
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        client_ip = scope["client"][0] if scope.get("client") else "unknown"
+        user_id = None if route_class == ROUTE_CLASS_AUTH else self._user_id(scope)
+        identity = f"user:{user_id}" if user_id else f"ip:{client_ip}"
+
+        buckets = [
+            (f"ratelimit:ip:{client_ip}", settings.RATE_LIMIT_IP_PER_MINUTE, 60),
+            (f"ratelimit:{route_class}:{identity}", route_class_limit(route_class), 60),
+        ]
+
+        try:
+            allowed, retry_after = await self.backend.hit(buckets)
+        except Exception as e:
+            logger.error(f"Rate limit backend error: {e}")
+            allowed, retry_after = True, 0
+
+        if not allowed:
+            await self._reject(send, retry_after, "Too many requests. Please slow down.")
+            return
+
+        if path == LOGIN_PATH and scope["method"] == "POST":
+            await self._guarded_login(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def _user_id(scope) -> Optional[str]:
+        """Extract the user ID from a bearer token without touching the database"""
+        for name, value in scope.get("headers", []):
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() != "bearer" or not token:
+                    return None
+                payload = decode_access_token(token)
+                if not payload or payload.get("type") != "access":
+                    return None
+                return payload.get("sub")
+        return None
+
+    async def _guarded_login(self, scope, receive, send):
+        """Reject logins for usernames with too many recent failures, and count new ones"""
+        messages = []
+        body = b""
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                break
+            body += message.get("body", b"")
+            if not message.get("more_body", False) or len(body) > MAX_LOGIN_BODY_BYTES:
+                break
+
+        username = None
+        try:
+            username = json.loads(body).get("username")
+        except (ValueError, AttributeError):
+            pass
+
+        async def replay_receive():
+            if messages:
+                return messages.pop(0)
+            return await receive()
+
+        if not isinstance(username, str) or not username:
+            await self.app(scope, replay_receive, send)
+            return
+
+        lockout_key = f"ratelimit:login_failures:{username[:50]}"
+
+        try:
+            failures, reset_in = await self.backend.failures(lockout_key)
+        except Exception as e:
+            logger.error(f"Rate limit backend error: {e}")
+            failures, reset_in = 0, 0
+
+        if failures >= settings.MAX_FAILED_LOGIN_ATTEMPTS:
+            await self._reject(
+                send,
+                reset_in,
+                f"Too many failed login attempts. Please try again in {max(reset_in // 60, 1)} minutes."
+            )
+            return
+
+        response_status = {}
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                response_status["code"] = message["status"]
+            await send(message)
+
+        await self.app(scope, replay_receive, capture_send)
+
+        try:
+            if response_status.get("code") == 401:
+                await self.backend.record_failure(
+                    lockout_key, settings.ACCOUNT_LOCKOUT_MINUTES * 60
+                )
+            elif response_status.get("code") == 200 and failures:
+                await self.backend.clear(lockout_key)
+        except Exception as e:
+            logger.error(f"Rate limit backend error: {e}")
+
+    @staticmethod
+    async def _reject(send, retry_after: int, detail: str):
+        """Send a 429 response"""
+        body = json.dumps({"detail": detail}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(max(retry_after, 1)).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,69 @@
+"""
+Redis Client
+Shared, lazily created Redis connection for caches, token stores and rate limits
+"""
+
+import logging
+from typing import Optional
+
+import redis
+import redis.asyncio as redis_async
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[redis.Redis] = None
+_async_client: Optional[redis_async.Redis] = None
+
+
+def get_redis() -> Optional[redis.Redis]:
+    """
+    Get the shared Redis client.
+
+    Returns:
+        Redis client, or None when REDIS_HOST is not configured (callers
+        should then fall back to their in-memory backend)
+    """
+    global _client
+
+    if not settings.REDIS_HOST:
+        return None
+
+    if _client is None:
+        _client = redis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            decode_responses=True,
+            socket_timeout=2,
+            socket_connect_timeout=2,
+        )
+        logger.info(f"Redis client configured for {settings.REDIS_HOST}:{settings.REDIS_PORT}")
+
+    return _client
+
+
+def get_async_redis() -> Optional[redis_async.Redis]:
+    """
+    Get the shared asyncio Redis client (for middleware and async services).
+
+    Returns:
+        Async Redis client, or None when REDIS_HOST is not configured
+    """
+    global _async_client
+
+    if not settings.REDIS_HOST:
+        return None
+
+    if _async_client is None:
+        _async_client = redis_async.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            decode_responses=True,
+            socket_timeout=2,
+            socket_connect_timeout=2,
+        )
+
+    return _async_client
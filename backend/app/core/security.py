@@ -103,6 +103,7 @@ def create_access_token(
 
     to_encode.update({"exp": expire})
     to_encode.update({"iat": datetime.utcnow()})  # Issued at
+    to_encode.update({"type": "access"})  # Refresh tokens must not authenticate requests
 
     # Encode JWT
     encoded_jwt = jwt.encode(
@@ -0,0 +1,134 @@
+"""
+Refresh Token Store
+Hot-path state for refresh-token rotation: revoked families and used token IDs
+
+Every refresh performs exactly one revocation lookup and one atomic "claim"
+of the presented token ID. With Redis these are a single EXISTS and SET NX and
+never touch the database; the `refresh_token_families` table is only written
+when a session starts or is revoked.
+
+Without Redis the store falls back to the database (a primary-key lookup on
+the family and an insert into `refresh_token_uses`), so a revocation or
+detected reuse is seen by every worker process, not only the one handling it.
+"""
+
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import text
+
+from app.core.redis_client import get_redis
+
+
+class RefreshTokenStore:
+    """Interface for refresh-token revocation and reuse tracking"""
+
+    def is_revoked(self, family_id: str) -> bool:
+        """Check whether a token family has been revoked"""
+        raise NotImplementedError
+
+    def revoke(self, family_id: str, ttl_seconds: int) -> None:
+        """Mark a token family as revoked for ttl_seconds"""
+        raise NotImplementedError
+
+    def claim(self, token_id: str, ttl_seconds: int) -> bool:
+        """
+        Atomically mark a refresh token as used.
+
+        Returns:
+            True on first use, False if the token was already used (reuse)
+        """
+        raise NotImplementedError
+
+
+class DatabaseRefreshTokenStore(RefreshTokenStore):
+    """
+    Store shared by all workers when Redis is not configured.
+
+    Revocation is read from `refresh_token_families` (a primary-key lookup)
+    and a claim is an insert into `refresh_token_uses`, each in its own short
+    transaction so every worker sees it at once. Expired uses are deleted
+    every PRUNE_EVERY claims.
+    """
+
+    PRUNE_EVERY = 1000
+
+    REVOKED_SQL = text("""
+    SELECT 1 FROM refresh_token_families WHERE id = :family_id AND revoked_at IS NOT NULL
+    """)
+
+    CLAIM_SQL = text("""
+    INSERT INTO refresh_token_uses (token_id, expires_at)
+    VALUES (:token_id, :expires_at)
+    ON CONFLICT (token_id) DO NOTHING
+    RETURNING token_id
+    """)
+
+    PRUNE_SQL = text("DELETE FROM refresh_token_uses WHERE expires_at < :now")
+
+    def __init__(self):
+        self._claims = 0
+        self._lock = threading.Lock()
+
+    def is_revoked(self, family_id: str) -> bool:
+        from app.database import engine
+
+        with engine.connect() as connection:
+            return connection.execute(self.REVOKED_SQL, {"family_id": family_id}).first() is not None
+
+    def revoke(self, family_id: str, ttl_seconds: int) -> None:
+        # RefreshTokenService persists the revocation on the family row itself
+        pass
+
+    def claim(self, token_id: str, ttl_seconds: int) -> bool:
+        from app.database import engine
+
+        now = datetime.utcnow()
+        with self._lock:
+            self._claims += 1
+            prune = self._claims % self.PRUNE_EVERY == 0
+
+        with engine.begin() as connection:
+            if prune:
+                connection.execute(self.PRUNE_SQL, {"now": now})
+            claimed = connection.execute(self.CLAIM_SQL, {
+                "token_id": token_id,
+                "expires_at": now + timedelta(seconds=ttl_seconds),
+            }).first()
+        return claimed is not None
+
+
+class RedisRefreshTokenStore(RefreshTokenStore):
+    """Store shared by all workers, backed by Redis keys with TTLs"""
+
+    REVOKED_KEY = "auth:refresh:revoked:{}"
+    USED_KEY = "auth:refresh:used:{}"
+
+    def __init__(self, client):
+        self.redis = client
+
+    def is_revoked(self, family_id: str) -> bool:
+        return bool(self.redis.exists(self.REVOKED_KEY.format(family_id)))
+
+    def revoke(self, family_id: str, ttl_seconds: int) -> None:
+        self.redis.set(self.REVOKED_KEY.format(family_id), 1, ex=max(ttl_seconds, 1))
+
+    def claim(self, token_id: str, ttl_seconds: int) -> bool:
+        return bool(
+            self.redis.set(self.USED_KEY.format(token_id), 1, nx=True, ex=max(ttl_seconds, 1))
+        )
+
+
+_store: Optional[RefreshTokenStore] = None
+
+
+def get_refresh_token_store() -> RefreshTokenStore:
+    """Get the process-wide refresh token store (Redis if configured)"""
+    global _store
+
+    if _store is None:
+        client = get_redis()
+        _store = RedisRefreshTokenStore(client) if client else DatabaseRefreshTokenStore()
+
+    return _store
@@ -10,6 +10,7 @@ from fastapi.staticfiles import StaticFiles
 import os
 
 from app.config import settings
+from app.core.rate_limit import RateLimitMiddleware
 
 # Create FastAPI application
 app = FastAPI(
@@ -21,6 +22,9 @@ app = FastAPI(
     debug=settings.DEBUG
 )
 
+# Rate limiting (registered before CORS so 429 responses still carry CORS headers)
+app.add_middleware(RateLimitMiddleware)
+
 # Configure CORS
 # This API uses JWT Bearer tokens (not cookies), so allow_credentials must be
 # False when allow_origins contains "*". Browsers reject the combination of
@@ -83,11 +87,36 @@ async def startup_event():
     print(f"Environment: {settings.ENVIRONMENT}")
     print(f"Debug mode: {settings.DEBUG}")
 
+    # Move committed audit entries from the outbox into audit_logs
+    from app.services.audit_pipeline import get_audit_relay
+    get_audit_relay().start()
+
+    # Start background email delivery
+    from app.services.email_queue import get_email_queue
+    get_email_queue().start()
+
+    # Start the scheduled report runner (only the lock holder fires reports)
+    if settings.REPORT_SCHEDULER_ENABLED:
+        from app.services.report_scheduler import get_report_scheduler
+        get_report_scheduler().start()
+
+    # Keep precomputed KPI values current (only the lock holder recalculates)
+    if settings.KPI_REFRESHER_ENABLED:
+        from app.services.kpi_service import get_kpi_refresher
+        get_kpi_refresher().start()
+
+    # Mark invoices past their due date overdue (only the lock holder sweeps)
+    if settings.INVOICE_SWEEPER_ENABLED:
+        from app.services.invoice_sweeper import get_invoice_sweeper
+        get_invoice_sweeper().start()
+
     # Auto-seed capabilities and predefined roles (idempotent - safe to run every startup)
     try:
         from app.database import SessionLocal
         from app.services.capability_service import CapabilityService
         from app.services.template_service import TemplateService
+        from app.services.refresh_token_service import RefreshTokenService
+        from app.services.report_execution_service import ReportExecutionService
 
         db = SessionLocal()
         try:
@@ -102,6 +131,16 @@ async def startup_event():
             role_count = tmpl_service.seed_predefined_roles()
             if role_count > 0:
                 print(f"Seeded {role_count} predefined roles")
+
+            # Reload recent session revocations into the refresh token store
+            revoked_count = RefreshTokenService(db).warm_store()
+            if revoked_count > 0:
+                print(f"Loaded {revoked_count} revoked refresh token families")
+
+            # Report jobs do not survive a restart
+            interrupted = ReportExecutionService(db).fail_interrupted()
+            if interrupted > 0:
+                print(f"Marked {interrupted} interrupted report executions as failed")
         except Exception as seed_error:
             # Tables may not exist yet if migrations haven't been run
             print(f"Warning: Seeding skipped (run migrations first): {seed_error}")
@@ -118,12 +157,46 @@ async def shutdown_event():
     """Cleanup on shutdown"""
     print(f"Shutting down {settings.APP_NAME}")
 
+    if settings.KPI_REFRESHER_ENABLED:
+        from app.services.kpi_service import get_kpi_refresher
+        get_kpi_refresher().stop()
+
+    if settings.INVOICE_SWEEPER_ENABLED:
+        from app.services.invoice_sweeper import get_invoice_sweeper
+        get_invoice_sweeper().stop()
+
+    # Stop scheduling, then let running report jobs finish
+    if settings.REPORT_SCHEDULER_ENABLED:
+        from app.services.report_scheduler import get_report_scheduler
+        get_report_scheduler().stop()
+
+    from app.services.report_execution_service import shutdown_report_executor
+    shutdown_report_executor()
+
+    from app.services.dashboard_service import shutdown_widget_executor
+    shutdown_widget_executor()
+
+    from app.services.invoice_pdf_service import shutdown_pdf_executor
+    shutdown_pdf_executor()
+
+    from app.services.attachment_service import shutdown_thumbnail_executor
+    shutdown_thumbnail_executor()
+
+    # Relay the audit entries written by the jobs above
+    from app.services.audit_pipeline import get_audit_relay
+    get_audit_relay().stop()
+
+    # Flush queued emails (including report notifications) and close the SMTP connection
+    from app.services.email_queue import get_email_queue
+    get_email_queue().stop()
+
 
 # Import and include API routers
 from app.api.v1 import (
     auth, company, driver, user, organization, reports, capabilities,
     custom_roles, templates, vehicles, profile, roles, organization_management,
-    tracking, expenses, invoices, payments, budgets, branding, loads, trips
+    tracking, expenses, invoices, payments, budgets, branding, loads, trips, kpis,
+    dashboards
 )
 
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
@@ -147,6 +220,8 @@ app.include_router(expenses.router, prefix="/api/expenses", tags=["Expenses"])
 app.include_router(invoices.router, prefix="/api/invoices", tags=["Invoices"])
 app.include_router(payments.router, prefix="/api/payments", tags=["Payments"])
 app.include_router(budgets.router, prefix="/api/budgets", tags=["Budgets"])
+app.include_router(kpis.router, prefix="/api/kpis", tags=["KPIs"])
+app.include_router(dashboards.router, prefix="/api/dashboards", tags=["Dashboards"])
 app.include_router(loads.router, prefix="/api/loads", tags=["Loads"])
 app.include_router(trips.router, prefix="/api", tags=["Trips"])
 
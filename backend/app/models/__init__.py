@@ -10,8 +10,10 @@ from .security_question import SecurityQuestion
 from .user_security_answer import UserSecurityAnswer
 from .user_organization import UserOrganization
 from .verification_token import VerificationToken
+from .refresh_token import RefreshTokenFamily, RefreshTokenUse
+from .email_dead_letter import EmailDeadLetter
 from .recovery_attempt import RecoveryAttempt
-from .audit_log import AuditLog
+from .audit_log import AuditLog, AuditLogOutbox
 from .driver import Driver, DriverLicense
 from .zone import Zone
 from .capability import Capability, AccessLevel, FeatureCategory
@@ -20,8 +22,10 @@ from .custom_role import CustomRole
 from .vehicle import Vehicle, VehicleDocument
 from .vendor import Vendor
 from .expense import Expense, ExpenseAttachment
+from .attachment_blob import AttachmentBlob
 from .invoice import Invoice, InvoiceLineItem
 from .payment import Payment
+from .financial_rollup import ExpenseDailyRollup, PaymentDailyRollup, InvoiceDailyRollup
 from .budget import Budget
 from .maintenance import MaintenanceSchedule, WorkOrder, Inspection, InspectionChecklistItem
 from .part import Part, PartUsage
@@ -29,6 +33,7 @@ from .report import Report, ReportExecution
 from .dashboard import Dashboard, DashboardWidget
 from .kpi import KPI, KPIHistory
 from .trip import Trip
+from .document_sequence import DocumentSequence
 
 __all__ = [
     "User",
@@ -38,8 +43,12 @@ __all__ = [
     "UserSecurityAnswer",
     "UserOrganization",
     "VerificationToken",
+    "RefreshTokenFamily",
+    "RefreshTokenUse",
+    "EmailDeadLetter",
     "RecoveryAttempt",
     "AuditLog",
+    "AuditLogOutbox",
     "Driver",
     "DriverLicense",
     "Zone",
@@ -53,9 +62,13 @@ __all__ = [
     "Vendor",
     "Expense",
     "ExpenseAttachment",
+    "AttachmentBlob",
     "Invoice",
     "InvoiceLineItem",
     "Payment",
+    "ExpenseDailyRollup",
+    "PaymentDailyRollup",
+    "InvoiceDailyRollup",
     "Budget",
     "MaintenanceSchedule",
     "WorkOrder",
@@ -70,4 +83,5 @@ __all__ = [
     "KPI",
     "KPIHistory",
     "Trip",
+    "DocumentSequence",
 ]
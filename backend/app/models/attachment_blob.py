@@ -0,0 +1,44 @@
+"""
+Attachment Blob Model
+Stored attachment files, one row per distinct content.
+
+Files are content-addressed by their SHA-256, so a receipt uploaded many times
+is stored once. `ref_count` counts the attachments pointing at the blob; the
+file is deleted when the last one goes. The row is locked while the count
+changes, so an upload of the same content cannot race the deletion.
+"""
+
+from sqlalchemy import Column, String, BigInteger, Integer, DateTime, CheckConstraint
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+THUMBNAIL_PENDING = "pending"
+THUMBNAIL_READY = "ready"
+THUMBNAIL_FAILED = "failed"
+
+
+class AttachmentBlob(Base):
+    """File content shared by every attachment with the same SHA-256"""
+    __tablename__ = "attachment_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    size_bytes = Column(BigInteger, nullable=False)
+    content_type = Column(String(100), nullable=True)  # as sent by the first uploader
+
+    ref_count = Column(Integer, nullable=False, default=0)
+
+    # NULL for content that has no thumbnail (PDFs, unknown types)
+    thumbnail_status = Column(String(20), nullable=True)
+
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        CheckConstraint(
+            "thumbnail_status IS NULL OR thumbnail_status IN ('pending', 'ready', 'failed')",
+            name='check_attachment_blob_thumbnail_status'
+        ),
+    )
+
+    def __repr__(self):
+        return f"<AttachmentBlob(sha256='{self.sha256[:12]}', size={self.size_bytes}, refs={self.ref_count})>"
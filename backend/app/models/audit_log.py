@@ -1,16 +1,45 @@
 """
 Audit Log Model
 Comprehensive audit trail for all system activities
+
+Services add `AuditLog` rows as before, but on flush they are written to the
+narrow, index-free `audit_log_outbox` table in the same transaction (see
+app/services/audit_pipeline.py). A background relay moves outbox rows into
+`audit_logs` in batches, so the indexed audit table is never written on the
+request path and no entry is lost if the process dies.
+
+`audit_logs` is range-partitioned by month on `created_at`, with a BRIN index
+for time-range scans and a default partition as a safety net. Migration 033
+and `create_all` both create the default partition and the partitions from
+this month to AUDIT_PARTITION_MONTHS_AHEAD ahead.
+
+`search_vector` is a stored generated tsvector over action (weight A),
+entity_type (B) and the string and numeric values in details (C), with a GIN
+index for full-text search.
 """
 
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Index
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from datetime import date, timedelta
+from typing import List
+
+from sqlalchemy import Column, String, Text, DateTime, BigInteger, Identity, Index, Computed, event
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
 
+from app.config import settings
 from app.database import Base
 
+# 'simple' keeps identifiers, plate numbers and names unstemmed
+AUDIT_SEARCH_CONFIG = "simple"
+
+AUDIT_SEARCH_VECTOR_SQL = (
+    f"setweight(to_tsvector('{AUDIT_SEARCH_CONFIG}', coalesce(action, '')), 'A') || "
+    f"setweight(to_tsvector('{AUDIT_SEARCH_CONFIG}', coalesce(entity_type, '')), 'B') || "
+    f"setweight(jsonb_to_tsvector('{AUDIT_SEARCH_CONFIG}', coalesce(details, '{{}}'::jsonb), "
+    f"'[\"string\", \"numeric\"]'), 'C')"
+)
+
 
 class AuditLog(Base):
     """
@@ -28,15 +57,16 @@ class AuditLog(Base):
     """
     __tablename__ = "audit_logs"
 
-    # Primary Key
+    # Primary Key (partitioned tables must include the partition key)
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
-    # Foreign Keys (nullable for system-level events)
-    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=True, index=True)
-    organization_id = Column(UUID(as_uuid=True), ForeignKey('organizations.id'), nullable=True, index=True)
+    # References (nullable for system-level events). Not foreign keys: entries
+    # outlive the users they mention and partitions are bulk-loaded by the relay.
+    user_id = Column(UUID(as_uuid=True), nullable=True)
+    organization_id = Column(UUID(as_uuid=True), nullable=True)
 
     # Event Information
-    action = Column(String(100), nullable=False, index=True)  # 'user_signup', 'user_login', etc.
+    action = Column(String(100), nullable=False)  # 'user_signup', 'user_login', etc.
     entity_type = Column(String(50), nullable=True)  # 'user', 'company', 'role', etc.
     entity_id = Column(UUID(as_uuid=True), nullable=True)
 
@@ -48,11 +78,25 @@ class AuditLog(Base):
     user_agent = Column(Text, nullable=True)
 
     # Timestamps
-    created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
+    created_at = Column(DateTime, primary_key=True, nullable=False, server_default=func.now())
+
+    # Full-text search document (generated by PostgreSQL)
+    search_vector = Column(TSVECTOR, Computed(AUDIT_SEARCH_VECTOR_SQL, persisted=True))
 
     # Relationships
-    user = relationship("User", foreign_keys=[user_id])
-    organization = relationship("Organization", foreign_keys=[organization_id])
+    user = relationship("User", primaryjoin="foreign(AuditLog.user_id) == User.id", viewonly=True)
+    organization = relationship(
+        "Organization", primaryjoin="foreign(AuditLog.organization_id) == Organization.id", viewonly=True
+    )
+
+    __table_args__ = (
+        Index('idx_audit_logs_org_user_created', 'organization_id', 'user_id', 'created_at'),
+        Index('idx_audit_logs_org_action', 'organization_id', 'action'),
+        Index('idx_audit_logs_org_created', 'organization_id', 'created_at'),
+        Index('idx_audit_logs_created_brin', 'created_at', postgresql_using='brin'),
+        Index('idx_audit_logs_search', 'search_vector', postgresql_using='gin'),
+        {'postgresql_partition_by': 'RANGE (created_at)'}
+    )
 
     def __repr__(self):
         return f"<AuditLog(action='{self.action}', user_id={self.user_id}, created_at={self.created_at})>"
@@ -70,3 +114,82 @@ class AuditLog(Base):
             "ip_address": self.ip_address,
             "created_at": self.created_at.isoformat() if self.created_at else None
         }
+
+
+class AuditLogOutbox(Base):
+    """
+    Audit entries committed with their business transaction, awaiting relay.
+
+    Deliberately has no secondary indexes so the insert on the request path
+    stays cheap; rows are removed as soon as the relay copies them.
+    """
+    __tablename__ = "audit_log_outbox"
+
+    seq = Column(BigInteger, Identity(), primary_key=True)
+
+    id = Column(UUID(as_uuid=True), nullable=False, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), nullable=True)
+    organization_id = Column(UUID(as_uuid=True), nullable=True)
+    action = Column(String(100), nullable=False)
+    entity_type = Column(String(50), nullable=True)
+    entity_id = Column(UUID(as_uuid=True), nullable=True)
+    details = Column(JSONB, nullable=True)
+    ip_address = Column(String(50), nullable=True)
+    user_agent = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    def __repr__(self):
+        return f"<AuditLogOutbox(seq={self.seq}, action='{self.action}')>"
+
+
+AUDIT_LOG_COLUMNS = (
+    "id, user_id, organization_id, action, entity_type, entity_id, "
+    "details, ip_address, user_agent, created_at"
+)
+
+
+AUDIT_DEFAULT_PARTITION_SQL = (
+    "CREATE TABLE IF NOT EXISTS audit_logs_default PARTITION OF audit_logs DEFAULT"
+)
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + (month.month == 12), month.month % 12 + 1, 1)
+
+
+def audit_partition_statements(first_month: date, last_month: date) -> List[str]:
+    """
+    Statements creating the monthly audit_logs partitions in a range.
+
+    Args:
+        first_month: Any day in the first month
+        last_month: Any day in the last month (inclusive)
+    """
+    statements = []
+    month = _month_start(first_month)
+    while month <= _month_start(last_month):
+        following = _next_month(month)
+        statements.append(
+            f"CREATE TABLE IF NOT EXISTS audit_logs_y{month.year}m{month.month:02d} "
+            f"PARTITION OF audit_logs FOR VALUES FROM ('{month}') TO ('{following}')"
+        )
+        month = following
+    return statements
+
+
+def _create_audit_partitions(target, connection, **kw):
+    """Create the default and upcoming partitions when `create_all` creates audit_logs"""
+    if connection.dialect.name != "postgresql":
+        return
+    today = date.today()
+    last_month = today + timedelta(days=31 * settings.AUDIT_PARTITION_MONTHS_AHEAD)
+    connection.exec_driver_sql(AUDIT_DEFAULT_PARTITION_SQL)
+    for statement in audit_partition_statements(today, last_month):
+        connection.exec_driver_sql(statement)
+
+
+event.listen(AuditLog.__table__, "after_create", _create_audit_partitions)
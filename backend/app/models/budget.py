@@ -3,7 +3,7 @@ Budget model for fleet management.
 Tracks budgets for expense categories with spend monitoring.
 """
 
-from sqlalchemy import Column, String, Date, DateTime, Numeric, ForeignKey, CheckConstraint, Index
+from sqlalchemy import Column, String, Date, DateTime, Integer, Numeric, ForeignKey, CheckConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -17,7 +17,8 @@ class Budget(Base):
     """
     Budget model for expense tracking and monitoring.
 
-    Tracks allocated budgets by category and period with automatic spend updates.
+    Tracks allocated budgets by category and period. Spend totals are kept
+    up to date by the budget ledger (app/services/budget_ledger.py).
     """
     __tablename__ = "budgets"
 
@@ -44,7 +45,8 @@ class Budget(Base):
     # Amounts
     allocated_amount = Column(Numeric(12, 2), nullable=False)
     spent_amount = Column(Numeric(12, 2), nullable=False, default=0)
-    remaining_amount = Column(Numeric(12, 2), nullable=False)
+    remaining_amount = Column(Numeric(12, 2), nullable=False)  # Negative once exceeded
+    expense_count = Column(Integer, nullable=False, default=0, server_default='0')  # Approved/paid expenses counted
 
     # Alert Threshold
     alert_threshold_percent = Column(Numeric(5, 2), nullable=False, default=80)  # Alert at 80% by default
@@ -82,10 +84,6 @@ class Budget(Base):
             "spent_amount >= 0",
             name='check_budget_spent_positive'
         ),
-        CheckConstraint(
-            "remaining_amount >= 0",
-            name='check_budget_remaining_positive'
-        ),
         CheckConstraint(
             "alert_threshold_percent > 0 AND alert_threshold_percent <= 100",
             name='check_budget_threshold_range'
@@ -0,0 +1,40 @@
+"""
+Document Sequence Model
+Counters behind expense, invoice and payment numbers, and the trip number sequence.
+
+One row per (organization, prefix, period). A number is taken with a single
+upsert that increments `last_value` and returns it, so creates never scan the
+documents table and concurrent creates cannot get the same number.
+
+Trip numbers are shared by all organizations and never reset, so they come
+from a native PostgreSQL sequence instead: `nextval` takes no row lock that
+would be held until the creating transaction commits.
+"""
+
+from sqlalchemy import Column, String, BigInteger, DateTime, Sequence
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+import uuid
+
+from app.database import Base
+
+# Scope of counters that are not per organization
+GLOBAL_SCOPE = uuid.UUID(int=0)
+
+TRIP_NUMBER_SEQUENCE = Sequence("trip_number_seq", metadata=Base.metadata)
+
+
+class DocumentSequence(Base):
+    """Last number handed out for an organization, prefix and period"""
+    __tablename__ = "document_sequences"
+
+    # No foreign key: GLOBAL_SCOPE is not an organization
+    organization_id = Column(UUID(as_uuid=True), primary_key=True)
+    prefix = Column(String(10), primary_key=True)  # EXP, INV, PAY
+    period = Column(String(6), primary_key=True)  # YYYYMM, or '' for counters that never reset
+
+    last_value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<DocumentSequence(org={self.organization_id}, prefix='{self.prefix}', period='{self.period}', last={self.last_value})>"
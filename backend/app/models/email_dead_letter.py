@@ -0,0 +1,42 @@
+"""
+Email Dead Letter Model
+Outbound emails that could not be delivered after all retries
+"""
+
+from sqlalchemy import Column, String, Text, Integer, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+import uuid
+
+from app.database import Base
+
+
+class EmailDeadLetter(Base):
+    """
+    Email Dead Letter model.
+
+    Written by the email queue worker when a message exhausts
+    EMAIL_MAX_RETRIES. Rows keep the full message so it can be inspected
+    and re-queued once the underlying problem is fixed.
+    """
+    __tablename__ = "email_dead_letters"
+
+    # Primary Key
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    # Message
+    to_email = Column(String(255), nullable=False, index=True)
+    subject = Column(String(500), nullable=False)
+    html_content = Column(Text, nullable=False)
+    text_content = Column(Text, nullable=True)
+
+    # Delivery Information
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+
+    # Timestamps
+    queued_at = Column(DateTime, nullable=False)
+    failed_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
+
+    def __repr__(self):
+        return f"<EmailDeadLetter(to='{self.to_email}', subject='{self.subject}', attempts={self.attempts})>"
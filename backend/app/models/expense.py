@@ -32,7 +32,7 @@ class Expense(Base):
     )
 
     # Expense Identification
-    expense_number = Column(String(50), nullable=False, unique=True, index=True)
+    expense_number = Column(String(50), nullable=False, index=True)  # Unique per organization
 
     # Expense Details
     category = Column(String(50), nullable=False, index=True)
@@ -200,6 +200,12 @@ class ExpenseAttachment(Base):
     file_path = Column(String(500), nullable=False)
     file_size = Column(Numeric(12, 0), nullable=False)
     file_type = Column(String(50), nullable=True)
+    content_hash = Column(
+        String(64),
+        ForeignKey("attachment_blobs.sha256"),
+        nullable=True,  # NULL for attachments recorded before content-addressed storage
+        index=True
+    )
 
     # Upload Information
     uploaded_by = Column(
@@ -212,6 +218,12 @@ class ExpenseAttachment(Base):
     # Relationships
     expense = relationship("Expense", back_populates="attachments")
     uploader = relationship("User")
+    blob = relationship("AttachmentBlob", lazy="joined")
+
+    @property
+    def thumbnail_status(self):
+        """pending, ready or failed; None when the file has no thumbnail"""
+        return self.blob.thumbnail_status if self.blob else None
 
     def __repr__(self):
         return f"<ExpenseAttachment(id={self.id}, expense_id={self.expense_id}, file_name='{self.file_name}')>"
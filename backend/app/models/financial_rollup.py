@@ -0,0 +1,250 @@
+"""
+Financial rollup models.
+Per-organization, per-day aggregates of expenses, payments and invoices.
+
+The rollups are maintained by PostgreSQL row triggers on the source tables,
+in the same transaction as the change, so summaries read from them are always
+consistent with the raw rows. Each trigger subtracts the old row's
+contribution and adds the new one with an upsert. UPDATE triggers only fire
+when a rolled-up column changes.
+
+The trigger SQL is kept here so that migration 032 and `create_all` install
+the same definitions.
+"""
+
+from sqlalchemy import Column, String, Date, Integer, Numeric, ForeignKey, event, text
+from sqlalchemy.dialects.postgresql import UUID
+import uuid
+
+from app.database import Base
+from app.models.expense import Expense
+from app.models.invoice import Invoice
+from app.models.payment import Payment
+
+# Rollup key used for expenses without a vehicle (primary key columns cannot be NULL)
+NO_VEHICLE = uuid.UUID(int=0)
+
+
+class ExpenseDailyRollup(Base):
+    """Expense totals per organization, day, category, status and vehicle"""
+    __tablename__ = "expense_daily_rollups"
+
+    organization_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("organizations.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    day = Column(Date, primary_key=True)  # expense_date
+    category = Column(String(50), primary_key=True)
+    status = Column(String(20), primary_key=True)
+    vehicle_id = Column(UUID(as_uuid=True), primary_key=True, default=NO_VEHICLE)
+
+    total_amount = Column(Numeric(14, 2), nullable=False, default=0)
+    row_count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ExpenseDailyRollup(org={self.organization_id}, day={self.day}, category='{self.category}', total={self.total_amount})>"
+
+
+class PaymentDailyRollup(Base):
+    """Payment totals per organization, day, type and method"""
+    __tablename__ = "payment_daily_rollups"
+
+    organization_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("organizations.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    day = Column(Date, primary_key=True)  # payment_date
+    payment_type = Column(String(20), primary_key=True)
+    payment_method = Column(String(50), primary_key=True)
+
+    total_amount = Column(Numeric(14, 2), nullable=False, default=0)
+    row_count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<PaymentDailyRollup(org={self.organization_id}, day={self.day}, type='{self.payment_type}', total={self.total_amount})>"
+
+
+class InvoiceDailyRollup(Base):
+    """
+    Invoice totals per organization, invoice day, due date and status.
+
+    The due date is part of the key so overdue counts can be derived for any
+    "today" without touching the invoices table.
+    """
+    __tablename__ = "invoice_daily_rollups"
+
+    organization_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("organizations.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    day = Column(Date, primary_key=True)  # invoice_date
+    due_date = Column(Date, primary_key=True)
+    status = Column(String(20), primary_key=True)
+
+    total_amount = Column(Numeric(14, 2), nullable=False, default=0)
+    amount_paid = Column(Numeric(14, 2), nullable=False, default=0)
+    row_count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<InvoiceDailyRollup(org={self.organization_id}, day={self.day}, status='{self.status}', total={self.total_amount})>"
+
+
+# ============================================================================
+# Trigger definitions
+# ============================================================================
+
+ROLLUP_FUNCTIONS = {
+    "expenses": """
+CREATE OR REPLACE FUNCTION rollup_expenses() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE expense_daily_rollups
+           SET total_amount = total_amount - OLD.total_amount, row_count = row_count - 1
+         WHERE organization_id = OLD.organization_id AND day = OLD.expense_date
+           AND category = OLD.category AND status = OLD.status
+           AND vehicle_id = COALESCE(OLD.vehicle_id, '00000000-0000-0000-0000-000000000000'::uuid);
+        DELETE FROM expense_daily_rollups
+         WHERE organization_id = OLD.organization_id AND day = OLD.expense_date
+           AND category = OLD.category AND status = OLD.status
+           AND vehicle_id = COALESCE(OLD.vehicle_id, '00000000-0000-0000-0000-000000000000'::uuid)
+           AND row_count <= 0;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO expense_daily_rollups
+            (organization_id, day, category, status, vehicle_id, total_amount, row_count)
+        VALUES
+            (NEW.organization_id, NEW.expense_date, NEW.category, NEW.status,
+             COALESCE(NEW.vehicle_id, '00000000-0000-0000-0000-000000000000'::uuid), NEW.total_amount, 1)
+        ON CONFLICT (organization_id, day, category, status, vehicle_id) DO UPDATE
+            SET total_amount = expense_daily_rollups.total_amount + EXCLUDED.total_amount,
+                row_count = expense_daily_rollups.row_count + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+""",
+    "payments": """
+CREATE OR REPLACE FUNCTION rollup_payments() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE payment_daily_rollups
+           SET total_amount = total_amount - OLD.amount, row_count = row_count - 1
+         WHERE organization_id = OLD.organization_id AND day = OLD.payment_date
+           AND payment_type = OLD.payment_type AND payment_method = OLD.payment_method;
+        DELETE FROM payment_daily_rollups
+         WHERE organization_id = OLD.organization_id AND day = OLD.payment_date
+           AND payment_type = OLD.payment_type AND payment_method = OLD.payment_method
+           AND row_count <= 0;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO payment_daily_rollups
+            (organization_id, day, payment_type, payment_method, total_amount, row_count)
+        VALUES
+            (NEW.organization_id, NEW.payment_date, NEW.payment_type, NEW.payment_method, NEW.amount, 1)
+        ON CONFLICT (organization_id, day, payment_type, payment_method) DO UPDATE
+            SET total_amount = payment_daily_rollups.total_amount + EXCLUDED.total_amount,
+                row_count = payment_daily_rollups.row_count + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+""",
+    "invoices": """
+CREATE OR REPLACE FUNCTION rollup_invoices() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE invoice_daily_rollups
+           SET total_amount = total_amount - OLD.total_amount,
+               amount_paid = amount_paid - OLD.amount_paid,
+               row_count = row_count - 1
+         WHERE organization_id = OLD.organization_id AND day = OLD.invoice_date
+           AND due_date = OLD.due_date AND status = OLD.status;
+        DELETE FROM invoice_daily_rollups
+         WHERE organization_id = OLD.organization_id AND day = OLD.invoice_date
+           AND due_date = OLD.due_date AND status = OLD.status
+           AND row_count <= 0;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO invoice_daily_rollups
+            (organization_id, day, due_date, status, total_amount, amount_paid, row_count)
+        VALUES
+            (NEW.organization_id, NEW.invoice_date, NEW.due_date, NEW.status,
+             NEW.total_amount, NEW.amount_paid, 1)
+        ON CONFLICT (organization_id, day, due_date, status) DO UPDATE
+            SET total_amount = invoice_daily_rollups.total_amount + EXCLUDED.total_amount,
+                amount_paid = invoice_daily_rollups.amount_paid + EXCLUDED.amount_paid,
+                row_count = invoice_daily_rollups.row_count + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+""",
+}
+
+# source table -> columns whose change affects the rollup
+ROLLUP_COLUMNS = {
+    "expenses": "organization_id, expense_date, category, status, vehicle_id, total_amount",
+    "payments": "organization_id, payment_date, payment_type, payment_method, amount",
+    "invoices": "organization_id, invoice_date, due_date, status, total_amount, amount_paid",
+}
+
+# source table -> INSERT ... SELECT that rebuilds its rollup from scratch
+ROLLUP_BACKFILL = {
+    "expenses": """
+INSERT INTO expense_daily_rollups (organization_id, day, category, status, vehicle_id, total_amount, row_count)
+SELECT organization_id, expense_date, category, status,
+       COALESCE(vehicle_id, '00000000-0000-0000-0000-000000000000'::uuid), SUM(total_amount), COUNT(*)
+  FROM expenses
+ GROUP BY 1, 2, 3, 4, 5
+""",
+    "payments": """
+INSERT INTO payment_daily_rollups (organization_id, day, payment_type, payment_method, total_amount, row_count)
+SELECT organization_id, payment_date, payment_type, payment_method, SUM(amount), COUNT(*)
+  FROM payments
+ GROUP BY 1, 2, 3, 4
+""",
+    "invoices": """
+INSERT INTO invoice_daily_rollups (organization_id, day, due_date, status, total_amount, amount_paid, row_count)
+SELECT organization_id, invoice_date, due_date, status, SUM(total_amount), SUM(amount_paid), COUNT(*)
+  FROM invoices
+ GROUP BY 1, 2, 3, 4
+""",
+}
+
+ROLLUP_TABLES = {
+    "expenses": "expense_daily_rollups",
+    "payments": "payment_daily_rollups",
+    "invoices": "invoice_daily_rollups",
+}
+
+
+def rollup_trigger_sql(source_table: str) -> list:
+    """Statements installing the rollup function and trigger for a source table"""
+    return [
+        ROLLUP_FUNCTIONS[source_table],
+        f"DROP TRIGGER IF EXISTS trg_{source_table}_rollup ON {source_table}",
+        f"CREATE TRIGGER trg_{source_table}_rollup "
+        f"AFTER INSERT OR DELETE OR UPDATE OF {ROLLUP_COLUMNS[source_table]} ON {source_table} "
+        f"FOR EACH ROW EXECUTE FUNCTION rollup_{source_table}()",
+    ]
+
+
+def rebuild_rollups(connection, source_table: str) -> None:
+    """Recompute a rollup table from its source table (backfill or repair)"""
+    connection.execute(text(f"DELETE FROM {ROLLUP_TABLES[source_table]}"))
+    connection.execute(text(ROLLUP_BACKFILL[source_table]))
+
+
+def _install_rollup_triggers(target, connection, **kw):
+    """Install the rollup trigger when `create_all` creates a source table"""
+    if connection.dialect.name != "postgresql":
+        return
+    for statement in rollup_trigger_sql(target.name):
+        connection.exec_driver_sql(statement)
+
+
+for _source in (Expense, Payment, Invoice):
+    event.listen(_source.__table__, "after_create", _install_rollup_triggers)
@@ -33,7 +33,7 @@ class Invoice(Base):
     )
 
     # Invoice Identification
-    invoice_number = Column(String(50), nullable=False, unique=True, index=True)
+    invoice_number = Column(String(50), nullable=False, index=True)  # Unique per organization
 
     # Customer Information
     customer_name = Column(String(255), nullable=False)
@@ -124,7 +124,7 @@ class Invoice(Base):
     @property
     def is_overdue(self) -> bool:
         """Check if invoice is overdue"""
-        return (
+        return self.status == 'overdue' or (
             self.status in ['sent', 'partially_paid'] and
             self.due_date < date_type.today()
         )
@@ -147,6 +147,13 @@ class Invoice(Base):
         """Check if payment can be recorded"""
         return self.status in ['sent', 'partially_paid', 'overdue']
 
+    def update_payment_status(self) -> None:
+        """Set status from amount paid (overdue invoices stay overdue until fully paid)"""
+        if self.is_fully_paid:
+            self.status = 'paid'
+        elif self.status != 'overdue':
+            self.status = 'partially_paid' if self.amount_paid > 0 else 'sent'
+
 
 class InvoiceLineItem(Base):
     """
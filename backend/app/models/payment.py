@@ -32,7 +32,7 @@ class Payment(Base):
     )
 
     # Payment Identification
-    payment_number = Column(String(50), nullable=False, unique=True, index=True)
+    payment_number = Column(String(50), nullable=False, index=True)  # Unique per organization
 
     # Payment Details
     payment_type = Column(String(20), nullable=False, index=True)  # received or paid
@@ -0,0 +1,63 @@
+"""
+Refresh Token Family Model
+Server-side record of refresh-token sessions for rotation and revocation
+"""
+
+from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+import uuid
+
+from app.database import Base
+
+
+class RefreshTokenFamily(Base):
+    """
+    Refresh Token Family model.
+
+    One row per login session. Every refresh token issued for the session
+    (the original and each rotated successor) carries the family ID in its
+    `fid` claim. Revoking the family invalidates all of them at once.
+
+    Rotation itself is tracked in the token store (Redis, or
+    `refresh_token_uses` without Redis), so refreshing a token never writes
+    to this table.
+    """
+    __tablename__ = "refresh_token_families"
+
+    # Primary Key (the `fid` claim)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    # Foreign Keys
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+
+    # Revocation
+    revoked_at = Column(DateTime, nullable=True, index=True)
+    revoke_reason = Column(String(50), nullable=True)  # 'logout', 'reuse_detected', 'password_reset', ...
+
+    # Timestamps
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    def __repr__(self):
+        return f"<RefreshTokenFamily(id={self.id}, user_id={self.user_id}, revoked={self.revoked_at is not None})>"
+
+    def is_revoked(self) -> bool:
+        """Check if the session has been revoked"""
+        return self.revoked_at is not None
+
+
+class RefreshTokenUse(Base):
+    """
+    Refresh token that has been used, when Redis is not configured.
+
+    Inserting the token's `jti` is the atomic claim shared by all workers; a
+    second insert of the same ID is a reuse. Rows are deleted once the token
+    would have expired anyway.
+    """
+    __tablename__ = "refresh_token_uses"
+
+    token_id = Column(UUID(as_uuid=True), primary_key=True)  # the `jti` claim
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<RefreshTokenUse(token_id={self.token_id}, expires_at={self.expires_at})>"
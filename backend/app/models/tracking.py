@@ -3,7 +3,7 @@ GPS Tracking Models
 Represents location tracking, geofence events, and route optimizations
 """
 
-from sqlalchemy import Column, String, Float, Integer, Boolean, DateTime, ForeignKey, CheckConstraint, Index, Numeric
+from sqlalchemy import Column, String, Float, Integer, Boolean, Date, DateTime, ForeignKey, CheckConstraint, Index, Numeric, event
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -83,6 +83,97 @@ class DriverLocation(Base):
         return f"<DriverLocation(id={self.id}, driver_id={self.driver_id}, lat={self.latitude}, lng={self.longitude}, timestamp={self.timestamp})>"
 
 
+class DriverDailyDistance(Base):
+    """
+    GPS distance driven per driver and day (UTC), the partial aggregate of
+    distance-based KPIs.
+
+    A row trigger on driver_locations marks the point's day (and the next
+    day, whose first segment starts at this day's last point) stale; the KPI
+    refresher recomputes only stale rows (`KPIService.refresh_distances`).
+    """
+    __tablename__ = "driver_daily_distances"
+
+    driver_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("drivers.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    day = Column(Date, primary_key=True)
+    organization_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("organizations.id", ondelete="CASCADE"),
+        nullable=False
+    )
+
+    distance_km = Column(Numeric(12, 3), nullable=False, default=0)
+    point_count = Column(Integer, nullable=False, default=0)
+    stale = Column(Boolean, nullable=False, default=True)
+
+    __table_args__ = (
+        Index('idx_driver_daily_distances_org_day', 'organization_id', 'day'),
+        Index('idx_driver_daily_distances_stale', 'day', postgresql_where=stale),
+    )
+
+    def __repr__(self):
+        return f"<DriverDailyDistance(driver_id={self.driver_id}, day={self.day}, km={self.distance_km}, stale={self.stale})>"
+
+
+DISTANCE_TRIGGER_SQL = [
+    """
+CREATE OR REPLACE FUNCTION mark_driver_day_stale(org uuid, driver uuid, point_time timestamptz) RETURNS void AS $$
+DECLARE
+    point_day date := CAST(point_time AT TIME ZONE 'UTC' AS date);
+BEGIN
+    INSERT INTO driver_daily_distances (driver_id, day, organization_id, distance_km, point_count, stale)
+    VALUES (driver, point_day, org, 0, 0, true)
+    ON CONFLICT (driver_id, day) DO UPDATE SET stale = true
+        WHERE NOT driver_daily_distances.stale;
+    UPDATE driver_daily_distances SET stale = true
+     WHERE driver_id = driver AND day = point_day + 1 AND NOT stale;
+END;
+$$ LANGUAGE plpgsql;
+""",
+    """
+CREATE OR REPLACE FUNCTION mark_driver_distance_stale() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM mark_driver_day_stale(OLD.organization_id, OLD.driver_id, OLD.timestamp);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM mark_driver_day_stale(NEW.organization_id, NEW.driver_id, NEW.timestamp);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+""",
+    "DROP TRIGGER IF EXISTS trg_driver_locations_distance ON driver_locations",
+    "CREATE TRIGGER trg_driver_locations_distance "
+    "AFTER INSERT OR DELETE OR UPDATE OF driver_id, latitude, longitude, is_mock_location, timestamp "
+    "ON driver_locations FOR EACH ROW EXECUTE FUNCTION mark_driver_distance_stale()",
+]
+
+# Marks every driver-day with points stale; the refresher then computes them
+DISTANCE_BACKFILL_SQL = """
+INSERT INTO driver_daily_distances (driver_id, day, organization_id, distance_km, point_count, stale)
+SELECT driver_id, CAST(timestamp AT TIME ZONE 'UTC' AS date), (array_agg(organization_id))[1], 0, 0, true
+  FROM driver_locations
+ GROUP BY 1, 2
+ON CONFLICT (driver_id, day) DO UPDATE SET stale = true
+"""
+
+
+def _install_distance_trigger(target, connection, **kw):
+    """Install the distance trigger when `create_all` creates driver_locations"""
+    if connection.dialect.name != "postgresql":
+        return
+    for statement in DISTANCE_TRIGGER_SQL:
+        connection.exec_driver_sql(statement)
+
+
+event.listen(DriverLocation.__table__, "after_create", _install_distance_trigger)
+
+
 class GeofenceEvent(Base):
     """
     Geofence Event model.
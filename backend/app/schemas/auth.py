@@ -176,6 +176,7 @@ class LoginResponse(BaseModel):
     """Login success response"""
     success: bool
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str = "bearer"
     user_id: str
     username: str
@@ -248,3 +249,15 @@ class TokenResponse(BaseModel):
     """Generic token response"""
     access_token: str
     token_type: str = "bearer"
+
+
+class RefreshTokenRequest(BaseModel):
+    """Refresh token exchange / logout request"""
+    refresh_token: str = Field(..., min_length=10)
+
+
+class RefreshTokenResponse(BaseModel):
+    """Rotated token pair"""
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
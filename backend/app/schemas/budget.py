@@ -71,6 +71,7 @@ class BudgetResponse(BaseModel):
     allocated_amount: Decimal
     spent_amount: Decimal
     remaining_amount: Decimal
+    expense_count: int = 0
     alert_threshold_percent: Decimal
     created_by: Optional[UUID] = None
     created_at: datetime
@@ -181,3 +182,28 @@ class BudgetSummaryResponse(BaseModel):
     overall_percentage: Decimal
     over_threshold_count: int
     exceeded_count: int
+
+
+class BudgetForecastItem(BaseModel):
+    """Spend forecast for one budget"""
+    budget_id: str
+    name: str
+    category: str
+    start_date: date
+    end_date: date
+    allocated_amount: Decimal
+    spent_amount: Decimal
+    days_observed: int
+    days_remaining: int
+    daily_rate: Decimal
+    projected_total: Decimal
+    projected_percentage: Decimal
+    overrun_probability: float
+    exhaustion_date: Optional[date] = None
+
+
+class BudgetForecastResponse(BaseModel):
+    """Spend forecasts for an organization's budgets"""
+    method: str
+    as_of: date
+    forecasts: List[BudgetForecastItem]
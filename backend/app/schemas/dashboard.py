@@ -0,0 +1,50 @@
+"""
+Dashboard Schemas
+Pydantic models for dashboard endpoints
+"""
+
+from pydantic import BaseModel, ConfigDict
+from typing import Optional, List, Any
+from datetime import datetime
+from uuid import UUID
+
+
+class DashboardResponse(BaseModel):
+    """Dashboard summary"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    dashboard_name: str
+    description: Optional[str] = None
+    layout_config: Optional[dict] = None
+    is_default: bool
+    is_shared: bool
+    owner_id: UUID
+    updated_at: datetime
+
+
+class DashboardListResponse(BaseModel):
+    """Dashboards visible to the user"""
+    dashboards: List[DashboardResponse]
+    total: int
+
+
+class WidgetDataResponse(BaseModel):
+    """Resolved data of one widget"""
+    widget_id: UUID
+    widget_name: str
+    widget_type: str
+    data: Optional[Any] = None
+    error: Optional[str] = None
+    cached: bool
+    computed_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    refresh_interval_seconds: Optional[int] = None
+
+
+class DashboardDataResponse(BaseModel):
+    """All widget data of a dashboard"""
+    dashboard_id: UUID
+    dashboard_name: str
+    generated_at: datetime
+    widgets: List[WidgetDataResponse]
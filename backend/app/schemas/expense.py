@@ -19,10 +19,17 @@ class ExpenseAttachmentResponse(BaseModel):
     file_path: str
     file_size: Decimal
     file_type: Optional[str] = None
+    content_hash: Optional[str] = Field(None, description="SHA-256 of the file")
+    thumbnail_status: Optional[str] = Field(None, description="pending, ready or failed; null if none")
     uploaded_by: Optional[UUID] = None
     uploaded_at: datetime
 
 
+class ExpenseAttachmentListResponse(BaseModel):
+    """Expense attachments"""
+    attachments: List[ExpenseAttachmentResponse]
+
+
 class ExpenseCreateRequest(BaseModel):
     """Create new expense request"""
     category: str = Field(..., description="Expense category")
@@ -135,6 +142,23 @@ class ExpenseListResponse(BaseModel):
     expenses: List[ExpenseResponse]
 
 
+class ExpenseImportError(BaseModel):
+    """Rejected row of an expense import"""
+    row: int = Field(..., description="Line number in the file (header is line 1)")
+    message: str
+
+
+class ExpenseImportResponse(BaseModel):
+    """Expense import result"""
+    success: bool
+    dry_run: bool
+    total_rows: int
+    imported: int
+    failed: int
+    errors: List[ExpenseImportError]
+    errors_truncated: bool = Field(..., description="More rows failed than are listed")
+
+
 class ExpenseSummaryItem(BaseModel):
     """Expense summary item"""
     category: Optional[str] = None
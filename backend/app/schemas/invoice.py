@@ -3,7 +3,7 @@ Invoice Schemas
 Pydantic models for invoice endpoints
 """
 
-from pydantic import BaseModel, Field, field_validator, ConfigDict
+from pydantic import BaseModel, Field, field_validator, model_validator, ConfigDict
 from typing import Optional, List
 from datetime import date, datetime
 from decimal import Decimal
@@ -18,6 +18,29 @@ class InvoiceLineItemRequest(BaseModel):
     vehicle_id: Optional[UUID] = Field(None, description="Related vehicle")
 
 
+class InvoiceLineItemUpdate(InvoiceLineItemRequest):
+    """Replacement values for an existing line item"""
+    id: UUID
+
+
+class InvoiceLineItemBulkRequest(BaseModel):
+    """Add, update and delete line items of a draft invoice in one request"""
+    add: List[InvoiceLineItemRequest] = Field(default_factory=list)
+    update: List[InvoiceLineItemUpdate] = Field(default_factory=list)
+    delete: List[UUID] = Field(default_factory=list)
+
+    @model_validator(mode='after')
+    def validate_changes(self):
+        """Require at least one change and touch each line item once"""
+        if not (self.add or self.update or self.delete):
+            raise ValueError('At least one line item change is required')
+
+        ids = [item.id for item in self.update] + self.delete
+        if len(ids) != len(set(ids)):
+            raise ValueError('Each line item can only be updated or deleted once')
+        return self
+
+
 class InvoiceLineItemResponse(BaseModel):
     """Invoice line item response"""
     model_config = ConfigDict(from_attributes=True)
@@ -140,7 +163,7 @@ class InvoiceResponse(BaseModel):
     @property
     def is_overdue(self) -> bool:
         """Check if invoice is overdue"""
-        return (
+        return self.status == 'overdue' or (
             self.status in ['sent', 'partially_paid'] and
             self.due_date < date.today()
         )
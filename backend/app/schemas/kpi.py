@@ -0,0 +1,80 @@
+"""
+KPI Schemas
+Pydantic models for KPI endpoints
+"""
+
+from pydantic import BaseModel, Field, field_validator, ConfigDict
+from typing import Optional, List, Dict, Any
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+
+
+class KPICreateRequest(BaseModel):
+    """Create new KPI request"""
+    kpi_name: str = Field(..., min_length=2, max_length=255)
+    kpi_code: str = Field(..., min_length=2, max_length=50, description="Unique code within the organization")
+    description: Optional[str] = None
+    category: str = Field(..., max_length=50, description="fleet, financial, maintenance, etc.")
+    calculation_config: Dict[str, Any] = Field(..., description="Metric, window_days, filters")
+    target_value: Optional[Decimal] = None
+    min_threshold: Optional[Decimal] = None
+    max_threshold: Optional[Decimal] = None
+    display_config: Optional[Dict[str, Any]] = None
+
+    @field_validator('calculation_config')
+    @classmethod
+    def validate_calculation_config(cls, v):
+        """Validate the rolling window"""
+        window_days = v.get('window_days', 30)
+        if not isinstance(window_days, int) or not 1 <= window_days <= 366:
+            raise ValueError('window_days must be an integer between 1 and 366')
+        return v
+
+
+class KPIResponse(BaseModel):
+    """KPI with its precomputed value"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    kpi_name: str
+    kpi_code: str
+    description: Optional[str] = None
+    category: str
+    calculation_config: Dict[str, Any]
+    target_value: Optional[Decimal] = None
+    min_threshold: Optional[Decimal] = None
+    max_threshold: Optional[Decimal] = None
+    display_config: Optional[Dict[str, Any]] = None
+    current_value: Optional[Decimal] = None
+    last_calculated_at: Optional[datetime] = None
+    is_above_target: bool = False
+    is_below_min: bool = False
+    is_above_max: bool = False
+
+
+class KPIListResponse(BaseModel):
+    """List of KPIs"""
+    kpis: List[KPIResponse]
+    total: int
+
+
+class KPIHistoryPoint(BaseModel):
+    """One KPI snapshot"""
+    model_config = ConfigDict(from_attributes=True)
+
+    value: Decimal
+    calculated_at: datetime
+    calculation_details: Optional[Dict[str, Any]] = None
+
+
+class KPIHistoryResponse(BaseModel):
+    """KPI trend"""
+    kpi_id: UUID
+    kpi_code: str
+    history: List[KPIHistoryPoint]
+
+
+class KPIRefreshResponse(BaseModel):
+    """Result of a manual refresh"""
+    refreshed: int
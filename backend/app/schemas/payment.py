@@ -4,7 +4,7 @@ Pydantic models for payment endpoints
 """
 
 from pydantic import BaseModel, Field, field_validator, ConfigDict
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import date, datetime
 from decimal import Decimal
 from uuid import UUID
@@ -163,6 +163,24 @@ class PaymentPeriodSummaryResponse(BaseModel):
     period_type: str
 
 
+class CashFlowPoint(BaseModel):
+    """Cash flow of one period"""
+    period_start: date
+    received: Decimal
+    paid: Decimal
+    net_flow: Decimal
+    cumulative_net: Decimal = Field(..., description="Net flow from from_date through this period")
+    count: int
+
+
+class CashFlowResponse(BaseModel):
+    """Cash-flow series by granularity"""
+    from_date: date
+    to_date: date
+    series: Dict[str, List[CashFlowPoint]] = Field(..., description="day, week and/or month series")
+    cached: bool
+
+
 class PaymentSummaryResponse(BaseModel):
     """Overall payment summary"""
     total_received: Decimal
@@ -171,3 +189,86 @@ class PaymentSummaryResponse(BaseModel):
     received_count: int
     paid_count: int
     total_count: int
+
+
+class ReconciliationCandidate(BaseModel):
+    """Invoice or expense proposed for a statement line"""
+    entity_type: str = Field(..., description="invoice or expense")
+    entity_id: UUID
+    number: str
+    counterparty: Optional[str] = None
+    amount_due: Decimal
+    confidence: float = Field(..., description="1.0 reference and amount, 0.8 reference, 0.7 amount and date, 0.4 ambiguous")
+    reason: str = Field(..., description="reference_amount, reference or amount_date")
+
+
+class ReconciliationLine(BaseModel):
+    """Matching result of one statement line"""
+    row: int = Field(..., description="Line number in the file (header is line 1)")
+    date: date
+    amount: Decimal
+    direction: str = Field(..., description="credit or debit")
+    reference: Optional[str] = None
+    description: Optional[str] = None
+    status: str = Field(..., description="matched, ambiguous, unmatched or already_recorded")
+    match: Optional[ReconciliationCandidate] = None
+
+
+class StatementLineError(BaseModel):
+    """Statement line that could not be read"""
+    row: int
+    message: str
+
+
+class ReconciliationResponse(BaseModel):
+    """Proposed matches for a bank statement"""
+    total_lines: int
+    matched: int
+    ambiguous: int
+    unmatched: int
+    already_recorded: int
+    failed: int
+    lines: List[ReconciliationLine]
+    errors: List[StatementLineError]
+    errors_truncated: bool
+
+
+class ReconciliationMatchConfirm(BaseModel):
+    """A confirmed statement match to record as a payment"""
+    row: Optional[int] = Field(None, description="Statement line number (kept in the payment notes)")
+    entity_type: str = Field(..., description="invoice (received payment) or expense (paid payment)")
+    entity_id: UUID
+    amount: Decimal = Field(..., gt=0)
+    payment_date: date
+    payment_method: str = Field('bank_transfer', description="Payment method")
+    reference_number: Optional[str] = Field(None, max_length=100)
+    bank_name: Optional[str] = Field(None, max_length=255)
+
+    @field_validator('entity_type')
+    @classmethod
+    def validate_entity_type(cls, v):
+        if v not in ('invoice', 'expense'):
+            raise ValueError('Entity type must be invoice or expense')
+        return v
+
+    @field_validator('payment_method')
+    @classmethod
+    def validate_payment_method(cls, v):
+        valid_methods = ['cash', 'bank_transfer', 'cheque', 'upi', 'card', 'other']
+        if v not in valid_methods:
+            raise ValueError(f'Payment method must be one of: {", ".join(valid_methods)}')
+        return v
+
+
+class ReconciliationApplyRequest(BaseModel):
+    """Confirmed matches to record"""
+    matches: List[ReconciliationMatchConfirm] = Field(..., min_length=1, max_length=10000)
+
+
+class ReconciliationApplyResponse(BaseModel):
+    """Recorded reconciliation payments"""
+    payments_created: int
+    invoices_updated: int
+    expenses_updated: int
+    total_received: Decimal
+    total_paid: Decimal
@@ -45,9 +45,9 @@ class DriverListItem(BaseModel):
     full_name: str
     phone: str
     status: str
-    license_number: str
-    license_type: str
-    license_expiry: date
+    license_number: Optional[str]
+    license_type: Optional[str]
+    license_expiry: Optional[date]
     join_date: date
     days_until_expiry: Optional[int]
     is_license_expired: bool
@@ -148,6 +148,33 @@ class AuditLogReportResponse(BaseModel):
     entries: List[AuditLogItem]
 
 
+class AuditLogSearchItem(BaseModel):
+    """Audit log search hit"""
+    id: str
+    timestamp: datetime
+    user_id: Optional[str]
+    username: str
+    action: str
+    entity_type: Optional[str]
+    entity_id: Optional[str]
+    details: Optional[Any]
+    ip_address: Optional[str]
+    rank: float
+
+
+class AuditLogSearchResponse(BaseModel):
+    """Page of audit log search results"""
+    success: bool
+    query: str
+    start_date: date
+    end_date: date
+    sort: str
+    page: int
+    page_size: int
+    has_more: bool
+    entries: List[AuditLogSearchItem]
+
+
 # User Activity Reports
 
 class UserActivityItem(BaseModel):
@@ -187,3 +214,28 @@ class ReportExportResponse(BaseModel):
     file_url: Optional[str]
     download_url: Optional[str]
     expires_at: Optional[datetime]
+
+
+# Report Executions
+
+class ReportExecutionRequest(BaseModel):
+    """Request a background report run"""
+    report_type: Optional[ReportType] = None
+    report_id: Optional[str] = None
+    parameters: Dict[str, Any] = Field(default_factory=dict)
+    force: bool = False
+
+
+class ReportExecutionResponse(BaseModel):
+    """Status (and result, once completed) of a report execution"""
+    success: bool = True
+    execution_id: str
+    report_id: str
+    report_type: str
+    status: str  # pending, running, completed, failed
+    started_at: datetime
+    completed_at: Optional[datetime] = None
+    row_count: Optional[int] = None
+    error_message: Optional[str] = None
+    parameters: Dict[str, Any] = Field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
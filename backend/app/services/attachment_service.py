@@ -0,0 +1,332 @@
+"""
+Attachment Service
+Deduplicated attachment blobs, background thumbnails and file responses
+
+`store` streams an upload into storage and takes a reference on its blob with
+one upsert. A second copy of the same content only bumps `ref_count`. `release`
+drops a reference and deletes the file with the last one. Both statements lock
+the blob row, so an upload of some content cannot interleave with the deletion
+of that same content. The file is removed while the lock is held. If that
+transaction then fails to commit, the next upload of the same content puts the
+file back.
+
+Thumbnails of image uploads are made on a small thread pool after the upload
+commits, keyed by content hash like the files themselves. A thumbnail that
+was lost to a restart is requested again the next time someone asks for it.
+
+Files are served with FileResponse, which answers Range requests and hands
+the path to the server (`http.response.pathsend`) when the server supports it.
+Behind nginx or Apache, ATTACHMENT_SENDFILE_HEADER (X-Accel-Redirect /
+X-Sendfile) leaves the whole transfer to the proxy.
+"""
+
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Optional, Set, Tuple
+from urllib.parse import quote
+
+from fastapi import HTTPException, status
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.attachment_blob import (
+    AttachmentBlob,
+    THUMBNAIL_PENDING,
+    THUMBNAIL_READY,
+    THUMBNAIL_FAILED,
+)
+from app.services.attachment_storage import CHUNK_SIZE, get_attachment_storage, relative_path
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_TYPES = {"image/jpeg", "image/jpg", "image/png", "image/gif", "image/webp", "image/bmp", "image/tiff"}
+
+# Served inline; anything else is a download so uploaded HTML/SVG never runs in the app's origin
+INLINE_TYPES = {"image/jpeg", "image/png", "image/gif", "image/webp", "application/pdf"}
+
+ACQUIRE_SQL = text("""
+INSERT INTO attachment_blobs (sha256, size_bytes, content_type, ref_count, thumbnail_status)
+VALUES (:sha256, :size_bytes, :content_type, 1, :thumbnail_status)
+ON CONFLICT (sha256) DO UPDATE
+    SET ref_count = attachment_blobs.ref_count + 1
+RETURNING thumbnail_status
+""")
+
+RELEASE_SQL = text("""
+UPDATE attachment_blobs
+   SET ref_count = ref_count - 1
+ WHERE sha256 = :sha256
+RETURNING ref_count
+""")
+
+
+def thumbnail_key(sha256: str) -> str:
+    return f"{sha256}.thumb.jpg"
+
+
+# ============================================================================
+# Thumbnails
+# ============================================================================
+
+_thumbnail_executor: Optional[ThreadPoolExecutor] = None
+_in_flight: Set[str] = set()
+_in_flight_lock = threading.Lock()
+
+
+def get_thumbnail_executor() -> ThreadPoolExecutor:
+    """Get the process-wide thumbnail pool"""
+    global _thumbnail_executor
+
+    if _thumbnail_executor is None:
+        _thumbnail_executor = ThreadPoolExecutor(
+            max_workers=settings.ATTACHMENT_THUMBNAIL_WORKERS,
+            thread_name_prefix="attachment-thumbnail"
+        )
+
+    return _thumbnail_executor
+
+
+def shutdown_thumbnail_executor() -> None:
+    """Stop the thumbnail pool; queued thumbnails are made on next request"""
+    global _thumbnail_executor
+
+    if _thumbnail_executor is not None:
+        _thumbnail_executor.shutdown(wait=True, cancel_futures=True)
+        _thumbnail_executor = None
+
+
+def schedule_thumbnail(sha256: str) -> None:
+    """Queue a thumbnail unless one is already being made in this process"""
+    with _in_flight_lock:
+        if sha256 in _in_flight:
+            return
+        _in_flight.add(sha256)
+
+    try:
+        get_thumbnail_executor().submit(_make_thumbnail, sha256)
+    except RuntimeError:
+        # Pool shut down
+        with _in_flight_lock:
+            _in_flight.discard(sha256)
+
+
+def render_thumbnail(data: BinaryIO) -> bytes:
+    """JPEG of an image, fitted into ATTACHMENT_THUMBNAIL_SIZE pixels"""
+    from PIL import Image, ImageOps
+
+    with Image.open(data) as image:
+        image.draft("RGB", (settings.ATTACHMENT_THUMBNAIL_SIZE, settings.ATTACHMENT_THUMBNAIL_SIZE))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((settings.ATTACHMENT_THUMBNAIL_SIZE, settings.ATTACHMENT_THUMBNAIL_SIZE))
+        output = io.BytesIO()
+        image.convert("RGB").save(output, "JPEG", quality=80, optimize=True)
+    return output.getvalue()
+
+
+def _make_thumbnail(sha256: str) -> None:
+    from app.database import SessionLocal
+
+    storage = get_attachment_storage()
+    try:
+        if storage.exists(thumbnail_key(sha256)):
+            outcome = THUMBNAIL_READY
+        else:
+            try:
+                with storage.open(sha256) as file:
+                    storage.put(thumbnail_key(sha256), render_thumbnail(file))
+                outcome = THUMBNAIL_READY
+            except FileNotFoundError:
+                # Blob deleted while queued
+                return
+            except Exception as e:
+                logger.warning("Thumbnail failed for attachment blob %s: %s", sha256, e)
+                outcome = THUMBNAIL_FAILED
+
+        db = SessionLocal()
+        try:
+            db.query(AttachmentBlob).filter(
+                AttachmentBlob.sha256 == sha256
+            ).update({AttachmentBlob.thumbnail_status: outcome}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+    except Exception:
+        logger.exception("Could not record thumbnail of attachment blob %s", sha256)
+    finally:
+        with _in_flight_lock:
+            _in_flight.discard(sha256)
+
+
+# ============================================================================
+# Responses
+# ============================================================================
+
+def _content_disposition(file_name: str, inline: bool) -> str:
+    return f"{'inline' if inline else 'attachment'}; filename*=utf-8''{quote(file_name)}"
+
+
+def file_response(key: str, file_name: str, content_type: Optional[str]) -> Response:
+    """
+    Response serving stored content.
+
+    Args:
+        key: Storage key
+        file_name: Name offered to the client
+        content_type: MIME type recorded at upload
+
+    Returns:
+        Proxy sendfile response, ranged FileResponse, or a chunked stream
+        for backends without local files
+
+    Raises:
+        HTTPException: If the content is missing from storage
+    """
+    storage = get_attachment_storage()
+    inline = content_type in INLINE_TYPES
+    media_type = content_type if inline else "application/octet-stream"
+    headers = {
+        "Content-Disposition": _content_disposition(file_name, inline),
+        "X-Content-Type-Options": "nosniff",
+        # Content never changes under a key
+        "Cache-Control": "private, max-age=31536000, immutable",
+    }
+
+    path = storage.local_path(key)
+    if path is not None:
+        if not os.path.isfile(path):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Attachment file not found"
+            )
+
+        if settings.ATTACHMENT_SENDFILE_HEADER:
+            prefix = settings.ATTACHMENT_SENDFILE_PREFIX
+            target = f"{prefix.rstrip('/')}/{relative_path(key)}" if prefix else path
+            headers[settings.ATTACHMENT_SENDFILE_HEADER] = target
+            return Response(media_type=media_type, headers=headers)
+
+        return FileResponse(path, media_type=media_type, headers=headers)
+
+    try:
+        file = storage.open(key)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Attachment file not found"
+        )
+
+    def chunks():
+        with file:
+            while chunk := file.read(CHUNK_SIZE):
+                yield chunk
+
+    return StreamingResponse(chunks(), media_type=media_type, headers=headers)
+
+
+# ============================================================================
+# Service
+# ============================================================================
+
+class AttachmentService:
+    """Service for content-addressed attachment blobs"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.storage = get_attachment_storage()
+
+    def store(self, stream: BinaryIO, content_type: Optional[str]) -> Tuple[str, int, bool]:
+        """
+        Stream an upload into storage and take a reference on its blob.
+
+        The caller commits, then calls `schedule_thumbnail` if asked to.
+
+        Args:
+            stream: Uploaded file
+            content_type: MIME type sent by the client
+
+        Returns:
+            (sha256, size in bytes, whether a thumbnail should be scheduled)
+
+        Raises:
+            HTTPException: If the file is empty or too large
+        """
+        staged = self.storage.stage(stream, settings.MAX_UPLOAD_SIZE)
+        if staged.size == 0:
+            self.storage.discard(staged)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="File is empty"
+            )
+
+        try:
+            thumbnail_status = self.db.execute(ACQUIRE_SQL, {
+                "sha256": staged.sha256,
+                "size_bytes": staged.size,
+                "content_type": content_type,
+                "thumbnail_status": THUMBNAIL_PENDING if content_type in THUMBNAIL_TYPES else None,
+            }).scalar_one()
+
+            # Under the row lock: puts the file back if a failed release lost it
+            self.storage.promote(staged, staged.sha256)
+        except BaseException:
+            self.storage.discard(staged)
+            raise
+
+        return staged.sha256, staged.size, thumbnail_status == THUMBNAIL_PENDING
+
+    def release(self, sha256: str) -> None:
+        """
+        Drop a reference to a blob; the last one deletes the file.
+
+        The referencing attachment must already be deleted (and is flushed
+        here), since the blob row is deleted with its last reference.
+
+        Args:
+            sha256: Blob content hash
+        """
+        self.db.flush()
+        ref_count = self.db.execute(RELEASE_SQL, {"sha256": sha256}).scalar_one_or_none()
+        if ref_count is None or ref_count > 0:
+            return
+
+        self.db.query(AttachmentBlob).filter(
+            AttachmentBlob.sha256 == sha256
+        ).delete(synchronize_session=False)
+        self.storage.delete(sha256)
+        self.storage.delete(thumbnail_key(sha256))
+
+    def thumbnail_response(self, sha256: str) -> Response:
+        """
+        Response serving a blob's thumbnail.
+
+        Args:
+            sha256: Blob content hash
+
+        Returns:
+            Thumbnail JPEG response
+
+        Raises:
+            HTTPException: 404 if the content has no thumbnail, 409 while it
+            is still being made (and requests it again if it was lost)
+        """
+        blob = self.db.query(AttachmentBlob).filter(AttachmentBlob.sha256 == sha256).first()
+
+        if not blob or blob.thumbnail_status in (None, THUMBNAIL_FAILED):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Attachment has no thumbnail"
+            )
+
+        if blob.thumbnail_status == THUMBNAIL_PENDING or not self.storage.exists(thumbnail_key(sha256)):
+            schedule_thumbnail(sha256)
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Thumbnail is still being generated"
+            )
+
+        return file_response(thumbnail_key(sha256), f"{sha256[:12]}.jpg", "image/jpeg")
@@ -0,0 +1,175 @@
+"""
+Attachment Storage
+Pluggable, content-addressed file storage for attachments
+
+Files are stored under the hex SHA-256 of their content (the key), so storing
+the same bytes twice keeps one copy. An upload is first streamed to a staging
+file in CHUNK_SIZE pieces, hashing as it goes, so memory use does not depend
+on file size. It is then promoted to its key, or discarded when the key
+already exists.
+
+A backend implements AttachmentStorage. ATTACHMENT_STORAGE_BACKEND selects one
+from STORAGE_BACKENDS. `local` keeps files on the local filesystem under
+ATTACHMENT_STORAGE_DIR, fanned out as ab/cd/<key>. That directory is not
+under UPLOAD_DIR, which is served publicly.
+"""
+
+import hashlib
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from app.config import settings
+
+CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class StagedFile:
+    """An upload written to staging, not yet stored under its key"""
+    sha256: str
+    size: int
+    path: str
+
+
+def relative_path(key: str) -> str:
+    """Fanned-out location of a key: ab/cd/<key>"""
+    return os.path.join(key[:2], key[2:4], key)
+
+
+class AttachmentStorage(ABC):
+    """Where attachment files live, addressed by key"""
+
+    @abstractmethod
+    def stage(self, stream: BinaryIO, max_bytes: int) -> StagedFile:
+        """Copy a stream to staging in chunks, hashing it; 413 past max_bytes"""
+
+    @abstractmethod
+    def promote(self, staged: StagedFile, key: str) -> None:
+        """Store staged content under a key, or drop it if the key exists"""
+
+    @abstractmethod
+    def discard(self, staged: StagedFile) -> None:
+        """Drop staged content"""
+
+    @abstractmethod
+    def put(self, key: str, data: bytes) -> None:
+        """Store small derived content (thumbnails) under a key"""
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        """Open stored content for reading; FileNotFoundError if missing"""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """Whether content is stored under a key"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove stored content; missing keys are ignored"""
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path of a key for sendfile, or None if not on local disk"""
+        return None
+
+
+class LocalAttachmentStorage(AttachmentStorage):
+    """Attachment files on the local filesystem"""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.staging = os.path.join(self.root, "staging")
+
+    def stage(self, stream: BinaryIO, max_bytes: int) -> StagedFile:
+        os.makedirs(self.staging, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+
+        # Staging sits on the same filesystem as the store, so promote is a rename
+        with tempfile.NamedTemporaryFile(dir=self.staging, suffix=".upload", delete=False) as file:
+            try:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"File exceeds the maximum size of {max_bytes} bytes"
+                        )
+                    digest.update(chunk)
+                    file.write(chunk)
+            except BaseException:
+                file.close()
+                os.remove(file.name)
+                raise
+
+        return StagedFile(sha256=digest.hexdigest(), size=size, path=file.name)
+
+    def promote(self, staged: StagedFile, key: str) -> None:
+        path = self._path(key)
+        if os.path.exists(path):
+            self.discard(staged)
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(staged.path, path)
+
+    def discard(self, staged: StagedFile) -> None:
+        try:
+            os.remove(staged.path)
+        except FileNotFoundError:
+            pass
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix=".tmp", delete=False) as file:
+            file.write(data)
+        os.replace(file.name, path)
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self._path(key), "rb")
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self._path(key)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, relative_path(key))
+
+
+# backend name -> factory
+STORAGE_BACKENDS: Dict[str, Callable[[], AttachmentStorage]] = {
+    "local": lambda: LocalAttachmentStorage(settings.ATTACHMENT_STORAGE_DIR),
+}
+
+_storage: Optional[AttachmentStorage] = None
+
+
+def get_attachment_storage() -> AttachmentStorage:
+    """Get the process-wide attachment storage backend"""
+    global _storage
+
+    if _storage is None:
+        backend = settings.ATTACHMENT_STORAGE_BACKEND
+        if backend not in STORAGE_BACKENDS:
+            raise ValueError(
+                f"Unknown ATTACHMENT_STORAGE_BACKEND '{backend}'; "
+                f"expected one of: {', '.join(STORAGE_BACKENDS)}"
+            )
+        _storage = STORAGE_BACKENDS[backend]()
+
+    return _storage
@@ -0,0 +1,172 @@
+"""
+Audit Pipeline
+Move audit entries from the transactional outbox into partitioned storage
+
+Services keep writing `db.add(AuditLog(...))`. A `before_flush` hook swaps
+each new AuditLog for an `AuditLogOutbox` row, so the entry commits (or rolls
+back) with the business change it describes, but the request only pays for an
+insert into a table without secondary indexes.
+
+The relay thread in every worker drains the outbox every
+AUDIT_RELAY_INTERVAL_SECONDS, AUDIT_RELAY_BATCH_SIZE rows per statement: one
+`DELETE ... RETURNING` feeding an `INSERT` into `audit_logs`, so a batch is
+either fully moved or stays in the outbox. `FOR UPDATE SKIP LOCKED` lets the
+workers' relays run side by side without moving a row twice.
+
+The relay also creates audit_logs partitions AUDIT_PARTITION_MONTHS_AHEAD
+months in advance.
+"""
+
+import logging
+import threading
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.audit_log import (
+    AuditLog, AuditLogOutbox, AUDIT_LOG_COLUMNS, audit_partition_statements
+)
+
+logger = logging.getLogger(__name__)
+
+PARTITION_CHECK_INTERVAL = timedelta(hours=1)
+
+RELAY_SQL = text(f"""
+WITH batch AS (
+    DELETE FROM audit_log_outbox
+     WHERE seq IN (
+         SELECT seq FROM audit_log_outbox
+          ORDER BY seq
+          LIMIT :limit
+          FOR UPDATE SKIP LOCKED
+     )
+    RETURNING {AUDIT_LOG_COLUMNS}
+)
+INSERT INTO audit_logs ({AUDIT_LOG_COLUMNS})
+SELECT {AUDIT_LOG_COLUMNS} FROM batch
+""")
+
+OUTBOX_FIELDS = (
+    "user_id", "organization_id", "action", "entity_type", "entity_id",
+    "details", "ip_address", "user_agent", "created_at",
+)
+
+
+@event.listens_for(Session, "before_flush")
+def route_audit_logs_to_outbox(session, flush_context, instances):
+    """Replace pending AuditLog rows with outbox rows before they are written"""
+    if not settings.AUDIT_OUTBOX_ENABLED:
+        return
+
+    entries = [obj for obj in session.new if isinstance(obj, AuditLog)]
+    for entry in entries:
+        session.expunge(entry)
+        # Unset fields are left out so server defaults (created_at) apply
+        values = {field: getattr(entry, field) for field in OUTBOX_FIELDS}
+        session.add(AuditLogOutbox(
+            id=entry.id or uuid.uuid4(),
+            **{field: value for field, value in values.items() if value is not None}
+        ))
+
+
+def relay_batch(db: Session, limit: int) -> int:
+    """
+    Move one batch of outbox rows into audit_logs and commit.
+
+    Returns:
+        Number of entries moved
+    """
+    moved = db.execute(RELAY_SQL, {"limit": limit}).rowcount
+    db.commit()
+    return moved
+
+
+def ensure_audit_partitions(db: Session, today: Optional[date] = None) -> None:
+    """Create audit_logs partitions from this month to AUDIT_PARTITION_MONTHS_AHEAD ahead"""
+    today = today or date.today()
+    last_month = today + timedelta(days=31 * settings.AUDIT_PARTITION_MONTHS_AHEAD)
+
+    for statement in audit_partition_statements(today, last_month):
+        try:
+            db.execute(text(statement))
+            db.commit()
+        except Exception as e:
+            # Another worker created it first, or the default partition
+            # already holds rows for that month
+            db.rollback()
+            logger.warning(f"Could not create audit partition: {e}")
+
+
+class AuditRelay:
+    """Background thread draining the audit outbox"""
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._partitions_checked_at: Optional[datetime] = None
+
+    def start(self) -> None:
+        """Start the relay thread if it is not running"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-relay", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the relay thread after a final drain"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        try:
+            self.drain()
+        except Exception:
+            logger.exception("Final audit relay drain failed")
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.drain()
+            except Exception:
+                logger.exception("Audit relay failed")
+            self._stop.wait(settings.AUDIT_RELAY_INTERVAL_SECONDS)
+
+    def drain(self) -> int:
+        """Relay batches until the outbox is empty"""
+        from app.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            if (
+                self._partitions_checked_at is None
+                or now - self._partitions_checked_at >= PARTITION_CHECK_INTERVAL
+            ):
+                ensure_audit_partitions(db)
+                self._partitions_checked_at = now
+
+            total = 0
+            while True:
+                moved = relay_batch(db, settings.AUDIT_RELAY_BATCH_SIZE)
+                total += moved
+                if moved < settings.AUDIT_RELAY_BATCH_SIZE:
+                    return total
+        finally:
+            db.close()
+
+
+_relay: Optional[AuditRelay] = None
+
+
+def get_audit_relay() -> AuditRelay:
+    """Get the process-wide audit relay"""
+    global _relay
+
+    if _relay is None:
+        _relay = AuditRelay()
+
+    return _relay
@@ -19,8 +19,9 @@ from app.models.recovery_attempt import RecoveryAttempt
 from app.models.audit_log import AuditLog
 from app.models.driver import Driver
 from app.core.security import hash_password, verify_password, create_access_token
-from app.core.encryption import generate_salt, encrypt_answer, decrypt_and_compare
+from app.core.encryption import generate_salt, encrypt_answers
 from app.services.token_service import TokenService
+from app.services.refresh_token_service import RefreshTokenService
 from app.services.email_service import EmailService
 from app.config import settings
 from app.utils.constants import *
@@ -275,19 +276,10 @@ class AuthService:
         user.last_login = datetime.utcnow()
 
         # Get user's organization and role
-        user_org = self.db.query(UserOrganization).filter(
-            UserOrganization.user_id == user.id
-        ).first()
+        company, role, effective_role_key, effective_role_name = self._resolve_session_context(user)
 
-        company = None
-        role = None
-
-        if user_org:
-            role = self.db.query(Role).filter(Role.id == user_org.role_id).first()
-            if user_org.organization_id:
-                company = self.db.query(Organization).filter(
-                    Organization.id == user_org.organization_id
-                ).first()
+        # Start a refresh token family for this session
+        refresh_token = RefreshTokenService(self.db).issue(user.id)
 
         self.db.commit()
 
@@ -303,14 +295,6 @@ class AuthService:
             entity_id=user.id
         )
 
-        # Detect driver: independent_user role + a Driver record
-        driver_record = self.db.query(Driver).filter(Driver.user_id == user.id).first()
-        effective_role_key = role.role_key if role else None
-        effective_role_name = role.role_name if role else None
-        if driver_record and role and role.role_key == 'independent_user':
-            effective_role_key = 'driver'
-            effective_role_name = 'Driver'
-
         # Create access token
         token_data = {
             "sub": str(user.id),
@@ -325,6 +309,7 @@ class AuthService:
         return {
             "success": True,
             "access_token": access_token,
+            "refresh_token": refresh_token,
             "token_type": "bearer",
             "user_id": str(user.id),
             "username": user.username,
@@ -337,6 +322,56 @@ class AuthService:
             "business_type": company.business_type if company else None
         }
 
+    def refresh_session(self, refresh_token: str) -> dict:
+        """
+        Exchange a refresh token for a new access token and rotated refresh token.
+
+        Args:
+            refresh_token: Refresh token issued at login or by a previous refresh
+
+        Returns:
+            Dictionary with new access and refresh tokens
+
+        Raises:
+            HTTPException: If the token is invalid, revoked or reused, or the
+                user can no longer log in
+        """
+        user_id, new_refresh_token = RefreshTokenService(self.db).rotate(refresh_token)
+
+        user = self.db.query(User).filter(User.id == user_id).first()
+        if not user or not user.can_login():
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User account is not active or locked"
+            )
+
+        company, role, effective_role_key, effective_role_name = self._resolve_session_context(user)
+
+        token_data = {
+            "sub": str(user.id),
+            "username": user.username,
+            "role": effective_role_key,
+            "company_id": str(company.id) if company else None
+        }
+
+        return {
+            "access_token": create_access_token(token_data),
+            "refresh_token": new_refresh_token,
+            "token_type": "bearer"
+        }
+
+    def logout(self, refresh_token: str) -> dict:
+        """Revoke the session (token family) a refresh token belongs to"""
+        revoked = RefreshTokenService(self.db).revoke_token(refresh_token, reason="logout")
+
+        if not revoked:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid refresh token"
+            )
+
+        return {"success": True, "message": "Logged out successfully"}
+
     def verify_email(self, token: str) -> dict:
         """Verify user's email using verification token"""
         is_valid, user_id, error = TokenService.verify_token(
@@ -435,17 +470,23 @@ class AuthService:
         # Generate unique salt for this user
         user_salt = generate_salt()
 
-        for q in questions:
-            # Get question from database
-            question = self.db.query(SecurityQuestion).filter(
-                SecurityQuestion.question_key == q['question_id']
-            ).first()
+        # Resolve questions in one query
+        question_keys = [q['question_id'] for q in questions]
+        questions_by_key = {
+            question.question_key: question
+            for question in self.db.query(SecurityQuestion).filter(
+                SecurityQuestion.question_key.in_(question_keys)
+            ).all()
+        }
+        questions = [q for q in questions if q['question_id'] in questions_by_key]
 
-            if not question:
-                continue
+        # Encrypt all answers with a single key derivation
+        encrypted_answers = encrypt_answers(
+            [q['answer'] for q in questions], password, user_salt
+        )
 
-            # Encrypt answer
-            encrypted_answer = encrypt_answer(q['answer'], password, user_salt)
+        for q, encrypted_answer in zip(questions, encrypted_answers):
+            question = questions_by_key[q['question_id']]
 
             # Save answer
             user_answer = UserSecurityAnswer(
@@ -539,6 +580,37 @@ class AuthService:
 
         return company, role, user_org
 
+    def _resolve_session_context(self, user: User) -> Tuple:
+        """
+        Resolve the organization and effective role encoded into access tokens.
+
+        Returns:
+            Tuple of (company, role, effective_role_key, effective_role_name)
+        """
+        user_org = self.db.query(UserOrganization).filter(
+            UserOrganization.user_id == user.id
+        ).first()
+
+        company = None
+        role = None
+
+        if user_org:
+            role = self.db.query(Role).filter(Role.id == user_org.role_id).first()
+            if user_org.organization_id:
+                company = self.db.query(Organization).filter(
+                    Organization.id == user_org.organization_id
+                ).first()
+
+        # Detect driver: independent_user role + a Driver record
+        driver_record = self.db.query(Driver).filter(Driver.user_id == user.id).first()
+        effective_role_key = role.role_key if role else None
+        effective_role_name = role.role_name if role else None
+        if driver_record and role and role.role_key == 'independent_user':
+            effective_role_key = 'driver'
+            effective_role_name = 'Driver'
+
+        return company, role, effective_role_key, effective_role_name
+
     def _get_role_by_key(self, role_key: str) -> Role:
         """Get role by role_key"""
         role = self.db.query(Role).filter(Role.role_key == role_key).first()
@@ -12,6 +12,7 @@ from datetime import datetime
 from pathlib import Path
 
 from app.models.organization_branding import OrganizationBranding
+from app.models.company import Organization
 from app.models.audit_log import AuditLog
 from app.schemas.branding import BrandingColors
 from app.config import settings
@@ -65,6 +66,49 @@ class BrandingService:
 
         return branding
 
+    def get_email_branding(self, org_id: uuid.UUID) -> Dict[str, str]:
+        """
+        Get the branding values used by email templates (read-only).
+
+        Unlike get_branding, this never creates a default branding row.
+
+        Args:
+            org_id: Organization UUID
+
+        Returns:
+            Dictionary of organization name, logo URL and colors; only the
+            values the organization has are included
+        """
+        row = self.db.query(
+            Organization.company_name,
+            OrganizationBranding.logo_url,
+            OrganizationBranding.primary_color,
+            OrganizationBranding.secondary_color,
+            OrganizationBranding.background_primary,
+            OrganizationBranding.background_secondary
+        ).outerjoin(
+            OrganizationBranding,
+            OrganizationBranding.organization_id == Organization.id
+        ).filter(Organization.id == org_id).first()
+
+        if not row:
+            return {}
+
+        values = {
+            "organization_name": row.company_name,
+            "logo_url": row.logo_url,
+            "primary_color": row.primary_color,
+            "secondary_color": row.secondary_color,
+            "background_primary": row.background_primary,
+            "background_secondary": row.background_secondary
+        }
+        return {key: value for key, value in values.items() if value}
+
+    def _invalidate_email_branding(self, org_id: uuid.UUID) -> None:
+        """Make email templates pick up changed branding"""
+        from app.services.email_templates import get_template_engine
+        get_template_engine().invalidate_branding(str(org_id))
+
     def update_branding(
         self,
         org_id: uuid.UUID,
@@ -131,6 +175,7 @@ class BrandingService:
 
         self.db.commit()
         self.db.refresh(branding)
+        self._invalidate_email_branding(org_id)
 
         # Audit log
         if changes:
@@ -223,6 +268,7 @@ class BrandingService:
 
         self.db.commit()
         self.db.refresh(branding)
+        self._invalidate_email_branding(org_id)
 
         # Audit log
         audit_log = AuditLog(
@@ -283,6 +329,7 @@ class BrandingService:
 
         self.db.commit()
         self.db.refresh(branding)
+        self._invalidate_email_branding(org_id)
 
         # Audit log
         audit_log = AuditLog(
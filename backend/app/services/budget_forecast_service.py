@@ -0,0 +1,230 @@
+"""
+Budget Forecast Service
+Spend projections for all of an organization's budgets at once
+
+Daily spend for every budget comes from one query over the expense daily
+rollups and is laid out as a (budgets x days) NumPy matrix, so each method is
+a handful of array operations whatever the number of budgets:
+- linear: average daily spend since the budget started
+- moving_average: average daily spend over the last `window` days
+- seasonal: average spend per weekday, projected onto the remaining weekdays
+
+Future daily spend is treated as independent draws with the observed mean and
+standard deviation, which gives the probability of ending over the allocation
+(normal approximation). The exhaustion date is the first day the cumulative
+projection reaches the allocation.
+"""
+
+import math
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+
+import numpy as np
+from fastapi import HTTPException, status
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from app.models.budget import Budget
+from app.models.financial_rollup import ExpenseDailyRollup
+from app.services.budget_ledger import COUNTED_STATUSES
+
+FORECAST_METHODS = ("linear", "moving_average", "seasonal")
+
+_erfc = np.frompyfunc(math.erfc, 1, 1)
+
+
+def _money(value: float) -> Decimal:
+    return Decimal(str(round(float(value), 2)))
+
+
+def _weekday(ordinals: np.ndarray) -> np.ndarray:
+    """Weekday (Monday = 0) of proleptic Gregorian ordinals"""
+    return (ordinals + 6) % 7
+
+
+def _reaches_allocation(spend: np.ndarray, allocated: np.ndarray) -> np.ndarray:
+    """Spend at or over the allocation; a zero allocation only once something is spent"""
+    return (spend >= allocated) & ((allocated > 0) | (spend > 0))
+
+
+class BudgetForecastService:
+    """Service for budget spend forecasts"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def forecast_budgets(
+        self,
+        org_id: str,
+        method: str = "linear",
+        window: int = 14,
+        active_only: bool = True,
+        today: Optional[date] = None
+    ) -> dict:
+        """
+        Forecast end-of-period spend for an organization's budgets.
+
+        Args:
+            org_id: Organization ID
+            method: linear, moving_average or seasonal
+            window: Days averaged by moving_average
+            active_only: Only budgets running today
+            today: Forecast date (default: today)
+
+        Returns:
+            Forecast per budget, highest overrun probability first
+        """
+        if method not in FORECAST_METHODS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Method must be one of: {', '.join(FORECAST_METHODS)}"
+            )
+
+        today = today or date.today()
+
+        budget_filter = [Budget.organization_id == org_id]
+        if active_only:
+            budget_filter += [Budget.start_date <= today, Budget.end_date >= today]
+
+        budgets = self.db.query(
+            Budget.id,
+            Budget.name,
+            Budget.category,
+            Budget.start_date,
+            Budget.end_date,
+            Budget.allocated_amount,
+            Budget.spent_amount
+        ).filter(*budget_filter).all()
+
+        result = {"method": method, "as_of": today, "forecasts": []}
+        if not budgets:
+            return result
+
+        # Daily spend of every budget, one row per (budget, day with spend)
+        series = self.db.query(
+            Budget.id,
+            ExpenseDailyRollup.day,
+            func.sum(ExpenseDailyRollup.total_amount)
+        ).join(
+            ExpenseDailyRollup,
+            and_(
+                ExpenseDailyRollup.organization_id == Budget.organization_id,
+                ExpenseDailyRollup.category == Budget.category,
+                ExpenseDailyRollup.day >= Budget.start_date,
+                ExpenseDailyRollup.day <= Budget.end_date
+            )
+        ).filter(
+            *budget_filter,
+            ExpenseDailyRollup.status.in_(COUNTED_STATUSES),
+            ExpenseDailyRollup.day <= today
+        ).group_by(Budget.id, ExpenseDailyRollup.day).all()
+
+        n = len(budgets)
+        index = {b.id: i for i, b in enumerate(budgets)}
+        start = np.array([b.start_date.toordinal() for b in budgets])
+        total_days = np.array([b.end_date.toordinal() for b in budgets]) - start + 1
+        allocated = np.array([float(b.allocated_amount) for b in budgets])
+        spent = np.array([float(b.spent_amount) for b in budgets])
+
+        # Days observed so far (through today) and days left to project
+        observed = np.clip(today.toordinal() - start + 1, 0, total_days)
+        remaining = total_days - observed
+
+        width = max(int(observed.max()), 1)
+        daily = np.zeros((n, width))
+        if series:
+            rows = np.array([index[budget_id] for budget_id, _, _ in series])
+            cols = np.array([day.toordinal() for _, day, _ in series]) - start[rows]
+            values = np.array([float(amount) for _, _, amount in series])
+            inside = (cols >= 0) & (cols < width)
+            np.add.at(daily, (rows[inside], cols[inside]), values[inside])
+
+        day_index = np.arange(width)[None, :]
+        observed_mask = day_index < observed[:, None]
+
+        # Days each budget's daily mean and deviation are taken over
+        if method == "moving_average":
+            sample_mask = observed_mask & (day_index >= (observed - window)[:, None])
+        else:
+            sample_mask = observed_mask
+        sample_days = np.maximum(sample_mask.sum(axis=1), 1)
+        mean = (daily * sample_mask).sum(axis=1) / sample_days
+        variance = (((daily - mean[:, None]) ** 2) * sample_mask).sum(axis=1) / sample_days
+        sigma = np.sqrt(variance)
+
+        horizon = max(int(remaining.max()), 1)
+        future_index = np.arange(horizon)[None, :]
+        future_mask = future_index < remaining[:, None]
+
+        if method == "seasonal":
+            observed_weekday = _weekday(start[:, None] + day_index)
+            profile = np.empty((n, 7))
+            for weekday in range(7):
+                on_day = sample_mask & (observed_weekday == weekday)
+                count = on_day.sum(axis=1)
+                profile[:, weekday] = np.where(
+                    count > 0, (daily * on_day).sum(axis=1) / np.maximum(count, 1), mean
+                )
+            future_weekday = _weekday(start[:, None] + observed[:, None] + future_index)
+            future = np.take_along_axis(profile, future_weekday, axis=1) * future_mask
+        else:
+            future = mean[:, None] * future_mask
+
+        projected_remaining = future.sum(axis=1)
+        projected_total = spent + projected_remaining
+
+        # P(spent + remaining spend > allocated), remaining ~ N(mean * days, sigma^2 * days)
+        headroom = allocated - spent - projected_remaining
+        spread = sigma * np.sqrt(remaining)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = headroom / spread
+        probability = np.where(
+            spread > 0,
+            0.5 * _erfc(np.where(spread > 0, z, 0) / math.sqrt(2)).astype(float),
+            (headroom < 0).astype(float)
+        )
+        probability = np.where(spent > allocated, 1.0, probability)
+
+        # First day cumulative spend reaches the allocation
+        cumulative = spent[:, None] + np.cumsum(future, axis=1)
+        future_hit = _reaches_allocation(cumulative, allocated[:, None]) & future_mask
+        exhausted_on = np.where(
+            future_hit.any(axis=1),
+            start + observed + future_hit.argmax(axis=1),
+            0
+        )
+        past_hit = _reaches_allocation(np.cumsum(daily, axis=1), allocated[:, None]) & observed_mask
+        already = _reaches_allocation(spent, allocated)
+        exhausted_on = np.where(
+            already,
+            np.where(past_hit.any(axis=1), start + past_hit.argmax(axis=1), today.toordinal()),
+            exhausted_on
+        )
+        # Never before the budget starts
+        exhausted_on = np.where(exhausted_on > 0, np.maximum(exhausted_on, start), 0)
+
+        daily_rate = np.where(remaining > 0, projected_remaining / np.maximum(remaining, 1), mean)
+
+        forecasts = []
+        for i, budget in enumerate(budgets):
+            forecasts.append({
+                "budget_id": str(budget.id),
+                "name": budget.name,
+                "category": budget.category,
+                "start_date": budget.start_date,
+                "end_date": budget.end_date,
+                "allocated_amount": budget.allocated_amount,
+                "spent_amount": budget.spent_amount,
+                "days_observed": int(observed[i]),
+                "days_remaining": int(remaining[i]),
+                "daily_rate": _money(daily_rate[i]),
+                "projected_total": _money(projected_total[i]),
+                "projected_percentage": _money(projected_total[i] / allocated[i] * 100) if allocated[i] > 0 else Decimal('0'),
+                "overrun_probability": round(float(probability[i]), 4),
+                "exhaustion_date": date.fromordinal(int(exhausted_on[i])) if exhausted_on[i] else None,
+            })
+
+        forecasts.sort(key=lambda f: f["overrun_probability"], reverse=True)
+        result["forecasts"] = forecasts
+        return result
@@ -0,0 +1,173 @@
+"""
+Budget Ledger
+Keep budget spend totals in step with expense state transitions
+
+An expense counts against every budget of its organization and category
+whose date range contains the expense date, while it is approved or paid. A
+`before_flush` hook compares each changed, new or deleted Expense with its
+previous state (status, amount, date, category) and applies the difference
+to the matching budgets with one UPDATE per (organization, category, day),
+found through idx_budget_org_category_period. Budgets keep running
+`spent_amount`, `remaining_amount` and `expense_count`, so reads never scan
+expenses.
+
+When an increase takes a budget over its alert threshold a budget_alert audit
+entry is added to the same flush.
+
+Budgets created or re-dated after their expenses are initialized from the
+expense daily rollups (`recalculate_budget`).
+"""
+
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event, func, inspect, text
+from sqlalchemy.orm import Session
+
+from app.models.audit_log import AuditLog
+from app.models.budget import Budget
+from app.models.expense import Expense
+from app.models.financial_rollup import ExpenseDailyRollup
+from app.utils.constants import AUDIT_ACTION_BUDGET_ALERT, ENTITY_TYPE_BUDGET
+
+# Expense statuses that count as spend
+COUNTED_STATUSES = ('approved', 'paid')
+
+LEDGER_FIELDS = ('organization_id', 'category', 'expense_date', 'status', 'total_amount')
+
+APPLY_SQL = text("""
+UPDATE budgets
+   SET spent_amount = spent_amount + :amount,
+       remaining_amount = allocated_amount - (spent_amount + :amount),
+       expense_count = expense_count + :count,
+       updated_at = now()
+ WHERE organization_id = :org_id
+   AND category = :category
+   AND start_date <= :day
+   AND end_date >= :day
+RETURNING id, name, spent_amount, allocated_amount, alert_threshold_percent
+""")
+
+LedgerKey = Tuple[str, str, date]
+
+
+def _contribution(values: dict) -> Optional[Tuple[LedgerKey, Decimal]]:
+    """Budget key and amount an expense state counts for, if any"""
+    if values['status'] not in COUNTED_STATUSES or values['total_amount'] is None:
+        return None
+    key = (str(values['organization_id']), values['category'], values['expense_date'])
+    return key, Decimal(values['total_amount'])
+
+
+def _previous_values(expense: Expense) -> dict:
+    """Field values as last loaded from the database"""
+    state = inspect(expense)
+    values = {}
+    for field in LEDGER_FIELDS:
+        history = state.attrs[field].history
+        values[field] = history.deleted[0] if history.deleted else getattr(expense, field)
+    return values
+
+
+def _current_values(expense: Expense) -> dict:
+    return {field: getattr(expense, field) for field in LEDGER_FIELDS}
+
+
+def _is_over_threshold(spent, allocated, threshold) -> bool:
+    return allocated > 0 and spent * 100 >= allocated * threshold
+
+
+@event.listens_for(Session, "before_flush", insert=True)
+def apply_expense_changes_to_budgets(session, flush_context, instances):
+    """Apply the budget deltas of the expenses about to be flushed"""
+    # key -> [amount delta, count delta]
+    deltas: Dict[LedgerKey, list] = defaultdict(lambda: [Decimal('0'), 0])
+    alert_user: Dict[LedgerKey, Optional[str]] = {}
+
+    def add(values: dict, sign: int, user_id=None):
+        counted = _contribution(values)
+        if counted:
+            key, amount = counted
+            deltas[key][0] += sign * amount
+            deltas[key][1] += sign
+            if sign > 0:
+                alert_user[key] = user_id
+
+    for obj in session.new:
+        if isinstance(obj, Expense):
+            add(_current_values(obj), +1, obj.approved_by)
+    for obj in session.dirty:
+        if isinstance(obj, Expense) and session.is_modified(obj):
+            add(_previous_values(obj), -1)
+            add(_current_values(obj), +1, obj.approved_by)
+    for obj in session.deleted:
+        if isinstance(obj, Expense):
+            add(_previous_values(obj), -1)
+
+    for key, (amount, count) in deltas.items():
+        if amount == 0 and count == 0:
+            continue
+        org_id, category, day = key
+        rows = session.execute(APPLY_SQL, {
+            "amount": amount,
+            "count": count,
+            "org_id": org_id,
+            "category": category,
+            "day": day,
+        }).all()
+
+        for row in rows:
+            # Budgets already loaded in this session reload their totals on access
+            budget = session.identity_map.get(session.identity_key(Budget, row.id))
+            if budget is not None:
+                session.expire(budget, ['spent_amount', 'remaining_amount', 'expense_count', 'updated_at'])
+
+            crossed = amount > 0 and _is_over_threshold(
+                row.spent_amount, row.allocated_amount, row.alert_threshold_percent
+            ) and not _is_over_threshold(
+                row.spent_amount - amount, row.allocated_amount, row.alert_threshold_percent
+            )
+            if crossed:
+                session.add(AuditLog(
+                    user_id=alert_user.get(key),
+                    organization_id=org_id,
+                    action=AUDIT_ACTION_BUDGET_ALERT,
+                    entity_type=ENTITY_TYPE_BUDGET,
+                    entity_id=row.id,
+                    details={
+                        "budget": row.name,
+                        "alert_threshold_percent": str(row.alert_threshold_percent),
+                        "percentage_spent": str(round(row.spent_amount / row.allocated_amount * 100, 2)),
+                    }
+                ))
+
+
+def spend_between(db: Session, org_id: str, category: str, start_date: date, end_date: date) -> Tuple[Decimal, int]:
+    """
+    Approved and paid spend of a category over a date range, from the expense daily rollups.
+
+    Returns:
+        Tuple of (total amount, expense count)
+    """
+    return db.query(
+        func.coalesce(func.sum(ExpenseDailyRollup.total_amount), 0),
+        func.coalesce(func.sum(ExpenseDailyRollup.row_count), 0)
+    ).filter(
+        ExpenseDailyRollup.organization_id == org_id,
+        ExpenseDailyRollup.category == category,
+        ExpenseDailyRollup.status.in_(COUNTED_STATUSES),
+        ExpenseDailyRollup.day >= start_date,
+        ExpenseDailyRollup.day <= end_date
+    ).one()
+
+
+def recalculate_budget(db: Session, budget: Budget) -> None:
+    """Recompute a budget's spend totals (new budgets and changed date ranges)"""
+    spent, count = spend_between(
+        db, budget.organization_id, budget.category, budget.start_date, budget.end_date
+    )
+    budget.spent_amount = spent
+    budget.expense_count = count
+    budget.remaining_amount = budget.allocated_amount - budget.spent_amount
@@ -4,7 +4,7 @@ Business logic for budget management
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, extract
+from sqlalchemy import and_, func, case
 from fastapi import HTTPException, status
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date
@@ -12,10 +12,11 @@ from decimal import Decimal
 import uuid
 
 from app.models.budget import Budget
-from app.models.expense import Expense
 from app.models.company import Organization
 from app.models.audit_log import AuditLog
 from app.schemas.budget import BudgetCreateRequest, BudgetUpdateRequest
+from app.services.kpi_service import record_kpi_change
+from app.services.budget_ledger import recalculate_budget, spend_between
 from app.utils.constants import (
     AUDIT_ACTION_BUDGET_CREATED,
     AUDIT_ACTION_BUDGET_UPDATED,
@@ -86,11 +87,11 @@ class BudgetService:
             start_date=budget_data.start_date,
             end_date=budget_data.end_date,
             allocated_amount=budget_data.allocated_amount,
-            spent_amount=Decimal('0'),
-            remaining_amount=budget_data.allocated_amount,
             alert_threshold_percent=budget_data.alert_threshold_percent,
             created_by=user_id
         )
+        # Count expenses approved before the budget existed
+        recalculate_budget(self.db, budget)
 
         self.db.add(budget)
 
@@ -107,6 +108,8 @@ class BudgetService:
         self.db.commit()
         self.db.refresh(budget)
 
+        record_kpi_change(budget.organization_id, "budgets")
+
         return budget
 
     def get_budget_by_id(self, budget_id: str, org_id: str) -> Optional[Budget]:
@@ -215,6 +218,7 @@ class BudgetService:
 
             budget.start_date = start_date
             budget.end_date = end_date
+            recalculate_budget(self.db, budget)
 
         # Create audit log
         audit_log = AuditLog(
@@ -229,6 +233,8 @@ class BudgetService:
         self.db.commit()
         self.db.refresh(budget)
 
+        record_kpi_change(budget.organization_id, "budgets")
+
         return budget
 
     def delete_budget(self, user_id: str, budget_id: str, org_id: str) -> None:
@@ -268,6 +274,8 @@ class BudgetService:
 
         self.db.commit()
 
+        record_kpi_change(org_id, "budgets")
+
     def update_spent_amount(
         self,
         budget_id: str,
@@ -275,7 +283,10 @@ class BudgetService:
         user_id: Optional[str] = None
     ) -> Budget:
         """
-        Update budget spent amount (called when expense is approved).
+        Manually adjust budget spent amount.
+
+        Expense approvals are applied by the budget ledger; this is for
+        spend that is not recorded as an expense.
 
         Args:
             budget_id: Budget ID
@@ -309,6 +320,8 @@ class BudgetService:
         self.db.commit()
         self.db.refresh(budget)
 
+        record_kpi_change(budget.organization_id, "budgets")
+
         return budget
 
     def _recalculate_remaining(self, budget: Budget) -> None:
@@ -325,13 +338,11 @@ class BudgetService:
         Returns:
             List of budgets over threshold
         """
-        budgets = self.db.query(Budget).filter(
-            Budget.organization_id == org_id
+        return self.db.query(Budget).filter(
+            Budget.organization_id == org_id,
+            Budget.spent_amount * 100 >= Budget.allocated_amount * Budget.alert_threshold_percent
         ).all()
 
-        # Filter budgets over threshold
-        return [b for b in budgets if b.is_over_threshold]
-
     def get_budget_utilization(
         self,
         budget_id: str,
@@ -372,15 +383,6 @@ class BudgetService:
         else:
             projected_total = budget.spent_amount
 
-        # Get expenses for this budget
-        expenses = self.db.query(Expense).filter(
-            Expense.organization_id == org_id,
-            Expense.category == budget.category,
-            Expense.expense_date >= budget.start_date,
-            Expense.expense_date <= budget.end_date,
-            Expense.status.in_(['approved', 'paid'])
-        ).order_by(Expense.expense_date).all()
-
         return {
             'budget_id': str(budget.id),
             'name': budget.name,
@@ -401,7 +403,7 @@ class BudgetService:
             'daily_burn_rate': daily_burn_rate,
             'projected_total': projected_total,
             'projected_percentage': (projected_total / budget.allocated_amount * 100) if budget.allocated_amount > 0 else Decimal('0'),
-            'expense_count': len(expenses),
+            'expense_count': budget.expense_count,
             'alert_threshold_percent': budget.alert_threshold_percent
         }
 
@@ -444,26 +446,8 @@ class BudgetService:
             Budget.end_date >= period2_start
         ).first()
 
-        # Get expenses for period 1
-        expenses1 = self.db.query(Expense).filter(
-            Expense.organization_id == org_id,
-            Expense.category == category,
-            Expense.expense_date >= period1_start,
-            Expense.expense_date <= period1_end,
-            Expense.status.in_(['approved', 'paid'])
-        ).all()
-
-        # Get expenses for period 2
-        expenses2 = self.db.query(Expense).filter(
-            Expense.organization_id == org_id,
-            Expense.category == category,
-            Expense.expense_date >= period2_start,
-            Expense.expense_date <= period2_end,
-            Expense.status.in_(['approved', 'paid'])
-        ).all()
-
-        spent1 = sum(e.total_amount for e in expenses1)
-        spent2 = sum(e.total_amount for e in expenses2)
+        spent1, count1 = spend_between(self.db, org_id, category, period1_start, period1_end)
+        spent2, count2 = spend_between(self.db, org_id, category, period2_start, period2_end)
 
         # Calculate change
         if spent1 > 0:
@@ -480,14 +464,14 @@ class BudgetService:
                 'end_date': period1_end.isoformat(),
                 'budget_allocated': budget1.allocated_amount if budget1 else None,
                 'spent_amount': spent1,
-                'expense_count': len(expenses1)
+                'expense_count': count1
             },
             'period2': {
                 'start_date': period2_start.isoformat(),
                 'end_date': period2_end.isoformat(),
                 'budget_allocated': budget2.allocated_amount if budget2 else None,
                 'spent_amount': spent2,
-                'expense_count': len(expenses2)
+                'expense_count': count2
             },
             'change': {
                 'amount': change_amount,
@@ -511,33 +495,38 @@ class BudgetService:
         Returns:
             Summary statistics
         """
-        query = self.db.query(Budget).filter(
+        today = date.today()
+        is_active = and_(Budget.start_date <= today, Budget.end_date >= today)
+        over_threshold = Budget.spent_amount * 100 >= Budget.allocated_amount * Budget.alert_threshold_percent
+
+        # One aggregate over the ledger-maintained totals
+        def count_where(condition):
+            return func.count(case((condition, 1)))
+
+        query = self.db.query(
+            func.count(Budget.id).label('total_budgets'),
+            count_where(is_active).label('active_budgets'),
+            func.coalesce(func.sum(Budget.allocated_amount), 0).label('total_allocated'),
+            func.coalesce(func.sum(Budget.spent_amount), 0).label('total_spent'),
+            func.coalesce(func.sum(Budget.remaining_amount), 0).label('total_remaining'),
+            count_where(over_threshold).label('over_threshold_count'),
+            count_where(Budget.spent_amount > Budget.allocated_amount).label('exceeded_count')
+        ).filter(
             Budget.organization_id == org_id
         )
 
         if active_only:
-            today = date.today()
-            query = query.filter(
-                Budget.start_date <= today,
-                Budget.end_date >= today
-            )
-
-        budgets = query.all()
-
-        total_allocated = sum(b.allocated_amount for b in budgets)
-        total_spent = sum(b.spent_amount for b in budgets)
-        total_remaining = sum(b.remaining_amount for b in budgets)
+            query = query.filter(is_active)
 
-        over_threshold_count = len([b for b in budgets if b.is_over_threshold])
-        exceeded_count = len([b for b in budgets if b.is_exceeded])
+        totals = query.one()
 
         return {
-            'total_budgets': len(budgets),
-            'active_budgets': len([b for b in budgets if b.is_active()]),
-            'total_allocated': total_allocated,
-            'total_spent': total_spent,
-            'total_remaining': total_remaining,
-            'overall_percentage': (total_spent / total_allocated * 100) if total_allocated > 0 else Decimal('0'),
-            'over_threshold_count': over_threshold_count,
-            'exceeded_count': exceeded_count
+            'total_budgets': totals.total_budgets,
+            'active_budgets': totals.active_budgets,
+            'total_allocated': totals.total_allocated,
+            'total_spent': totals.total_spent,
+            'total_remaining': totals.total_remaining,
+            'overall_percentage': (totals.total_spent / totals.total_allocated * 100) if totals.total_allocated > 0 else Decimal('0'),
+            'over_threshold_count': totals.over_threshold_count,
+            'exceeded_count': totals.exceeded_count
         }
@@ -0,0 +1,271 @@
+"""
+Cash Flow Service
+Received / paid / net time series for several granularities in one query
+
+The series are read from the payment daily rollups. The date range is a plain
+`day BETWEEN :from AND :to` on the rollup primary key. Each day is bucketed
+with `date_trunc` once per requested granularity. `generate_series` lays out
+every bucket of the range, so periods without payments still appear with
+zeros. Net flow and the running balance are computed in the same statement.
+Weeks start on Monday. The first and last buckets only count the days inside
+the range.
+
+Results are cached per organization until its payments change. Every cache
+key contains the organization's cash-flow generation. Payment writes bump the
+generation after their commit (`invalidate_cash_flow`), so older entries are
+never read again and simply expire. A computation that started before a bump
+stores its result under the old generation, where no one looks.
+
+The cache is Redis when REDIS_HOST is set (shared by all workers). Otherwise it
+is a per-process dictionary, and CASH_FLOW_CACHE_TTL_SECONDS bounds how long
+another worker can serve a stale series.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ("day", "week", "month")
+DEFAULT_RANGE_DAYS = 90
+MAX_DAILY_POINTS = 731
+
+CASH_FLOW_SQL = text("""
+WITH daily AS (
+    SELECT day,
+           SUM(total_amount) FILTER (WHERE payment_type = 'received') AS received,
+           SUM(total_amount) FILTER (WHERE payment_type = 'paid') AS paid,
+           SUM(row_count) AS count
+      FROM payment_daily_rollups
+     WHERE organization_id = :org_id
+       AND day BETWEEN :from_date AND :to_date
+     GROUP BY day
+), granularities AS (
+    SELECT unnest(CAST(:granularities AS text[])) AS granularity
+), totals AS (
+    SELECT g.granularity,
+           CAST(date_trunc(g.granularity, CAST(d.day AS timestamp)) AS date) AS bucket,
+           SUM(d.received) AS received,
+           SUM(d.paid) AS paid,
+           SUM(d.count) AS count
+      FROM daily d
+     CROSS JOIN granularities g
+     GROUP BY 1, 2
+), buckets AS (
+    SELECT g.granularity, CAST(s.bucket AS date) AS bucket
+      FROM granularities g
+     CROSS JOIN LATERAL generate_series(
+           date_trunc(g.granularity, CAST(:from_date AS timestamp)),
+           CAST(:to_date AS timestamp),
+           CAST('1 ' || g.granularity AS interval)
+     ) AS s(bucket)
+)
+SELECT b.granularity,
+       b.bucket,
+       COALESCE(t.received, 0) AS received,
+       COALESCE(t.paid, 0) AS paid,
+       COALESCE(t.received, 0) - COALESCE(t.paid, 0) AS net_flow,
+       SUM(COALESCE(t.received, 0) - COALESCE(t.paid, 0))
+           OVER (PARTITION BY b.granularity ORDER BY b.bucket) AS cumulative_net,
+       COALESCE(t.count, 0) AS count
+  FROM buckets b
+  LEFT JOIN totals t USING (granularity, bucket)
+ ORDER BY b.granularity, b.bucket
+""")
+
+
+# ============================================================================
+# Cache
+# ============================================================================
+
+class InMemoryCashFlowCache:
+    """Per-process cash-flow series keyed by organization generation"""
+
+    def __init__(self, max_entries: int = 1000):
+        self._generations: Dict[str, int] = {}
+        self._entries: Dict[str, Tuple[float, dict]] = {}
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def generation(self, org_id: str) -> int:
+        return self._generations.get(org_id, 0)
+
+    def bump(self, org_id: str) -> None:
+        with self._lock:
+            self._generations[org_id] = self._generations.get(org_id, 0) + 1
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.time():
+            return entry[1]
+        return None
+
+    def set(self, key: str, value: dict, ttl_seconds: int) -> None:
+        now = time.time()
+        with self._lock:
+            if len(self._entries) >= self._max_entries:
+                self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+            self._entries[key] = (now + ttl_seconds, value)
+
+
+class RedisCashFlowCache:
+    """Cash-flow series shared by all workers, generation counter per organization"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def generation(self, org_id: str) -> int:
+        return int(self.client.get(f"cashflow:gen:{org_id}") or 0)
+
+    def bump(self, org_id: str) -> None:
+        self.client.incr(f"cashflow:gen:{org_id}")
+
+    def get(self, key: str) -> Optional[dict]:
+        value = self.client.get(key)
+        return json.loads(value) if value else None
+
+    def set(self, key: str, value: dict, ttl_seconds: int) -> None:
+        self.client.set(key, json.dumps(value), ex=ttl_seconds)
+
+
+_cash_flow_cache = None
+
+
+def get_cash_flow_cache():
+    """Get the process-wide cash-flow cache (Redis if configured)"""
+    global _cash_flow_cache
+
+    if _cash_flow_cache is None:
+        client = get_redis()
+        _cash_flow_cache = RedisCashFlowCache(client) if client is not None else InMemoryCashFlowCache()
+
+    return _cash_flow_cache
+
+
+def invalidate_cash_flow(org_id) -> None:
+    """Drop an organization's cached series; call after committing payment changes"""
+    try:
+        get_cash_flow_cache().bump(str(org_id))
+    except Exception as e:
+        logger.warning(f"Cash flow cache unavailable: {e}")
+
+
+# ============================================================================
+# Service
+# ============================================================================
+
+class CashFlowService:
+    """Service for cash-flow time series"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_cash_flow(
+        self,
+        org_id: str,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+        granularities: Optional[List[str]] = None
+    ) -> dict:
+        """
+        Get received, paid and net series for a date range.
+
+        Args:
+            org_id: Organization ID
+            from_date: First day (default: DEFAULT_RANGE_DAYS before to_date)
+            to_date: Last day (default: today)
+            granularities: Any of day, week, month (default: all)
+
+        Returns:
+            Range, whether the result came from the cache, and one gap-free
+            series per granularity
+
+        Raises:
+            HTTPException: If the granularities or range are invalid
+        """
+        requested = set(granularities or GRANULARITIES)
+        if not requested <= set(GRANULARITIES):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Granularity must be one of: {', '.join(GRANULARITIES)}"
+            )
+        granularities = [g for g in GRANULARITIES if g in requested]
+
+        to_date = to_date or date.today()
+        from_date = from_date or to_date - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+        if from_date > to_date:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="from_date must not be after to_date"
+            )
+        if "day" in granularities and (to_date - from_date).days + 1 > MAX_DAILY_POINTS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Daily series are limited to {MAX_DAILY_POINTS} days"
+            )
+
+        cache = get_cash_flow_cache()
+        key = None
+        try:
+            key = self._cache_key(cache.generation(str(org_id)), org_id, from_date, to_date, granularities)
+            cached = cache.get(key)
+        except Exception as e:
+            logger.warning(f"Cash flow cache unavailable: {e}")
+            cached = None
+        if cached is not None:
+            return {**cached, "cached": True}
+
+        result = self._compute(org_id, from_date, to_date, granularities)
+
+        if key is not None:
+            try:
+                cache.set(key, json.loads(json.dumps(result, default=str)), settings.CASH_FLOW_CACHE_TTL_SECONDS)
+            except Exception as e:
+                logger.warning(f"Cash flow cache unavailable: {e}")
+
+        return {**result, "cached": False}
+
+    def _compute(self, org_id: str, from_date: date, to_date: date, granularities: List[str]) -> dict:
+        """Run the series query and group its rows by granularity"""
+        rows = self.db.execute(CASH_FLOW_SQL, {
+            "org_id": org_id,
+            "from_date": from_date,
+            "to_date": to_date,
+            "granularities": granularities,
+        }).all()
+
+        series = {granularity: [] for granularity in granularities}
+        for row in rows:
+            series[row.granularity].append({
+                "period_start": row.bucket,
+                "received": row.received or Decimal('0'),
+                "paid": row.paid or Decimal('0'),
+                "net_flow": row.net_flow or Decimal('0'),
+                "cumulative_net": row.cumulative_net or Decimal('0'),
+                "count": int(row.count),
+            })
+
+        return {
+            "from_date": from_date,
+            "to_date": to_date,
+            "series": series,
+        }
+
+    @staticmethod
+    def _cache_key(generation: int, org_id: str, from_date: date, to_date: date, granularities: List[str]) -> str:
+        params = f"{from_date.isoformat()}:{to_date.isoformat()}:{','.join(granularities)}"
+        digest = hashlib.sha1(params.encode()).hexdigest()[:16]
+        return f"cashflow:{org_id}:{generation}:{digest}"
@@ -0,0 +1,486 @@
+"""
+Dashboard Service
+Resolve all widgets of a dashboard in one request
+
+Widget data depends only on the widget (its organization, type and config),
+never on the user viewing it. Each result is therefore cached under the
+widget's id and a digest of its config for `refresh_interval_seconds`, and
+everyone viewing a shared dashboard reads the same entry. Editing a widget's
+config changes the digest, so the stale entry is never read again.
+
+Cache misses are computed concurrently on a small thread pool, each widget
+with its own database session. Concurrent requests in one process for the same
+uncached widget wait on a single computation.
+
+The cache is Redis when REDIS_HOST is set (shared by all workers), otherwise a
+per-process dictionary.
+
+widget_config by widget_type:
+    kpi / gauge: {"kpi_code": "fuel_cost_per_km"}   # precomputed KPI
+                 {"metric": "active_vehicles"}      # live count, see COUNT_METRICS
+    chart:       {"data_source": "expenses|trips", "x_axis": "date|category|status",
+                  "y_axis": "amount|count", "period_days": 30, "filters": {...}}
+    table:       {"data_source": "expenses|trips|vehicles", "limit": 10, "filters": {...}}
+    map:         {"max_age_minutes": 60}            # latest position per driver
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+import uuid
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.redis_client import get_redis
+from app.models.dashboard import Dashboard, DashboardWidget
+from app.models.driver import Driver
+from app.models.expense import Expense
+from app.models.kpi import KPI
+from app.models.tracking import DriverLocation
+from app.models.trip import Trip
+from app.models.vehicle import Vehicle
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFRESH_SECONDS = 300
+MIN_REFRESH_SECONDS = 5
+MAX_TABLE_ROWS = 100
+
+
+# ============================================================================
+# Widget cache
+# ============================================================================
+
+class InMemoryWidgetCache:
+    """Per-process widget results with expiry times"""
+
+    def __init__(self, max_entries: int = 10000):
+        self._entries: Dict[str, Tuple[float, dict]] = {}
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> Dict[str, dict]:
+        now = time.time()
+        found = {}
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                found[key] = entry[1]
+        return found
+
+    def set(self, key: str, value: dict, ttl_seconds: int) -> None:
+        now = time.time()
+        with self._lock:
+            if len(self._entries) >= self._max_entries:
+                self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+            self._entries[key] = (now + ttl_seconds, value)
+
+
+class RedisWidgetCache:
+    """Widget results shared by all workers, stored as JSON with a TTL"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def get_many(self, keys: List[str]) -> Dict[str, dict]:
+        if not keys:
+            return {}
+        values = self.client.mget(keys)
+        return {key: json.loads(value) for key, value in zip(keys, values) if value}
+
+    def set(self, key: str, value: dict, ttl_seconds: int) -> None:
+        self.client.set(key, json.dumps(value), ex=ttl_seconds)
+
+
+_widget_cache = None
+
+
+def get_widget_cache():
+    """Get the process-wide widget cache (Redis if configured)"""
+    global _widget_cache
+
+    if _widget_cache is None:
+        client = get_redis()
+        _widget_cache = RedisWidgetCache(client) if client is not None else InMemoryWidgetCache()
+
+    return _widget_cache
+
+
+_widget_executor: Optional[ThreadPoolExecutor] = None
+_in_flight: Dict[str, Future] = {}
+_in_flight_lock = threading.Lock()
+
+
+def get_widget_executor() -> ThreadPoolExecutor:
+    """Get the process-wide widget query pool"""
+    global _widget_executor
+
+    if _widget_executor is None:
+        _widget_executor = ThreadPoolExecutor(
+            max_workers=settings.DASHBOARD_WIDGET_WORKERS,
+            thread_name_prefix="dashboard-widget"
+        )
+
+    return _widget_executor
+
+
+def shutdown_widget_executor() -> None:
+    """Stop the widget query pool"""
+    global _widget_executor
+
+    if _widget_executor is not None:
+        _widget_executor.shutdown(wait=False, cancel_futures=True)
+        _widget_executor = None
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+# ============================================================================
+# Widget resolvers
+# ============================================================================
+
+# metric -> (model, extra filter)
+COUNT_METRICS = {
+    "total_vehicles": (Vehicle, Vehicle.status != 'decommissioned'),
+    "active_vehicles": (Vehicle, Vehicle.status == 'active'),
+    "vehicles_in_maintenance": (Vehicle, Vehicle.status == 'maintenance'),
+    "total_drivers": (Driver, Driver.status != 'terminated'),
+    "active_drivers": (Driver, Driver.status == 'active'),
+    "ongoing_trips": (Trip, Trip.status == 'ongoing'),
+    "pending_expenses": (Expense, Expense.status == 'submitted'),
+}
+
+# data_source -> (model, date column, amount column, allowed group/filter columns)
+DATA_SOURCES = {
+    "expenses": (Expense, Expense.expense_date, Expense.total_amount, {
+        "category": Expense.category, "status": Expense.status,
+    }),
+    "trips": (Trip, func.date(Trip.created_at), Trip.trip_amount, {
+        "status": Trip.status,
+    }),
+    "vehicles": (Vehicle, func.date(Vehicle.created_at), None, {
+        "status": Vehicle.status, "vehicle_type": Vehicle.vehicle_type, "fuel_type": Vehicle.fuel_type,
+    }),
+}
+
+TABLE_COLUMNS = {
+    "expenses": [Expense.expense_number, Expense.category, Expense.total_amount,
+                 Expense.expense_date, Expense.status],
+    "trips": [Trip.trip_number, Trip.origin, Trip.destination, Trip.status,
+              Trip.trip_amount, Trip.start_date, Trip.end_date],
+    "vehicles": [Vehicle.vehicle_number, Vehicle.registration_number, Vehicle.vehicle_type,
+                 Vehicle.status, Vehicle.current_odometer],
+}
+
+
+def _data_source(config: dict):
+    source = DATA_SOURCES.get(config.get("data_source"))
+    if source is None:
+        raise ValueError(f"Unknown data_source. Available: {', '.join(DATA_SOURCES)}")
+    return source
+
+
+def _apply_filters(query, model, columns: dict, org_id: str, config: dict):
+    query = query.filter(model.organization_id == org_id)
+    for name, value in (config.get("filters") or {}).items():
+        column = columns.get(name)
+        if column is None:
+            raise ValueError(f"Unsupported filter '{name}'")
+        query = query.filter(column.in_(value) if isinstance(value, list) else column == value)
+    return query
+
+
+def _kpi_widget(db: Session, org_id: str, config: dict) -> dict:
+    if config.get("kpi_code"):
+        kpi = db.query(KPI).filter(
+            KPI.organization_id == org_id,
+            KPI.kpi_code == config["kpi_code"]
+        ).first()
+        if kpi is None:
+            raise ValueError(f"KPI '{config['kpi_code']}' not found")
+        return {
+            "value": kpi.current_value,
+            "target_value": kpi.target_value,
+            "min_threshold": kpi.min_threshold,
+            "max_threshold": kpi.max_threshold,
+            "last_calculated_at": kpi.last_calculated_at,
+        }
+
+    metric = COUNT_METRICS.get(config.get("metric"))
+    if metric is None:
+        raise ValueError(f"Set kpi_code or a metric from: {', '.join(COUNT_METRICS)}")
+
+    model, condition = metric
+    value = db.query(func.count(model.id)).filter(
+        model.organization_id == org_id,
+        condition
+    ).scalar()
+    return {"value": value}
+
+
+def _chart_widget(db: Session, org_id: str, config: dict) -> dict:
+    model, date_column, amount_column, columns = _data_source(config)
+    period_days = int(config.get("period_days", 30))
+
+    x_axis = config.get("x_axis", "date")
+    x_column = date_column if x_axis == "date" else columns.get(x_axis)
+    if x_column is None:
+        raise ValueError(f"Unsupported x_axis '{x_axis}'")
+
+    if config.get("y_axis", "count") == "amount":
+        if amount_column is None:
+            raise ValueError("This data_source has no amount")
+        y_column = func.coalesce(func.sum(amount_column), 0)
+    else:
+        y_column = func.count(model.id)
+
+    query = db.query(x_column.label("x"), y_column.label("y"))
+    query = _apply_filters(query, model, columns, org_id, config)
+    query = query.filter(date_column >= date.today() - timedelta(days=period_days))
+    rows = query.group_by(x_column).order_by(x_column).all()
+
+    return {"series": [{"x": row.x, "y": row.y} for row in rows]}
+
+
+def _table_widget(db: Session, org_id: str, config: dict) -> dict:
+    model, date_column, _, columns = _data_source(config)
+    selected = TABLE_COLUMNS[config["data_source"]]
+    limit = min(int(config.get("limit", 10)), MAX_TABLE_ROWS)
+
+    query = _apply_filters(db.query(*selected), model, columns, org_id, config)
+    rows = query.order_by(model.created_at.desc()).limit(limit).all()
+
+    return {
+        "columns": [column.key for column in selected],
+        "rows": [list(row) for row in rows],
+    }
+
+
+def _map_widget(db: Session, org_id: str, config: dict) -> dict:
+    since = datetime.utcnow() - timedelta(minutes=int(config.get("max_age_minutes", 60)))
+
+    # Latest fix per driver (DISTINCT ON uses idx_locations_driver_time)
+    rows = db.query(
+        DriverLocation.driver_id,
+        DriverLocation.latitude,
+        DriverLocation.longitude,
+        DriverLocation.heading,
+        DriverLocation.speed,
+        DriverLocation.timestamp
+    ).filter(
+        DriverLocation.organization_id == org_id,
+        DriverLocation.timestamp >= since
+    ).distinct(DriverLocation.driver_id).order_by(
+        DriverLocation.driver_id, DriverLocation.timestamp.desc()
+    ).all()
+
+    return {"markers": [row._asdict() for row in rows]}
+
+
+WIDGET_RESOLVERS = {
+    "kpi": _kpi_widget,
+    "gauge": _kpi_widget,
+    "chart": _chart_widget,
+    "table": _table_widget,
+    "map": _map_widget,
+}
+
+
+def compute_widget(widget_type: str, org_id: str, config: dict) -> dict:
+    """
+    Compute one widget's data with a dedicated session (runs on the pool).
+
+    Returns:
+        JSON-ready result with `data` or `error`, and `computed_at`
+    """
+    from app.database import SessionLocal
+
+    resolver = WIDGET_RESOLVERS.get(widget_type)
+    result = {"computed_at": datetime.utcnow()}
+
+    if resolver is None:
+        result["error"] = f"Unsupported widget type '{widget_type}'"
+    else:
+        db = SessionLocal()
+        try:
+            result["data"] = resolver(db, org_id, config)
+        except ValueError as e:
+            result["error"] = str(e)
+        except Exception:
+            logger.exception(f"Dashboard widget query failed ({widget_type})")
+            result["error"] = "Widget data could not be loaded"
+        finally:
+            db.close()
+
+    return json.loads(json.dumps(result, default=_json_default))
+
+
+# ============================================================================
+# Service
+# ============================================================================
+
+class DashboardService:
+    """Service for dashboards and their widget data"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_dashboards(self, org_id: str, user_id: str) -> List[Dashboard]:
+        """Dashboards the user owns plus shared and default ones"""
+        return self.db.query(Dashboard).filter(
+            Dashboard.organization_id == org_id,
+            or_(
+                Dashboard.owner_id == user_id,
+                Dashboard.is_shared == True,
+                Dashboard.is_default == True
+            )
+        ).order_by(Dashboard.is_default.desc(), Dashboard.dashboard_name).all()
+
+    def get_dashboard(self, org_id: str, user_id: str, dashboard_id: str) -> Dashboard:
+        """
+        Get a dashboard the user may view.
+
+        Raises:
+            HTTPException: If not found or private to another user
+        """
+        dashboard = self.db.query(Dashboard).filter(
+            Dashboard.id == dashboard_id,
+            Dashboard.organization_id == org_id
+        ).first()
+
+        if not dashboard or not (
+            str(dashboard.owner_id) == str(user_id) or dashboard.is_shared or dashboard.is_default
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Dashboard not found"
+            )
+
+        return dashboard
+
+    def get_dashboard_data(
+        self,
+        org_id: str,
+        user_id: str,
+        dashboard_id: str,
+        refresh: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Resolve every widget of a dashboard.
+
+        Args:
+            org_id: Organization ID
+            user_id: Viewing user
+            dashboard_id: Dashboard ID
+            refresh: Recompute all widgets instead of reading the cache
+
+        Returns:
+            Dashboard id, generation time and one entry per widget in display order
+        """
+        dashboard = self.get_dashboard(org_id, user_id, dashboard_id)
+        widgets = self.db.query(DashboardWidget).filter(
+            DashboardWidget.dashboard_id == dashboard.id
+        ).order_by(DashboardWidget.display_order, DashboardWidget.created_at).all()
+
+        keys = {widget.id: self._cache_key(widget) for widget in widgets}
+        cache = get_widget_cache()
+        try:
+            cached = {} if refresh else cache.get_many(list(keys.values()))
+        except Exception as e:
+            logger.warning(f"Widget cache unavailable: {e}")
+            cached = {}
+
+        futures = {
+            widget.id: self._compute(widget, keys[widget.id], str(dashboard.organization_id), refresh)
+            for widget in widgets if keys[widget.id] not in cached
+        }
+        if futures:
+            wait(list(futures.values()), timeout=settings.DASHBOARD_WIDGET_TIMEOUT_SECONDS)
+
+        results = []
+        for widget in widgets:
+            key = keys[widget.id]
+            ttl = self._ttl(widget)
+            if key in cached:
+                result, from_cache = cached[key], True
+            elif futures[widget.id].done() and futures[widget.id].exception() is None:
+                result, from_cache = futures[widget.id].result(), False
+            else:
+                result, from_cache = {"error": "Widget data is still loading"}, False
+
+            computed_at = result.get("computed_at")
+            results.append({
+                "widget_id": widget.id,
+                "widget_name": widget.widget_name,
+                "widget_type": widget.widget_type,
+                "data": result.get("data"),
+                "error": result.get("error"),
+                "cached": from_cache,
+                "computed_at": computed_at,
+                "expires_at": (
+                    datetime.fromisoformat(computed_at) + timedelta(seconds=ttl)
+                    if computed_at else None
+                ),
+                "refresh_interval_seconds": ttl if widget.auto_refresh else None,
+            })
+
+        return {
+            "dashboard_id": dashboard.id,
+            "dashboard_name": dashboard.dashboard_name,
+            "generated_at": datetime.utcnow(),
+            "widgets": results,
+        }
+
+    @staticmethod
+    def _ttl(widget: DashboardWidget) -> int:
+        return max(widget.refresh_interval_seconds or DEFAULT_REFRESH_SECONDS, MIN_REFRESH_SECONDS)
+
+    @staticmethod
+    def _cache_key(widget: DashboardWidget) -> str:
+        config = json.dumps(
+            [widget.widget_type, widget.widget_config], sort_keys=True, default=str
+        )
+        digest = hashlib.sha256(config.encode()).hexdigest()[:16]
+        return f"dashboard:widget:{widget.id}:{digest}"
+
+    def _compute(self, widget: DashboardWidget, key: str, org_id: str, refresh: bool) -> Future:
+        """Start (or join) the computation of a widget and cache its result"""
+        ttl = self._ttl(widget)
+        widget_type, config = widget.widget_type, dict(widget.widget_config or {})
+
+        def run() -> dict:
+            try:
+                result = compute_widget(widget_type, org_id, config)
+                # Errors are cached briefly so a broken widget cannot hammer the database
+                try:
+                    get_widget_cache().set(key, result, MIN_REFRESH_SECONDS if "error" in result else ttl)
+                except Exception as e:
+                    logger.warning(f"Widget cache unavailable: {e}")
+                return result
+            finally:
+                with _in_flight_lock:
+                    _in_flight.pop(key, None)
+
+        with _in_flight_lock:
+            future = _in_flight.get(key)
+            if future is None or (refresh and future.done()):
+                future = get_widget_executor().submit(run)
+                _in_flight[key] = future
+        return future
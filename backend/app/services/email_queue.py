@@ -0,0 +1,283 @@
+"""
+Email Queue
+Background delivery of outbound email over a persistent SMTP connection
+
+`EmailService` helpers enqueue messages and return immediately. A single
+worker thread drains the queue in batches, reusing one authenticated SMTP
+connection across messages, retries failures with exponential backoff and
+moves messages that exhaust their retries to the `email_dead_letters` table.
+
+Transports:
+- SMTPTransport: production delivery via SMTP_* settings
+- MemoryTransport: local stand-in that keeps messages in memory
+  (EMAIL_BACKEND=memory), for development and tests
+"""
+
+import heapq
+import itertools
+import logging
+import queue
+import smtplib
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OutboundEmail:
+    """An email waiting for delivery"""
+    to_email: str
+    subject: str
+    html_content: str
+    text_content: Optional[str] = None
+    attempts: int = 0
+    last_error: Optional[str] = None
+    queued_at: datetime = field(default_factory=datetime.utcnow)
+
+    def to_mime(self) -> MIMEMultipart:
+        """Build the MIME message"""
+        msg = MIMEMultipart('alternative')
+        msg['From'] = f"{settings.SMTP_FROM_NAME} <{settings.SMTP_FROM_EMAIL}>"
+        msg['To'] = self.to_email
+        msg['Subject'] = self.subject
+
+        if self.text_content:
+            msg.attach(MIMEText(self.text_content, 'plain'))
+        msg.attach(MIMEText(self.html_content, 'html'))
+
+        return msg
+
+
+# ============================================================================
+# Transports
+# ============================================================================
+
+class SMTPTransport:
+    """
+    SMTP delivery that keeps one authenticated connection open.
+
+    The connection is reused across batches and checked with NOOP after it
+    has been idle, so STARTTLS and login happen once per connection rather
+    than once per email.
+    """
+
+    IDLE_CHECK_SECONDS = 30
+
+    def __init__(self):
+        self._server: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=30)
+        server.starttls()
+        if settings.SMTP_USER:
+            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+        return server
+
+    def _connection(self) -> smtplib.SMTP:
+        if self._server is not None and time.monotonic() - self._last_used > self.IDLE_CHECK_SECONDS:
+            try:
+                self._server.noop()
+            except smtplib.SMTPException:
+                self.close()
+            except OSError:
+                self.close()
+
+        if self._server is None:
+            self._server = self._connect()
+
+        return self._server
+
+    def send(self, message: OutboundEmail) -> None:
+        """Send one message, reconnecting once if the server dropped us"""
+        try:
+            self._connection().send_message(message.to_mime())
+        except smtplib.SMTPServerDisconnected:
+            self.close()
+            self._connection().send_message(message.to_mime())
+        self._last_used = time.monotonic()
+
+    def close(self) -> None:
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+
+class MemoryTransport:
+    """Local SMTP stand-in that records delivered messages"""
+
+    def __init__(self):
+        self.outbox: List[OutboundEmail] = []
+
+    def send(self, message: OutboundEmail) -> None:
+        self.outbox.append(message)
+
+    def close(self) -> None:
+        pass
+
+
+def create_transport():
+    """Create the transport selected by EMAIL_BACKEND"""
+    if settings.EMAIL_BACKEND == "memory":
+        return MemoryTransport()
+    return SMTPTransport()
+
+
+# ============================================================================
+# Queue
+# ============================================================================
+
+class EmailQueue:
+    """Outbound mail queue with a background delivery worker"""
+
+    def __init__(self, transport=None):
+        self.transport = transport or create_transport()
+        self._queue: "queue.Queue[OutboundEmail]" = queue.Queue()
+        self._retries: list = []  # heap of (not_before, seq, message)
+        self._seq = itertools.count()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, message: OutboundEmail) -> None:
+        """Queue a message for delivery and return immediately"""
+        self.start()
+        self._queue.put(message)
+
+    def start(self) -> None:
+        """Start the delivery worker if it is not running"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="email-queue", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush queued messages (best effort) and stop the worker"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.transport.close()
+
+    def pending(self) -> int:
+        """Number of messages waiting (including scheduled retries)"""
+        return self._queue.qsize() + len(self._retries)
+
+    def _run(self) -> None:
+        while not self._stop.is_set() or not self._queue.empty():
+            batch = self._next_batch()
+            if batch:
+                self._deliver(batch)
+            elif self._stop.is_set():
+                break
+
+        # Messages still waiting for a retry at shutdown are dead-lettered
+        leftovers = [message for _, _, message in self._retries]
+        self._retries = []
+        for message in leftovers:
+            message.last_error = message.last_error or "worker stopped"
+        if leftovers:
+            self._dead_letter(leftovers)
+
+    def _next_batch(self) -> List[OutboundEmail]:
+        """Collect due retries plus up to a batch of new messages"""
+        batch = []
+        now = time.monotonic()
+        while self._retries and self._retries[0][0] <= now:
+            batch.append(heapq.heappop(self._retries)[2])
+
+        wait = 0.0 if batch else 1.0
+        if self._retries and not batch:
+            wait = min(wait, max(self._retries[0][0] - now, 0.0))
+
+        try:
+            batch.append(self._queue.get(timeout=wait) if wait else self._queue.get_nowait())
+        except queue.Empty:
+            return batch
+
+        while len(batch) < settings.EMAIL_QUEUE_BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _deliver(self, batch: List[OutboundEmail]) -> None:
+        dead = []
+        for message in batch:
+            try:
+                self.transport.send(message)
+            except Exception as e:
+                message.attempts += 1
+                message.last_error = str(e)[:500]
+                logger.warning(
+                    f"Email to {message.to_email} failed (attempt {message.attempts}): {e}"
+                )
+                self.transport.close()
+
+                if message.attempts >= settings.EMAIL_MAX_RETRIES:
+                    dead.append(message)
+                else:
+                    delay = settings.EMAIL_RETRY_BASE_SECONDS * (2 ** (message.attempts - 1))
+                    heapq.heappush(
+                        self._retries,
+                        (time.monotonic() + delay, next(self._seq), message)
+                    )
+
+        if dead:
+            self._dead_letter(dead)
+
+    @staticmethod
+    def _dead_letter(messages: List[OutboundEmail]) -> None:
+        """Persist undeliverable messages to the dead-letter table"""
+        from app.database import SessionLocal
+        from app.models.email_dead_letter import EmailDeadLetter
+
+        db = SessionLocal()
+        try:
+            db.add_all([
+                EmailDeadLetter(
+                    to_email=message.to_email,
+                    subject=message.subject,
+                    html_content=message.html_content,
+                    text_content=message.text_content,
+                    attempts=message.attempts,
+                    last_error=message.last_error,
+                    queued_at=message.queued_at
+                )
+                for message in messages
+            ])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Could not dead-letter {len(messages)} emails: {e}")
+        finally:
+            db.close()
+
+
+_email_queue: Optional[EmailQueue] = None
+
+
+def get_email_queue() -> EmailQueue:
+    """Get the process-wide email queue"""
+    global _email_queue
+
+    if _email_queue is None:
+        _email_queue = EmailQueue()
+
+    return _email_queue
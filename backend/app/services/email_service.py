@@ -1,14 +1,17 @@
 """
 Email Service
-Send verification and notification emails
+Compose verification and notification emails and queue them for delivery
 """
 
-from typing import Optional
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
 
 from app.config import settings
+from app.models.driver import Driver, DriverLicense
+from app.services.email_queue import OutboundEmail, get_email_queue
+from app.services.email_templates import get_template_engine
 
 
 class EmailService:
@@ -22,7 +25,10 @@ class EmailService:
         text_content: Optional[str] = None
     ) -> bool:
         """
-        Send an email.
+        Queue an email for background delivery.
+
+        Delivery, retries and dead-lettering are handled by the email queue
+        worker, so this returns without waiting for SMTP.
 
         Args:
             to_email: Recipient email address
@@ -31,96 +37,110 @@ class EmailService:
             text_content: Plain text email body (optional)
 
         Returns:
-            True if email sent successfully, False otherwise
+            True if email was queued successfully, False otherwise
         """
         try:
-            # Create message
-            msg = MIMEMultipart('alternative')
-            msg['From'] = f"{settings.SMTP_FROM_NAME} <{settings.SMTP_FROM_EMAIL}>"
-            msg['To'] = to_email
-            msg['Subject'] = subject
-
-            # Add text content
-            if text_content:
-                part1 = MIMEText(text_content, 'plain')
-                msg.attach(part1)
-
-            # Add HTML content
-            part2 = MIMEText(html_content, 'html')
-            msg.attach(part2)
-
-            # Send email
-            with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-                server.starttls()
-                server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-                server.send_message(msg)
-
+            get_email_queue().enqueue(OutboundEmail(
+                to_email=to_email,
+                subject=subject,
+                html_content=html_content,
+                text_content=text_content
+            ))
             return True
 
         except Exception as e:
-            print(f"Error sending email: {e}")
+            print(f"Error queueing email: {e}")
             return False
 
     @staticmethod
-    def send_verification_email(email: str, username: str, token: str) -> bool:
+    def send_template(
+        to_email: str,
+        template_name: str,
+        context: Dict[str, object],
+        organization_id: Optional[str] = None
+    ) -> bool:
         """
-        Send email verification link.
+        Render a pre-compiled template with the organization's branding and queue it.
 
         Args:
-            email: User's email address
-            username: User's username
-            token: Verification token
+            to_email: Recipient email address
+            template_name: Name of the template (see email_templates)
+            context: Values for the template placeholders
+            organization_id: Organization whose branding to apply (optional)
 
         Returns:
-            True if sent successfully
+            True if email was queued successfully
         """
-        verification_url = f"{settings.EMAIL_VERIFICATION_URL}?token={token}"
-
-        subject = "Verify Your Email - Fleet Management System"
-
-        html_content = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; padding: 20px;">
-            <h2>Welcome to Fleet Management System!</h2>
-            <p>Hello <strong>{username}</strong>,</p>
-            <p>Thank you for signing up. Please verify your email address to activate your account.</p>
-            <p>
-                <a href="{verification_url}"
-                   style="background-color: #4CAF50; color: white; padding: 12px 24px;
-                          text-decoration: none; border-radius: 4px; display: inline-block;">
-                    Verify Email Address
-                </a>
-            </p>
-            <p>Or copy and paste this link into your browser:</p>
-            <p><a href="{verification_url}">{verification_url}</a></p>
-            <p>This link will expire in 24 hours.</p>
-            <p>If you didn't create an account, please ignore this email.</p>
-            <hr style="margin-top: 30px;">
-            <p style="color: #666; font-size: 12px;">
-                This is an automated email. Please do not reply.
-            </p>
-        </body>
-        </html>
+        rendered = get_template_engine().render(template_name, context, organization_id)
+        return EmailService.send_email(
+            to_email, rendered.subject, rendered.html_content, rendered.text_content
+        )
+
+    @staticmethod
+    def send_bulk(
+        template_name: str,
+        recipients: List[Tuple[str, Dict[str, object]]],
+        organization_id: Optional[str] = None
+    ) -> int:
         """
+        Render and queue one template for many recipients.
 
-        text_content = f"""
-        Welcome to Fleet Management System!
+        Branding is resolved once for the whole batch.
 
-        Hello {username},
+        Args:
+            template_name: Name of the template
+            recipients: List of (email, context) tuples
+            organization_id: Organization whose branding to apply (optional)
 
-        Thank you for signing up. Please verify your email address to activate your account.
+        Returns:
+            Number of emails queued
+        """
+        if not recipients:
+            return 0
 
-        Click this link to verify: {verification_url}
+        rendered = get_template_engine().render_many(
+            template_name, [context for _, context in recipients], organization_id
+        )
 
-        This link will expire in 24 hours.
+        queued = 0
+        for (to_email, _), message in zip(recipients, rendered):
+            if EmailService.send_email(
+                to_email, message.subject, message.html_content, message.text_content
+            ):
+                queued += 1
+        return queued
 
-        If you didn't create an account, please ignore this email.
+    @staticmethod
+    def send_verification_email(
+        email: str,
+        username: str,
+        token: str,
+        organization_id: Optional[str] = None
+    ) -> bool:
         """
+        Send email verification link.
 
-        return EmailService.send_email(email, subject, html_content, text_content)
+        Args:
+            email: User's email address
+            username: User's username
+            token: Verification token
+            organization_id: Organization whose branding to apply (optional)
+
+        Returns:
+            True if queued successfully
+        """
+        return EmailService.send_template(email, "email_verification", {
+            "username": username,
+            "verification_url": f"{settings.EMAIL_VERIFICATION_URL}?token={token}"
+        }, organization_id)
 
     @staticmethod
-    def send_password_reset_email(email: str, username: str, token: str) -> bool:
+    def send_password_reset_email(
+        email: str,
+        username: str,
+        token: str,
+        organization_id: Optional[str] = None
+    ) -> bool:
         """
         Send password reset link.
 
@@ -128,145 +148,106 @@ class EmailService:
             email: User's email address
             username: User's username
             token: Password reset token
+            organization_id: Organization whose branding to apply (optional)
 
         Returns:
-            True if sent successfully
-        """
-        reset_url = f"{settings.PASSWORD_RESET_URL}?token={token}"
-
-        subject = "Password Reset Request - Fleet Management System"
-
-        html_content = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; padding: 20px;">
-            <h2>Password Reset Request</h2>
-            <p>Hello <strong>{username}</strong>,</p>
-            <p>We received a request to reset your password for your Fleet Management System account.</p>
-            <p>
-                <a href="{reset_url}"
-                   style="background-color: #2196F3; color: white; padding: 12px 24px;
-                          text-decoration: none; border-radius: 4px; display: inline-block;">
-                    Reset Password
-                </a>
-            </p>
-            <p>Or copy and paste this link into your browser:</p>
-            <p><a href="{reset_url}">{reset_url}</a></p>
-            <p>This link will expire in 24 hours.</p>
-            <p><strong>If you didn't request a password reset, please ignore this email or contact support if you have concerns.</strong></p>
-            <hr style="margin-top: 30px;">
-            <p style="color: #666; font-size: 12px;">
-                This is an automated email. Please do not reply.
-            </p>
-        </body>
-        </html>
+            True if queued successfully
         """
-
-        text_content = f"""
-        Password Reset Request
-
-        Hello {username},
-
-        We received a request to reset your password for your Fleet Management System account.
-
-        Click this link to reset your password: {reset_url}
-
-        This link will expire in 24 hours.
-
-        If you didn't request a password reset, please ignore this email or contact support if you have concerns.
-        """
-
-        return EmailService.send_email(email, subject, html_content, text_content)
+        return EmailService.send_template(email, "password_reset", {
+            "username": username,
+            "reset_url": f"{settings.PASSWORD_RESET_URL}?token={token}"
+        }, organization_id)
 
     @staticmethod
-    def send_username_recovery_email(email: str, username: str) -> bool:
+    def send_username_recovery_email(
+        email: str,
+        username: str,
+        organization_id: Optional[str] = None
+    ) -> bool:
         """
         Send username recovery email.
 
         Args:
             email: User's email address
             username: Recovered username
+            organization_id: Organization whose branding to apply (optional)
 
         Returns:
-            True if sent successfully
+            True if queued successfully
         """
-        subject = "Username Recovery - Fleet Management System"
-
-        html_content = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; padding: 20px;">
-            <h2>Username Recovery</h2>
-            <p>Hello,</p>
-            <p>You requested to recover your username for the Fleet Management System.</p>
-            <p>Your username is: <strong>{username}</strong></p>
-            <p>You can now use this username to log in to your account.</p>
-            <p>If you didn't request username recovery, please contact support immediately.</p>
-            <hr style="margin-top: 30px;">
-            <p style="color: #666; font-size: 12px;">
-                This is an automated email. Please do not reply.
-            </p>
-        </body>
-        </html>
-        """
-
-        text_content = f"""
-        Username Recovery
-
-        Hello,
-
-        You requested to recover your username for the Fleet Management System.
-
-        Your username is: {username}
-
-        You can now use this username to log in to your account.
-
-        If you didn't request username recovery, please contact support immediately.
-        """
-
-        return EmailService.send_email(email, subject, html_content, text_content)
+        return EmailService.send_template(email, "username_recovery", {
+            "username": username
+        }, organization_id)
 
     @staticmethod
-    def send_welcome_email_security_questions(email: str, username: str) -> bool:
+    def send_welcome_email_security_questions(
+        email: str,
+        username: str,
+        organization_id: Optional[str] = None
+    ) -> bool:
         """
         Send welcome email for security questions signup (no verification needed).
 
         Args:
             email: User's email address (if provided)
             username: User's username
+            organization_id: Organization whose branding to apply (optional)
 
         Returns:
-            True if sent successfully
+            True if queued successfully
         """
         if not email:
             return False  # No email to send to
 
-        subject = "Welcome to Fleet Management System"
-
-        html_content = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; padding: 20px;">
-            <h2>Welcome to Fleet Management System!</h2>
-            <p>Hello <strong>{username}</strong>,</p>
-            <p>Your account has been successfully created using security questions authentication.</p>
-            <p>You can now log in to your account using your username and password.</p>
-            <p>Thank you for choosing Fleet Management System!</p>
-            <hr style="margin-top: 30px;">
-            <p style="color: #666; font-size: 12px;">
-                This is an automated email. Please do not reply.
-            </p>
-        </body>
-        </html>
-        """
-
-        text_content = f"""
-        Welcome to Fleet Management System!
+        return EmailService.send_template(email, "welcome_security_questions", {
+            "username": username
+        }, organization_id)
 
-        Hello {username},
-
-        Your account has been successfully created using security questions authentication.
+    @staticmethod
+    def send_license_expiry_reminders(
+        db: Session,
+        organization_id: str,
+        days_ahead: int = 30
+    ) -> int:
+        """
+        Email every active driver whose license expires within days_ahead.
 
-        You can now log in to your account using your username and password.
+        Drivers are fetched with one column-only query and all messages are
+        rendered from the organization's cached branded template.
 
-        Thank you for choosing Fleet Management System!
-        """
+        Args:
+            db: Database session
+            organization_id: Organization UUID
+            days_ahead: Reminder horizon in days (default: 30)
 
-        return EmailService.send_email(email, subject, html_content, text_content)
+        Returns:
+            Number of reminders queued
+        """
+        today = date.today()
+        rows = db.query(
+            Driver.email,
+            Driver.first_name,
+            Driver.last_name,
+            DriverLicense.license_number,
+            DriverLicense.expiry_date
+        ).join(
+            DriverLicense, DriverLicense.driver_id == Driver.id
+        ).filter(
+            Driver.organization_id == organization_id,
+            Driver.status == 'active',
+            Driver.email != None,
+            DriverLicense.expiry_date >= today,
+            DriverLicense.expiry_date <= today + timedelta(days=days_ahead)
+        ).all()
+
+        recipients = [
+            (row.email, {
+                "driver_name": f"{row.first_name} {row.last_name}",
+                "license_number": row.license_number,
+                "expiry_date": row.expiry_date.strftime('%d %b %Y'),
+                "days_remaining": (row.expiry_date - today).days
+            })
+            for row in rows
+        ]
+
+        return EmailService.send_bulk("license_expiry_reminder", recipients, organization_id)
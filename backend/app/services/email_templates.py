@@ -0,0 +1,395 @@
+"""
+Email Templates
+Pre-compiled, organization-branded email templates
+
+Templates are compiled once at import: each message template is merged into
+the shared layout and parsed into a `string.Template`. The first time an
+organization sends a given template, its branding (logo, colors from
+`BrandingService`) is substituted in and the resulting variant is cached, so
+rendering a message is a single substitution of the per-recipient values.
+Batch sends render every message from the same cached variant.
+"""
+
+import html
+import threading
+import time
+from string import Template
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from app.config import settings
+
+
+DEFAULT_LOCALE = "en"
+BRANDING_CACHE_SECONDS = 300
+
+# Used for system emails (no organization) and organizations without branding
+DEFAULT_BRANDING = {
+    "organization_name": settings.APP_NAME,
+    "logo_url": "",
+    "primary_color": "#1E40AF",
+    "secondary_color": "#06B6D4",
+    "background_primary": "#F8FAFC",
+    "background_secondary": "#FFFFFF",
+}
+
+# Branding values that are HTML markup (escaped when built) rather than text
+MARKUP_BRANDING = {"logo_block"}
+
+LAYOUT_HTML = """
+        <html>
+        <body style="font-family: Arial, sans-serif; padding: 20px; background-color: $${background_primary};">
+            <div style="background-color: $${background_secondary}; padding: 20px;">
+            $${logo_block}
+            <h2 style="color: $${primary_color};">${heading}</h2>
+            ${body}
+            <hr style="margin-top: 30px;">
+            <p style="color: #666; font-size: 12px;">
+                This is an automated email from $${organization_name}. Please do not reply.
+            </p>
+            </div>
+        </body>
+        </html>
+        """
+
+BUTTON_HTML = """<p>
+                <a href="${url}"
+                   style="background-color: $${primary_color}; color: white; padding: 12px 24px;
+                          text-decoration: none; border-radius: 4px; display: inline-block;">
+                    ${label}
+                </a>
+            </p>"""
+
+
+def _button(url_placeholder: str, label: str) -> str:
+    return Template(BUTTON_HTML).safe_substitute(url=url_placeholder, label=label)
+
+
+# name -> locale -> (subject, heading, html body, text body)
+TEMPLATE_SOURCES: Dict[str, Dict[str, Tuple[str, str, str, str]]] = {
+    "email_verification": {
+        "en": (
+            "Verify Your Email - $organization_name",
+            "Welcome to $organization_name!",
+            """<p>Hello <strong>$username</strong>,</p>
+            <p>Thank you for signing up. Please verify your email address to activate your account.</p>
+            """ + _button("$verification_url", "Verify Email Address") + """
+            <p>Or copy and paste this link into your browser:</p>
+            <p><a href="$verification_url">$verification_url</a></p>
+            <p>This link will expire in 24 hours.</p>
+            <p>If you didn't create an account, please ignore this email.</p>""",
+            """
+        Welcome to $organization_name!
+
+        Hello $username,
+
+        Thank you for signing up. Please verify your email address to activate your account.
+
+        Click this link to verify: $verification_url
+
+        This link will expire in 24 hours.
+
+        If you didn't create an account, please ignore this email.
+        """,
+        ),
+    },
+    "password_reset": {
+        "en": (
+            "Password Reset Request - $organization_name",
+            "Password Reset Request",
+            """<p>Hello <strong>$username</strong>,</p>
+            <p>We received a request to reset your password for your $organization_name account.</p>
+            """ + _button("$reset_url", "Reset Password") + """
+            <p>Or copy and paste this link into your browser:</p>
+            <p><a href="$reset_url">$reset_url</a></p>
+            <p>This link will expire in 24 hours.</p>
+            <p><strong>If you didn't request a password reset, please ignore this email or contact support if you have concerns.</strong></p>""",
+            """
+        Password Reset Request
+
+        Hello $username,
+
+        We received a request to reset your password for your $organization_name account.
+
+        Click this link to reset your password: $reset_url
+
+        This link will expire in 24 hours.
+
+        If you didn't request a password reset, please ignore this email or contact support if you have concerns.
+        """,
+        ),
+    },
+    "username_recovery": {
+        "en": (
+            "Username Recovery - $organization_name",
+            "Username Recovery",
+            """<p>Hello,</p>
+            <p>You requested to recover your username for $organization_name.</p>
+            <p>Your username is: <strong>$username</strong></p>
+            <p>You can now use this username to log in to your account.</p>
+            <p>If you didn't request username recovery, please contact support immediately.</p>""",
+            """
+        Username Recovery
+
+        Hello,
+
+        You requested to recover your username for $organization_name.
+
+        Your username is: $username
+
+        You can now use this username to log in to your account.
+
+        If you didn't request username recovery, please contact support immediately.
+        """,
+        ),
+    },
+    "welcome_security_questions": {
+        "en": (
+            "Welcome to $organization_name",
+            "Welcome to $organization_name!",
+            """<p>Hello <strong>$username</strong>,</p>
+            <p>Your account has been successfully created using security questions authentication.</p>
+            <p>You can now log in to your account using your username and password.</p>
+            <p>Thank you for choosing $organization_name!</p>""",
+            """
+        Welcome to $organization_name!
+
+        Hello $username,
+
+        Your account has been successfully created using security questions authentication.
+
+        You can now log in to your account using your username and password.
+
+        Thank you for choosing $organization_name!
+        """,
+        ),
+    },
+    "license_expiry_reminder": {
+        "en": (
+            "Driving License Expiry Reminder - $organization_name",
+            "Your Driving License Expires Soon",
+            """<p>Hello <strong>$driver_name</strong>,</p>
+            <p>Your driving license <strong>$license_number</strong> expires on
+               <strong>$expiry_date</strong> ($days_remaining days from today).</p>
+            <p>Please renew it and share the updated license with $organization_name
+               to avoid interruption to your trips.</p>""",
+            """
+        Driving License Expiry Reminder
+
+        Hello $driver_name,
+
+        Your driving license $license_number expires on $expiry_date ($days_remaining days from today).
+
+        Please renew it and share the updated license with $organization_name to avoid interruption to your trips.
+        """,
+        ),
+    },
+    "invoice_overdue_reminder": {
+        "en": (
+            "Invoice $invoice_number is overdue - $organization_name",
+            "Payment Reminder",
+            """<p>Hello <strong>$customer_name</strong>,</p>
+            <p>Invoice <strong>$invoice_number</strong> was due on <strong>$due_date</strong>
+               ($days_overdue days ago) and has an outstanding balance of
+               <strong>$amount_due</strong>.</p>
+            <p>Please arrange payment at your earliest convenience. If you have already paid,
+               please disregard this reminder.</p>
+            <p>Thank you,<br>$organization_name</p>""",
+            """
+        Payment Reminder
+
+        Hello $customer_name,
+
+        Invoice $invoice_number was due on $due_date ($days_overdue days ago) and has an outstanding balance of $amount_due.
+
+        Please arrange payment at your earliest convenience. If you have already paid, please disregard this reminder.
+
+        Thank you,
+        $organization_name
+        """,
+        ),
+    },
+    "scheduled_report_ready": {
+        "en": (
+            "$report_name is ready - $organization_name",
+            "Your Scheduled Report Is Ready",
+            """<p>Hello,</p>
+            <p>The scheduled report <strong>$report_name</strong> has been generated
+               ($row_count rows, as of $generated_at UTC).</p>
+            """ + _button("$report_url", "View Report") + """
+            <p>Or copy and paste this link into your browser:</p>
+            <p><a href="$report_url">$report_url</a></p>""",
+            """
+        Your Scheduled Report Is Ready
+
+        Hello,
+
+        The scheduled report $report_name has been generated ($row_count rows, as of $generated_at UTC).
+
+        View it here: $report_url
+        """,
+        ),
+    },
+}
+
+
+class RenderedEmail(NamedTuple):
+    """A rendered message ready to queue"""
+    subject: str
+    html_content: str
+    text_content: str
+
+
+class CompiledTemplate(NamedTuple):
+    """Subject, HTML and text parts, parsed once"""
+    subject: Template
+    html: Template
+    text: Template
+
+
+def _compile(subject: str, heading: str, body_html: str, body_text: str) -> CompiledTemplate:
+    # Merge the message into the layout. Branding placeholders in the layout are
+    # escaped ($$) so they survive this step and are filled per organization.
+    page = Template(LAYOUT_HTML).substitute(heading=heading, body=body_html)
+    return CompiledTemplate(Template(subject), Template(page), Template(body_text))
+
+
+def compile_templates() -> Dict[Tuple[str, str], CompiledTemplate]:
+    """Compile every template source into (name, locale) -> CompiledTemplate"""
+    return {
+        (name, locale): _compile(*parts)
+        for name, locales in TEMPLATE_SOURCES.items()
+        for locale, parts in locales.items()
+    }
+
+
+COMPILED_TEMPLATES = compile_templates()
+
+
+class EmailTemplateEngine:
+    """Renders compiled templates with cached per-organization branding"""
+
+    def __init__(self):
+        self._templates = COMPILED_TEMPLATES
+        self._branding: Dict[Optional[str], Tuple[float, Dict[str, str]]] = {}
+        self._variants: Dict[Tuple[str, str, Optional[str]], CompiledTemplate] = {}
+        self._lock = threading.Lock()
+
+    def render(
+        self,
+        name: str,
+        context: Dict[str, object],
+        organization_id: Optional[str] = None,
+        locale: str = DEFAULT_LOCALE
+    ) -> RenderedEmail:
+        """Render one message"""
+        return self.render_many(name, [context], organization_id, locale)[0]
+
+    def render_many(
+        self,
+        name: str,
+        contexts: List[Dict[str, object]],
+        organization_id: Optional[str] = None,
+        locale: str = DEFAULT_LOCALE
+    ) -> List[RenderedEmail]:
+        """
+        Render a batch of messages from the same template and organization.
+
+        Branding is resolved once for the whole batch.
+        """
+        variant = self._variant(name, locale, organization_id)
+
+        rendered = []
+        for context in contexts:
+            text_values = {key: str(value) for key, value in context.items()}
+            html_values = {key: html.escape(value) for key, value in text_values.items()}
+            rendered.append(RenderedEmail(
+                subject=variant.subject.substitute(text_values),
+                html_content=variant.html.substitute(html_values),
+                text_content=variant.text.substitute(text_values)
+            ))
+        return rendered
+
+    def invalidate_branding(self, organization_id: str) -> None:
+        """Drop cached branding and variants for an organization"""
+        org_key = str(organization_id)
+        with self._lock:
+            self._branding.pop(org_key, None)
+            for key in [key for key in self._variants if key[2] == org_key]:
+                del self._variants[key]
+
+    def _variant(self, name: str, locale: str, organization_id: Optional[str]) -> CompiledTemplate:
+        org_key = str(organization_id) if organization_id else None
+        branding = self._get_branding(org_key)
+
+        key = (name, locale, org_key)
+        variant = self._variants.get(key)
+        if variant is not None:
+            return variant
+
+        template = self._templates.get((name, locale)) or self._templates[(name, DEFAULT_LOCALE)]
+
+        # Escape '$' so branding values can never be read as placeholders.
+        # Markup values are built by _get_branding from escaped parts already.
+        html_branding = {
+            k: (v if k in MARKUP_BRANDING else html.escape(v)).replace("$", "$$")
+            for k, v in branding.items()
+        }
+        text_branding = {k: v.replace("$", "$$") for k, v in branding.items()}
+
+        variant = CompiledTemplate(
+            subject=Template(template.subject.safe_substitute(text_branding)),
+            html=Template(template.html.safe_substitute(html_branding)),
+            text=Template(template.text.safe_substitute(text_branding))
+        )
+        with self._lock:
+            self._variants[key] = variant
+        return variant
+
+    def _get_branding(self, org_key: Optional[str]) -> Dict[str, str]:
+        """Get branding values for an organization, reloading after BRANDING_CACHE_SECONDS"""
+        cached = self._branding.get(org_key)
+        if cached and time.monotonic() - cached[0] < BRANDING_CACHE_SECONDS:
+            return cached[1]
+
+        branding = dict(DEFAULT_BRANDING)
+        if org_key:
+            branding.update(self._load_branding(org_key))
+
+        logo_url = branding.get("logo_url") or ""
+        if logo_url.startswith("/"):
+            logo_url = f"{settings.PUBLIC_BASE_URL.rstrip('/')}{logo_url}"
+        branding["logo_url"] = logo_url
+        branding["logo_block"] = (
+            f'<img src="{html.escape(logo_url)}" alt="" style="max-height: 60px;">'
+            if logo_url else ""
+        )
+
+        with self._lock:
+            self._branding[org_key] = (time.monotonic(), branding)
+            for key in [key for key in self._variants if key[2] == org_key]:
+                del self._variants[key]
+        return branding
+
+    @staticmethod
+    def _load_branding(org_key: str) -> Dict[str, str]:
+        from app.database import SessionLocal
+        from app.services.branding_service import BrandingService
+
+        db = SessionLocal()
+        try:
+            return BrandingService(db).get_email_branding(org_key)
+        finally:
+            db.close()
+
+
+_engine: Optional[EmailTemplateEngine] = None
+
+
+def get_template_engine() -> EmailTemplateEngine:
+    """Get the process-wide email template engine"""
+    global _engine
+
+    if _engine is None:
+        _engine = EmailTemplateEngine()
+
+    return _engine
@@ -0,0 +1,410 @@
+"""
+Expense Import Service
+Bulk import of expenses from CSV or Excel (XLSX) files
+
+The file is read row by row and handled in chunks of IMPORT_CHUNK_SIZE rows.
+For each chunk:
+- every row is validated with ExpenseCreateRequest
+- vehicles, drivers and vendors referenced by the chunk are resolved with one
+  query per table
+- expense numbers are reserved with a single counter update
+- valid rows are inserted with one multi-row INSERT and committed
+
+Invalid rows are skipped and reported with their line number; valid rows are
+imported. One audit entry summarizes the whole import.
+
+Columns (header names are case-insensitive):
+    category, description, amount, expense_date   required
+    tax_amount, notes                             optional
+    vehicle_id or vehicle_number                  vehicle_number also matches the registration number
+    driver_id or employee_id
+    vendor_id or vendor_name
+"""
+
+import csv
+import io
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+import uuid
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import func, insert, or_
+from sqlalchemy.orm import Session
+
+from app.models.audit_log import AuditLog
+from app.models.company import Organization
+from app.models.driver import Driver
+from app.models.expense import Expense
+from app.models.vehicle import Vehicle
+from app.models.vendor import Vendor
+from app.schemas.expense import ExpenseCreateRequest
+from app.services.kpi_service import record_kpi_change
+from app.services.numbering_service import NumberingService
+from app.utils.constants import AUDIT_ACTION_EXPENSE_IMPORTED, ENTITY_TYPE_EXPENSE
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 500
+
+REQUIRED_COLUMNS = {"category", "description", "amount", "expense_date"}
+
+# Tried in order; cp1252 covers Excel and most bank exports
+CSV_ENCODINGS = ("utf-8-sig", "cp1252")
+
+# Reference columns resolved against the organization's records
+LOOKUP_COLUMNS = ("vehicle_number", "employee_id", "vendor_name")
+
+Row = Tuple[int, Dict[str, Any]]
+
+
+def _column_name(header: Any) -> str:
+    return str(header or "").strip().lower().replace(" ", "_")
+
+
+def _cell(value: Any) -> Any:
+    """Normalize a CSV/XLSX cell: blank -> None, Excel datetimes -> dates"""
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def _csv_encoding(file: BinaryIO) -> str:
+    """
+    Pick the encoding of a CSV upload by parsing it once, before any row is used.
+
+    Excel and bank portals often export cp1252 instead of UTF-8. Checking the
+    whole file up front means a bad byte or malformed CSV near the end is
+    rejected before earlier chunks are committed.
+
+    Raises:
+        HTTPException: If the file is neither UTF-8 nor cp1252, or is not valid CSV
+    """
+    for encoding in CSV_ENCODINGS:
+        file.seek(0)
+        wrapper = io.TextIOWrapper(file, encoding=encoding, newline="")
+        reader = csv.reader(wrapper)
+        try:
+            for _ in reader:
+                pass
+            return encoding
+        except UnicodeDecodeError:
+            continue
+        except csv.Error as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid CSV at line {reader.line_num}: {e}"
+            )
+        finally:
+            wrapper.detach()
+            file.seek(0)
+
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="CSV file must be UTF-8 or Windows-1252 encoded"
+    )
+
+
+def read_rows(
+    file: BinaryIO,
+    filename: str,
+    required_columns: Set[str] = REQUIRED_COLUMNS,
+    column_aliases: Optional[Dict[str, str]] = None
+) -> Iterator[Row]:
+    """
+    Yield (line number, row) pairs from a CSV or XLSX file.
+
+    Args:
+        file: Uploaded file
+        filename: Original file name (selects the CSV or XLSX reader)
+        required_columns: Columns the header must contain
+        column_aliases: Alternative header names mapped to column names
+
+    Raises:
+        HTTPException: If the file type, encoding or header is not supported
+    """
+    extension = (filename or "").rsplit(".", 1)[-1].lower()
+    wrapper = None
+
+    if extension == "csv":
+        encoding = _csv_encoding(file)
+        wrapper = io.TextIOWrapper(file, encoding=encoding, newline="")
+        rows = csv.reader(wrapper)
+    elif extension == "xlsx":
+        import openpyxl
+
+        try:
+            workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="File is not a valid XLSX workbook"
+            )
+        rows = workbook.active.iter_rows(values_only=True)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only CSV and XLSX files can be imported"
+        )
+
+    try:
+        aliases = column_aliases or {}
+        columns = [_column_name(header) for header in next(rows, None) or []]
+        columns = [aliases.get(column, column) for column in columns]
+        missing = required_columns - set(columns)
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Missing required columns: {', '.join(sorted(missing))}"
+            )
+
+        for line, values in enumerate(rows, start=2):
+            row = {
+                column: _cell(value)
+                for column, value in zip(columns, values)
+                if column
+            }
+            if any(value is not None for value in row.values()):
+                yield line, row
+    finally:
+        if wrapper is not None:
+            # Leave the upload's file open for its owner
+            wrapper.detach()
+
+
+def _chunks(rows: Iterator[Row], size: int) -> Iterator[List[Row]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+class ExpenseImportService:
+    """Service for bulk expense imports"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def import_expenses(
+        self,
+        user_id: str,
+        org_id: str,
+        file: BinaryIO,
+        filename: str,
+        dry_run: bool = False
+    ) -> dict:
+        """
+        Import expenses from an uploaded file as drafts.
+
+        Args:
+            user_id: User importing the expenses
+            org_id: Organization ID
+            file: Uploaded file
+            filename: Original file name (selects the CSV or XLSX reader)
+            dry_run: Validate only, insert nothing
+
+        Returns:
+            Import result with per-row errors
+        """
+        organization = self.db.query(Organization.id).filter(
+            Organization.id == org_id
+        ).first()
+
+        if not organization:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Organization not found"
+            )
+
+        total_rows = imported = failed = 0
+        errors: List[dict] = []
+
+        for chunk in _chunks(read_rows(file, filename), IMPORT_CHUNK_SIZE):
+            total_rows += len(chunk)
+            records, chunk_errors = self._validate_chunk(org_id, chunk)
+
+            failed += len(chunk_errors)
+            errors.extend(chunk_errors[:MAX_REPORTED_ERRORS - len(errors)])
+
+            if records and not dry_run:
+                self._insert_chunk(user_id, org_id, records)
+                self.db.commit()
+                record_kpi_change(org_id, "expenses")
+            imported += len(records)
+
+        if imported and not dry_run:
+            self.db.add(AuditLog(
+                user_id=user_id,
+                organization_id=org_id,
+                action=AUDIT_ACTION_EXPENSE_IMPORTED,
+                entity_type=ENTITY_TYPE_EXPENSE,
+                details={
+                    "filename": filename,
+                    "total_rows": total_rows,
+                    "imported": imported,
+                    "failed": failed,
+                }
+            ))
+            self.db.commit()
+
+        return {
+            "success": failed == 0,
+            "dry_run": dry_run,
+            "total_rows": total_rows,
+            "imported": imported,
+            "failed": failed,
+            "errors": errors,
+            "errors_truncated": failed > len(errors),
+        }
+
+    def _validate_chunk(self, org_id: str, chunk: List[Row]) -> Tuple[List[dict], List[dict]]:
+        """
+        Validate a chunk of rows and resolve their references.
+
+        Returns:
+            Tuple of (insertable expense values, row errors)
+        """
+        errors = []
+        parsed = []
+        for line, row in chunk:
+            lookups = {column: row.pop(column, None) for column in LOOKUP_COLUMNS}
+            try:
+                # Blank cells fall back to the request defaults
+                data = ExpenseCreateRequest(**{k: v for k, v in row.items() if v is not None})
+            except ValidationError as e:
+                errors.append({"row": line, "message": _validation_message(e)})
+                continue
+            parsed.append((line, data, lookups))
+
+        vehicles, drivers, vendors = self._resolve_references(org_id, parsed)
+
+        records = []
+        for line, data, lookups in parsed:
+            vehicle_id = self._match(vehicles, data.vehicle_id, lookups["vehicle_number"])
+            driver_id = self._match(drivers, data.driver_id, lookups["employee_id"])
+            vendor_id = self._match(vendors, data.vendor_id, lookups["vendor_name"])
+
+            problems = [
+                message for resolved, message in (
+                    (vehicle_id, "Vehicle not found in your organization"),
+                    (driver_id, "Driver not found in your organization"),
+                    (vendor_id, "Vendor not found in your organization"),
+                ) if resolved is False
+            ]
+            if problems:
+                errors.append({"row": line, "message": "; ".join(problems)})
+                continue
+
+            records.append({
+                "category": data.category,
+                "description": data.description,
+                "amount": data.amount,
+                "tax_amount": data.tax_amount,
+                "total_amount": data.amount + data.tax_amount,
+                "expense_date": data.expense_date,
+                "vehicle_id": vehicle_id,
+                "driver_id": driver_id,
+                "vendor_id": vendor_id,
+                "notes": data.notes,
+            })
+
+        return records, errors
+
+    def _resolve_references(self, org_id: str, parsed: list) -> Tuple[dict, dict, dict]:
+        """
+        Look up the vehicles, drivers and vendors a chunk refers to.
+
+        Returns:
+            Three maps from every accepted key (id, number, name) to record ID
+        """
+        def wanted(field: str, lookup: str) -> Tuple[set, set]:
+            ids = {getattr(data, field) for _, data, _ in parsed if getattr(data, field)}
+            keys = {str(lookups[lookup]) for _, _, lookups in parsed if lookups[lookup] is not None}
+            return ids, keys
+
+        vehicles: Dict[Any, Any] = {}
+        ids, numbers = wanted("vehicle_id", "vehicle_number")
+        if ids or numbers:
+            rows = self.db.query(
+                Vehicle.id, Vehicle.vehicle_number, Vehicle.registration_number
+            ).filter(
+                Vehicle.organization_id == org_id,
+                or_(
+                    Vehicle.id.in_(ids),
+                    Vehicle.vehicle_number.in_(numbers),
+                    Vehicle.registration_number.in_(numbers)
+                )
+            ).all()
+            for row in rows:
+                vehicles[row.id] = row.id
+                vehicles[row.vehicle_number] = row.id
+                vehicles[row.registration_number] = row.id
+
+        drivers: Dict[Any, Any] = {}
+        ids, employee_ids = wanted("driver_id", "employee_id")
+        if ids or employee_ids:
+            rows = self.db.query(Driver.id, Driver.employee_id).filter(
+                Driver.organization_id == org_id,
+                or_(Driver.id.in_(ids), Driver.employee_id.in_(employee_ids))
+            ).all()
+            for row in rows:
+                drivers[row.id] = row.id
+                drivers[row.employee_id] = row.id
+
+        vendors: Dict[Any, Any] = {}
+        ids, names = wanted("vendor_id", "vendor_name")
+        if ids or names:
+            rows = self.db.query(Vendor.id, Vendor.vendor_name).filter(
+                Vendor.organization_id == org_id,
+                or_(
+                    Vendor.id.in_(ids),
+                    func.lower(Vendor.vendor_name).in_({name.lower() for name in names})
+                )
+            ).all()
+            for row in rows:
+                vendors[row.id] = row.id
+                vendors[row.vendor_name.lower()] = row.id
+
+        return vehicles, drivers, vendors
+
+    @staticmethod
+    def _match(found: dict, record_id, key):
+        """
+        Resolve a reference by ID, or by its natural key when no ID is given.
+
+        Returns:
+            Record ID, None when the row has no reference, False when it is unknown
+        """
+        if record_id is None and key is None:
+            return None
+        if record_id is None:
+            key = str(key)
+            record_id = found.get(key, found.get(key.lower()))
+            return record_id if record_id is not None else False
+        return found.get(record_id, False)
+
+    def _insert_chunk(self, user_id: str, org_id: str, records: List[dict]) -> None:
+        """Number and insert one chunk of validated expenses"""
+        numbers = NumberingService(self.db).monthly_numbers(org_id, "EXP", len(records))
+        for record, number in zip(records, numbers):
+            record.update(
+                id=uuid.uuid4(),
+                organization_id=org_id,
+                expense_number=number,
+                status='draft',
+                created_by=user_id,
+            )
+        self.db.execute(insert(Expense), records)
@@ -4,11 +4,12 @@ Business logic for expense management
 """
 
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, func, extract
+from sqlalchemy import and_, func
 from fastapi import HTTPException, status
-from typing import List, Optional, Dict, Any
+from typing import BinaryIO, List, Optional, Dict, Any
 from datetime import datetime, date
 from decimal import Decimal
+import os
 import uuid
 
 from app.models.expense import Expense, ExpenseAttachment
@@ -16,9 +17,14 @@ from app.models.company import Organization
 from app.models.vehicle import Vehicle
 from app.models.driver import Driver
 from app.models.vendor import Vendor
-from app.models.budget import Budget
+from app.models.financial_rollup import ExpenseDailyRollup, NO_VEHICLE
 from app.models.audit_log import AuditLog
 from app.schemas.expense import ExpenseCreateRequest, ExpenseUpdateRequest, ExpenseApproveRequest
+from app.services.attachment_service import AttachmentService, schedule_thumbnail
+from app.services.attachment_storage import relative_path
+from app.services.kpi_service import record_kpi_change
+from app.services.numbering_service import NumberingService
+from app.services import budget_ledger  # registers the flush hook keeping budgets in step
 from app.utils.constants import (
     AUDIT_ACTION_EXPENSE_CREATED,
     AUDIT_ACTION_EXPENSE_UPDATED,
@@ -27,6 +33,7 @@ from app.utils.constants import (
     AUDIT_ACTION_EXPENSE_REJECTED,
     AUDIT_ACTION_EXPENSE_PAID,
     AUDIT_ACTION_EXPENSE_ATTACHMENT_UPLOADED,
+    AUDIT_ACTION_EXPENSE_ATTACHMENT_DELETED,
     ENTITY_TYPE_EXPENSE,
     EXPENSE_STATUSES
 )
@@ -40,14 +47,8 @@ class ExpenseService:
 
     def _generate_expense_number(self, org_id: str) -> str:
         """Generate unique expense number for organization"""
-        # Get count of expenses for organization
-        count = self.db.query(Expense).filter(
-            Expense.organization_id == org_id
-        ).count()
-
-        # Format: EXP-YYYYMM-NNNN
-        today = datetime.now()
-        return f"EXP-{today.strftime('%Y%m')}-{str(count + 1).zfill(4)}"
+        # Format: EXP-YYYYMM-NNNN, numbered per organization and month
+        return NumberingService(self.db).monthly_number(org_id, "EXP")
 
     def create_expense(
         self,
@@ -158,6 +159,7 @@ class ExpenseService:
 
         self.db.commit()
         self.db.refresh(expense)
+        record_kpi_change(org_id, "expenses")
 
         return expense
 
@@ -303,6 +305,7 @@ class ExpenseService:
 
         self.db.commit()
         self.db.refresh(expense)
+        record_kpi_change(org_id, "expenses")
 
         return expense
 
@@ -351,6 +354,7 @@ class ExpenseService:
 
         self.db.commit()
         self.db.refresh(expense)
+        record_kpi_change(org_id, "expenses")
 
         return expense
 
@@ -396,8 +400,7 @@ class ExpenseService:
             expense.approved_by = user_id
             expense.rejection_reason = None
 
-            # Update budget if exists
-            self._update_budget_for_expense(expense)
+            # Budget totals follow through the budget ledger on flush
 
             action = AUDIT_ACTION_EXPENSE_APPROVED
             details = f"Approved expense {expense.expense_number}"
@@ -423,6 +426,10 @@ class ExpenseService:
         self.db.commit()
         self.db.refresh(expense)
 
+        if approval_data.approved:
+            record_kpi_change(org_id, "expenses")
+            record_kpi_change(org_id, "budgets")
+
         return expense
 
     def mark_expense_paid(self, user_id: str, expense_id: str, org_id: str) -> Expense:
@@ -470,6 +477,8 @@ class ExpenseService:
         self.db.commit()
         self.db.refresh(expense)
 
+        record_kpi_change(org_id, "expenses")
+
         return expense
 
     def get_expense_summary(
@@ -491,63 +500,62 @@ class ExpenseService:
         Returns:
             Summary data with totals
         """
-        query = self.db.query(Expense).filter(
-            Expense.organization_id == org_id,
-            Expense.status.in_(['approved', 'paid'])
+        # Read the trigger-maintained daily rollup instead of the expenses table
+        query = self.db.query(ExpenseDailyRollup).filter(
+            ExpenseDailyRollup.organization_id == org_id,
+            ExpenseDailyRollup.status.in_(['approved', 'paid'])
         )
 
         if from_date:
-            query = query.filter(Expense.expense_date >= from_date)
+            query = query.filter(ExpenseDailyRollup.day >= from_date)
 
         if to_date:
-            query = query.filter(Expense.expense_date <= to_date)
+            query = query.filter(ExpenseDailyRollup.day <= to_date)
+
+        total_amount = func.sum(ExpenseDailyRollup.total_amount).label('total_amount')
+        count = func.sum(ExpenseDailyRollup.row_count).label('count')
 
         summary = []
 
         if group_by == 'category':
             results = query.with_entities(
-                Expense.category,
-                func.sum(Expense.total_amount).label('total_amount'),
-                func.count(Expense.id).label('count')
-            ).group_by(Expense.category).all()
+                ExpenseDailyRollup.category, total_amount, count
+            ).group_by(ExpenseDailyRollup.category).all()
 
             summary = [
                 {
                     'category': r.category,
                     'total_amount': r.total_amount or Decimal('0'),
-                    'count': r.count
+                    'count': int(r.count)
                 }
                 for r in results
             ]
 
         elif group_by == 'vehicle':
             results = query.with_entities(
-                Expense.vehicle_id,
-                func.sum(Expense.total_amount).label('total_amount'),
-                func.count(Expense.id).label('count')
-            ).group_by(Expense.vehicle_id).all()
+                ExpenseDailyRollup.vehicle_id, total_amount, count
+            ).group_by(ExpenseDailyRollup.vehicle_id).all()
 
             summary = [
                 {
-                    'vehicle_id': r.vehicle_id,
+                    'vehicle_id': None if r.vehicle_id == NO_VEHICLE else r.vehicle_id,
                     'total_amount': r.total_amount or Decimal('0'),
-                    'count': r.count
+                    'count': int(r.count)
                 }
                 for r in results
             ]
 
         elif group_by == 'month':
+            month = func.to_char(ExpenseDailyRollup.day, 'YYYY-MM')
             results = query.with_entities(
-                func.to_char(Expense.expense_date, 'YYYY-MM').label('month'),
-                func.sum(Expense.total_amount).label('total_amount'),
-                func.count(Expense.id).label('count')
-            ).group_by(func.to_char(Expense.expense_date, 'YYYY-MM')).all()
+                month.label('month'), total_amount, count
+            ).group_by(month).all()
 
             summary = [
                 {
                     'month': r.month,
                     'total_amount': r.total_amount or Decimal('0'),
-                    'count': r.count
+                    'count': int(r.count)
                 }
                 for r in results
             ]
@@ -568,20 +576,21 @@ class ExpenseService:
         expense_id: str,
         org_id: str,
         file_name: str,
-        file_path: str,
-        file_size: int,
+        file: BinaryIO,
         file_type: Optional[str] = None
     ) -> ExpenseAttachment:
         """
         Upload attachment for expense.
 
+        The file is streamed into content-addressed storage; identical files
+        share one stored copy. Image thumbnails are generated in the background.
+
         Args:
             user_id: User uploading the file
             expense_id: Expense ID
             org_id: Organization ID
             file_name: Original file name
-            file_path: Stored file path
-            file_size: File size in bytes
+            file: Uploaded file stream
             file_type: MIME type
 
         Returns:
@@ -598,13 +607,17 @@ class ExpenseService:
                 detail="Expense not found"
             )
 
+        file_name = os.path.basename(file_name or "") or "attachment"
+        sha256, file_size, needs_thumbnail = AttachmentService(self.db).store(file, file_type)
+
         attachment = ExpenseAttachment(
             id=uuid.uuid4(),
-            expense_id=expense_id,
-            file_name=file_name,
-            file_path=file_path,
+            expense_id=expense.id,
+            file_name=file_name[:255],
+            file_path=relative_path(sha256),
             file_size=file_size,
-            file_type=file_type,
+            file_type=file_type[:50] if file_type else None,
+            content_hash=sha256,
             uploaded_by=user_id
         )
 
@@ -623,23 +636,82 @@ class ExpenseService:
         self.db.commit()
         self.db.refresh(attachment)
 
+        if needs_thumbnail:
+            schedule_thumbnail(sha256)
+
         return attachment
 
-    def _update_budget_for_expense(self, expense: Expense):
-        """Update budget spent amount when expense is approved"""
-        # Find matching budget for the expense category and period
-        expense_month = expense.expense_date.month
-        expense_year = expense.expense_date.year
-
-        # Try to find monthly budget
-        budget = self.db.query(Budget).filter(
-            Budget.organization_id == expense.organization_id,
-            Budget.category == expense.category,
-            Budget.period == 'monthly',
-            extract('year', Budget.start_date) == expense_year,
-            extract('month', Budget.start_date) == expense_month
+    def get_expense_attachment(
+        self,
+        expense_id: str,
+        attachment_id: str,
+        org_id: str
+    ) -> ExpenseAttachment:
+        """
+        Get an attachment of an organization's expense.
+
+        Args:
+            expense_id: Expense ID
+            attachment_id: Attachment ID
+            org_id: Organization ID
+
+        Returns:
+            Attachment
+
+        Raises:
+            HTTPException: If the attachment does not exist
+        """
+        attachment = self.db.query(ExpenseAttachment).join(
+            Expense, Expense.id == ExpenseAttachment.expense_id
+        ).filter(
+            ExpenseAttachment.id == attachment_id,
+            ExpenseAttachment.expense_id == expense_id,
+            Expense.organization_id == org_id
         ).first()
 
-        if budget:
-            budget.spent_amount += expense.total_amount
-            budget.remaining_amount = budget.allocated_amount - budget.spent_amount
+        if not attachment:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Attachment not found"
+            )
+
+        return attachment
+
+    def delete_expense_attachment(
+        self,
+        user_id: str,
+        expense_id: str,
+        attachment_id: str,
+        org_id: str
+    ) -> None:
+        """
+        Delete attachment; the stored file goes with the last attachment using it.
+
+        Args:
+            user_id: User deleting the attachment
+            expense_id: Expense ID
+            attachment_id: Attachment ID
+            org_id: Organization ID
+
+        Raises:
+            HTTPException: If the attachment does not exist
+        """
+        attachment = self.get_expense_attachment(expense_id, attachment_id, org_id)
+        content_hash = attachment.content_hash
+        file_name = attachment.file_name
+
+        self.db.delete(attachment)
+        if content_hash:
+            AttachmentService(self.db).release(content_hash)
+
+        # Create audit log
+        audit_log = AuditLog(
+            user_id=user_id,
+            action=AUDIT_ACTION_EXPENSE_ATTACHMENT_DELETED,
+            entity_type=ENTITY_TYPE_EXPENSE,
+            entity_id=str(expense_id),
+            details=f"Deleted attachment {file_name}"
+        )
+        self.db.add(audit_log)
+
+        self.db.commit()
@@ -0,0 +1,583 @@
+"""
+Invoice PDF Service
+Render organization-branded invoice PDFs and serve them from a content-addressed store
+
+An invoice is first reduced to a plain "document" (invoice fields, line items
+and the organization's branding as strings). The SHA-256 of that document plus
+PDF_TEMPLATE_VERSION names the stored file:
+
+    INVOICE_PDF_DIR/<organization_id>/<invoice_id>/<content hash>.pdf
+
+so a PDF is rendered only when something printed on it changes, and older
+versions are removed when a new one is stored. Readers therefore open a PDF
+before using it (`_open_pdf`): an open file survives its removal, and a
+version removed before it could be opened is rendered again.
+
+Rendering runs in a process pool (INVOICE_PDF_WORKERS) so month-end batches use
+every core without blocking request threads. Each worker compiles an
+organization's branded layout (colors, logo, footer) once and reuses it for
+every invoice of that organization.
+
+The period archive renders missing PDFs PDF_BATCH_SIZE invoices at a time and
+streams a ZIP while it goes; PDFs are already compressed, so entries are
+stored as is.
+"""
+
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session, selectinload
+
+from app.config import settings
+from app.utils.pdf_text import fit_text, wrap_text
+
+# Bump when the layout changes so stored PDFs are re-rendered
+PDF_TEMPLATE_VERSION = 2
+
+PDF_BATCH_SIZE = 100
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+# ============================================================================
+# Rendering (runs in the worker processes)
+# ============================================================================
+
+class InvoicePdfLayout(NamedTuple):
+    """Branded parts of the invoice layout, compiled once per organization"""
+    organization_name: str
+    primary_color: object
+    secondary_color: object
+    logo: Optional[object]
+    footer: str
+
+
+_layouts: Dict[str, InvoicePdfLayout] = {}
+
+
+def _compile_layout(branding: Dict[str, str]) -> InvoicePdfLayout:
+    from reportlab.lib.colors import HexColor
+    from reportlab.lib.utils import ImageReader
+
+    def color(value: str, default: str):
+        try:
+            return HexColor(value or default)
+        except ValueError:
+            return HexColor(default)
+
+    logo = None
+    if branding.get("logo_path"):
+        try:
+            logo = ImageReader(branding["logo_path"])
+        except Exception:
+            logo = None  # SVG or unreadable logos are left out
+
+    name = branding.get("organization_name") or settings.APP_NAME
+    return InvoicePdfLayout(
+        organization_name=name,
+        primary_color=color(branding.get("primary_color"), "#1E40AF"),
+        secondary_color=color(branding.get("secondary_color"), "#06B6D4"),
+        logo=logo,
+        footer=f"{name} - Thank you for your business",
+    )
+
+
+def _get_layout(branding: Dict[str, str]) -> InvoicePdfLayout:
+    key = json.dumps(branding, sort_keys=True)
+    layout = _layouts.get(key)
+    if layout is None:
+        layout = _layouts[key] = _compile_layout(branding)
+    return layout
+
+
+def render_invoice_pdf(document: dict) -> bytes:
+    """Draw one invoice document onto A4 pages"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    layout = _get_layout(document["branding"])
+    invoice = document["invoice"]
+
+    font, margin, line_height = "Helvetica", 42, 14
+    page_width, page_height = A4
+    columns = [margin, margin + 280, margin + 350, margin + 430]
+    description_width = columns[1] - columns[0] - 8
+
+    def fit(text: str) -> str:
+        return fit_text(text, description_width, font, 9)
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    pdf.setTitle(f"Invoice {invoice['invoice_number']} - {layout.organization_name}")
+    page = 0
+
+    def start_page() -> float:
+        nonlocal page
+        page += 1
+        top = page_height - margin
+        if layout.logo is not None:
+            pdf.drawImage(layout.logo, margin, top - 40, width=120, height=40,
+                          preserveAspectRatio=True, anchor="sw", mask="auto")
+            name_y = top - 56
+        else:
+            name_y = top - 14
+        pdf.setFillColor(layout.primary_color)
+        pdf.setFont(f"{font}-Bold", 14)
+        pdf.drawString(margin, name_y, layout.organization_name)
+        pdf.setFont(f"{font}-Bold", 20)
+        pdf.drawRightString(page_width - margin, top - 14, "INVOICE")
+        pdf.setFillColorRGB(0, 0, 0)
+        pdf.setFont(font, 9)
+        pdf.drawRightString(page_width - margin, top - 30, invoice["invoice_number"])
+        pdf.drawRightString(page_width - margin, top - 44, f"Date: {invoice['invoice_date']}")
+        pdf.drawRightString(page_width - margin, top - 58, f"Due: {invoice['due_date']}")
+        pdf.setFont(font, 7)
+        pdf.drawString(margin, margin / 2, layout.footer)
+        pdf.drawRightString(page_width - margin, margin / 2, f"Page {page}")
+        return name_y - 2 * line_height
+
+    def table_header(y: float) -> float:
+        pdf.setFillColor(layout.secondary_color)
+        pdf.rect(margin, y - 4, page_width - 2 * margin, line_height, stroke=0, fill=1)
+        pdf.setFillColorRGB(1, 1, 1)
+        pdf.setFont(f"{font}-Bold", 9)
+        pdf.drawString(columns[0] + 4, y, "Description")
+        pdf.drawRightString(columns[2] - 8, y, "Qty")
+        pdf.drawRightString(columns[3] - 8, y, "Unit Price")
+        pdf.drawRightString(page_width - margin - 4, y, "Amount")
+        pdf.setFillColorRGB(0, 0, 0)
+        pdf.setFont(font, 9)
+        return y - line_height - 4
+
+    y = start_page()
+
+    # Bill to
+    pdf.setFont(f"{font}-Bold", 10)
+    pdf.drawString(margin, y, "Bill To")
+    pdf.setFont(font, 9)
+    for line in (
+        invoice["customer_name"],
+        invoice["customer_address"],
+        invoice["customer_email"],
+        invoice["customer_phone"],
+        f"GSTIN: {invoice['customer_gstin']}" if invoice["customer_gstin"] else "",
+    ):
+        if line:
+            y -= line_height
+            pdf.drawString(margin, y, fit(line))
+
+    y = table_header(y - 2 * line_height)
+    for item in document["line_items"]:
+        if y < margin + 4 * line_height:
+            pdf.showPage()
+            y = table_header(start_page())
+        pdf.drawString(columns[0] + 4, y, fit(item["description"]))
+        pdf.drawRightString(columns[2] - 8, y, item["quantity"])
+        pdf.drawRightString(columns[3] - 8, y, item["unit_price"])
+        pdf.drawRightString(page_width - margin - 4, y, item["amount"])
+        y -= line_height
+
+    if y < margin + 6 * line_height:
+        pdf.showPage()
+        y = start_page()
+
+    # Totals
+    y -= line_height
+    for label, value, bold in (
+        ("Subtotal", invoice["subtotal"], False),
+        ("Tax", invoice["tax_amount"], False),
+        ("Total", invoice["total_amount"], True),
+        ("Paid", invoice["amount_paid"], False),
+        ("Amount Due", invoice["amount_due"], True),
+    ):
+        pdf.setFont(f"{font}-Bold" if bold else font, 10 if bold else 9)
+        pdf.drawRightString(columns[3] - 8, y, label)
+        pdf.drawRightString(page_width - margin - 4, y, value)
+        y -= line_height
+
+    for title, text in (("Notes", invoice["notes"]), ("Terms and Conditions", invoice["terms_and_conditions"])):
+        if not text:
+            continue
+        if y < margin + 3 * line_height:
+            pdf.showPage()
+            y = start_page()
+        y -= line_height
+        pdf.setFont(f"{font}-Bold", 9)
+        pdf.drawString(margin, y, title)
+        pdf.setFont(font, 8)
+        for line in wrap_text(text, page_width - 2 * margin, font, 8):
+            if y < margin + line_height:
+                pdf.showPage()
+                y = start_page()
+                pdf.setFont(font, 8)
+            y -= line_height - 2
+            pdf.drawString(margin, y, line)
+
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+# ============================================================================
+# Process pool
+# ============================================================================
+
+_pdf_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_pdf_executor() -> ProcessPoolExecutor:
+    """Get the process-wide invoice rendering pool"""
+    global _pdf_executor
+
+    if _pdf_executor is None:
+        # spawn: forking a process that runs threads (relay, email queue) is unsafe
+        _pdf_executor = ProcessPoolExecutor(
+            max_workers=settings.INVOICE_PDF_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    return _pdf_executor
+
+
+def shutdown_pdf_executor() -> None:
+    """Stop the rendering pool and wait for running renders"""
+    global _pdf_executor
+
+    if _pdf_executor is not None:
+        _pdf_executor.shutdown(wait=True, cancel_futures=True)
+        _pdf_executor = None
+
+
+# ============================================================================
+# Storage
+# ============================================================================
+
+def content_hash(document: dict) -> str:
+    """Hash of everything printed on the invoice, plus the layout version"""
+    payload = json.dumps({"version": PDF_TEMPLATE_VERSION, **document}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _pdf_path(document: dict) -> str:
+    return os.path.join(
+        settings.INVOICE_PDF_DIR,
+        document["organization_id"],
+        document["invoice"]["id"],
+        f"{content_hash(document)}.pdf"
+    )
+
+
+def _store(path: str, data: bytes) -> None:
+    """Write a PDF atomically and remove the invoice's older versions"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+
+    with tempfile.NamedTemporaryFile(dir=directory, suffix=".tmp", delete=False) as file:
+        file.write(data)
+    os.replace(file.name, path)
+
+    for name in os.listdir(directory):
+        if name.endswith(".pdf") and os.path.join(directory, name) != path:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def _open_pdf(path: str, document: dict) -> BinaryIO:
+    """Open a stored PDF, rendering it again if a newer version just replaced it"""
+    try:
+        return open(path, "rb")
+    except FileNotFoundError:
+        _store(path, render_invoice_pdf(document))
+        return open(path, "rb")
+
+
+def iter_pdf_chunks(file: BinaryIO) -> Iterator[bytes]:
+    """Yield an open PDF in chunks and close it"""
+    with file:
+        while True:
+            chunk = file.read(FILE_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def _logo_path(logo_url: Optional[str]) -> str:
+    """Local file of an uploaded logo (/uploads/...), if any"""
+    if not logo_url or not logo_url.startswith("/uploads/"):
+        return ""
+    path = os.path.join(settings.UPLOAD_DIR, logo_url[len("/uploads/"):])
+    return path if os.path.isfile(path) else ""
+
+
+def _money(value) -> str:
+    return f"{value:,.2f}"
+
+
+# ============================================================================
+# Service
+# ============================================================================
+
+class InvoicePdfService:
+    """Service for invoice PDF rendering and retrieval"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._branding: Dict[str, Dict[str, str]] = {}
+
+    def get_invoice_pdf(self, org_id: str, invoice_id: str) -> Tuple[BinaryIO, str]:
+        """
+        Get an invoice's PDF, rendering it if the invoice changed.
+
+        Args:
+            org_id: Organization ID
+            invoice_id: Invoice ID
+
+        Returns:
+            Tuple of (open PDF file, download file name)
+
+        Raises:
+            HTTPException: If the invoice is not found
+        """
+        from app.models.invoice import Invoice
+
+        invoice = self.db.query(Invoice).options(
+            selectinload(Invoice.line_items)
+        ).filter(
+            Invoice.id == invoice_id,
+            Invoice.organization_id == org_id
+        ).first()
+
+        if not invoice:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Invoice not found"
+            )
+
+        document = self._document(invoice)
+        path = self.ensure_rendered([document])[0]
+        return _open_pdf(path, document), f"{invoice.invoice_number}.pdf"
+
+    def iter_period_pdfs(
+        self,
+        org_id: str,
+        from_date: date,
+        to_date: date,
+        status_filter: Optional[str] = None
+    ) -> Iterator[Tuple[BinaryIO, str]]:
+        """
+        Yield the PDFs of every invoice dated in a period, rendering missing ones in batches.
+
+        Args:
+            org_id: Organization ID
+            from_date: First invoice date
+            to_date: Last invoice date
+            status_filter: Only invoices with this status
+
+        Yields:
+            Tuples of (open PDF file, archive entry name); the caller closes the file
+        """
+        from app.models.invoice import Invoice
+
+        query = self.db.query(Invoice.id).filter(
+            Invoice.organization_id == org_id,
+            Invoice.invoice_date >= from_date,
+            Invoice.invoice_date <= to_date
+        )
+        if status_filter:
+            query = query.filter(Invoice.status == status_filter)
+        invoice_ids = [row.id for row in query.order_by(Invoice.invoice_date, Invoice.invoice_number)]
+
+        for start in range(0, len(invoice_ids), PDF_BATCH_SIZE):
+            batch_ids = invoice_ids[start:start + PDF_BATCH_SIZE]
+            invoices = self.db.query(Invoice).options(
+                selectinload(Invoice.line_items)
+            ).filter(
+                Invoice.id.in_(batch_ids)
+            ).order_by(Invoice.invoice_date, Invoice.invoice_number).all()
+
+            documents = [self._document(invoice) for invoice in invoices]
+            paths = self.ensure_rendered(documents)
+            for invoice, document, path in zip(invoices, documents, paths):
+                yield _open_pdf(path, document), f"{invoice.invoice_number}.pdf"
+
+            # Keep the session small over long periods
+            self.db.expunge_all()
+
+    def prerender(self, org_id: str, invoice_id: str) -> None:
+        """Render an invoice's PDF in the background if it is not stored yet"""
+        from app.models.invoice import Invoice
+
+        invoice = self.db.query(Invoice).options(
+            selectinload(Invoice.line_items)
+        ).filter(
+            Invoice.id == invoice_id,
+            Invoice.organization_id == org_id
+        ).first()
+        if not invoice:
+            return
+
+        document = self._document(invoice)
+        path = _pdf_path(document)
+        if os.path.exists(path):
+            return
+
+        future = get_pdf_executor().submit(render_invoice_pdf, document)
+        future.add_done_callback(
+            lambda done: _store(path, done.result()) if not done.exception() else None
+        )
+
+    def ensure_rendered(self, documents: List[dict]) -> List[str]:
+        """
+        Make sure every document has a stored PDF, rendering missing ones in the process pool.
+
+        Returns:
+            Stored file path per document
+        """
+        paths = [_pdf_path(document) for document in documents]
+        missing = [
+            (path, document)
+            for path, document in zip(paths, documents)
+            if not os.path.exists(path)
+        ]
+
+        if len(missing) == 1:
+            # Not worth a round trip through the pool
+            path, document = missing[0]
+            _store(path, render_invoice_pdf(document))
+        elif missing:
+            rendered = get_pdf_executor().map(
+                render_invoice_pdf,
+                [document for _, document in missing],
+                chunksize=max(1, len(missing) // (settings.INVOICE_PDF_WORKERS * 4))
+            )
+            for (path, _), data in zip(missing, rendered):
+                _store(path, data)
+
+        return paths
+
+    def _document(self, invoice) -> dict:
+        """Everything printed on an invoice, as strings"""
+        org_id = str(invoice.organization_id)
+        return {
+            "organization_id": org_id,
+            "branding": self._get_branding(org_id),
+            "invoice": {
+                "id": str(invoice.id),
+                "invoice_number": invoice.invoice_number,
+                "invoice_date": invoice.invoice_date.strftime('%d %b %Y'),
+                "due_date": invoice.due_date.strftime('%d %b %Y'),
+                "customer_name": invoice.customer_name,
+                "customer_email": invoice.customer_email or "",
+                "customer_phone": invoice.customer_phone or "",
+                "customer_address": invoice.customer_address or "",
+                "customer_gstin": invoice.customer_gstin or "",
+                "subtotal": _money(invoice.subtotal),
+                "tax_amount": _money(invoice.tax_amount),
+                "total_amount": _money(invoice.total_amount),
+                "amount_paid": _money(invoice.amount_paid),
+                "amount_due": _money(invoice.amount_due),
+                "notes": invoice.notes or "",
+                "terms_and_conditions": invoice.terms_and_conditions or "",
+            },
+            "line_items": [
+                {
+                    "description": item.description,
+                    "quantity": f"{item.quantity:,.2f}",
+                    "unit_price": _money(item.unit_price),
+                    "amount": _money(item.amount),
+                }
+                for item in sorted(invoice.line_items, key=lambda item: (item.created_at, str(item.id)))
+            ],
+        }
+
+    def _get_branding(self, org_id: str) -> Dict[str, str]:
+        """Branding printed on the organization's invoices, loaded once per service"""
+        branding = self._branding.get(org_id)
+        if branding is None:
+            from app.services.branding_service import BrandingService
+            from app.services.email_templates import DEFAULT_BRANDING
+
+            values = dict(DEFAULT_BRANDING)
+            values.update(BrandingService(self.db).get_email_branding(org_id))
+            logo_path = _logo_path(values.get("logo_url"))
+            branding = self._branding[org_id] = {
+                "organization_name": values["organization_name"],
+                "primary_color": values["primary_color"],
+                "secondary_color": values["secondary_color"],
+                "logo_path": logo_path,
+                # A replaced logo file re-renders the organization's invoices
+                "logo_version": str(os.path.getmtime(logo_path)) if logo_path else "",
+            }
+        return branding
+
+
+# ============================================================================
+# Archive
+# ============================================================================
+
+class _ChunkWriter(io.RawIOBase):
+    """Unseekable sink that collects what ZipFile writes until it is drained"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_invoice_archive(
+    org_id: str,
+    from_date: date,
+    to_date: date,
+    status_filter: Optional[str] = None
+) -> Iterator[bytes]:
+    """
+    Produce a ZIP of a period's invoice PDFs, opening and closing its own database session.
+
+    Args:
+        org_id: Organization ID
+        from_date: First invoice date
+        to_date: Last invoice date
+        status_filter: Only invoices with this status
+
+    Yields:
+        Chunks of the ZIP archive
+    """
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        sink = _ChunkWriter()
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+            for pdf, name in InvoicePdfService(db).iter_period_pdfs(org_id, from_date, to_date, status_filter):
+                with pdf as source, archive.open(name, "w") as entry:
+                    while True:
+                        chunk = source.read(FILE_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        entry.write(chunk)
+                        if len(chunk) == FILE_CHUNK_SIZE:
+                            yield sink.drain()
+                yield sink.drain()
+        yield sink.drain()
+    finally:
+        db.close()
@@ -4,7 +4,7 @@ Business logic for invoice management
 """
 
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, func
+from sqlalchemy import and_, case, delete, func, insert, or_, select, update
 from fastapi import HTTPException, status
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date
@@ -12,6 +12,7 @@ from decimal import Decimal
 import uuid
 
 from app.models.invoice import Invoice, InvoiceLineItem
+from app.models.financial_rollup import InvoiceDailyRollup
 from app.models.company import Organization
 from app.models.vehicle import Vehicle
 from app.models.user import User
@@ -19,7 +20,8 @@ from app.models.audit_log import AuditLog
 from app.schemas.invoice import (
     InvoiceCreateRequest,
     InvoiceUpdateRequest,
-    InvoiceLineItemRequest
+    InvoiceLineItemRequest,
+    InvoiceLineItemBulkRequest
 )
 from app.utils.constants import (
     AUDIT_ACTION_INVOICE_CREATED,
@@ -29,6 +31,8 @@ from app.utils.constants import (
     AUDIT_ACTION_INVOICE_CANCELLED,
     ENTITY_TYPE_INVOICE
 )
+from app.services.invoice_pdf_service import InvoicePdfService
+from app.services.numbering_service import NumberingService
 
 
 class InvoiceService:
@@ -39,14 +43,8 @@ class InvoiceService:
 
     def _generate_invoice_number(self, org_id: str) -> str:
         """Generate unique invoice number for organization"""
-        # Get count of invoices for organization
-        count = self.db.query(Invoice).filter(
-            Invoice.organization_id == org_id
-        ).count()
-
-        # Format: INV-YYYYMM-NNNN
-        today = datetime.now()
-        return f"INV-{today.strftime('%Y%m')}-{str(count + 1).zfill(4)}"
+        # Format: INV-YYYYMM-NNNN, numbered per organization and month
+        return NumberingService(self.db).monthly_number(org_id, "INV")
 
     def create_invoice(
         self,
@@ -112,6 +110,11 @@ class InvoiceService:
         )
 
         self.db.add(invoice)
+        self.db.flush()
+
+        if invoice_data.line_items:
+            self._validate_vehicles(org_id, invoice_data.line_items)
+            self._insert_line_items(invoice.id, invoice_data.line_items)
 
         # Create audit log
         audit_log = AuditLog(
@@ -172,11 +175,7 @@ class InvoiceService:
             query = query.filter(Invoice.invoice_date <= to_date)
 
         if overdue_only:
-            today = date.today()
-            query = query.filter(
-                Invoice.status.in_(['sent', 'partially_paid']),
-                Invoice.due_date < today
-            )
+            query = query.filter(self._overdue_condition(date.today()))
 
         # Get total count
         total = query.count()
@@ -511,16 +510,163 @@ class InvoiceService:
 
         self.db.commit()
 
-    def _recalculate_invoice_totals(self, invoice: Invoice) -> None:
-        """Recalculate invoice subtotal and total based on line items"""
-        # Sum all line items
-        line_items = self.db.query(InvoiceLineItem).filter(
-            InvoiceLineItem.invoice_id == invoice.id
-        ).all()
+    def bulk_update_line_items(
+        self,
+        user_id: str,
+        invoice_id: str,
+        org_id: str,
+        changes: InvoiceLineItemBulkRequest
+    ) -> Invoice:
+        """
+        Add, update and delete line items of a draft invoice in one transaction.
+
+        Each kind of change is one statement, and the totals are recomputed
+        with one aggregate UPDATE.
+
+        Args:
+            user_id: User editing the line items
+            invoice_id: Invoice ID
+            org_id: Organization ID
+            changes: Line items to add, update and delete
+
+        Returns:
+            Updated invoice with its line items
+
+        Raises:
+            HTTPException: If the invoice, a line item or a vehicle is not found
+        """
+        invoice = self.db.query(Invoice).filter(
+            Invoice.id == invoice_id,
+            Invoice.organization_id == org_id
+        ).first()
+
+        if not invoice:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Invoice not found"
+            )
+
+        if invoice.status != 'draft':
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Cannot edit line items of invoice in {invoice.status} status"
+            )
+
+        # Every updated or deleted line item must belong to this invoice
+        existing_ids = [item.id for item in changes.update] + list(changes.delete)
+        if existing_ids:
+            found = set(self.db.scalars(
+                select(InvoiceLineItem.id).where(
+                    InvoiceLineItem.invoice_id == invoice.id,
+                    InvoiceLineItem.id.in_(existing_ids)
+                )
+            ))
+            missing = [str(item_id) for item_id in existing_ids if item_id not in found]
+            if missing:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Line items not found: {', '.join(missing)}"
+                )
 
-        subtotal = sum(item.amount for item in line_items)
-        invoice.subtotal = subtotal
-        invoice.total_amount = subtotal + invoice.tax_amount
+        self._validate_vehicles(org_id, changes.add + changes.update)
+
+        if changes.delete:
+            self.db.execute(
+                delete(InvoiceLineItem).where(
+                    InvoiceLineItem.invoice_id == invoice.id,
+                    InvoiceLineItem.id.in_(changes.delete)
+                ),
+                execution_options={"synchronize_session": False}
+            )
+
+        if changes.update:
+            self.db.execute(update(InvoiceLineItem), [
+                {
+                    "id": item.id,
+                    "description": item.description,
+                    "quantity": item.quantity,
+                    "unit_price": item.unit_price,
+                    "amount": item.quantity * item.unit_price,
+                    "vehicle_id": item.vehicle_id,
+                }
+                for item in changes.update
+            ])
+
+        if changes.add:
+            self._insert_line_items(invoice.id, changes.add)
+
+        self._recalculate_invoice_totals(invoice)
+
+        self.db.add(AuditLog(
+            user_id=user_id,
+            organization_id=org_id,
+            action=AUDIT_ACTION_INVOICE_UPDATED,
+            entity_type=ENTITY_TYPE_INVOICE,
+            entity_id=str(invoice.id),
+            details={
+                "invoice_number": invoice.invoice_number,
+                "line_items_added": len(changes.add),
+                "line_items_updated": len(changes.update),
+                "line_items_deleted": len(changes.delete),
+            }
+        ))
+
+        self.db.commit()
+
+        return self.get_invoice_by_id(invoice_id, org_id)
+
+    def _validate_vehicles(self, org_id: str, line_items: List[InvoiceLineItemRequest]) -> None:
+        """Check that every vehicle referenced by the line items belongs to the organization"""
+        vehicle_ids = {item.vehicle_id for item in line_items if item.vehicle_id}
+        if not vehicle_ids:
+            return
+
+        found = set(self.db.scalars(
+            select(Vehicle.id).where(
+                Vehicle.id.in_(vehicle_ids),
+                Vehicle.organization_id == org_id
+            )
+        ))
+        if found != vehicle_ids:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Vehicle not found in your organization"
+            )
+
+    def _insert_line_items(self, invoice_id, line_items: List[InvoiceLineItemRequest]) -> None:
+        """Insert line items with one multi-row INSERT"""
+        self.db.execute(insert(InvoiceLineItem), [
+            {
+                "id": uuid.uuid4(),
+                "invoice_id": invoice_id,
+                "description": item.description,
+                "quantity": item.quantity,
+                "unit_price": item.unit_price,
+                "amount": item.quantity * item.unit_price,
+                "vehicle_id": item.vehicle_id,
+            }
+            for item in line_items
+        ])
+
+    def _recalculate_invoice_totals(self, invoice: Invoice) -> None:
+        """Recalculate invoice subtotal and total from its line items with one aggregate UPDATE"""
+        # Pending line item and tax changes must be in the database first
+        self.db.flush()
+
+        subtotal = select(
+            func.coalesce(func.sum(InvoiceLineItem.amount), 0)
+        ).where(
+            InvoiceLineItem.invoice_id == Invoice.id
+        ).scalar_subquery()
+
+        self.db.execute(
+            update(Invoice).where(Invoice.id == invoice.id).values(
+                subtotal=subtotal,
+                total_amount=subtotal + Invoice.tax_amount
+            ),
+            execution_options={"synchronize_session": False}
+        )
+        self.db.expire(invoice, ['subtotal', 'total_amount', 'line_items'])
 
     def send_invoice(
         self,
@@ -579,6 +725,9 @@ class InvoiceService:
         self.db.commit()
         self.db.refresh(invoice)
 
+        # Have the PDF ready before the customer asks for it
+        InvoicePdfService(self.db).prerender(org_id, invoice_id)
+
         return invoice
 
     def record_payment(
@@ -627,10 +776,7 @@ class InvoiceService:
         invoice.amount_paid += amount
 
         # Update status based on payment
-        if invoice.is_fully_paid:
-            invoice.status = 'paid'
-        elif invoice.amount_paid > 0:
-            invoice.status = 'partially_paid'
+        invoice.update_payment_status()
 
         # Create audit log
         audit_log = AuditLog(
@@ -697,33 +843,36 @@ class InvoiceService:
         """
         Get all overdue invoices for organization.
 
+        Statuses are moved to overdue by the invoice sweeper; invoices it has
+        not reached yet are included by due date.
+
         Args:
             org_id: Organization ID
 
         Returns:
-            List of overdue invoices
+            List of overdue invoices, oldest due date first
         """
-        today = date.today()
-        invoices = self.db.query(Invoice).filter(
+        return self.db.query(Invoice).filter(
             Invoice.organization_id == org_id,
-            Invoice.status.in_(['sent', 'partially_paid']),
-            Invoice.due_date < today
-        ).all()
-
-        # Update status to overdue if needed
-        for invoice in invoices:
-            if invoice.status != 'overdue':
-                invoice.status = 'overdue'
+            self._overdue_condition(date.today())
+        ).order_by(Invoice.due_date).all()
 
-        if invoices:
-            self.db.commit()
-
-        return invoices
+    @staticmethod
+    def _overdue_condition(today: date, model=Invoice):
+        """
+        Invoices marked overdue, or still sent/partially paid past their due date.
 
-    def _check_overdue_status(self, invoice: Invoice) -> None:
-        """Check and update invoice status if overdue"""
-        if invoice.is_overdue and invoice.status != 'overdue':
-            invoice.status = 'overdue'
+        Args:
+            today: Date overdue is judged on
+            model: Invoice, or InvoiceDailyRollup (same status and due_date columns)
+        """
+        return or_(
+            model.status == 'overdue',
+            and_(
+                model.status.in_(['sent', 'partially_paid']),
+                model.due_date < today
+            )
+        )
 
     def get_invoice_summary(
         self,
@@ -742,30 +891,45 @@ class InvoiceService:
         Returns:
             Summary statistics
         """
-        query = self.db.query(Invoice).filter(
-            Invoice.organization_id == org_id
+        # One aggregate over the trigger-maintained daily rollup
+        def count_where(*conditions):
+            return func.coalesce(func.sum(case((and_(*conditions), InvoiceDailyRollup.row_count))), 0)
+
+        query = self.db.query(
+            func.coalesce(func.sum(InvoiceDailyRollup.row_count), 0).label('total_invoices'),
+            func.coalesce(func.sum(InvoiceDailyRollup.total_amount), 0).label('total_amount'),
+            func.coalesce(func.sum(InvoiceDailyRollup.amount_paid), 0).label('total_paid'),
+            count_where(InvoiceDailyRollup.status == 'draft').label('draft_count'),
+            count_where(InvoiceDailyRollup.status == 'sent').label('sent_count'),
+            count_where(InvoiceDailyRollup.status == 'partially_paid').label('partially_paid_count'),
+            count_where(InvoiceDailyRollup.status == 'paid').label('paid_count'),
+            count_where(
+                self._overdue_condition(date.today(), InvoiceDailyRollup)
+            ).label('overdue_count'),
+            count_where(InvoiceDailyRollup.status == 'cancelled').label('cancelled_count')
+        ).filter(
+            InvoiceDailyRollup.organization_id == org_id
         )
 
         if from_date:
-            query = query.filter(Invoice.invoice_date >= from_date)
+            query = query.filter(InvoiceDailyRollup.day >= from_date)
 
         if to_date:
-            query = query.filter(Invoice.invoice_date <= to_date)
+            query = query.filter(InvoiceDailyRollup.day <= to_date)
 
-        invoices = query.all()
+        totals = query.one()
 
-        total_invoices = len(invoices)
-        total_amount = sum(inv.total_amount for inv in invoices)
-        total_paid = sum(inv.amount_paid for inv in invoices)
+        total_invoices = int(totals.total_invoices)
+        total_amount = Decimal(totals.total_amount)
+        total_paid = Decimal(totals.total_paid)
         total_due = total_amount - total_paid
 
-        # Count by status
-        draft_count = len([inv for inv in invoices if inv.status == 'draft'])
-        sent_count = len([inv for inv in invoices if inv.status == 'sent'])
-        partially_paid_count = len([inv for inv in invoices if inv.status == 'partially_paid'])
-        paid_count = len([inv for inv in invoices if inv.status == 'paid'])
-        overdue_count = len([inv for inv in invoices if inv.is_overdue])
-        cancelled_count = len([inv for inv in invoices if inv.status == 'cancelled'])
+        draft_count = int(totals.draft_count)
+        sent_count = int(totals.sent_count)
+        partially_paid_count = int(totals.partially_paid_count)
+        paid_count = int(totals.paid_count)
+        overdue_count = int(totals.overdue_count)
+        cancelled_count = int(totals.cancelled_count)
 
         return {
             'total_invoices': total_invoices,
@@ -0,0 +1,189 @@
+"""
+Invoice Sweeper
+Move invoices past their due date to `overdue` and remind their customers
+
+One thread per process wakes every INVOICE_SWEEP_INTERVAL_SECONDS, but only
+the worker holding the leader lock sweeps. A sweep marks due invoices with
+set-based `UPDATE ... WHERE due_date < today RETURNING` statements of
+INVOICE_SWEEP_BATCH_SIZE rows (through idx_invoice_status_due). For each
+batch it adds one invoice_overdue audit entry per invoice in the same
+transaction, and after the commit it queues the reminder emails with one
+`EmailService.send_bulk` call per organization.
+
+An invoice changes to overdue exactly once, so each customer gets one reminder.
+Partial payments keep an overdue invoice overdue.
+
+Read endpoints only filter on status and due date and never write.
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.leader_lock import create_leader_lock
+from app.models.audit_log import AuditLog
+from app.utils.constants import AUDIT_ACTION_INVOICE_OVERDUE, ENTITY_TYPE_INVOICE
+
+logger = logging.getLogger(__name__)
+
+LEADER_LOCK_KEY = "invoice-sweeper:leader"
+LEADER_ADVISORY_LOCK_ID = 0x494E5653  # 'INVS'
+
+SWEEP_SQL = text("""
+UPDATE invoices
+   SET status = 'overdue',
+       updated_at = now()
+ WHERE id IN (
+       SELECT id
+         FROM invoices
+        WHERE status IN ('sent', 'partially_paid')
+          AND due_date < :today
+        ORDER BY due_date
+        LIMIT :batch_size
+          FOR UPDATE SKIP LOCKED
+ )
+RETURNING id, organization_id, invoice_number, customer_name, customer_email,
+          due_date, total_amount - amount_paid AS amount_due
+""")
+
+
+def sweep_overdue_invoices(db: Session, today: Optional[date] = None) -> int:
+    """
+    Mark every invoice past its due date as overdue and queue reminders.
+
+    Args:
+        db: Database session
+        today: Sweep date (default: today)
+
+    Returns:
+        Number of invoices marked overdue
+    """
+    today = today or date.today()
+    batch_size = settings.INVOICE_SWEEP_BATCH_SIZE
+    swept = 0
+
+    while True:
+        rows = db.execute(SWEEP_SQL, {"today": today, "batch_size": batch_size}).all()
+        if not rows:
+            break
+
+        db.add_all([
+            AuditLog(
+                organization_id=row.organization_id,
+                action=AUDIT_ACTION_INVOICE_OVERDUE,
+                entity_type=ENTITY_TYPE_INVOICE,
+                entity_id=row.id,
+                details={
+                    "invoice_number": row.invoice_number,
+                    "due_date": row.due_date.isoformat(),
+                    "amount_due": str(row.amount_due),
+                }
+            )
+            for row in rows
+        ])
+        db.commit()
+
+        _send_reminders(rows, today)
+        swept += len(rows)
+
+        if len(rows) < batch_size:
+            break
+
+    return swept
+
+
+def _send_reminders(rows: list, today: date) -> int:
+    """Queue reminder emails for a batch of newly overdue invoices"""
+    from app.services.email_service import EmailService
+
+    recipients: Dict[str, List[Tuple[str, dict]]] = defaultdict(list)
+    for row in rows:
+        if not row.customer_email:
+            continue
+        recipients[str(row.organization_id)].append((row.customer_email, {
+            "customer_name": row.customer_name,
+            "invoice_number": row.invoice_number,
+            "amount_due": f"{row.amount_due:,.2f}",
+            "due_date": row.due_date.strftime('%d %b %Y'),
+            "days_overdue": (today - row.due_date).days,
+        }))
+
+    queued = 0
+    for org_id, org_recipients in recipients.items():
+        queued += EmailService.send_bulk("invoice_overdue_reminder", org_recipients, org_id)
+    return queued
+
+
+class OverdueInvoiceSweeper:
+    """Background thread that sweeps overdue invoices on the leader"""
+
+    def __init__(self):
+        self.lock = create_leader_lock(
+            LEADER_LOCK_KEY,
+            LEADER_ADVISORY_LOCK_ID,
+            settings.INVOICE_SWEEP_INTERVAL_SECONDS * 3
+        )
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the sweeper thread if it is not running"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="invoice-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the sweeper thread and give up leadership"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        try:
+            self.lock.release()
+        except Exception:
+            pass
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.lock.acquire():
+                    self.tick()
+            except Exception:
+                logger.exception("Overdue invoice sweep failed")
+            self._stop.wait(settings.INVOICE_SWEEP_INTERVAL_SECONDS)
+
+    def tick(self) -> int:
+        """Run one sweep"""
+        from app.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            swept = sweep_overdue_invoices(db)
+            if swept:
+                logger.info("Marked %d invoices overdue", swept)
+            return swept
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+_sweeper: Optional[OverdueInvoiceSweeper] = None
+
+
+def get_invoice_sweeper() -> OverdueInvoiceSweeper:
+    """Get the process-wide overdue invoice sweeper"""
+    global _sweeper
+
+    if _sweeper is None:
+        _sweeper = OverdueInvoiceSweeper()
+
+    return _sweeper
@@ -0,0 +1,605 @@
+"""
+KPI Service
+Precompute KPI values and history from change events
+
+Services that write KPI source data (expenses, trips, budgets, vehicles)
+call `record_kpi_change(org_id, source)` after committing. The
+leader-elected `KPIRefresher` drains these change events every
+KPI_REFRESH_INTERVAL_SECONDS and recalculates only the KPIs of affected
+organizations whose data sources changed. It also runs a full refresh every
+KPI_FULL_REFRESH_MINUTES. Each calculation updates `KPI.current_value`; a
+`KPIHistory` snapshot is appended when the value changes or the last
+snapshot is older than KPI_SNAPSHOT_MINUTES.
+
+Metrics read per-day partial aggregates where the raw data is large. GPS
+distance comes from `driver_daily_distances`: a trigger on driver_locations
+marks the driver-days a point touches stale, and each refresher tick first
+recomputes only those driver-days (DISTANCE_BATCH_SIZE at a time) and treats
+their organizations as "tracking" changes. GPS writes therefore never queue
+change events, and however many points arrive, a tick redoes each touched
+driver-day once. Expense totals come from the trigger-maintained
+`expense_daily_rollups`.
+
+Dashboards read `current_value` and history and never aggregate raw tables.
+
+Change events go to a Redis set when REDIS_HOST is set (shared by all
+workers). Otherwise they go to a per-process set, and events recorded by
+non-leader workers are picked up by the next full refresh.
+
+calculation_config:
+    {
+      "metric": "fleet_utilization|cost_per_km|on_time_trip_rate|budget_burn",
+      "window_days": 30,            # rolling window (default 30)
+      "filters": {"category": "fuel"},
+      "data_sources": [...]         # optional override of the metric's sources
+    }
+"""
+
+import json
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import case, func, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.leader_lock import create_leader_lock
+from app.core.redis_client import get_redis
+from app.models.budget import Budget
+from app.models.financial_rollup import ExpenseDailyRollup
+from app.models.kpi import KPI, KPIHistory
+from app.models.tracking import DriverDailyDistance
+from app.models.trip import Trip
+from app.models.vehicle import Vehicle
+
+logger = logging.getLogger(__name__)
+
+CHANGE_SET_KEY = "kpi:changes"
+LEADER_LOCK_KEY = "kpi-refresher:leader"
+LEADER_ADVISORY_LOCK_ID = 0x4B504952  # 'KPIR'
+
+EARTH_RADIUS_KM = 6371.0
+DISTANCE_BATCH_SIZE = 500
+
+# Recompute a batch of stale driver-days: haversine between consecutive real
+# (non-mock) points of each day, the first one measured from the driver's last
+# point before the day
+DISTANCE_REFRESH_SQL = text("""
+WITH stale AS (
+    SELECT driver_id, day,
+           CAST(day AS timestamp) AT TIME ZONE 'UTC' AS day_start
+      FROM driver_daily_distances
+     WHERE stale
+     ORDER BY day
+     LIMIT :batch_size
+       FOR UPDATE SKIP LOCKED
+), points AS (
+    SELECT s.driver_id, s.day, l.timestamp, l.latitude AS lat, l.longitude AS lon, true AS in_day
+      FROM stale s
+      JOIN driver_locations l
+        ON l.driver_id = s.driver_id
+       AND l.timestamp >= s.day_start
+       AND l.timestamp < s.day_start + interval '1 day'
+       AND NOT l.is_mock_location
+    UNION ALL
+    SELECT s.driver_id, s.day, p.timestamp, p.latitude, p.longitude, false
+      FROM stale s
+     CROSS JOIN LATERAL (
+           SELECT timestamp, latitude, longitude
+             FROM driver_locations
+            WHERE driver_id = s.driver_id
+              AND timestamp < s.day_start
+              AND NOT is_mock_location
+            ORDER BY timestamp DESC
+            LIMIT 1
+     ) p
+), segments AS (
+    SELECT driver_id, day, in_day, lat, lon,
+           lag(lat) OVER w AS prev_lat,
+           lag(lon) OVER w AS prev_lon
+      FROM points
+    WINDOW w AS (PARTITION BY driver_id, day ORDER BY timestamp)
+), totals AS (
+    SELECT driver_id, day,
+           SUM(2 * :earth_radius_km * asin(sqrt(
+               power(sin(radians(lat - prev_lat) / 2), 2)
+               + cos(radians(prev_lat)) * cos(radians(lat))
+               * power(sin(radians(lon - prev_lon) / 2), 2)
+           ))) AS distance_km,
+           COUNT(*) AS point_count
+      FROM segments
+     WHERE in_day
+     GROUP BY driver_id, day
+)
+UPDATE driver_daily_distances d
+   SET distance_km = COALESCE(t.distance_km, 0),
+       point_count = COALESCE(t.point_count, 0),
+       stale = false
+  FROM stale s
+  LEFT JOIN totals t ON t.driver_id = s.driver_id AND t.day = s.day
+ WHERE d.driver_id = s.driver_id AND d.day = s.day
+RETURNING d.organization_id
+""")
+
+
+# ============================================================================
+# Change events
+# ============================================================================
+
+class InMemoryChangeLog:
+    """Per-process set of (organization_id, source) change events"""
+
+    def __init__(self):
+        self._changes: Set[Tuple[str, str]] = set()
+        self._lock = threading.Lock()
+
+    def add(self, org_id: str, source: str) -> None:
+        with self._lock:
+            self._changes.add((org_id, source))
+
+    def drain(self) -> Set[Tuple[str, str]]:
+        with self._lock:
+            changes, self._changes = self._changes, set()
+        return changes
+
+
+class RedisChangeLog:
+    """Change events in a Redis set shared by all workers"""
+
+    DRAIN_BATCH = 10000
+
+    def __init__(self, client):
+        self.client = client
+
+    def add(self, org_id: str, source: str) -> None:
+        self.client.sadd(CHANGE_SET_KEY, f"{org_id}|{source}")
+
+    def drain(self) -> Set[Tuple[str, str]]:
+        members = self.client.spop(CHANGE_SET_KEY, self.DRAIN_BATCH) or []
+        return {tuple(member.split("|", 1)) for member in members}
+
+
+_change_log = None
+
+
+def get_change_log():
+    """Get the process-wide KPI change log"""
+    global _change_log
+
+    if _change_log is None:
+        client = get_redis()
+        _change_log = RedisChangeLog(client) if client is not None else InMemoryChangeLog()
+
+    return _change_log
+
+
+def record_kpi_change(org_id, source: str) -> None:
+    """
+    Record that KPI source data changed for an organization.
+
+    Never raises: a lost event is corrected by the next full refresh.
+
+    Args:
+        org_id: Organization ID
+        source: expenses, trips, budgets or vehicles ("tracking" changes
+            are detected from driver_daily_distances)
+    """
+    if not org_id:
+        return
+    try:
+        get_change_log().add(str(org_id), source)
+    except Exception as e:
+        logger.warning(f"Could not record KPI change for {org_id}/{source}: {e}")
+
+
+# ============================================================================
+# Metrics
+# ============================================================================
+
+def _ratio(numerator, denominator, scale: int = 1) -> Optional[Decimal]:
+    if not denominator:
+        return None
+    return Decimal(str(numerator)) * scale / Decimal(str(denominator))
+
+
+def _fleet_utilization(db: Session, org_id: str, config: dict, today: date) -> Tuple[Optional[Decimal], dict]:
+    """Percentage of active vehicles that ran at least one trip in the window"""
+    window_start = today - timedelta(days=int(config.get("window_days", 30)))
+
+    active_vehicles = db.query(func.count(Vehicle.id)).filter(
+        Vehicle.organization_id == org_id,
+        Vehicle.status == 'active'
+    ).scalar()
+
+    used_vehicles = db.query(func.count(func.distinct(Trip.vehicle_id))).filter(
+        Trip.organization_id == org_id,
+        Trip.vehicle_id != None,
+        Trip.status.in_(['ongoing', 'completed']),
+        func.coalesce(Trip.start_date, func.date(Trip.created_at)) <= today,
+        func.coalesce(Trip.end_date, today) >= window_start
+    ).scalar()
+
+    return _ratio(used_vehicles, active_vehicles, 100), {
+        "data_points": active_vehicles,
+        "used_vehicles": used_vehicles,
+        "date_range": {"from": window_start.isoformat(), "to": today.isoformat()},
+    }
+
+
+def _cost_per_km(db: Session, org_id: str, config: dict, today: date) -> Tuple[Optional[Decimal], dict]:
+    """Approved/paid expenses divided by GPS distance driven in the window"""
+    window_start = today - timedelta(days=int(config.get("window_days", 30)))
+    filters = config.get("filters") or {}
+
+    expense_query = db.query(func.coalesce(func.sum(ExpenseDailyRollup.total_amount), 0)).filter(
+        ExpenseDailyRollup.organization_id == org_id,
+        ExpenseDailyRollup.status.in_(['approved', 'paid']),
+        ExpenseDailyRollup.day >= window_start
+    )
+    if filters.get("category"):
+        expense_query = expense_query.filter(ExpenseDailyRollup.category == filters["category"])
+    total_cost = expense_query.scalar()
+
+    # Per driver-day GPS distance, kept current by refresh_distances
+    distance_km = db.query(func.coalesce(func.sum(DriverDailyDistance.distance_km), 0)).filter(
+        DriverDailyDistance.organization_id == org_id,
+        DriverDailyDistance.day >= window_start,
+        DriverDailyDistance.day <= today
+    ).scalar()
+
+    return _ratio(total_cost, distance_km), {
+        "total_cost": str(total_cost),
+        "distance_km": round(float(distance_km), 2),
+        "date_range": {"from": window_start.isoformat(), "to": today.isoformat()},
+        "filters_applied": filters,
+    }
+
+
+def _on_time_trip_rate(db: Session, org_id: str, config: dict, today: date) -> Tuple[Optional[Decimal], dict]:
+    """
+    Percentage of trips completed in the window on or before their end date.
+
+    Trips have no separate completion timestamp; the last update of a
+    completed trip is taken as its completion.
+    """
+    window_start = today - timedelta(days=int(config.get("window_days", 30)))
+    completed_on = func.date(Trip.updated_at)
+
+    row = db.query(
+        func.count(Trip.id).label('completed'),
+        func.count(case((completed_on <= Trip.end_date, 1))).label('on_time')
+    ).filter(
+        Trip.organization_id == org_id,
+        Trip.status == 'completed',
+        Trip.end_date != None,
+        completed_on >= window_start
+    ).one()
+
+    return _ratio(row.on_time, row.completed, 100), {
+        "data_points": row.completed,
+        "on_time": row.on_time,
+        "date_range": {"from": window_start.isoformat(), "to": today.isoformat()},
+    }
+
+
+def _budget_burn(db: Session, org_id: str, config: dict, today: date) -> Tuple[Optional[Decimal], dict]:
+    """Spent as a percentage of allocated, over budgets running today"""
+    filters = config.get("filters") or {}
+
+    query = db.query(
+        func.count(Budget.id).label('budgets'),
+        func.coalesce(func.sum(Budget.spent_amount), 0).label('spent'),
+        func.coalesce(func.sum(Budget.allocated_amount), 0).label('allocated')
+    ).filter(
+        Budget.organization_id == org_id,
+        Budget.start_date <= today,
+        Budget.end_date >= today
+    )
+    if filters.get("category"):
+        query = query.filter(Budget.category == filters["category"])
+    row = query.one()
+
+    return _ratio(row.spent, row.allocated, 100), {
+        "data_points": row.budgets,
+        "spent": str(row.spent),
+        "allocated": str(row.allocated),
+        "filters_applied": filters,
+    }
+
+
+# metric -> (calculator, default data sources)
+METRICS: Dict[str, Tuple[Callable, List[str]]] = {
+    "fleet_utilization": (_fleet_utilization, ["trips", "vehicles"]),
+    "cost_per_km": (_cost_per_km, ["expenses", "tracking"]),
+    "on_time_trip_rate": (_on_time_trip_rate, ["trips"]),
+    "budget_burn": (_budget_burn, ["budgets", "expenses"]),
+}
+
+
+def kpi_sources(kpi: KPI) -> List[str]:
+    """Data sources a KPI depends on"""
+    config = kpi.calculation_config or {}
+    metric = METRICS.get(config.get("metric"))
+    return config.get("data_sources") or (metric[1] if metric else [])
+
+
+# ============================================================================
+# Service
+# ============================================================================
+
+class KPIService:
+    """Service for KPI definitions and precomputed values"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create_kpi(self, user_id: str, org_id: str, kpi_data: dict) -> KPI:
+        """
+        Create a KPI and calculate its first value.
+
+        Raises:
+            HTTPException: If the metric is unknown or the code is taken
+        """
+        metric = (kpi_data.get("calculation_config") or {}).get("metric")
+        if metric not in METRICS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown metric. Available: {', '.join(METRICS)}"
+            )
+
+        existing = self.db.query(KPI.id).filter(
+            KPI.organization_id == org_id,
+            KPI.kpi_code == kpi_data["kpi_code"]
+        ).first()
+        if existing:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"KPI code '{kpi_data['kpi_code']}' already exists"
+            )
+
+        kpi = KPI(organization_id=org_id, created_by=user_id, is_active='active', **kpi_data)
+        self.db.add(kpi)
+        self.db.flush()
+
+        self._refresh_kpis([kpi], datetime.utcnow())
+        self.db.commit()
+        self.db.refresh(kpi)
+
+        return kpi
+
+    def get_kpis(self, org_id: str, category: Optional[str] = None) -> List[KPI]:
+        """Active KPIs with their precomputed values"""
+        query = self.db.query(KPI).filter(
+            KPI.organization_id == org_id,
+            KPI.is_active == 'active'
+        )
+        if category:
+            query = query.filter(KPI.category == category)
+
+        return query.order_by(KPI.category, KPI.kpi_name).all()
+
+    def get_kpi(self, org_id: str, kpi_id: str) -> KPI:
+        """
+        Get a KPI of the organization.
+
+        Raises:
+            HTTPException: If not found
+        """
+        kpi = self.db.query(KPI).filter(
+            KPI.id == kpi_id,
+            KPI.organization_id == org_id
+        ).first()
+
+        if not kpi:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="KPI not found"
+            )
+
+        return kpi
+
+    def get_history(self, org_id: str, kpi_id: str, days: int = 30) -> List[KPIHistory]:
+        """KPI snapshots over the last `days` days, oldest first"""
+        kpi = self.get_kpi(org_id, kpi_id)
+        since = datetime.utcnow() - timedelta(days=days)
+
+        return self.db.query(KPIHistory).filter(
+            KPIHistory.kpi_id == kpi.id,
+            KPIHistory.calculated_at >= since
+        ).order_by(KPIHistory.calculated_at).all()
+
+    def refresh(self, org_ids: Optional[Set[str]] = None, sources: Optional[Dict[str, Set[str]]] = None) -> int:
+        """
+        Recalculate KPIs and commit.
+
+        Args:
+            org_ids: Only these organizations (None = all)
+            sources: Per organization, only KPIs depending on these sources
+
+        Returns:
+            Number of KPIs recalculated
+        """
+        query = self.db.query(KPI).filter(KPI.is_active == 'active')
+        if org_ids is not None:
+            if not org_ids:
+                return 0
+            query = query.filter(KPI.organization_id.in_(list(org_ids)))
+
+        kpis = query.all()
+        if sources is not None:
+            kpis = [
+                kpi for kpi in kpis
+                if set(kpi_sources(kpi)) & sources.get(str(kpi.organization_id), set())
+            ]
+
+        refreshed = self._refresh_kpis(kpis, datetime.utcnow())
+        self.db.commit()
+        return refreshed
+
+    def refresh_distances(self) -> Set[str]:
+        """
+        Recompute stale driver-day distances, committing each batch.
+
+        Returns:
+            Organizations whose distances were recomputed
+        """
+        org_ids: Set[str] = set()
+        while True:
+            rows = self.db.execute(DISTANCE_REFRESH_SQL, {
+                "batch_size": DISTANCE_BATCH_SIZE,
+                "earth_radius_km": EARTH_RADIUS_KM,
+            }).all()
+            self.db.commit()
+            org_ids.update(str(row.organization_id) for row in rows)
+            if len(rows) < DISTANCE_BATCH_SIZE:
+                return org_ids
+
+    def refresh_changed(self) -> int:
+        """Recalculate only KPIs whose sources changed since the last drain"""
+        changes = get_change_log().drain()
+        changes |= {(org_id, "tracking") for org_id in self.refresh_distances()}
+        if not changes:
+            return 0
+
+        sources: Dict[str, Set[str]] = {}
+        for org_id, source in changes:
+            sources.setdefault(org_id, set()).add(source)
+
+        return self.refresh(set(sources), sources)
+
+    def _refresh_kpis(self, kpis: List[KPI], now: datetime) -> int:
+        """Calculate values, update KPIs and append due snapshots (no commit)"""
+        if not kpis:
+            return 0
+
+        today = now.date()
+        last_snapshots = dict(
+            self.db.query(KPIHistory.kpi_id, func.max(KPIHistory.calculated_at)).filter(
+                KPIHistory.kpi_id.in_([kpi.id for kpi in kpis])
+            ).group_by(KPIHistory.kpi_id).all()
+        )
+        snapshot_age = timedelta(minutes=settings.KPI_SNAPSHOT_MINUTES)
+
+        # KPIs with the same metric and config in one organization share a calculation
+        computed: Dict[Tuple[str, str], Tuple[Optional[Decimal], dict]] = {}
+        refreshed = 0
+
+        for kpi in kpis:
+            config = kpi.calculation_config or {}
+            metric = METRICS.get(config.get("metric"))
+            if metric is None:
+                continue
+
+            key = (str(kpi.organization_id), json.dumps(config, sort_keys=True, default=str))
+            if key not in computed:
+                try:
+                    # Savepoint so a failing query keeps the other KPIs' updates
+                    with self.db.begin_nested():
+                        computed[key] = metric[0](self.db, str(kpi.organization_id), config, today)
+                except Exception:
+                    logger.exception(f"KPI {kpi.kpi_code} calculation failed")
+                    continue
+
+            value, details = computed[key]
+            if value is not None:
+                value = value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+            changed = value != kpi.current_value
+            kpi.current_value = value
+            kpi.last_calculated_at = now
+            refreshed += 1
+
+            last_snapshot = last_snapshots.get(kpi.id)
+            if value is not None and (changed or not last_snapshot or now - last_snapshot >= snapshot_age):
+                self.db.add(KPIHistory(
+                    kpi_id=kpi.id,
+                    value=value,
+                    calculated_at=now,
+                    calculation_details=details
+                ))
+
+        return refreshed
+
+
+# ============================================================================
+# Background refresher
+# ============================================================================
+
+class KPIRefresher:
+    """Background thread that keeps KPI values current on the leader"""
+
+    def __init__(self):
+        self.lock = create_leader_lock(
+            LEADER_LOCK_KEY,
+            LEADER_ADVISORY_LOCK_ID,
+            settings.KPI_REFRESH_INTERVAL_SECONDS * 3
+        )
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_full_refresh: Optional[datetime] = None
+
+    def start(self) -> None:
+        """Start the refresher thread if it is not running"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="kpi-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the refresher thread and give up leadership"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        try:
+            self.lock.release()
+        except Exception:
+            pass
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.lock.acquire():
+                    self.tick()
+            except Exception:
+                logger.exception("KPI refresh failed")
+            self._stop.wait(settings.KPI_REFRESH_INTERVAL_SECONDS)
+
+    def tick(self) -> int:
+        """Refresh changed KPIs, or all KPIs when a full refresh is due"""
+        from app.database import SessionLocal
+
+        now = datetime.utcnow()
+        full_refresh_due = (
+            self._last_full_refresh is None
+            or now - self._last_full_refresh >= timedelta(minutes=settings.KPI_FULL_REFRESH_MINUTES)
+        )
+
+        db = SessionLocal()
+        try:
+            service = KPIService(db)
+            if full_refresh_due:
+                get_change_log().drain()
+                service.refresh_distances()
+                self._last_full_refresh = now
+                return service.refresh()
+            return service.refresh_changed()
+        finally:
+            db.close()
+
+
+_refresher: Optional[KPIRefresher] = None
+
+
+def get_kpi_refresher() -> KPIRefresher:
+    """Get the process-wide KPI refresher"""
+    global _refresher
+
+    if _refresher is None:
+        _refresher = KPIRefresher()
+
+    return _refresher
@@ -0,0 +1,146 @@
+"""
+Numbering Service
+Document numbers from per-organization, per-prefix, per-month counters
+
+Each number costs one upsert on `document_sequences` instead of counting the
+organization's documents, and the row lock makes concurrent creates wait for
+each other rather than pick the same number.
+
+With DOCUMENT_NUMBER_BLOCK_SIZE = 1 the counter is bumped in the caller's
+transaction: numbers are gapless, but creates for the same organization and
+prefix queue on the counter row until the creating transaction commits.
+With a larger block size each worker reserves a block of numbers in its own
+short transaction and hands them out from memory, so the row is locked once
+per block. Numbers are then only increasing within a worker, and unused
+numbers of a block are skipped when the worker restarts.
+
+Trip numbers are global, so a single counter row would serialize every trip
+create across all organizations; they come from the `trip_number_seq`
+sequence, which never blocks (numbers of rolled-back creates are skipped).
+"""
+
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.document_sequence import TRIP_NUMBER_SEQUENCE
+
+ALLOCATE_SQL = text("""
+INSERT INTO document_sequences (organization_id, prefix, period, last_value, updated_at)
+VALUES (:org_id, :prefix, :period, :count, now())
+ON CONFLICT (organization_id, prefix, period) DO UPDATE
+    SET last_value = document_sequences.last_value + EXCLUDED.last_value,
+        updated_at = now()
+RETURNING last_value
+""")
+
+
+def allocate_range(db: Session, org_id: str, prefix: str, period: str, count: int) -> int:
+    """
+    Reserve `count` consecutive values of a counter.
+
+    Returns:
+        Last value of the reserved range
+    """
+    return db.execute(ALLOCATE_SQL, {
+        "org_id": str(org_id),
+        "prefix": prefix,
+        "period": period,
+        "count": count,
+    }).scalar_one()
+
+
+class NumberBlockAllocator:
+    """Per-process cache of reserved counter blocks"""
+
+    def __init__(self, block_size: int):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._blocks: Dict[Tuple[str, str, str], List[int]] = {}  # key -> [next, last]
+
+    def take(self, org_id: str, prefix: str, period: str) -> int:
+        """Next value from this process's block, reserving a new block when it runs out"""
+        key = (str(org_id), prefix, period)
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is None or block[0] > block[1]:
+                last = self._reserve(*key)
+                block = [last - self.block_size + 1, last]
+                self._blocks[key] = block
+            value = block[0]
+            block[0] += 1
+            return value
+
+    def _reserve(self, org_id: str, prefix: str, period: str) -> int:
+        from app.database import SessionLocal
+
+        # Committed on its own so the counter row is not held by the caller's transaction
+        db = SessionLocal()
+        try:
+            last = allocate_range(db, org_id, prefix, period, self.block_size)
+            db.commit()
+            return last
+        finally:
+            db.close()
+
+
+_allocator: Optional[NumberBlockAllocator] = None
+
+
+def get_block_allocator() -> NumberBlockAllocator:
+    """Get the process-wide block allocator"""
+    global _allocator
+
+    if _allocator is None:
+        _allocator = NumberBlockAllocator(settings.DOCUMENT_NUMBER_BLOCK_SIZE)
+
+    return _allocator
+
+
+class NumberingService:
+    """Service handing out document numbers"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def next_value(self, org_id: str, prefix: str, period: str = "") -> int:
+        """
+        Take the next value of a counter.
+
+        Args:
+            org_id: Organization ID
+            prefix: Document prefix
+            period: Counter period (YYYYMM), empty for counters that never reset
+
+        Returns:
+            Counter value
+        """
+        if settings.DOCUMENT_NUMBER_BLOCK_SIZE > 1:
+            return get_block_allocator().take(org_id, prefix, period)
+        return allocate_range(self.db, org_id, prefix, period, 1)
+
+    def monthly_number(self, org_id: str, prefix: str) -> str:
+        """Number restarting every month, formatted PREFIX-YYYYMM-NNNN"""
+        period = datetime.now().strftime('%Y%m')
+        value = self.next_value(org_id, prefix, period)
+        return f"{prefix}-{period}-{str(value).zfill(4)}"
+
+    def monthly_numbers(self, org_id: str, prefix: str, count: int) -> List[str]:
+        """
+        Consecutive monthly numbers for a bulk create, reserved with one statement.
+
+        The range is always taken in the caller's transaction, whatever the
+        block size, so it is released if the bulk insert rolls back.
+        """
+        period = datetime.now().strftime('%Y%m')
+        last = allocate_range(self.db, org_id, prefix, period, count)
+        return [f"{prefix}-{period}-{str(value).zfill(4)}" for value in range(last - count + 1, last + 1)]
+
+    def trip_number(self) -> str:
+        """Trip number shared by all organizations, formatted RR-NNNNN"""
+        value = self.db.execute(select(TRIP_NUMBER_SEQUENCE.next_value())).scalar_one()
+        return f"RR-{str(value).zfill(5)}"
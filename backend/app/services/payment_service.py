@@ -4,7 +4,7 @@ Business logic for payment management
 """
 
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, func, extract
+from sqlalchemy import and_, func, extract, literal_column
 from fastapi import HTTPException, status
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date
@@ -12,6 +12,7 @@ from decimal import Decimal
 import uuid
 
 from app.models.payment import Payment
+from app.models.financial_rollup import PaymentDailyRollup
 from app.models.invoice import Invoice
 from app.models.expense import Expense
 from app.models.company import Organization
@@ -23,6 +24,20 @@ from app.utils.constants import (
     AUDIT_ACTION_PAYMENT_DELETED,
     ENTITY_TYPE_PAYMENT
 )
+from app.services.numbering_service import NumberingService
+from app.services.cash_flow_service import invalidate_cash_flow
+
+# get_payments_by_period period -> date_trunc unit
+PERIOD_UNITS = {'monthly': 'month', 'quarterly': 'quarter', 'yearly': 'year'}
+
+
+def _period_label(bucket: datetime, unit: str) -> str:
+    """Label of a date_trunc bucket: YYYY-MM, YYYY-Q or YYYY"""
+    if unit == 'month':
+        return bucket.strftime('%Y-%m')
+    if unit == 'quarter':
+        return f"{bucket.year}-{(bucket.month - 1) // 3 + 1}"
+    return str(bucket.year)
 
 
 class PaymentService:
@@ -33,14 +48,8 @@ class PaymentService:
 
     def _generate_payment_number(self, org_id: str) -> str:
         """Generate unique payment number for organization"""
-        # Get count of payments for organization
-        count = self.db.query(Payment).filter(
-            Payment.organization_id == org_id
-        ).count()
-
-        # Format: PAY-YYYYMM-NNNN
-        today = datetime.now()
-        return f"PAY-{today.strftime('%Y%m')}-{str(count + 1).zfill(4)}"
+        # Format: PAY-YYYYMM-NNNN, numbered per organization and month
+        return NumberingService(self.db).monthly_number(org_id, "PAY")
 
     def _validate_payment_reference(
         self,
@@ -109,12 +118,7 @@ class PaymentService:
                 invoice.amount_paid += amount
 
             # Update status based on payment
-            if invoice.is_fully_paid:
-                invoice.status = 'paid'
-            elif invoice.amount_paid > 0:
-                invoice.status = 'partially_paid'
-            else:
-                invoice.status = 'sent'
+            invoice.update_payment_status()
 
         elif expense_id:
             expense = self.db.query(Expense).filter(
@@ -217,6 +221,7 @@ class PaymentService:
         self.db.add(audit_log)
 
         self.db.commit()
+        invalidate_cash_flow(org_id)
         self.db.refresh(payment)
 
         return payment
@@ -339,6 +344,7 @@ class PaymentService:
         self.db.add(audit_log)
 
         self.db.commit()
+        invalidate_cash_flow(org_id)
         self.db.refresh(payment)
 
         return payment
@@ -388,6 +394,7 @@ class PaymentService:
         self.db.add(audit_log)
 
         self.db.commit()
+        invalidate_cash_flow(org_id)
 
     def get_payments_by_method(
         self,
@@ -406,22 +413,23 @@ class PaymentService:
         Returns:
             Payments grouped by method with totals
         """
-        query = self.db.query(Payment).filter(
-            Payment.organization_id == org_id
+        # Read the trigger-maintained daily rollup instead of the payments table
+        query = self.db.query(PaymentDailyRollup).filter(
+            PaymentDailyRollup.organization_id == org_id
         )
 
         if from_date:
-            query = query.filter(Payment.payment_date >= from_date)
+            query = query.filter(PaymentDailyRollup.day >= from_date)
 
         if to_date:
-            query = query.filter(Payment.payment_date <= to_date)
+            query = query.filter(PaymentDailyRollup.day <= to_date)
 
         results = query.with_entities(
-            Payment.payment_method,
-            Payment.payment_type,
-            func.sum(Payment.amount).label('total_amount'),
-            func.count(Payment.id).label('count')
-        ).group_by(Payment.payment_method, Payment.payment_type).all()
+            PaymentDailyRollup.payment_method,
+            PaymentDailyRollup.payment_type,
+            func.sum(PaymentDailyRollup.total_amount).label('total_amount'),
+            func.sum(PaymentDailyRollup.row_count).label('count')
+        ).group_by(PaymentDailyRollup.payment_method, PaymentDailyRollup.payment_type).all()
 
         summary = {}
         for r in results:
@@ -465,59 +473,45 @@ class PaymentService:
         Returns:
             Payments grouped by period
         """
-        query = self.db.query(Payment).filter(
-            Payment.organization_id == org_id
+        query = self.db.query(PaymentDailyRollup).filter(
+            PaymentDailyRollup.organization_id == org_id
         )
 
         if from_date:
-            query = query.filter(Payment.payment_date >= from_date)
+            query = query.filter(PaymentDailyRollup.day >= from_date)
 
         if to_date:
-            query = query.filter(Payment.payment_date <= to_date)
-
-        if period == 'monthly':
-            date_format = 'YYYY-MM'
-        elif period == 'quarterly':
-            date_format = 'YYYY-Q'
-        else:  # yearly
-            date_format = 'YYYY'
+            query = query.filter(PaymentDailyRollup.day <= to_date)
+
+        unit = PERIOD_UNITS.get(period, 'year')
+        # Inlined so the SELECT and GROUP BY expressions are identical
+        bucket = func.date_trunc(literal_column(f"'{unit}'"), PaymentDailyRollup.day)
+        received = func.coalesce(func.sum(PaymentDailyRollup.total_amount).filter(
+            PaymentDailyRollup.payment_type == 'received'
+        ), 0)
+        paid = func.coalesce(func.sum(PaymentDailyRollup.total_amount).filter(
+            PaymentDailyRollup.payment_type == 'paid'
+        ), 0)
 
         results = query.with_entities(
-            func.to_char(Payment.payment_date, date_format).label('period'),
-            Payment.payment_type,
-            func.sum(Payment.amount).label('total_amount'),
-            func.count(Payment.id).label('count')
-        ).group_by(
-            func.to_char(Payment.payment_date, date_format),
-            Payment.payment_type
-        ).order_by(
-            func.to_char(Payment.payment_date, date_format)
-        ).all()
-
-        summary = {}
-        for r in results:
-            if r.period not in summary:
-                summary[r.period] = {
-                    'period': r.period,
-                    'received': Decimal('0'),
-                    'paid': Decimal('0'),
-                    'net_flow': Decimal('0'),
-                    'count': 0
-                }
-
-            if r.payment_type == 'received':
-                summary[r.period]['received'] = r.total_amount or Decimal('0')
-            elif r.payment_type == 'paid':
-                summary[r.period]['paid'] = r.total_amount or Decimal('0')
-
-            summary[r.period]['count'] += r.count
-
-        # Calculate net flow for each period
-        for item in summary.values():
-            item['net_flow'] = item['received'] - item['paid']
+            bucket.label('bucket'),
+            received.label('received'),
+            paid.label('paid'),
+            (received - paid).label('net_flow'),
+            func.sum(PaymentDailyRollup.row_count).label('count')
+        ).group_by(bucket).order_by(bucket).all()
 
         return {
-            'by_period': list(summary.values()),
+            'by_period': [
+                {
+                    'period': _period_label(r.bucket, unit),
+                    'received': r.received,
+                    'paid': r.paid,
+                    'net_flow': r.net_flow,
+                    'count': r.count
+                }
+                for r in results
+            ],
             'period_type': period
         }
 
@@ -538,21 +532,21 @@ class PaymentService:
         Returns:
             Summary statistics
         """
-        query = self.db.query(Payment).filter(
-            Payment.organization_id == org_id
+        query = self.db.query(PaymentDailyRollup).filter(
+            PaymentDailyRollup.organization_id == org_id
         )
 
         if from_date:
-            query = query.filter(Payment.payment_date >= from_date)
+            query = query.filter(PaymentDailyRollup.day >= from_date)
 
         if to_date:
-            query = query.filter(Payment.payment_date <= to_date)
+            query = query.filter(PaymentDailyRollup.day <= to_date)
 
         results = query.with_entities(
-            Payment.payment_type,
-            func.sum(Payment.amount).label('total_amount'),
-            func.count(Payment.id).label('count')
-        ).group_by(Payment.payment_type).all()
+            PaymentDailyRollup.payment_type,
+            func.sum(PaymentDailyRollup.total_amount).label('total_amount'),
+            func.sum(PaymentDailyRollup.row_count).label('count')
+        ).group_by(PaymentDailyRollup.payment_type).all()
 
         total_received = Decimal('0')
         total_paid = Decimal('0')
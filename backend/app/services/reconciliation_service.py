@@ -0,0 +1,525 @@
+"""
+Reconciliation Service
+Match bank statement lines to open invoices and expenses, then record the confirmed payments in bulk
+
+Matching reads the statement (CSV or XLSX) and loads the organization's open
+records once per run, with one query each:
+- invoices that can take a payment (sent, partially paid, overdue), matched
+  to credit lines
+- approved (unpaid) expenses, matched to debit lines
+- payments already recorded over the statement's dates
+
+These are put into in-memory hash indexes: by normalized document number and
+by amount. Every line is then matched without further queries:
+1. reference: an invoice or expense number found in the line's reference or
+   description
+2. amount and date: an open record of exactly the line's amount, with the
+   line dated between the record's date and DATE_WINDOW_DAYS after it is due
+   (invoices) or incurred (expenses)
+
+A record is matched by amount at most once per run. Lines that equal an
+already recorded payment (type, date, amount) are reported as already
+recorded.
+
+Nothing is written while matching. Confirmed matches are applied together:
+payments are numbered with one counter update and inserted with one
+multi-row INSERT, and the invoices and expenses are loaded once and updated in
+a single flush.
+
+Statement columns (header names are case-insensitive):
+    date                          required (also: transaction_date, value_date)
+    amount                        signed: positive is a credit, negative a debit
+    credit, debit                 instead of amount (also: deposit, withdrawal)
+    reference                     optional (also: ref_no, utr, cheque_no)
+    description                   optional (also: narration, details)
+"""
+
+import re
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import BinaryIO, Dict, List, NamedTuple, Optional, Set, Tuple
+import uuid
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from app.models.audit_log import AuditLog
+from app.models.company import Organization
+from app.models.expense import Expense
+from app.models.invoice import Invoice
+from app.models.payment import Payment
+from app.schemas.payment import ReconciliationApplyRequest
+from app.services.cash_flow_service import invalidate_cash_flow
+from app.services.expense_import_service import read_rows
+from app.services.numbering_service import NumberingService
+from app.utils.constants import AUDIT_ACTION_PAYMENTS_RECONCILED, ENTITY_TYPE_PAYMENT
+
+DATE_WINDOW_DAYS = 30
+MAX_STATEMENT_LINES = 50000
+MAX_REPORTED_ERRORS = 500
+
+OPEN_INVOICE_STATUSES = ('sent', 'partially_paid', 'overdue')
+
+# Header aliases found in common bank exports
+COLUMN_ALIASES = {
+    "transaction_date": "date",
+    "txn_date": "date",
+    "value_date": "date",
+    "deposit": "credit",
+    "deposits": "credit",
+    "withdrawal": "debit",
+    "withdrawals": "debit",
+    "ref_no": "reference",
+    "reference_number": "reference",
+    "utr": "reference",
+    "cheque_no": "reference",
+    "narration": "description",
+    "details": "description",
+    "particulars": "description",
+}
+
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y", "%d %b %Y", "%d-%b-%Y", "%d-%b-%y")
+
+# INV-202610-0001, EXP 202610 0001, EXP2026100001 ...
+DOCUMENT_NUMBER_PATTERN = re.compile(r"\b([A-Z]{2,4})[-/ ]?(\d{6})[-/ ]?(\d{4,})\b")
+
+CONFIDENCE_REFERENCE_AMOUNT = 1.0
+CONFIDENCE_REFERENCE = 0.8
+CONFIDENCE_AMOUNT_DATE = 0.7
+CONFIDENCE_AMBIGUOUS = 0.4
+
+
+class StatementLine(NamedTuple):
+    """A parsed bank statement line"""
+    row: int
+    date: date
+    amount: Decimal  # Always positive
+    direction: str  # credit or debit
+    reference: Optional[str]
+    description: Optional[str]
+
+
+class OpenItem(NamedTuple):
+    """An invoice or expense that can still be paid"""
+    entity_type: str
+    id: uuid.UUID
+    number: str
+    counterparty: Optional[str]
+    amount_due: Decimal
+    start_date: date  # Earliest plausible payment date
+    anchor_date: date  # Date payments are expected around (due date / expense date)
+
+
+def _normalize_number(value: str) -> str:
+    return re.sub(r"[^A-Z0-9]", "", value.upper())
+
+
+def _cents(value: Decimal) -> Decimal:
+    return value.quantize(Decimal("0.01"))
+
+
+def _parse_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date '{text}'")
+
+
+def _parse_amount(value) -> Optional[Decimal]:
+    if value is None:
+        return None
+    if isinstance(value, (int, float, Decimal)):
+        return Decimal(str(value))
+    text = str(value).strip().replace(",", "").replace("₹", "").replace(" ", "")
+    negative = text.startswith("(") and text.endswith(")")
+    text = text.strip("()")
+    if text.upper().endswith(("CR", "DR")):
+        negative = text.upper().endswith("DR")
+        text = text[:-2]
+    if not text:
+        return None
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"Unrecognized amount '{value}'")
+    return -amount if negative else amount
+
+
+def _parse_line(row_number: int, row: dict) -> StatementLine:
+    """Turn a statement row into a line; raises ValueError with a readable message"""
+    if row.get("date") is None:
+        raise ValueError("date: missing")
+    line_date = _parse_date(row["date"])
+
+    if "amount" in row:
+        amount = _parse_amount(row.get("amount"))
+    else:
+        credit = _parse_amount(row.get("credit")) or Decimal("0")
+        debit = _parse_amount(row.get("debit")) or Decimal("0")
+        amount = credit - abs(debit)
+
+    if not amount:
+        raise ValueError("amount: missing or zero")
+
+    reference = row.get("reference")
+    description = row.get("description")
+    return StatementLine(
+        row=row_number,
+        date=line_date,
+        amount=_cents(abs(amount)),
+        direction="credit" if amount > 0 else "debit",
+        reference=str(reference) if reference is not None else None,
+        description=str(description) if description is not None else None,
+    )
+
+
+class ReconciliationService:
+    """Service for bank statement reconciliation"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def match_statement(
+        self,
+        org_id: str,
+        file: BinaryIO,
+        filename: str,
+        date_window_days: int = DATE_WINDOW_DAYS
+    ) -> dict:
+        """
+        Propose an invoice or expense for every line of a bank statement.
+
+        Args:
+            org_id: Organization ID
+            file: Uploaded statement
+            filename: Original file name (selects the CSV or XLSX reader)
+            date_window_days: Days after the due/expense date a payment may arrive
+
+        Returns:
+            Matching result per line with counts and row errors
+        """
+        lines: List[StatementLine] = []
+        errors: List[dict] = []
+        failed = 0
+
+        rows = read_rows(file, filename, required_columns={"date"}, column_aliases=COLUMN_ALIASES)
+        for row_number, row in rows:
+            if "amount" not in row and "credit" not in row and "debit" not in row:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Statement needs an amount column or credit/debit columns"
+                )
+            try:
+                lines.append(_parse_line(row_number, row))
+            except ValueError as e:
+                failed += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({"row": row_number, "message": str(e)})
+
+            if len(lines) + failed > MAX_STATEMENT_LINES:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Statements are limited to {MAX_STATEMENT_LINES} lines"
+                )
+
+        results = self._match_lines(org_id, lines, timedelta(days=date_window_days)) if lines else []
+
+        counts = Counter(result["status"] for result in results)
+        return {
+            "total_lines": len(lines) + failed,
+            "matched": counts["matched"],
+            "ambiguous": counts["ambiguous"],
+            "unmatched": counts["unmatched"],
+            "already_recorded": counts["already_recorded"],
+            "failed": failed,
+            "lines": results,
+            "errors": errors,
+            "errors_truncated": failed > len(errors),
+        }
+
+    def _match_lines(self, org_id: str, lines: List[StatementLine], window: timedelta) -> List[dict]:
+        """Match parsed lines against indexes built from one query per source"""
+        items = self._load_open_items(org_id)
+
+        by_number: Dict[str, OpenItem] = {}
+        by_amount: Dict[Tuple[str, Decimal], List[OpenItem]] = defaultdict(list)
+        for item in items:
+            by_number[_normalize_number(item.number)] = item
+            by_amount[(item.entity_type, _cents(item.amount_due))].append(item)
+
+        recorded = self._recorded_payments(
+            org_id,
+            min(line.date for line in lines),
+            max(line.date for line in lines)
+        )
+
+        remaining: Dict[uuid.UUID, Decimal] = {item.id: item.amount_due for item in items}
+        used: Set[uuid.UUID] = set()
+        results: Dict[int, dict] = {}
+
+        def result(line: StatementLine, line_status: str, item: Optional[OpenItem] = None,
+                   confidence: float = 0.0, reason: Optional[str] = None) -> dict:
+            return {
+                "row": line.row,
+                "date": line.date,
+                "amount": line.amount,
+                "direction": line.direction,
+                "reference": line.reference,
+                "description": line.description,
+                "status": line_status,
+                "match": {
+                    "entity_type": item.entity_type,
+                    "entity_id": item.id,
+                    "number": item.number,
+                    "counterparty": item.counterparty,
+                    "amount_due": remaining[item.id],
+                    "confidence": confidence,
+                    "reason": reason,
+                } if item else None,
+            }
+
+        # Pass 1: already recorded payments, then document numbers
+        pending = []
+        for line in lines:
+            payment_type = "received" if line.direction == "credit" else "paid"
+            key = (payment_type, line.date, line.amount)
+            if recorded[key] > 0:
+                recorded[key] -= 1
+                results[line.row] = result(line, "already_recorded")
+                continue
+
+            wanted_type = "invoice" if line.direction == "credit" else "expense"
+            text = " ".join(part for part in (line.reference, line.description) if part).upper()
+            item = None
+            for match in DOCUMENT_NUMBER_PATTERN.finditer(text):
+                candidate = by_number.get("".join(match.groups()))
+                if candidate is not None and candidate.entity_type == wanted_type:
+                    item = candidate
+                    break
+
+            if item is None:
+                pending.append(line)
+                continue
+
+            exact = _cents(remaining[item.id]) == line.amount
+            results[line.row] = result(
+                line, "matched", item,
+                CONFIDENCE_REFERENCE_AMOUNT if exact else CONFIDENCE_REFERENCE,
+                "reference_amount" if exact else "reference"
+            )
+            remaining[item.id] -= line.amount
+            used.add(item.id)
+
+        # Pass 2: amount within the date window, closest to the expected date
+        for line in pending:
+            wanted_type = "invoice" if line.direction == "credit" else "expense"
+            candidates = [
+                item for item in by_amount.get((wanted_type, line.amount), [])
+                if item.id not in used
+                and item.start_date <= line.date <= item.anchor_date + window
+            ]
+            if not candidates:
+                results[line.row] = result(line, "unmatched")
+                continue
+
+            candidates.sort(key=lambda item: (abs((line.date - item.anchor_date).days), item.number))
+            item = candidates[0]
+            unique = len(candidates) == 1
+            results[line.row] = result(
+                line,
+                "matched" if unique else "ambiguous",
+                item,
+                CONFIDENCE_AMOUNT_DATE if unique else CONFIDENCE_AMBIGUOUS,
+                "amount_date"
+            )
+            remaining[item.id] -= line.amount
+            used.add(item.id)
+
+        return [results[line.row] for line in lines]
+
+    def _load_open_items(self, org_id: str) -> List[OpenItem]:
+        """Open invoices and approved expenses, one query each"""
+        invoices = self.db.query(
+            Invoice.id,
+            Invoice.invoice_number,
+            Invoice.customer_name,
+            Invoice.total_amount,
+            Invoice.amount_paid,
+            Invoice.invoice_date,
+            Invoice.due_date
+        ).filter(
+            Invoice.organization_id == org_id,
+            Invoice.status.in_(OPEN_INVOICE_STATUSES)
+        ).all()
+
+        expenses = self.db.query(
+            Expense.id,
+            Expense.expense_number,
+            Expense.description,
+            Expense.total_amount,
+            Expense.expense_date
+        ).filter(
+            Expense.organization_id == org_id,
+            Expense.status == 'approved'
+        ).all()
+
+        return [
+            OpenItem("invoice", row.id, row.invoice_number, row.customer_name,
+                     row.total_amount - row.amount_paid, row.invoice_date, row.due_date)
+            for row in invoices
+        ] + [
+            OpenItem("expense", row.id, row.expense_number, row.description,
+                     row.total_amount, row.expense_date, row.expense_date)
+            for row in expenses
+        ]
+
+    def _recorded_payments(self, org_id: str, start_date: date, end_date: date) -> Counter:
+        """Count of recorded payments per (type, date, amount) over the statement's dates"""
+        rows = self.db.query(
+            Payment.payment_type,
+            Payment.payment_date,
+            Payment.amount,
+            func.count(Payment.id)
+        ).filter(
+            Payment.organization_id == org_id,
+            Payment.payment_date >= start_date,
+            Payment.payment_date <= end_date
+        ).group_by(
+            Payment.payment_type, Payment.payment_date, Payment.amount
+        ).all()
+
+        return Counter({
+            (payment_type, payment_date, _cents(amount)): count
+            for payment_type, payment_date, amount, count in rows
+        })
+
+    def apply_matches(self, user_id: str, org_id: str, request: ReconciliationApplyRequest) -> dict:
+        """
+        Record payments for confirmed statement matches in one transaction.
+
+        Args:
+            user_id: User confirming the matches
+            org_id: Organization ID
+            request: Confirmed matches
+
+        Returns:
+            Counts and totals of the recorded payments
+
+        Raises:
+            HTTPException: If a matched invoice or expense cannot be paid
+        """
+        organization = self.db.query(Organization.id).filter(
+            Organization.id == org_id
+        ).first()
+
+        if not organization:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Organization not found"
+            )
+
+        matches = request.matches
+        invoice_ids = {match.entity_id for match in matches if match.entity_type == "invoice"}
+        expense_ids = {match.entity_id for match in matches if match.entity_type == "expense"}
+
+        invoices: Dict[uuid.UUID, Invoice] = {}
+        if invoice_ids:
+            invoices = {
+                invoice.id: invoice
+                for invoice in self.db.query(Invoice).filter(
+                    Invoice.organization_id == org_id,
+                    Invoice.id.in_(invoice_ids),
+                    Invoice.status.in_(OPEN_INVOICE_STATUSES)
+                ).with_for_update()
+            }
+
+        expenses: Dict[uuid.UUID, Expense] = {}
+        if expense_ids:
+            expenses = {
+                expense.id: expense
+                for expense in self.db.query(Expense).filter(
+                    Expense.organization_id == org_id,
+                    Expense.id.in_(expense_ids),
+                    Expense.status == 'approved'
+                ).with_for_update()
+            }
+
+        unavailable = sorted(
+            str(entity_id) for entity_id in (invoice_ids - invoices.keys()) | (expense_ids - expenses.keys())
+        )
+        if unavailable:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Not found or no longer open for payment: {', '.join(unavailable)}"
+            )
+
+        numbers = NumberingService(self.db).monthly_numbers(org_id, "PAY", len(matches))
+        payments = []
+        received = paid = Decimal("0")
+        for match, number in zip(matches, numbers):
+            is_invoice = match.entity_type == "invoice"
+            payments.append({
+                "id": uuid.uuid4(),
+                "organization_id": org_id,
+                "payment_number": number,
+                "payment_type": "received" if is_invoice else "paid",
+                "payment_method": match.payment_method,
+                "amount": match.amount,
+                "payment_date": match.payment_date,
+                "invoice_id": match.entity_id if is_invoice else None,
+                "expense_id": None if is_invoice else match.entity_id,
+                "reference_number": match.reference_number,
+                "bank_name": match.bank_name,
+                "notes": f"Reconciled from bank statement (line {match.row})" if match.row else "Reconciled from bank statement",
+                "created_by": user_id,
+            })
+
+            if is_invoice:
+                invoices[match.entity_id].amount_paid += match.amount
+                received += match.amount
+            else:
+                paid += match.amount
+
+        self.db.execute(insert(Payment), payments)
+
+        for invoice in invoices.values():
+            invoice.update_payment_status()
+
+        paid_at = datetime.now()
+        for expense in expenses.values():
+            expense.status = 'paid'
+            expense.paid_at = paid_at
+
+        self.db.add(AuditLog(
+            user_id=user_id,
+            organization_id=org_id,
+            action=AUDIT_ACTION_PAYMENTS_RECONCILED,
+            entity_type=ENTITY_TYPE_PAYMENT,
+            details={
+                "payments": len(payments),
+                "invoices": len(invoices),
+                "expenses": len(expenses),
+                "total_received": str(received),
+                "total_paid": str(paid),
+            }
+        ))
+
+        self.db.commit()
+        invalidate_cash_flow(org_id)
+
+        return {
+            "payments_created": len(payments),
+            "invoices_updated": len(invoices),
+            "expenses_updated": len(expenses),
+            "total_received": received,
+            "total_paid": paid,
+        }
@@ -14,8 +14,9 @@ from app.models.user_security_answer import UserSecurityAnswer
 from app.models.verification_token import VerificationToken
 from app.models.recovery_attempt import RecoveryAttempt
 from app.core.security import hash_password
-from app.core.encryption import decrypt_and_compare
+from app.core.encryption import verify_salted_answers
 from app.services.email_service import EmailService
+from app.services.refresh_token_service import RefreshTokenService
 
 
 class RecoveryService:
@@ -57,6 +58,36 @@ class RecoveryService:
         self.db.add(attempt)
         self.db.commit()
 
+    def _verify_answers(
+        self,
+        key_material: str,
+        user_answers: List[UserSecurityAnswer],
+        answers: List[Dict]
+    ) -> bool:
+        """
+        Check that every stored security answer was answered correctly.
+
+        The encryption key is derived once per stored salt for the whole
+        request rather than once per question.
+        """
+        stored_by_question = {str(ua.question_id): ua for ua in user_answers}
+
+        to_verify = []
+        for answer_input in answers:
+            stored_answer = stored_by_question.pop(answer_input.get('question_id'), None)
+            if stored_answer:
+                to_verify.append((
+                    stored_answer.encrypted_answer,
+                    answer_input.get('answer'),
+                    stored_answer.encryption_salt
+                ))
+
+        # All answers must be present and correct
+        if stored_by_question or not to_verify:
+            return False
+
+        return verify_salted_answers(to_verify, key_material)
+
     def initiate_password_reset_email(self, username: str) -> Dict:
         """Initiate password reset via email"""
         # Find user by username
@@ -189,32 +220,8 @@ class RecoveryService:
                 detail=f"Expected {len(user_answers)} answers"
             )
 
-        # Verify all answers
-        correct_answers = 0
-        for answer_input in answers:
-            question_id = answer_input.get('question_id')
-            user_answer_text = answer_input.get('answer')
-
-            # Find stored answer
-            stored_answer = next(
-                (ua for ua in user_answers if str(ua.question_id) == question_id),
-                None
-            )
-
-            if not stored_answer:
-                continue
-
-            # Decrypt and compare
-            if decrypt_and_compare(
-                stored_answer.encrypted_answer,
-                user_answer_text,
-                user.password_hash,  # Using password hash as key material
-                stored_answer.encryption_salt
-            ):
-                correct_answers += 1
-
-        # All answers must be correct
-        if correct_answers == len(user_answers):
+        # Verify all answers (password hash is used as key material)
+        if self._verify_answers(user.password_hash, user_answers, answers):
             self._log_recovery_attempt(user.id, 'password_reset_security', True)
 
             # Generate reset token
@@ -285,6 +292,9 @@ class RecoveryService:
         # Mark token as used
         token_record.used = True
 
+        # Sign out every existing session
+        RefreshTokenService(self.db).revoke_all_for_user(user.id, reason="password_reset")
+
         self.db.commit()
 
         return {
@@ -333,29 +343,7 @@ class RecoveryService:
             )
 
         # Verify all answers
-        correct_answers = 0
-        for answer_input in answers:
-            question_id = answer_input.get('question_id')
-            user_answer_text = answer_input.get('answer')
-
-            stored_answer = next(
-                (ua for ua in user_answers if str(ua.question_id) == question_id),
-                None
-            )
-
-            if not stored_answer:
-                continue
-
-            if decrypt_and_compare(
-                stored_answer.encrypted_answer,
-                user_answer_text,
-                user.password_hash,
-                stored_answer.encryption_salt
-            ):
-                correct_answers += 1
-
-        # All answers must be correct
-        if correct_answers == len(user_answers):
+        if self._verify_answers(user.password_hash, user_answers, answers):
             self._log_recovery_attempt(user.id, 'username_recovery', True)
 
             return {
@@ -0,0 +1,187 @@
+"""
+Refresh Token Service
+Issue, rotate and revoke refresh tokens grouped into session families
+"""
+
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+from fastapi import HTTPException, status
+from redis import RedisError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.security import create_refresh_token, decode_access_token
+from app.core.token_store import get_refresh_token_store
+from app.models.refresh_token import RefreshTokenFamily
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshTokenService:
+    """
+    Service for refresh-token rotation.
+
+    Each login starts a token family. Using a refresh token consumes it and
+    returns a successor in the same family. Presenting an already-used token
+    means it leaked, so the whole family is revoked.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.store = get_refresh_token_store()
+
+    @staticmethod
+    def _lifetime_seconds() -> int:
+        return settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600
+
+    def issue(self, user_id: uuid.UUID) -> str:
+        """
+        Start a new token family for a user and return its first refresh token.
+
+        The family row is added to the session; the caller commits.
+        """
+        family = RefreshTokenFamily(id=uuid.uuid4(), user_id=user_id)
+        self.db.add(family)
+
+        return create_refresh_token({
+            "sub": str(user_id),
+            "fid": str(family.id),
+            "jti": str(uuid.uuid4())
+        })
+
+    def rotate(self, refresh_token: str) -> Tuple[str, str]:
+        """
+        Consume a refresh token and issue its successor.
+
+        Args:
+            refresh_token: Refresh token presented by the client
+
+        Returns:
+            Tuple of (user_id, new_refresh_token)
+
+        Raises:
+            HTTPException: If the token is invalid, revoked or reused
+        """
+        payload = decode_access_token(refresh_token)
+        if not payload or payload.get("type") != "refresh":
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired refresh token"
+            )
+
+        user_id = payload.get("sub")
+        family_id = payload.get("fid")
+        token_id = payload.get("jti")
+        if not (user_id and family_id and token_id):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid refresh token payload"
+            )
+
+        remaining = max(int(payload["exp"] - time.time()), 1)
+
+        try:
+            if self.store.is_revoked(family_id):
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Session has been revoked"
+                )
+
+            if not self.store.claim(token_id, remaining):
+                logger.warning(f"Refresh token reuse detected for family {family_id}")
+                self.revoke_family(family_id, reason="reuse_detected")
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Refresh token has already been used; session revoked"
+                )
+        except (RedisError, SQLAlchemyError) as e:
+            logger.error(f"Refresh token store unavailable: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Session store unavailable, please try again"
+            )
+
+        new_token = create_refresh_token({
+            "sub": user_id,
+            "fid": family_id,
+            "jti": str(uuid.uuid4())
+        })
+
+        return user_id, new_token
+
+    def revoke_token(self, refresh_token: str, reason: str = "logout") -> bool:
+        """
+        Revoke the family of a refresh token (logout).
+
+        Returns:
+            True if a family was revoked, False if the token was not valid
+        """
+        payload = decode_access_token(refresh_token)
+        if not payload or payload.get("type") != "refresh" or not payload.get("fid"):
+            return False
+
+        self.revoke_family(payload["fid"], reason=reason)
+        return True
+
+    def revoke_family(self, family_id: str, reason: str) -> None:
+        """Revoke a token family in the store and persist the revocation"""
+        self.store.revoke(family_id, self._lifetime_seconds())
+
+        self.db.query(RefreshTokenFamily).filter(
+            RefreshTokenFamily.id == family_id,
+            RefreshTokenFamily.revoked_at == None
+        ).update({"revoked_at": datetime.utcnow(), "revoke_reason": reason})
+        self.db.commit()
+
+    def revoke_all_for_user(self, user_id: uuid.UUID, reason: str) -> int:
+        """
+        Revoke every active session of a user (e.g. after a password reset).
+
+        The revocation is committed by the caller.
+
+        Returns:
+            Number of families revoked
+        """
+        families: List[RefreshTokenFamily] = self.db.query(RefreshTokenFamily).filter(
+            RefreshTokenFamily.user_id == user_id,
+            RefreshTokenFamily.revoked_at == None
+        ).all()
+
+        now = datetime.utcnow()
+        for family in families:
+            self.store.revoke(str(family.id), self._lifetime_seconds())
+            family.revoked_at = now
+            family.revoke_reason = reason
+
+        return len(families)
+
+    def warm_store(self) -> int:
+        """
+        Load recent revocations into the store.
+
+        Needed for Redis after it lost its data; harmless otherwise (the
+        database store reads revocations from the families table).
+        Only revocations younger than the refresh-token lifetime can still
+        matter, so older rows are skipped.
+
+        Returns:
+            Number of revocations loaded
+        """
+        lifetime = self._lifetime_seconds()
+        cutoff = datetime.utcnow() - timedelta(seconds=lifetime)
+
+        rows = self.db.query(RefreshTokenFamily.id, RefreshTokenFamily.revoked_at).filter(
+            RefreshTokenFamily.revoked_at > cutoff
+        ).all()
+
+        now = datetime.utcnow()
+        for family_id, revoked_at in rows:
+            ttl = lifetime - int((now - revoked_at).total_seconds())
+            self.store.revoke(str(family_id), ttl)
+
+        return len(rows)
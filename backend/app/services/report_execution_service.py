@@ -0,0 +1,546 @@
+"""
+Report Execution Service
+Run reports as background jobs and cache their results in ReportExecution
+
+A request for a report creates (or reuses) a `ReportExecution` row and returns
+immediately; a small thread pool runs the report with its own database session
+and stores the JSON result on the execution. Clients poll the execution until
+it is completed.
+
+Repeated requests with the same parameters are served from the latest
+completed execution for as long as the report's source data is unchanged.
+Each execution records a fingerprint of its source tables (row counts and
+latest change timestamps; for the append-only audit log only its latest
+entry, an index lookup); a request whose fingerprint matches reuses the
+stored result, and any write to the source data produces a new fingerprint
+and therefore a fresh run.
+
+Executions record the worker that runs them: host, pid and a boot token
+(kernel boot id plus the process start time), so a pid reused by a sibling
+worker after a restart is not mistaken for the original process. At startup
+a worker fails the pending/running executions of dead workers on its host,
+and an in-flight execution found for reuse is checked the same way, so a
+restart never leaves a stale run to be handed out.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import socket
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func, case
+from sqlalchemy.orm import Session, defer
+
+from app.config import settings
+from app.models.audit_log import AuditLog
+from app.models.driver import Driver, DriverLicense
+from app.models.report import Report, ReportExecution
+from app.models.user_organization import UserOrganization
+from app.services.report_service import ReportService
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_date(value: Optional[str]) -> Optional[date]:
+    return date.fromisoformat(value) if value else None
+
+
+# report_type -> runner(ReportService, org_id, parameters) -> report dict
+REPORT_RUNNERS: Dict[str, Callable[[ReportService, str, Dict[str, Any]], dict]] = {
+    "driver_list": lambda service, org_id, params: service.get_driver_list_report(
+        org_id, params.get("status_filter")
+    ),
+    "license_expiry": lambda service, org_id, params: service.get_license_expiry_report(
+        org_id, int(params.get("days_ahead", 90))
+    ),
+    "organization_summary": lambda service, org_id, params: service.get_organization_summary_report(
+        org_id
+    ),
+    "audit_log": lambda service, org_id, params: service.get_audit_log_report(
+        org_id,
+        _parse_date(params.get("start_date")),
+        _parse_date(params.get("end_date")),
+        params.get("action_filter"),
+        int(params.get("limit", 100))
+    ),
+    "user_activity": lambda service, org_id, params: service.get_user_activity_report(
+        org_id,
+        _parse_date(params.get("start_date")),
+        _parse_date(params.get("end_date"))
+    ),
+}
+
+# Source tables each report reads, used for the data fingerprint
+REPORT_SOURCES: Dict[str, List[str]] = {
+    "driver_list": ["drivers", "driver_licenses"],
+    "license_expiry": ["drivers", "driver_licenses"],
+    "organization_summary": ["drivers", "driver_licenses", "user_organizations", "audit_logs"],
+    "audit_log": ["audit_logs"],
+    "user_activity": ["user_organizations", "audit_logs"],
+}
+
+def _boot_token(pid: int) -> Optional[str]:
+    """Kernel boot id and start time of a process, None where /proc is unavailable"""
+    try:
+        with open("/proc/sys/kernel/random/boot_id") as file:
+            boot_id = file.read().strip()
+        with open(f"/proc/{pid}/stat") as file:
+            # Field 22 (starttime); the command name before it may contain spaces
+            start_time = file.read().rsplit(")", 1)[1].split()[19]
+    except (OSError, IndexError):
+        return None
+    return f"{boot_id}:{start_time}"
+
+
+# Worker running this process's executions, recorded on each execution
+WORKER_HOST = socket.gethostname()
+WORKER_BOOT = _boot_token(os.getpid()) or uuid.uuid4().hex
+
+
+def _worker_gone(worker: Optional[Dict[str, Any]]) -> Optional[bool]:
+    """
+    Whether the worker recorded on an execution has exited.
+
+    Returns:
+        True or False for workers of this host; None when it cannot be told
+        (another host, no worker recorded, or no /proc)
+    """
+    if not worker or worker.get("host") != WORKER_HOST or not worker.get("boot"):
+        return None
+    if worker["boot"] == WORKER_BOOT:
+        return False
+
+    token = _boot_token(int(worker.get("pid") or 0))
+    if token is None:
+        # The pid has no /proc entry: gone, unless this host has no /proc at all
+        return True if _boot_token(os.getpid()) else None
+    return token != worker["boot"]
+
+
+# Reports whose output depends on today's date (expiry buckets)
+DATE_SENSITIVE_REPORTS = {"driver_list", "license_expiry", "organization_summary"}
+
+_report_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_report_executor() -> ThreadPoolExecutor:
+    """Get the process-wide report job pool"""
+    global _report_executor
+
+    if _report_executor is None:
+        _report_executor = ThreadPoolExecutor(
+            max_workers=settings.REPORT_WORKERS,
+            thread_name_prefix="report-job"
+        )
+
+    return _report_executor
+
+
+def shutdown_report_executor() -> None:
+    """Stop accepting report jobs and wait for running ones"""
+    global _report_executor
+
+    if _report_executor is not None:
+        _report_executor.shutdown(wait=True, cancel_futures=True)
+        _report_executor = None
+
+
+class ReportExecutionService:
+    """Service for background report execution with result caching"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ------------------------------------------------------------------
+    # Submission
+    # ------------------------------------------------------------------
+
+    def submit(
+        self,
+        org_id: str,
+        user_id: str,
+        report_type: Optional[str] = None,
+        parameters: Optional[Dict[str, Any]] = None,
+        report_id: Optional[str] = None,
+        force: bool = False,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> ReportExecution:
+        """
+        Request a report run.
+
+        Returns the cached execution when an up-to-date one exists, the
+        in-flight execution when the same run is already queued, or a new
+        execution that has been handed to the background pool.
+
+        Args:
+            org_id: Organization ID
+            user_id: Requesting user ID
+            report_type: Standard report type (when report_id is not given)
+            parameters: Report parameters
+            report_id: Saved report to run; its report_config filters are
+                used as default parameters
+            force: Skip the cache and always run
+            metadata: Extra values stored on the execution (e.g. the
+                scheduler's "scheduled_for" and "recipients", who are
+                emailed when the run completes)
+
+        Returns:
+            ReportExecution
+        """
+        report = self._resolve_report(org_id, user_id, report_type, report_id)
+        params = dict((report.report_config or {}).get("filters") or {})
+        params.update(parameters or {})
+        params = jsonable_encoder(params)
+
+        if report.report_type not in REPORT_RUNNERS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Report type '{report.report_type}' cannot be executed"
+            )
+
+        cache_key = self._cache_key(report, org_id, params)
+
+        if not force:
+            existing = self._find_reusable(report.id, cache_key)
+            if existing:
+                return existing
+
+        execution = ReportExecution(
+            id=uuid.uuid4(),
+            report_id=report.id,
+            execution_status='pending',
+            started_at=datetime.utcnow(),
+            executed_by=user_id,
+            execution_parameters={
+                **(metadata or {}),
+                "params": params,
+                "cache_key": cache_key,
+                "worker": {"host": WORKER_HOST, "pid": os.getpid(), "boot": WORKER_BOOT},
+            }
+        )
+        self.db.add(execution)
+        self.db.commit()
+        self.db.refresh(execution)
+
+        get_report_executor().submit(run_execution, str(execution.id), org_id)
+
+        return execution
+
+    def get_execution(self, org_id: str, execution_id: str) -> ReportExecution:
+        """
+        Get an execution belonging to the organization.
+
+        Raises:
+            HTTPException: If the execution does not exist
+        """
+        execution = self.db.query(ReportExecution).join(
+            Report, Report.id == ReportExecution.report_id
+        ).filter(
+            ReportExecution.id == execution_id,
+            Report.organization_id == org_id
+        ).first()
+
+        if not execution:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Report execution not found"
+            )
+
+        return execution
+
+    def get_latest_completed(self, org_id: str, report_id: str) -> ReportExecution:
+        """
+        Get the most recent completed execution of a report
+        (e.g. the precomputed result of a scheduled report).
+
+        Raises:
+            HTTPException: If the report has no completed execution
+        """
+        execution = self.db.query(ReportExecution).join(
+            Report, Report.id == ReportExecution.report_id
+        ).filter(
+            ReportExecution.report_id == report_id,
+            Report.organization_id == org_id,
+            ReportExecution.execution_status == 'completed'
+        ).order_by(ReportExecution.completed_at.desc()).first()
+
+        if not execution:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No completed execution for this report"
+            )
+
+        return execution
+
+    def list_executions(self, org_id: str, report_id: Optional[str] = None, limit: int = 20) -> List[ReportExecution]:
+        """Most recent executions for the organization (without result data)"""
+        query = self.db.query(ReportExecution).options(
+            defer(ReportExecution.result_data)
+        ).join(
+            Report, Report.id == ReportExecution.report_id
+        ).filter(
+            Report.organization_id == org_id
+        )
+
+        if report_id:
+            query = query.filter(ReportExecution.report_id == report_id)
+
+        return query.order_by(ReportExecution.started_at.desc()).limit(limit).all()
+
+    def fail_interrupted(self) -> int:
+        """
+        Mark executions left pending/running by a previous process as failed.
+
+        Called at startup. Executions of this host whose worker has exited
+        (its pid is gone or now belongs to a process with another boot token)
+        are failed at once. Executions from other hosts, or without a
+        recorded worker, are only failed once older than the cache window,
+        since their worker may still be running.
+
+        Returns:
+            Number of executions updated
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.REPORT_CACHE_MAX_AGE_SECONDS)
+
+        in_flight = self.db.query(
+            ReportExecution.id,
+            ReportExecution.started_at,
+            ReportExecution.execution_parameters["worker"].label("worker")
+        ).filter(
+            ReportExecution.execution_status.in_(['pending', 'running'])
+        ).all()
+
+        interrupted = []
+        for execution_id, started_at, worker in in_flight:
+            gone = _worker_gone(worker)
+            if gone or (gone is None and started_at < cutoff):
+                interrupted.append(execution_id)
+
+        return self._fail_executions(interrupted)
+
+    def _fail_executions(self, execution_ids: List[uuid.UUID]) -> int:
+        """Fail executions that are still pending/running and commit"""
+        if not execution_ids:
+            return 0
+
+        count = self.db.query(ReportExecution).filter(
+            ReportExecution.id.in_(execution_ids),
+            ReportExecution.execution_status.in_(['pending', 'running'])
+        ).update({
+            "execution_status": 'failed',
+            "completed_at": datetime.utcnow(),
+            "error_message": "Interrupted by server restart"
+        }, synchronize_session=False)
+        self.db.commit()
+
+        return count
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _resolve_report(
+        self,
+        org_id: str,
+        user_id: str,
+        report_type: Optional[str],
+        report_id: Optional[str]
+    ) -> Report:
+        """Get the saved report, or the organization's standard report of a type"""
+        if report_id:
+            report = self.db.query(Report).filter(
+                Report.id == report_id,
+                Report.organization_id == org_id,
+                Report.is_active == True
+            ).first()
+
+            if not report:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Report not found"
+                )
+            return report
+
+        if not report_type:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Either report_id or report_type is required"
+            )
+
+        # Ad-hoc runs of standard reports hang off one Report row per type
+        report = self.db.query(Report).filter(
+            Report.organization_id == org_id,
+            Report.report_type == report_type,
+            Report.report_config["standard"].astext == "true"
+        ).first()
+
+        if not report:
+            report = Report(
+                id=uuid.uuid4(),
+                organization_id=org_id,
+                report_name=report_type.replace("_", " ").title(),
+                report_type=report_type,
+                report_config={"standard": True},
+                created_by=user_id
+            )
+            self.db.add(report)
+            self.db.flush()
+
+        return report
+
+    def _find_reusable(self, report_id: uuid.UUID, cache_key: str) -> Optional[ReportExecution]:
+        """Latest completed or in-flight execution with the same cache key"""
+        max_age = datetime.utcnow() - timedelta(seconds=settings.REPORT_CACHE_MAX_AGE_SECONDS)
+
+        execution = self.db.query(ReportExecution).filter(
+            ReportExecution.report_id == report_id,
+            ReportExecution.execution_parameters["cache_key"].astext == cache_key,
+            ReportExecution.execution_status.in_(['pending', 'running', 'completed']),
+            ReportExecution.started_at >= max_age
+        ).order_by(ReportExecution.started_at.desc()).first()
+
+        # An in-flight run whose worker has exited will never complete
+        if execution and execution.execution_status != 'completed' and _worker_gone(
+            (execution.execution_parameters or {}).get("worker")
+        ):
+            self._fail_executions([execution.id])
+            return None
+
+        return execution
+
+    def _cache_key(self, report: Report, org_id: str, params: Dict[str, Any]) -> str:
+        """Hash of report, parameters and source-data fingerprint"""
+        key_data = {
+            "report_id": str(report.id),
+            "params": params,
+            "sources": self._source_fingerprint(report.report_type, org_id),
+        }
+        if report.report_type in DATE_SENSITIVE_REPORTS:
+            key_data["today"] = date.today().isoformat()
+
+        encoded = json.dumps(key_data, sort_keys=True, default=str).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _source_fingerprint(self, report_type: str, org_id: str) -> Dict[str, list]:
+        """Row count and latest change per source table, one aggregate query each"""
+        fingerprint = {}
+
+        for source in REPORT_SOURCES.get(report_type, []):
+            if source == "drivers":
+                row = self.db.query(
+                    func.count(Driver.id), func.max(Driver.updated_at)
+                ).filter(Driver.organization_id == org_id).one()
+            elif source == "driver_licenses":
+                row = self.db.query(
+                    func.count(DriverLicense.id), func.max(DriverLicense.updated_at)
+                ).join(
+                    Driver, Driver.id == DriverLicense.driver_id
+                ).filter(Driver.organization_id == org_id).one()
+            elif source == "user_organizations":
+                # No updated_at here; status changes show up in the active count
+                row = self.db.query(
+                    func.count(UserOrganization.id),
+                    func.max(UserOrganization.joined_at),
+                    func.max(UserOrganization.approved_at),
+                    func.count(case((UserOrganization.status == 'active', 1)))
+                ).filter(UserOrganization.organization_id == org_id).one()
+            elif source == "audit_logs":
+                # Append-only: the latest entry changes on every write (idx_audit_logs_org_created)
+                row = self.db.query(
+                    func.max(AuditLog.created_at)
+                ).filter(AuditLog.organization_id == org_id).one()
+            else:
+                continue
+
+            fingerprint[source] = [str(value) for value in row]
+
+        return fingerprint
+
+
+def run_execution(execution_id: str, org_id: str) -> None:
+    """
+    Run a queued execution and store its result.
+
+    Runs on the report pool with its own database session.
+    """
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        execution = db.query(ReportExecution).filter(
+            ReportExecution.id == execution_id
+        ).first()
+        if not execution or execution.execution_status != 'pending':
+            return
+
+        execution.execution_status = 'running'
+        db.commit()
+
+        report_type = execution.report.report_type
+        params = (execution.execution_parameters or {}).get("params") or {}
+
+        try:
+            result = REPORT_RUNNERS[report_type](ReportService(db), org_id, params)
+            result_data = jsonable_encoder(result)
+        except Exception as e:
+            db.rollback()
+            logger.exception(f"Report execution {execution_id} failed")
+            execution.execution_status = 'failed'
+            execution.error_message = e.detail if isinstance(e, HTTPException) else str(e)[:1000]
+            execution.completed_at = datetime.utcnow()
+            db.commit()
+            return
+
+        execution.result_data = result_data
+        execution.row_count = str(_row_count(result_data))
+        execution.execution_status = 'completed'
+        execution.completed_at = datetime.utcnow()
+        db.commit()
+
+        if (execution.execution_parameters or {}).get("recipients"):
+            notify_recipients(execution)
+    except Exception:
+        db.rollback()
+        logger.exception(f"Could not record report execution {execution_id}")
+    finally:
+        db.close()
+
+
+def notify_recipients(execution: ReportExecution) -> int:
+    """
+    Email the execution's recipients that the report is ready.
+
+    Returns:
+        Number of emails queued
+    """
+    from app.services.email_service import EmailService
+
+    report = execution.report
+    recipients = (execution.execution_parameters or {}).get("recipients") or []
+    context = {
+        "report_name": report.report_name,
+        "row_count": execution.row_count or 0,
+        "generated_at": (execution.completed_at or datetime.utcnow()).strftime("%Y-%m-%d %H:%M"),
+        "report_url": f"{settings.FRONTEND_URL.rstrip('/')}/reports/executions/{execution.id}",
+    }
+
+    return EmailService.send_bulk(
+        "scheduled_report_ready",
+        [(email, context) for email in recipients],
+        str(report.organization_id)
+    )
+
+
+def _row_count(result: dict) -> int:
+    """Length of the report's main list, if it has one"""
+    for key in ("drivers", "licenses", "entries", "users", "recent_activity"):
+        if isinstance(result.get(key), list):
+            return len(result[key])
+    return 0
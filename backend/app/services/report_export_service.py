@@ -0,0 +1,316 @@
+"""
+Report Export Service
+Stream reports as CSV, Excel (XLSX) or PDF without building them in memory
+
+Rows are read with `yield_per`, which on PostgreSQL uses a server-side cursor,
+so only one batch of rows is held at a time:
+- CSV is encoded and sent batch by batch as rows arrive
+- XLSX is written by openpyxl in write-only mode (rows go straight to the
+  temporary file) and the finished file is sent in chunks
+- PDF is drawn page by page with reportlab into a temporary file; very long
+  PDFs are capped at REPORT_EXPORT_PDF_MAX_ROWS rows
+
+Exports run with their own database session because the response body is
+produced after the request handler has returned.
+"""
+
+import csv
+import io
+import json
+import tempfile
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple
+
+from app.config import settings
+from app.services.report_service import ReportService
+from app.utils.pdf_text import fit_text
+
+EXPORT_BATCH_SIZE = 1000
+FILE_CHUNK_SIZE = 64 * 1024
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "excel": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "pdf": ("application/pdf", "pdf"),
+}
+
+
+class ExportTable(NamedTuple):
+    """Title, header and lazily produced rows of an export"""
+    title: str
+    columns: List[str]
+    rows: Iterator[list]
+
+
+def _cell(value: Any) -> Any:
+    """Convert a value to something every writer can store"""
+    if value is None:
+        return ""
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return value
+
+
+def _text(value: Any) -> str:
+    value = _cell(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat(sep=" ") if isinstance(value, datetime) else value.isoformat()
+    return str(value)
+
+
+class ReportExportService:
+    """Builds export tables for the standard reports"""
+
+    def __init__(self, db):
+        self.db = db
+        self.reports = ReportService(db)
+
+    def table(self, report_type: str, org_id: str, params: Dict[str, Any]) -> ExportTable:
+        """
+        Get the export table for a report.
+
+        Args:
+            report_type: Standard report type
+            org_id: Organization ID
+            params: Report parameters (same names as the report endpoints)
+
+        Returns:
+            ExportTable whose rows are streamed from the database
+        """
+        builder = getattr(self, f"_{report_type}", None)
+        if builder is None:
+            raise ValueError(f"Report type '{report_type}' cannot be exported")
+        return builder(org_id, params)
+
+    def _driver_list(self, org_id: str, params: Dict[str, Any]) -> ExportTable:
+        today = date.today()
+        query = self.reports.driver_list_query(org_id, today, params.get("status_filter"))
+
+        def rows():
+            for row in query.yield_per(EXPORT_BATCH_SIZE):
+                yield [
+                    row.employee_id, f"{row.first_name} {row.last_name}", row.phone,
+                    row.status, row.join_date, row.license_number, row.license_type,
+                    row.expiry_date,
+                    (row.expiry_date - today).days if row.expiry_date else None,
+                    row.license_status if row.license_number else None,
+                ]
+
+        return ExportTable(
+            "Driver List",
+            ["Employee ID", "Name", "Phone", "Status", "Join Date", "License Number",
+             "License Type", "License Expiry", "Days Until Expiry", "License Status"],
+            rows()
+        )
+
+    def _license_expiry(self, org_id: str, params: Dict[str, Any]) -> ExportTable:
+        today = date.today()
+        cutoff_date = today + timedelta(days=int(params.get("days_ahead") or 90))
+        query = self.reports.license_expiry_query(org_id, today, cutoff_date)
+
+        def rows():
+            for row in query.yield_per(EXPORT_BATCH_SIZE):
+                yield [
+                    row.employee_id, f"{row.first_name} {row.last_name}", row.phone,
+                    row.license_number, row.license_type, row.expiry_date,
+                    (row.expiry_date - today).days, row.license_status,
+                ]
+
+        return ExportTable(
+            "License Expiry",
+            ["Employee ID", "Name", "Phone", "License Number", "License Type",
+             "Expiry Date", "Days Until Expiry", "Status"],
+            rows()
+        )
+
+    def _audit_log(self, org_id: str, params: Dict[str, Any]) -> ExportTable:
+        end_date = params.get("end_date") or date.today()
+        start_date = params.get("start_date") or end_date - timedelta(days=30)
+        query = self.reports.audit_log_query(org_id, start_date, end_date, params.get("action_filter"))
+
+        def rows():
+            for row in query.yield_per(EXPORT_BATCH_SIZE):
+                yield [
+                    row.created_at, row.username or "System", row.action, row.entity_type,
+                    row.entity_id, row.ip_address, row.details,
+                ]
+
+        return ExportTable(
+            f"Audit Log {start_date} to {end_date}",
+            ["Timestamp", "User", "Action", "Entity Type", "Entity ID", "IP Address", "Details"],
+            rows()
+        )
+
+    def _user_activity(self, org_id: str, params: Dict[str, Any]) -> ExportTable:
+        # One row per member; the report itself runs a fixed number of queries
+        report = self.reports.get_user_activity_report(
+            org_id, params.get("start_date"), params.get("end_date")
+        )
+
+        rows = (
+            [user["username"], user["full_name"], user["role"], user["status"],
+             user["last_login"], user["total_actions"], ", ".join(user["recent_actions"])]
+            for user in report["users"]
+        )
+
+        return ExportTable(
+            f"User Activity {report['start_date']} to {report['end_date']}",
+            ["Username", "Name", "Role", "Status", "Last Login", "Total Actions", "Recent Actions"],
+            rows
+        )
+
+    def _organization_summary(self, org_id: str, params: Dict[str, Any]) -> ExportTable:
+        report = self.reports.get_organization_summary_report(org_id)
+
+        rows = (
+            [key.replace("_", " ").title(), value]
+            for key, value in report["stats"].items()
+        )
+
+        return ExportTable("Organization Summary", ["Metric", "Value"], rows)
+
+
+# ============================================================================
+# Writers
+# ============================================================================
+
+def write_csv(table: ExportTable) -> Iterator[bytes]:
+    """Encode rows as CSV, yielding one chunk per batch"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # BOM so Excel opens UTF-8 CSV correctly
+    buffer.write("\ufeff")
+    writer.writerow(table.columns)
+
+    for count, row in enumerate(table.rows, start=1):
+        writer.writerow([_text(value) for value in row])
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue().encode("utf-8")
+
+
+def _read_chunks(file) -> Iterator[bytes]:
+    file.seek(0)
+    while True:
+        chunk = file.read(FILE_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
+def write_xlsx(table: ExportTable) -> Iterator[bytes]:
+    """Write rows with openpyxl's write-only workbook and stream the file"""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=table.title[:31])
+
+    header = []
+    for column in table.columns:
+        cell = WriteOnlyCell(sheet, value=column)
+        cell.font = Font(bold=True)
+        header.append(cell)
+    sheet.append(header)
+
+    for row in table.rows:
+        sheet.append([_cell(value) for value in row])
+
+    with tempfile.TemporaryFile() as file:
+        workbook.save(file)
+        yield from _read_chunks(file)
+
+
+def write_pdf(table: ExportTable, organization_name: str) -> Iterator[bytes]:
+    """Draw rows onto landscape A4 pages with a repeated header"""
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.pdfgen import canvas
+
+    font, font_size, line_height, margin = "Helvetica", 8, 12, 36
+    page_width, page_height = landscape(A4)
+    column_width = (page_width - 2 * margin) / len(table.columns)
+    max_rows = settings.REPORT_EXPORT_PDF_MAX_ROWS
+
+    def fit(value: Any) -> str:
+        return fit_text(_text(value), column_width - 4, font, font_size)
+
+    with tempfile.TemporaryFile() as file:
+        pdf = canvas.Canvas(file, pagesize=landscape(A4))
+        pdf.setTitle(f"{table.title} - {organization_name}")
+        page = 0
+
+        def start_page() -> float:
+            nonlocal page
+            page += 1
+            pdf.setFont(f"{font}-Bold", 12)
+            pdf.drawString(margin, page_height - margin, f"{table.title} - {organization_name}")
+            pdf.setFont(font, 7)
+            pdf.drawRightString(page_width - margin, margin / 2, f"Page {page}")
+            pdf.setFont(f"{font}-Bold", font_size)
+            y = page_height - margin - 2 * line_height
+            for index, column in enumerate(table.columns):
+                pdf.drawString(margin + index * column_width, y, fit(column))
+            pdf.setFont(font, font_size)
+            return y - line_height
+
+        y = start_page()
+        count = 0
+        for row in table.rows:
+            if count >= max_rows:
+                pdf.drawString(margin, y, f"Truncated after {max_rows} rows; export as CSV or Excel for the full report.")
+                break
+            if y < margin:
+                pdf.showPage()
+                y = start_page()
+            for index, value in enumerate(row):
+                pdf.drawString(margin + index * column_width, y, fit(value))
+            y -= line_height
+            count += 1
+
+        pdf.showPage()
+        pdf.save()
+        yield from _read_chunks(file)
+
+
+def stream_export(
+    report_type: str,
+    export_format: str,
+    org_id: str,
+    organization_name: str,
+    params: Dict[str, Any]
+) -> Iterable[bytes]:
+    """
+    Produce an export, opening and closing its own database session.
+
+    Args:
+        report_type: Standard report type
+        export_format: csv, excel or pdf
+        org_id: Organization ID
+        organization_name: Shown in the PDF heading
+        params: Report parameters
+
+    Yields:
+        Chunks of the exported file
+    """
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        table = ReportExportService(db).table(report_type, org_id, params)
+
+        if export_format == "csv":
+            yield from write_csv(table)
+        elif export_format == "excel":
+            yield from write_xlsx(table)
+        else:
+            yield from write_pdf(table, organization_name)
+    finally:
+        db.close()
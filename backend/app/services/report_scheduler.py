@@ -0,0 +1,257 @@
+"""
+Report Scheduler
+Precompute scheduled reports from Report.schedule_config
+
+One thread per process wakes every REPORT_SCHEDULER_INTERVAL_SECONDS, but only
+the worker holding the leader lock fires reports, so a multi-worker deployment
+runs each occurrence once. The lock is a Redis key when REDIS_HOST is set and
+a PostgreSQL advisory lock otherwise.
+
+A report's "time" is when its readers want it (UTC). The run is started
+ahead of that, at an offset inside REPORT_SCHEDULE_WINDOW_MINUTES derived
+from the report id, so reports sharing a delivery time (typically 09:00)
+are spread across the window instead of all starting at once. The result is
+stored as a ReportExecution, and the schedule's recipients are emailed a link
+when it completes.
+
+schedule_config:
+    {
+      "frequency": "daily|weekly|monthly",
+      "day_of_week": 1,      # weekly, 1 = Monday ... 7 = Sunday
+      "day_of_month": 1,     # monthly, clamped to the month's last day
+      "time": "09:00",
+      "recipients": ["manager@example.com"],
+      "parameters": {...}    # optional report parameters
+    }
+"""
+
+import calendar
+import hashlib
+import logging
+import threading
+import uuid
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.leader_lock import create_leader_lock
+from app.models.report import Report, ReportExecution
+
+logger = logging.getLogger(__name__)
+
+LEADER_LOCK_KEY = "report-scheduler:leader"
+LEADER_ADVISORY_LOCK_ID = 0x52505453  # 'RPTS'
+
+
+# ============================================================================
+# Schedule calculation
+# ============================================================================
+
+def _schedule_time(schedule_config: dict) -> time:
+    hour, minute = (schedule_config.get("time") or "00:00").split(":")[:2]
+    return time(int(hour), int(minute))
+
+
+def _occurrence_on(day: date, schedule_config: dict) -> Optional[datetime]:
+    """The occurrence on a given day, or None if the schedule skips that day"""
+    frequency = schedule_config.get("frequency", "daily")
+
+    if frequency == "weekly":
+        if day.isoweekday() != int(schedule_config.get("day_of_week", 1)):
+            return None
+    elif frequency == "monthly":
+        last_day = calendar.monthrange(day.year, day.month)[1]
+        if day.day != min(int(schedule_config.get("day_of_month", 1)), last_day):
+            return None
+    elif frequency != "daily":
+        return None
+
+    return datetime.combine(day, _schedule_time(schedule_config))
+
+
+def next_occurrence(schedule_config: dict, after: datetime) -> Optional[datetime]:
+    """
+    First scheduled delivery time strictly after a moment.
+
+    Args:
+        schedule_config: Report schedule configuration
+        after: Moment to search from (UTC)
+
+    Returns:
+        Next occurrence, or None if the schedule is invalid
+    """
+    try:
+        _schedule_time(schedule_config)
+    except (TypeError, ValueError):
+        return None
+
+    # A monthly schedule always fires within 31 days
+    for offset in range(0, 32):
+        occurrence = _occurrence_on(after.date() + timedelta(days=offset), schedule_config)
+        if occurrence and occurrence > after:
+            return occurrence
+
+    return None
+
+
+def jitter_for(report_id) -> timedelta:
+    """Stable per-report lead time inside the precompute window"""
+    window_seconds = settings.REPORT_SCHEDULE_WINDOW_MINUTES * 60
+    if window_seconds <= 0:
+        return timedelta(0)
+
+    digest = hashlib.sha256(str(report_id).encode()).digest()
+    return timedelta(seconds=int.from_bytes(digest[:4], "big") % window_seconds)
+
+
+# ============================================================================
+# Scheduler
+# ============================================================================
+
+class ReportScheduler:
+    """Background thread that fires due scheduled reports on the leader"""
+
+    def __init__(self):
+        self.lock = create_leader_lock(
+            LEADER_LOCK_KEY,
+            LEADER_ADVISORY_LOCK_ID,
+            settings.REPORT_SCHEDULER_INTERVAL_SECONDS * 3
+        )
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the scheduler thread if it is not running"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="report-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the scheduler thread and give up leadership"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        try:
+            self.lock.release()
+        except Exception:
+            pass
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.lock.acquire():
+                    self.tick()
+            except Exception:
+                logger.exception("Report scheduler tick failed")
+            self._stop.wait(settings.REPORT_SCHEDULER_INTERVAL_SECONDS)
+
+    def tick(self, now: Optional[datetime] = None) -> int:
+        """
+        Fire every scheduled report that is due.
+
+        Args:
+            now: Current time (UTC), for testing
+
+        Returns:
+            Number of executions started
+        """
+        from app.database import SessionLocal
+
+        now = now or datetime.utcnow()
+        db = SessionLocal()
+        try:
+            return fire_due_reports(db, now)
+        finally:
+            db.close()
+
+
+def _last_scheduled_runs(db: Session) -> Dict[uuid.UUID, datetime]:
+    """Latest occurrence already fired, per report, in one grouped query"""
+    scheduled_for = ReportExecution.execution_parameters["scheduled_for"].astext
+
+    rows = db.query(
+        ReportExecution.report_id,
+        func.max(scheduled_for)
+    ).join(
+        Report, Report.id == ReportExecution.report_id
+    ).filter(
+        Report.is_scheduled == True,
+        scheduled_for != None
+    ).group_by(ReportExecution.report_id).all()
+
+    return {report_id: datetime.fromisoformat(value) for report_id, value in rows}
+
+
+def fire_due_reports(db: Session, now: datetime) -> int:
+    """
+    Start executions for scheduled reports whose precompute time has come.
+
+    Occurrences missed by more than the precompute window (e.g. while no
+    worker was running) are skipped rather than replayed.
+
+    Returns:
+        Number of executions started
+    """
+    from app.services.report_execution_service import ReportExecutionService
+
+    reports = db.query(Report).filter(
+        Report.is_active == True,
+        Report.is_scheduled == True,
+        Report.schedule_config != None
+    ).all()
+    if not reports:
+        return 0
+
+    last_runs = _last_scheduled_runs(db)
+    window = timedelta(minutes=settings.REPORT_SCHEDULE_WINDOW_MINUTES)
+    execution_service = ReportExecutionService(db)
+    started = 0
+
+    for report in reports:
+        config = report.schedule_config or {}
+        occurrence = next_occurrence(config, last_runs.get(report.id) or report.created_at)
+        if occurrence and occurrence < now - window:
+            occurrence = next_occurrence(config, now - window)
+
+        if not occurrence or now < occurrence - jitter_for(report.id):
+            continue
+
+        try:
+            execution_service.submit(
+                org_id=str(report.organization_id),
+                user_id=str(report.created_by) if report.created_by else None,
+                report_id=str(report.id),
+                parameters=config.get("parameters"),
+                force=True,
+                metadata={
+                    "trigger": "schedule",
+                    "scheduled_for": occurrence.isoformat(),
+                    "recipients": config.get("recipients") or []
+                }
+            )
+            started += 1
+        except Exception:
+            db.rollback()
+            logger.exception(f"Could not start scheduled report {report.id}")
+
+    if started:
+        logger.info(f"Started {started} scheduled reports")
+    return started
+
+
+_scheduler: Optional[ReportScheduler] = None
+
+
+def get_report_scheduler() -> ReportScheduler:
+    """Get the process-wide report scheduler"""
+    global _scheduler
+
+    if _scheduler is None:
+        _scheduler = ReportScheduler()
+
+    return _scheduler
@@ -4,17 +4,17 @@ Business logic for generating various reports
 """
 
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, case
 from fastapi import HTTPException, status
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date, timedelta
 import uuid
 
-from app.models.driver import Driver
+from app.models.driver import Driver, DriverLicense
 from app.models.user import User
 from app.models.user_organization import UserOrganization
 from app.models.company import Organization
-from app.models.audit_log import AuditLog
+from app.models.audit_log import AuditLog, AUDIT_SEARCH_CONFIG
 from app.models.role import Role
 
 
@@ -38,6 +38,108 @@ class ReportService:
 
         return org
 
+    @staticmethod
+    def _license_status(today: date, cutoff_date: Optional[date] = None):
+        """
+        SQL CASE bucketing a license as expired / expiring_soon / valid.
+
+        With cutoff_date, valid licenses expiring before it are reported as
+        expiring_later.
+        """
+        whens = [
+            (DriverLicense.expiry_date < today, 'expired'),
+            (DriverLicense.expiry_date <= today + timedelta(days=30), 'expiring_soon'),
+        ]
+        if cutoff_date:
+            whens.append((DriverLicense.expiry_date <= cutoff_date, 'expiring_later'))
+
+        return case(*whens, else_='valid')
+
+    def driver_list_query(
+        self,
+        org_id: str,
+        today: date,
+        status_filter: Optional[str] = None
+    ):
+        """
+        Column-only driver rows joined to their license, sorted by name.
+
+        Shared by the driver list report and its exports; no ORM objects
+        are loaded.
+        """
+        query = self.db.query(
+            Driver.id,
+            Driver.employee_id,
+            Driver.first_name,
+            Driver.last_name,
+            Driver.phone,
+            Driver.status,
+            Driver.join_date,
+            DriverLicense.license_number,
+            DriverLicense.license_type,
+            DriverLicense.expiry_date,
+            self._license_status(today).label('license_status')
+        ).outerjoin(
+            DriverLicense, DriverLicense.driver_id == Driver.id
+        ).filter(
+            Driver.organization_id == org_id
+        )
+
+        if status_filter:
+            query = query.filter(Driver.status == status_filter)
+
+        return query.order_by(Driver.first_name, Driver.last_name)
+
+    def license_expiry_query(self, org_id: str, today: date, cutoff_date: date):
+        """Active drivers with a license, bucketed and sorted by expiry in SQL"""
+        return self.db.query(
+            Driver.id,
+            Driver.employee_id,
+            Driver.first_name,
+            Driver.last_name,
+            Driver.phone,
+            DriverLicense.license_number,
+            DriverLicense.license_type,
+            DriverLicense.expiry_date,
+            self._license_status(today, cutoff_date).label('license_status')
+        ).join(
+            DriverLicense, DriverLicense.driver_id == Driver.id
+        ).filter(
+            Driver.organization_id == org_id,
+            Driver.status == 'active'
+        ).order_by(DriverLicense.expiry_date)
+
+    def audit_log_query(
+        self,
+        org_id: str,
+        start_date: date,
+        end_date: date,
+        action_filter: Optional[str] = None
+    ):
+        """Audit log rows with the acting username, newest first"""
+        query = self.db.query(
+            AuditLog.id,
+            AuditLog.created_at,
+            AuditLog.user_id,
+            User.username,
+            AuditLog.action,
+            AuditLog.entity_type,
+            AuditLog.entity_id,
+            AuditLog.details,
+            AuditLog.ip_address
+        ).outerjoin(
+            User, User.id == AuditLog.user_id
+        ).filter(
+            AuditLog.organization_id == org_id,
+            AuditLog.created_at >= start_date,
+            AuditLog.created_at < end_date + timedelta(days=1)
+        )
+
+        if action_filter:
+            query = query.filter(AuditLog.action == action_filter)
+
+        return query.order_by(AuditLog.created_at.desc())
+
     def get_driver_list_report(
         self,
         org_id: str,
@@ -54,50 +156,33 @@ class ReportService:
             Driver list report data
         """
         org = self._get_organization(org_id)
+        today = date.today()
 
-        # Query drivers
-        query = self.db.query(Driver).filter(
-            Driver.organization_id == org_id
-        )
-
-        if status_filter:
-            query = query.filter(Driver.status == status_filter)
-
-        drivers = query.order_by(Driver.full_name).all()
-
-        # Calculate statistics
-        total_drivers = len(drivers)
-        active_drivers = sum(1 for d in drivers if d.status == 'active')
-        inactive_drivers = sum(1 for d in drivers if d.status != 'active')
+        rows = self.driver_list_query(org_id, today, status_filter).all()
 
         # Format driver data
         driver_list = []
-        today = date.today()
+        active_drivers = 0
+
+        for row in rows:
+            if row.status == 'active':
+                active_drivers += 1
 
-        for driver in drivers:
-            license = driver.license
-            if license:
-                days_until_expiry = (license.expiry_date - today).days
-                is_expired = license.expiry_date < today
-                is_expiring_soon = 0 < days_until_expiry <= 30
-            else:
-                days_until_expiry = None
-                is_expired = False
-                is_expiring_soon = False
+            has_license = row.license_number is not None
 
             driver_list.append({
-                "driver_id": str(driver.id),
-                "employee_id": driver.employee_id,
-                "full_name": driver.full_name,
-                "phone": driver.phone,
-                "status": driver.status,
-                "license_number": license.license_number if license else None,
-                "license_type": license.license_type if license else None,
-                "license_expiry": license.expiry_date if license else None,
-                "join_date": driver.join_date,
-                "days_until_expiry": days_until_expiry,
-                "is_license_expired": is_expired,
-                "is_license_expiring_soon": is_expiring_soon
+                "driver_id": str(row.id),
+                "employee_id": row.employee_id,
+                "full_name": f"{row.first_name} {row.last_name}",
+                "phone": row.phone,
+                "status": row.status,
+                "license_number": row.license_number,
+                "license_type": row.license_type,
+                "license_expiry": row.expiry_date,
+                "join_date": row.join_date,
+                "days_until_expiry": (row.expiry_date - today).days if has_license else None,
+                "is_license_expired": has_license and row.license_status == 'expired',
+                "is_license_expiring_soon": has_license and row.license_status == 'expiring_soon'
             })
 
         return {
@@ -106,9 +191,9 @@ class ReportService:
             "organization_id": str(org_id),
             "organization_name": org.company_name,
             "generated_at": datetime.utcnow(),
-            "total_drivers": total_drivers,
+            "total_drivers": len(driver_list),
             "active_drivers": active_drivers,
-            "inactive_drivers": inactive_drivers,
+            "inactive_drivers": len(driver_list) - active_drivers,
             "drivers": driver_list
         }
 
@@ -129,53 +214,28 @@ class ReportService:
         """
         org = self._get_organization(org_id)
 
-        # Query active drivers with licenses
-        drivers = self.db.query(Driver).filter(
-            Driver.organization_id == org_id,
-            Driver.status == 'active'
-        ).all()
-
         today = date.today()
         cutoff_date = today + timedelta(days=days_ahead)
 
-        expired_licenses = []
-        expiring_soon_licenses = []
-        valid_licenses = []
+        rows = self.license_expiry_query(org_id, today, cutoff_date).all()
 
-        for driver in drivers:
-            license = driver.license
-            if not license:
-                continue
+        counts = {"expired": 0, "expiring_soon": 0}
+        licenses = []
+
+        for row in rows:
+            counts[row.license_status] = counts.get(row.license_status, 0) + 1
 
-            days_until_expiry = (license.expiry_date - today).days
-
-            license_item = {
-                "driver_id": str(driver.id),
-                "employee_id": driver.employee_id,
-                "full_name": driver.full_name,
-                "phone": driver.phone,
-                "license_number": license.license_number,
-                "license_type": license.license_type,
-                "expiry_date": license.expiry_date,
-                "days_until_expiry": days_until_expiry
-            }
-
-            if license.expiry_date < today:
-                license_item["status"] = "expired"
-                expired_licenses.append(license_item)
-            elif 0 < days_until_expiry <= 30:
-                license_item["status"] = "expiring_soon"
-                expiring_soon_licenses.append(license_item)
-            elif license.expiry_date <= cutoff_date:
-                license_item["status"] = "expiring_later"
-                valid_licenses.append(license_item)
-            else:
-                license_item["status"] = "valid"
-                valid_licenses.append(license_item)
-
-        # Combine and sort by expiry date
-        all_licenses = expired_licenses + expiring_soon_licenses + valid_licenses
-        all_licenses.sort(key=lambda x: x['expiry_date'])
+            licenses.append({
+                "driver_id": str(row.id),
+                "employee_id": row.employee_id,
+                "full_name": f"{row.first_name} {row.last_name}",
+                "phone": row.phone,
+                "license_number": row.license_number,
+                "license_type": row.license_type,
+                "expiry_date": row.expiry_date,
+                "days_until_expiry": (row.expiry_date - today).days,
+                "status": row.license_status
+            })
 
         return {
             "success": True,
@@ -183,10 +243,10 @@ class ReportService:
             "organization_id": str(org_id),
             "organization_name": org.company_name,
             "generated_at": datetime.utcnow(),
-            "expired_count": len(expired_licenses),
-            "expiring_soon_count": len(expiring_soon_licenses),
-            "valid_count": len(valid_licenses),
-            "licenses": all_licenses
+            "expired_count": counts["expired"],
+            "expiring_soon_count": counts["expiring_soon"],
+            "valid_count": len(licenses) - counts["expired"] - counts["expiring_soon"],
+            "licenses": licenses
         }
 
     def get_organization_summary_report(self, org_id: str) -> dict:
@@ -223,34 +283,35 @@ class ReportService:
         user_counts = {stat.status: stat.count for stat in user_stats}
         total_users = sum(user_counts.values())
 
-        # License expiry stats
-        today = date.today()
-        thirty_days = today + timedelta(days=30)
-
-        active_drivers = self.db.query(Driver).filter(
+        # License expiry stats, counted in SQL
+        license_status = self._license_status(date.today())
+        license_stats = self.db.query(
+            func.count(case((license_status == 'expired', 1))).label('expired'),
+            func.count(case((license_status == 'expiring_soon', 1))).label('expiring_soon')
+        ).select_from(DriverLicense).join(
+            Driver, Driver.id == DriverLicense.driver_id
+        ).filter(
             Driver.organization_id == org_id,
             Driver.status == 'active'
-        ).all()
-
-        licenses_expiring_soon = 0
-        expired_licenses = 0
+        ).one()
 
-        for driver in active_drivers:
-            if driver.license:
-                if driver.license.expiry_date < today:
-                    expired_licenses += 1
-                elif driver.license.expiry_date <= thirty_days:
-                    licenses_expiring_soon += 1
+        licenses_expiring_soon = license_stats.expiring_soon
+        expired_licenses = license_stats.expired
 
         # Recent activity (last 10 audit logs)
-        recent_logs = self.db.query(AuditLog).filter(
+        recent_logs = self.db.query(
+            AuditLog.created_at,
+            AuditLog.action,
+            AuditLog.entity_type,
+            AuditLog.details
+        ).filter(
             AuditLog.organization_id == org_id
-        ).order_by(AuditLog.timestamp.desc()).limit(10).all()
+        ).order_by(AuditLog.created_at.desc()).limit(10).all()
 
         recent_activity = []
         for log in recent_logs:
             recent_activity.append({
-                "timestamp": log.timestamp.isoformat(),
+                "timestamp": log.created_at.isoformat(),
                 "action": log.action,
                 "entity_type": log.entity_type,
                 "details": log.details
@@ -293,7 +354,7 @@ class ReportService:
         Args:
             org_id: Organization ID
             start_date: Start date for logs
-            end_date: End date for logs
+            end_date: End date for logs (inclusive)
             action_filter: Filter by action type
             limit: Maximum number of entries
 
@@ -308,33 +369,21 @@ class ReportService:
         if not start_date:
             start_date = end_date - timedelta(days=30)
 
-        # Query audit logs
-        query = self.db.query(AuditLog).options(
-            joinedload(AuditLog.user)
-        ).filter(
-            AuditLog.organization_id == org_id,
-            AuditLog.timestamp >= start_date,
-            AuditLog.timestamp <= end_date
-        )
-
-        if action_filter:
-            query = query.filter(AuditLog.action == action_filter)
-
-        logs = query.order_by(AuditLog.timestamp.desc()).limit(limit).all()
+        logs = self.audit_log_query(org_id, start_date, end_date, action_filter).limit(limit).all()
 
         # Format audit log entries
         entries = []
         for log in logs:
             entries.append({
                 "id": str(log.id),
-                "timestamp": log.timestamp,
+                "timestamp": log.created_at,
                 "user_id": str(log.user_id) if log.user_id else None,
-                "username": log.user.username if log.user else "System",
+                "username": log.username or "System",
                 "action": log.action,
                 "entity_type": log.entity_type,
                 "entity_id": str(log.entity_id) if log.entity_id else None,
                 "details": log.details,
-                "ip_address": None  # Could be added if IP tracking implemented
+                "ip_address": log.ip_address
             })
 
         return {
@@ -349,6 +398,115 @@ class ReportService:
             "entries": entries
         }
 
+    def search_audit_log(
+        self,
+        org_id: str,
+        q: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        action_filter: Optional[str] = None,
+        entity_type: Optional[str] = None,
+        sort: str = "relevance",
+        page: int = 1,
+        page_size: int = 50
+    ) -> dict:
+        """
+        Full-text search over audit log entries.
+
+        Matches `q` (web search syntax: quoted phrases, OR, -term) against the
+        generated search_vector using its GIN index. The date range defaults to
+        the last 90 days so only those monthly partitions are scanned. One extra
+        row is fetched to tell whether another page exists instead of counting
+        every match.
+
+        Args:
+            org_id: Organization ID
+            q: Search query
+            start_date: Start date for logs
+            end_date: End date for logs (inclusive)
+            action_filter: Filter by action type
+            entity_type: Filter by entity type
+            sort: "relevance" (rank, then newest) or "recent" (newest first)
+            page: Page number (1-based)
+            page_size: Entries per page
+
+        Returns:
+            Page of matching entries with their rank
+        """
+        if not q.strip():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Search query cannot be empty"
+            )
+
+        if not end_date:
+            end_date = date.today()
+        if not start_date:
+            start_date = end_date - timedelta(days=90)
+
+        ts_query = func.websearch_to_tsquery(AUDIT_SEARCH_CONFIG, q)
+        rank = func.ts_rank_cd(AuditLog.search_vector, ts_query).label("rank")
+
+        query = self.db.query(
+            AuditLog.id,
+            AuditLog.created_at,
+            AuditLog.user_id,
+            User.username,
+            AuditLog.action,
+            AuditLog.entity_type,
+            AuditLog.entity_id,
+            AuditLog.details,
+            AuditLog.ip_address,
+            rank
+        ).outerjoin(
+            User, User.id == AuditLog.user_id
+        ).filter(
+            AuditLog.organization_id == org_id,
+            AuditLog.created_at >= start_date,
+            AuditLog.created_at < end_date + timedelta(days=1),
+            AuditLog.search_vector.op("@@")(ts_query)
+        )
+
+        if action_filter:
+            query = query.filter(AuditLog.action == action_filter)
+        if entity_type:
+            query = query.filter(AuditLog.entity_type == entity_type)
+
+        if sort == "recent":
+            query = query.order_by(AuditLog.created_at.desc())
+        else:
+            query = query.order_by(rank.desc(), AuditLog.created_at.desc())
+
+        rows = query.offset((page - 1) * page_size).limit(page_size + 1).all()
+        has_more = len(rows) > page_size
+
+        entries = []
+        for log in rows[:page_size]:
+            entries.append({
+                "id": str(log.id),
+                "timestamp": log.created_at,
+                "user_id": str(log.user_id) if log.user_id else None,
+                "username": log.username or "System",
+                "action": log.action,
+                "entity_type": log.entity_type,
+                "entity_id": str(log.entity_id) if log.entity_id else None,
+                "details": log.details,
+                "ip_address": log.ip_address,
+                "rank": float(log.rank)
+            })
+
+        return {
+            "success": True,
+            "query": q,
+            "start_date": start_date,
+            "end_date": end_date,
+            "sort": sort,
+            "page": page,
+            "page_size": page_size,
+            "has_more": has_more,
+            "entries": entries
+        }
+
     def get_user_activity_report(
         self,
         org_id: str,
@@ -361,7 +519,7 @@ class ReportService:
         Args:
             org_id: Organization ID
             start_date: Start date for activity
-            end_date: End date for activity
+            end_date: End date for activity (inclusive)
 
         Returns:
             User activity report data
@@ -382,6 +540,42 @@ class ReportService:
             UserOrganization.organization_id == org_id
         ).all()
 
+        activity_filter = and_(
+            AuditLog.organization_id == org_id,
+            AuditLog.user_id != None,
+            AuditLog.created_at >= start_date,
+            AuditLog.created_at < end_date + timedelta(days=1)
+        )
+
+        # Action counts for every user in one grouped query
+        action_counts = dict(
+            self.db.query(
+                AuditLog.user_id,
+                func.count(AuditLog.id)
+            ).filter(activity_filter).group_by(AuditLog.user_id).all()
+        )
+
+        # Last 5 actions per user, ranked in SQL instead of one query per user
+        ranked_actions = self.db.query(
+            AuditLog.user_id.label('user_id'),
+            AuditLog.action.label('action'),
+            func.row_number().over(
+                partition_by=AuditLog.user_id,
+                order_by=AuditLog.created_at.desc()
+            ).label('rank')
+        ).filter(activity_filter).subquery()
+
+        recent_rows = self.db.query(
+            ranked_actions.c.user_id,
+            ranked_actions.c.action
+        ).filter(
+            ranked_actions.c.rank <= 5
+        ).order_by(ranked_actions.c.user_id, ranked_actions.c.rank).all()
+
+        recent_actions_by_user: Dict[uuid.UUID, List[str]] = {}
+        for user_id, action in recent_rows:
+            recent_actions_by_user.setdefault(user_id, []).append(action)
+
         users_data = []
         active_users_count = 0
 
@@ -390,24 +584,8 @@ class ReportService:
                 continue
 
             user = user_org.user
-
-            # Count actions in date range
-            action_count = self.db.query(func.count(AuditLog.id)).filter(
-                AuditLog.user_id == user.id,
-                AuditLog.organization_id == org_id,
-                AuditLog.timestamp >= start_date,
-                AuditLog.timestamp <= end_date
-            ).scalar()
-
-            # Get recent actions
-            recent_actions_query = self.db.query(AuditLog.action).filter(
-                AuditLog.user_id == user.id,
-                AuditLog.organization_id == org_id,
-                AuditLog.timestamp >= start_date,
-                AuditLog.timestamp <= end_date
-            ).order_by(AuditLog.timestamp.desc()).limit(5).all()
-
-            recent_actions = [action[0] for action in recent_actions_query]
+            action_count = action_counts.get(user.id, 0)
+            recent_actions = recent_actions_by_user.get(user.id, [])
 
             if user_org.status == 'active':
                 active_users_count += 1
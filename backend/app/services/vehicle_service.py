@@ -13,6 +13,7 @@ from app.models.vehicle import Vehicle, VehicleDocument
 from app.models.driver import Driver
 from app.models.company import Organization
 from app.models.audit_log import AuditLog
+from app.services.kpi_service import record_kpi_change
 from app.schemas.vehicle import (
     VehicleCreateRequest,
     VehicleUpdateRequest,
@@ -136,6 +137,8 @@ class VehicleService:
         self.db.add(audit_log)
         self.db.commit()
 
+        record_kpi_change(org_id, "vehicles")
+
         return {
             "success": True,
             "message": "Vehicle created successfully",
@@ -360,6 +363,8 @@ class VehicleService:
             self.db.add(audit_log)
             self.db.commit()
 
+        record_kpi_change(org_id, "vehicles")
+
         return {
             "success": True,
             "message": "Vehicle updated successfully",
@@ -410,6 +415,8 @@ class VehicleService:
         self.db.add(audit_log)
         self.db.commit()
 
+        record_kpi_change(org_id, "vehicles")
+
         return {
             "success": True,
             "message": "Vehicle decommissioned successfully"
@@ -523,6 +523,8 @@ AUDIT_ACTION_EXPENSE_APPROVED = "expense_approved"
 AUDIT_ACTION_EXPENSE_REJECTED = "expense_rejected"
 AUDIT_ACTION_EXPENSE_PAID = "expense_paid"
 AUDIT_ACTION_EXPENSE_ATTACHMENT_UPLOADED = "expense_attachment_uploaded"
+AUDIT_ACTION_EXPENSE_ATTACHMENT_DELETED = "expense_attachment_deleted"
+AUDIT_ACTION_EXPENSE_IMPORTED = "expense_imported"
 AUDIT_ACTION_VENDOR_CREATED = "vendor_created"
 AUDIT_ACTION_VENDOR_UPDATED = "vendor_updated"
 AUDIT_ACTION_INVOICE_CREATED = "invoice_created"
@@ -530,10 +532,12 @@ AUDIT_ACTION_INVOICE_UPDATED = "invoice_updated"
 AUDIT_ACTION_INVOICE_SENT = "invoice_sent"
 AUDIT_ACTION_INVOICE_PAYMENT_RECORDED = "invoice_payment_recorded"
 AUDIT_ACTION_INVOICE_CANCELLED = "invoice_cancelled"
+AUDIT_ACTION_INVOICE_OVERDUE = "invoice_overdue"
 AUDIT_ACTION_PAYMENT_CREATED = "payment_created"
 AUDIT_ACTION_PAYMENT_UPDATED = "payment_updated"
 AUDIT_ACTION_PAYMENT_DELETED = "payment_deleted"
 AUDIT_ACTION_PAYMENT_RECORDED = "payment_recorded"
+AUDIT_ACTION_PAYMENTS_RECONCILED = "payments_reconciled"
 AUDIT_ACTION_BUDGET_CREATED = "budget_created"
 AUDIT_ACTION_BUDGET_UPDATED = "budget_updated"
 AUDIT_ACTION_BUDGET_ALERT = "budget_alert"
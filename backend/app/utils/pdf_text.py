@@ -0,0 +1,100 @@
+"""
+PDF Text Utilities
+Fit and wrap text to a width in reportlab fonts in linear time
+
+Widths are summed glyph by glyph, so the cut point of a string is found in one
+pass instead of measuring the whole string again after every removed character.
+Text longer than the most characters that could fit (width divided by the
+font's narrowest glyph) is cut to that budget first, so a cell costs at most a
+few hundred glyph lookups however long its value is.
+"""
+
+from functools import lru_cache
+from typing import List
+
+ELLIPSIS = "…"
+
+
+@lru_cache(maxsize=None)
+def _min_glyph_width(font: str, font_size: float) -> float:
+    from reportlab.pdfbase.pdfmetrics import getFont
+
+    widths = [w for w in getattr(getFont(font), "widths", []) if w > 0]
+    return (min(widths) if widths else 100) * font_size / 1000
+
+
+@lru_cache(maxsize=4096)
+def _glyph_width(char: str, font: str, font_size: float) -> float:
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+
+    return stringWidth(char, font, font_size)
+
+
+def _char_budget(width: float, font: str, font_size: float) -> int:
+    return max(int(width / _min_glyph_width(font, font_size)) + 1, 0)
+
+
+def _fitting_length(text: str, width: float, font: str, font_size: float) -> int:
+    """Number of leading characters of text whose width is within width"""
+    used = 0.0
+    for index, char in enumerate(text):
+        used += _glyph_width(char, font, font_size)
+        if used > width:
+            return index
+    return len(text)
+
+
+def fit_text(text: str, width: float, font: str, font_size: float) -> str:
+    """
+    Cut text to one line of the given width, ending it with an ellipsis if cut.
+
+    Args:
+        text: Text to draw; newlines are drawn as spaces
+        width: Available width in points
+        font: reportlab font name
+        font_size: Font size in points
+
+    Returns:
+        The whole text if it fits, otherwise the longest prefix that fits
+        together with the ellipsis (empty if not even that fits)
+    """
+    text = (text or "").replace("\n", " ")[:_char_budget(width, font, font_size)]
+    if _fitting_length(text, width, font, font_size) == len(text):
+        return text
+
+    room = width - _glyph_width(ELLIPSIS, font, font_size)
+    if room < 0:
+        return ""
+    return text[:_fitting_length(text, room, font, font_size)] + ELLIPSIS
+
+
+def wrap_text(text: str, width: float, font: str, font_size: float) -> List[str]:
+    """
+    Wrap text into lines of the given width, breaking at spaces where possible.
+
+    Args:
+        text: Text to draw; each of its lines is wrapped separately
+        width: Available width in points
+        font: reportlab font name
+        font_size: Font size in points
+
+    Returns:
+        Lines to draw, in order (blank input lines are kept as "")
+    """
+    lines = []
+    for paragraph in (text or "").splitlines():
+        paragraph = paragraph.rstrip()
+        if not paragraph:
+            lines.append("")
+            continue
+        while paragraph:
+            length = _fitting_length(paragraph, width, font, font_size)
+            if length >= len(paragraph):
+                lines.append(paragraph)
+                break
+            # Break at the last space that fits; a single word wider than the line is split
+            space = paragraph.rfind(" ", 0, length + 1)
+            cut = space if space > 0 else max(length, 1)
+            lines.append(paragraph[:cut].rstrip())
+            paragraph = paragraph[cut:].lstrip()
+    return lines
@@ -4,5 +4,7 @@
 mkdir -p /home/RR4/backend/uploads/vehicles
 mkdir -p /home/RR4/backend/uploads/logos
 chmod -R 777 /home/RR4/backend/uploads
+mkdir -p /home/RR4/backend/storage
+chmod -R 777 /home/RR4/backend/storage
 
 echo "✅ Uploads directory permissions fixed."
@@ -0,0 +1,68 @@
+"""
+Test fixtures
+
+Service tests run against an in-memory SQLite database holding copies of the
+tables they need. PostgreSQL-only parts of those tables (regex CHECK
+constraints, GIN/BRIN/partial indexes, generated tsvector columns) are left
+out of the copies; JSONB and TSVECTOR columns are stored as JSON and TEXT.
+"""
+
+from typing import List
+
+import pytest
+from sqlalchemy import CheckConstraint, MetaData, create_engine
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.main  # noqa: F401  (imports every model so the mappers configure)
+from app.database import Base
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+@compiles(TSVECTOR, "sqlite")
+def _tsvector_sqlite(type_, compiler, **kw):
+    return "TEXT"
+
+
+def _sqlite_metadata(table_names: List[str]) -> MetaData:
+    """Copies of the named tables without their PostgreSQL-only parts"""
+    metadata = MetaData()
+    for name in table_names:
+        table = Base.metadata.tables[name].to_metadata(metadata)
+        for constraint in [c for c in table.constraints if isinstance(c, CheckConstraint)]:
+            table.constraints.discard(constraint)
+        for index in [i for i in table.indexes if i.dialect_kwargs]:
+            table.indexes.discard(index)
+        for column in table.columns:
+            if column.computed is not None:
+                column.computed = column.server_default = None
+    return metadata
+
+
+@pytest.fixture
+def make_db():
+    """Factory for a session on a fresh SQLite database with the given tables"""
+    sessions = []
+
+    def factory(*table_names: str) -> Session:
+        engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool
+        )
+        _sqlite_metadata(list(table_names)).create_all(engine)
+        session = sessionmaker(bind=engine, autoflush=False)()
+        sessions.append(session)
+        return session
+
+    yield factory
+
+    for session in sessions:
+        session.close()
+        session.get_bind().dispose()
@@ -0,0 +1,67 @@
+"""Tests for BudgetForecastService"""
+
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from app.models.budget import Budget
+from app.models.financial_rollup import ExpenseDailyRollup
+from app.services.budget_forecast_service import BudgetForecastService
+
+TABLES = ("organizations", "users", "budgets", "expense_daily_rollups")
+TODAY = date(2026, 10, 19)
+
+
+def _add_budget(db, org_id, allocated, spent="0", start=date(2026, 10, 1), end=date(2026, 10, 31)) -> Budget:
+    budget = Budget(
+        id=uuid.uuid4(),
+        organization_id=org_id,
+        name=f"Fuel {start:%b}",
+        category="fuel",
+        period="monthly",
+        start_date=start,
+        end_date=end,
+        allocated_amount=Decimal(allocated),
+        spent_amount=Decimal(spent),
+        remaining_amount=Decimal(allocated) - Decimal(spent),
+    )
+    db.add(budget)
+    return budget
+
+
+def _forecast(db, org_id):
+    result = BudgetForecastService(db).forecast_budgets(org_id, active_only=False, today=TODAY)
+    return {f["name"]: f for f in result["forecasts"]}
+
+
+def test_zero_allocation_without_spend_is_not_exhausted(make_db):
+    db = make_db(*TABLES)
+    org_id = uuid.uuid4()
+    _add_budget(db, org_id, "0", start=date(2026, 11, 1), end=date(2026, 11, 30))
+    _add_budget(db, org_id, "0")
+    db.commit()
+
+    forecasts = _forecast(db, org_id)
+
+    assert forecasts["Fuel Nov"]["exhaustion_date"] is None
+    assert forecasts["Fuel Oct"]["exhaustion_date"] is None
+
+
+def test_exhaustion_date_is_first_day_spend_reaches_allocation(make_db):
+    db = make_db(*TABLES)
+    org_id = uuid.uuid4()
+    _add_budget(db, org_id, "300", spent="300")
+    for day, amount in ((date(2026, 10, 2), "100"), (date(2026, 10, 5), "200")):
+        db.add(ExpenseDailyRollup(
+            organization_id=org_id,
+            day=day,
+            category="fuel",
+            status="approved",
+            total_amount=Decimal(amount),
+            row_count=1,
+        ))
+    db.commit()
+
+    forecasts = _forecast(db, org_id)
+
+    assert forecasts["Fuel Oct"]["exhaustion_date"] == date(2026, 10, 5)
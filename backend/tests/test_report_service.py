@@ -0,0 +1,113 @@
+"""Tests for ReportService"""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.models.audit_log import AuditLog
+from app.models.company import Organization
+from app.models.role import Role
+from app.models.user import User
+from app.models.user_organization import UserOrganization
+from app.services.report_service import ReportService
+
+TABLES = ("organizations", "users", "roles", "user_organizations", "audit_logs")
+
+
+def _add_organization(db, role: Role, users: int, actions_per_user: int) -> Organization:
+    org = Organization(
+        id=uuid.uuid4(),
+        company_name=f"Org {users}",
+        business_type="transport",
+        business_email="org@example.com",
+        business_phone="9999999999",
+        address="1 Road",
+        city="Pune",
+        state="MH",
+        pincode="411001",
+    )
+    db.add(org)
+
+    now = datetime.utcnow()
+    for index in range(users):
+        user = User(
+            id=uuid.uuid4(),
+            full_name=f"User {index}",
+            username=f"user_{org.id.hex[:8]}_{index}",
+            phone="9999999999",
+            password_hash="x",
+            auth_method="email",
+        )
+        db.add(user)
+        db.add(UserOrganization(
+            user_id=user.id,
+            organization_id=org.id,
+            role_id=role.id,
+            status="active",
+        ))
+        for action in range(actions_per_user):
+            db.add(AuditLog(
+                id=uuid.uuid4(),
+                user_id=user.id,
+                organization_id=org.id,
+                action=f"action_{action}",
+                created_at=now - timedelta(minutes=action),
+            ))
+
+    db.commit()
+    return org
+
+
+def _count_statements(db, run) -> int:
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return len(statements)
+
+
+@pytest.fixture
+def db(make_db):
+    return make_db(*TABLES)
+
+
+@pytest.fixture
+def role(db):
+    role = Role(id=uuid.uuid4(), role_name="Member", role_key="member")
+    db.add(role)
+    db.commit()
+    return role
+
+
+def test_user_activity_report_query_count_does_not_grow_with_org_size(db, role):
+    small_id = _add_organization(db, role, users=2, actions_per_user=3).id
+    large_id = _add_organization(db, role, users=25, actions_per_user=12).id
+    service = ReportService(db)
+
+    # Each run starts with an empty identity map
+    db.expunge_all()
+    small_count = _count_statements(db, lambda: service.get_user_activity_report(small_id))
+    db.expunge_all()
+    large_count = _count_statements(db, lambda: service.get_user_activity_report(large_id))
+
+    assert small_count == large_count
+
+
+def test_user_activity_report_includes_todays_activity(db, role):
+    org = _add_organization(db, role, users=3, actions_per_user=7)
+
+    report = ReportService(db).get_user_activity_report(org.id)
+
+    assert report["total_users"] == 3
+    for user in report["users"]:
+        assert user["total_actions"] == 7
+        assert user["recent_actions"] == [f"action_{index}" for index in range(5)]